@@ -1,6 +1,7 @@
 """
 Mia Agent 交互中枢 v3.0 — 记忆共鸣与动态人格
 POST /api/mia/interact - 请求 Mia 的反馈（注入记忆 + 情绪）
+GET  /api/mia/search   - 全文检索历史消息
 
 流程:
   1. 获取 HP → 情绪
@@ -14,9 +15,11 @@ Author: Femo
 Date: 2026-02-18
 """
 
-from fastapi import APIRouter
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
+import base64
+import binascii
 import json
 import asyncio
 from datetime import datetime, timezone, timedelta
@@ -24,11 +27,13 @@ from typing import Optional, Dict, Any, List
 
 from app.db.helpers import (
     get_profile_conn, get_static_conn,
-    get_user_hp, get_user_max_hp, ensure_auto_save,
+    ensure_auto_save,
 )
 from app.services.game_mechanics import game_mechanics
+from app.services.game_state_service import game_state_service
 from app.services.context_service import context_service
 from app.services.persona_service import persona_service
+from app.services.conversation_service import conversation_service
 
 BASE_SYSTEM_PROMPT = """
 ### 核心协议：赛博猫娘 Mia (Core Protocol: Cyber-Neko Mia)
@@ -74,6 +79,20 @@ BASE_SYSTEM_PROMPT = """
 “系统链接……Mia 上线。啧，又是你啊，笨蛋绯墨。今天准备好接受本喵的魔鬼特训了吗？把你的问题交出来，别浪费我的算力喵！”
 """
 
+# 查询语句 (登记在 indexes.hot_queries，scripts/test_query_plans.py 检查查询计划)
+LATEST_SUBMISSION_SQL = (
+    "SELECT user_answer, score, ai_feedback FROM exam_history WHERE q_id = ? ORDER BY created_at DESC LIMIT 1"
+)
+QUESTION_CONTEXT_SQL = (
+    "SELECT content, correct_answer, passage_text, official_analysis, options_json, image_base64 "
+    "FROM questions WHERE q_id = ?"
+)
+PAPER_PASSAGE_SQL = """
+    SELECT passage_text FROM questions
+    WHERE paper_id = ? AND passage_text IS NOT NULL
+    AND passage_text != '' LIMIT 1
+"""
+
 router = APIRouter()
 
 # 定义东八区时区
@@ -108,7 +127,7 @@ class MessageItem(BaseModel):
     id: int
     role: str
     content: str
-    image: Optional[str] = None
+    image_url: Optional[str] = None   # [Stage 45.0] 图片引用，GET 该地址获取
     created_at: str
 
 
@@ -117,6 +136,7 @@ class ConversationItem(BaseModel):
     title: str
     updated_at: str
     last_message: str = ""
+    message_count: int = 0
 
 
 class ConversationDetail(BaseModel):
@@ -124,6 +144,9 @@ class ConversationDetail(BaseModel):
     title: str
     messages: List[MessageItem]
     created_at: str
+    message_count: int = 0
+    has_more: bool = False                 # [Stage 45.0] 是否还有更早的消息
+    next_before_id: Optional[int] = None   # [Stage 45.0] 加载更早消息的游标
 
 
 class MiaInteractResult(BaseModel):
@@ -138,60 +161,110 @@ class MiaInteractResult(BaseModel):
 # ---- 路由 ----
 
 @router.get("/conversations", response_model=List[ConversationItem])
-async def get_conversations():
-    """获取会话列表 (最近活跃在前)"""
-    items = []
+async def get_conversations(
+    limit: int = Query(50, ge=1, le=100),
+    before_updated_at: Optional[str] = None,
+    before_id: Optional[int] = None,
+):
+    """
+    获取会话列表 (最近活跃在前)
+    [Stage 44.0] 读反规范化摘要列；翻页传上一页最后一条的 updated_at + id
+    """
     with get_profile_conn() as conn:
-        rows = conn.execute("""
-            SELECT c.id, c.title, c.updated_at, 
-                   (SELECT content FROM messages WHERE conversation_id = c.id ORDER BY id DESC LIMIT 1) as last_msg
-            FROM conversations c
-            ORDER BY c.updated_at DESC
-            LIMIT 50
-        """).fetchall()
-        for r in rows:
-            items.append(ConversationItem(
-                id=r["id"],
-                title=r["title"] or "New Chat",
-                updated_at=str(r["updated_at"]),
-                last_message=r.get("last_msg") or ""
-            ))
-    return items
+        ensure_auto_save(conn)
+        rows = conversation_service.list_conversations(conn, limit, before_updated_at, before_id)
+    return [
+        ConversationItem(
+            id=r["id"],
+            title=r["title"] or "New Chat",
+            updated_at=str(r["updated_at"]),
+            last_message=r["last_message_preview"] or "",
+            message_count=r["message_count"] or 0,
+        )
+        for r in rows
+    ]
 
 
 @router.get("/conversations/{conversation_id}", response_model=ConversationDetail)
-async def get_conversation_detail(conversation_id: int):
-    """获取单个会话详情"""
+async def get_conversation_detail(
+    conversation_id: int,
+    limit: int = Query(30, ge=1, le=100),
+    before_id: Optional[int] = None,
+):
+    """
+    获取单个会话详情
+    [Stage 45.0] 分页: 默认返回最新 limit 条 (升序)，传 next_before_id 加载更早的消息；
+    图片改为 image_url 引用，单独拉取。行数据来自本库、结构固定，直接 JSONResponse 跳过模型校验。
+    """
     with get_profile_conn() as conn:
-        # 1. Conv info
-        conv = conn.execute(
-            "SELECT * FROM conversations WHERE id = ?", (conversation_id,)
-        ).fetchone()
+        ensure_auto_save(conn)
+        conv = conversation_service.get_conversation(conn, conversation_id)
         if not conv:
             return ConversationDetail(id=conversation_id, title="Not Found", messages=[], created_at="")
+        page = conversation_service.get_messages_page(conn, conversation_id, limit, before_id)
+
+    messages = [
+        {
+            "id": m["id"],
+            "role": m["role"],
+            "content": m["content"],
+            "image_url": f"/api/mia/messages/{m['id']}/image" if m["has_image"] else None,
+            "created_at": str(m["created_at"]),
+        }
+        for m in page["messages"]
+    ]
+    return JSONResponse({
+        "id": conv["id"],
+        "title": conv["title"] or "New Chat",
+        "messages": messages,
+        "created_at": str(conv["created_at"]),
+        "message_count": conv["message_count"] or 0,
+        "has_more": page["has_more"],
+        "next_before_id": page["next_before_id"],
+    })
+
+
+@router.get("/search")
+async def search_messages(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    role: Optional[str] = Query(None, pattern="^(user|assistant)$"),
+):
+    """
+    [Stage 46.0] 全文检索历史消息 (中英混排)
+    返回相关度排序的片段，highlights 为片段内的 [start, end) 字符区间；
+    继续翻页传回 next_cursor。role=assistant 只搜 Mia 的回复。
+    """
+    with get_profile_conn() as conn:
+        ensure_auto_save(conn)
+        try:
+            return conversation_service.search_messages(conn, q, limit, cursor, role)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
 
-        # 2. Messages
-        msgs = conn.execute(
-            "SELECT * FROM messages WHERE conversation_id = ? ORDER BY id ASC", 
-            (conversation_id,)
-        ).fetchall()
-        
-        msg_list = [
-            MessageItem(
-                id=m["id"],
-                role=m["role"],
-                content=m["content"],
-                image=m.get("image_base64"),
-                created_at=str(m["created_at"])
-            ) for m in msgs
-        ]
-        
-        return ConversationDetail(
-            id=conv["id"],
-            title=conv["title"] or "New Chat",
-            messages=msg_list,
-            created_at=str(conv["created_at"])
-        )
+
+@router.get("/messages/{message_id}/image")
+async def get_message_image(message_id: int):
+    """[Stage 45.0] 消息附图 (按需加载；消息不可变，允许浏览器长期缓存)"""
+    with get_profile_conn() as conn:
+        data = conversation_service.get_message_image(conn, message_id)
+    if not data:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    media_type = "image/png"
+    if data.startswith("data:"):
+        header, _, data = data.partition(",")
+        media_type = header[5:].split(";")[0] or media_type
+    try:
+        raw = base64.b64decode(data)
+    except (ValueError, binascii.Error):
+        raise HTTPException(status_code=422, detail="Corrupted image data")
+    return Response(
+        content=raw,
+        media_type=media_type,
+        headers={"Cache-Control": "private, max-age=31536000, immutable"},
+    )
 
 
 @router.post("/interact")
@@ -215,10 +288,9 @@ async def mia_interact(body: MiaInteractRequest):
 
     # 2. 严格隔离：只有勾选了 rpg_mode 才拼接入 HP 信息
     if is_rpg_mode:
-        with get_profile_conn() as pconn:
-            ensure_auto_save(pconn)
-            current_hp = get_user_hp(pconn)
-            max_hp = get_user_max_hp(pconn)
+        state = await game_state_service.get(context_data.get("slot_id", 0))
+        current_hp = state["hp"]
+        max_hp = state["max_hp"]
         
         mood_info = game_mechanics.get_mia_mood(current_hp, max_hp)
         mood = mood_info["mood"]
@@ -257,10 +329,7 @@ async def mia_interact(body: MiaInteractRequest):
         # 查询用户提交过的答案
         try:
             with get_profile_conn() as pconn:
-                user_submission = pconn.execute(
-                    "SELECT user_answer, score, ai_feedback FROM exam_history WHERE q_id = ? ORDER BY created_at DESC LIMIT 1",
-                    (q_id,)
-                ).fetchone()
+                user_submission = pconn.execute(LATEST_SUBMISSION_SQL, (q_id,)).fetchone()
                 
                 if user_submission:
                     ans_text = user_submission["user_answer"]
@@ -299,10 +368,7 @@ async def mia_interact(body: MiaInteractRequest):
                           (current_time, attempt_id, word_id, conv_id))
         
         # Insert User Message
-        pconn.execute(
-            "INSERT INTO messages (conversation_id, role, content, created_at) VALUES (?, ?, ?, ?)",
-            (conv_id, 'user', user_msg_content, current_time)
-        )
+        conversation_service.insert_message(pconn, conv_id, 'user', user_msg_content, current_time)
         pconn.commit()
 
     # 4. 强制控制台“透明化”打印 (Transparent Logging)
@@ -346,11 +412,7 @@ async def mia_interact(body: MiaInteractRequest):
             # Stream 结束，保存 Assistant 消息
             now_str = datetime.now(UTC_PLUS_8).strftime('%Y-%m-%d %H:%M:%S')
             with get_profile_conn() as pconn:
-                 pconn.execute(
-                    "INSERT INTO messages (conversation_id, role, content, created_at) VALUES (?, ?, ?, ?)",
-                    (conv_id, 'assistant', full_reply, now_str)
-                 )
-                 pconn.execute("UPDATE conversations SET updated_at = ? WHERE id = ?", (now_str, conv_id))
+                 conversation_service.insert_message(pconn, conv_id, 'assistant', full_reply, now_str)
                  pconn.commit()
             
             yield "data: [DONE]\n\n"
@@ -390,11 +452,7 @@ def _fetch_question_context(q_id: str) -> tuple:
     article_text = ""
 
     with get_static_conn() as sconn:
-        q = sconn.execute(
-            "SELECT content, correct_answer, passage_text, official_analysis, options_json, image_base64 "
-            "FROM questions WHERE q_id = ?",
-            (q_id,),
-        ).fetchone()
+        q = sconn.execute(QUESTION_CONTEXT_SQL, (q_id,)).fetchone()
 
         if q:
             question_info["question_text"] = q.get("content", "")
@@ -408,12 +466,7 @@ def _fetch_question_context(q_id: str) -> tuple:
                 parts = q_id.split("-")
                 if len(parts) >= 2:
                     paper_id = f"{parts[0]}-{parts[1]}"
-                    qn = sconn.execute(
-                        """SELECT passage_text FROM questions
-                           WHERE paper_id = ? AND passage_text IS NOT NULL
-                           AND passage_text != '' LIMIT 1""",
-                        (paper_id,),
-                    ).fetchone()
+                    qn = sconn.execute(PAPER_PASSAGE_SQL, (paper_id,)).fetchone()
                     if qn:
                         article_text = qn.get("passage_text", "")
 
@@ -0,0 +1,46 @@
+"""
+Analytics 报表接口 (只读统计汇总表，与答题日志条数无关)
+GET /api/analytics/sections  — 按题型正确率
+GET /api/analytics/years     — 按年份正确率
+GET /api/analytics/timeline  — 每日作答量 / 正确率
+GET /api/analytics/questions — 单卷逐题统计
+"""
+
+from fastapi import APIRouter, Query
+
+from app.db.helpers import get_profile_conn, ensure_auto_save
+from app.services.analytics_service import analytics_service
+
+router = APIRouter()
+
+
+@router.get("/sections")
+def get_section_stats(slot_id: int = 0):
+    """按题型 (use_of_english / reading_a / ...) 的累计正确率"""
+    with get_profile_conn() as conn:
+        ensure_auto_save(conn)
+        return analytics_service.get_section_accuracy(conn, slot_id)
+
+
+@router.get("/years")
+def get_year_stats(slot_id: int = 0):
+    """按真题年份的正确率"""
+    with get_profile_conn() as conn:
+        ensure_auto_save(conn)
+        return analytics_service.get_year_accuracy(conn, slot_id)
+
+
+@router.get("/timeline")
+def get_timeline(slot_id: int = 0, days: int = Query(30, ge=1, le=365)):
+    """最近 N 天的学习曲线"""
+    with get_profile_conn() as conn:
+        ensure_auto_save(conn)
+        return analytics_service.get_timeline(conn, slot_id, days)
+
+
+@router.get("/questions")
+def get_question_stats(paper_id: str, slot_id: int = 0):
+    """单卷逐题统计 (ExamReport 用)"""
+    with get_profile_conn() as conn:
+        ensure_auto_save(conn)
+        return analytics_service.get_question_stats(conn, slot_id, paper_id)
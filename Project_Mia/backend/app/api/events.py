@@ -0,0 +1,67 @@
+"""
+Events 推送接口 (挂载前缀 /api/events)
+GET /api/events?slot_id=0 — 长连接 SSE，推送 hp_change / level_up / mood_change / vocab_progress
+  - 连接建立先推一条 state (当前数值快照)，前端无需再调 /user/status
+  - 每 HEARTBEAT_SECONDS 秒无事件发送一次注释心跳，防止代理断开空闲连接
+  - 消费过慢被丢弃事件时推送 resync，前端整体刷新一次
+"""
+
+import asyncio
+import json
+
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+
+from app.services.event_bus import event_bus
+from app.services.game_state_service import game_state_service
+
+router = APIRouter()
+
+HEARTBEAT_SECONDS = 15.0
+
+
+def _format_sse(event: str, data, event_id=None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+@router.get("")
+async def stream_events(request: Request, slot_id: int = 0):
+    """按 slot 订阅状态事件"""
+
+    async def event_generator():
+        # 订阅放在生成器内: 响应未开始迭代就断开时不会留下订阅者；
+        # 先订阅再取快照，两者之间的事件不会漏掉
+        sub = event_bus.subscribe(slot_id)
+        try:
+            state = await game_state_service.get(slot_id)
+            yield "retry: 3000\n\n"
+            yield _format_sse("state", state)
+            while True:
+                if await request.is_disconnected():
+                    break
+                try:
+                    message = await asyncio.wait_for(sub.queue.get(), timeout=HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+
+                dropped = sub.take_dropped()
+                if dropped:
+                    yield _format_sse("resync", {"dropped": dropped})
+                yield _format_sse(message["event"], message["data"], message["id"])
+        finally:
+            event_bus.unsubscribe(sub)
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
+    )
@@ -1,20 +1,30 @@
 """
 Exam 路由 — 试卷列表、详情、客观题提交
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+import asyncio
 import json
 import traceback
 
 from app.db.session import get_static_db
 from app.db.models import Paper, Question
-from app.db.helpers import (
-    get_profile_conn, ensure_auto_save,
-    get_user_hp, get_user_max_hp, update_user_hp,
-)
+from app.db.helpers import get_profile_conn, ensure_auto_save
 from contextlib import closing
 from app.services.game_mechanics import game_mechanics
+from app.services.game_state_service import game_state_service
+from app.services.progress_service import progress_service
+from app.services.paper_service import paper_service
+from app.services.recommender_service import recommender_service
+from app.services.story_service import story_service
+
+# 查询语句 (登记在 indexes.hot_queries，scripts/test_query_plans.py 检查查询计划)
+EXAM_HISTORY_SQL = """
+    SELECT q_id, section_type, user_answer, score, is_correct, ai_feedback
+    FROM user_answers
+    WHERE slot_id = ?
+"""
 
 router = APIRouter()
 
@@ -44,11 +54,7 @@ def get_exam_history(slot_id: int = 0):
     try:
         with get_profile_conn() as conn:
             ensure_auto_save(conn)
-            rows = conn.execute("""
-                SELECT q_id, section_type, user_answer, score, is_correct, ai_feedback
-                FROM user_answers
-                WHERE slot_id = ?
-            """, (slot_id,)).fetchall()
+            rows = conn.execute(EXAM_HISTORY_SQL, (slot_id,)).fetchall()
             
             for r in rows:
                 history[r["q_id"]] = {
@@ -66,117 +72,126 @@ def get_exam_history(slot_id: int = 0):
     return history
 
 
+@router.get("/exam/progress_summary")
+def get_progress_summary(slot_id: int = 0):
+    """
+    [Stage 37.0] Dashboard 批量进度: 所有试卷的 answered / total / accuracy / score
+    替代逐卷调用 /exam/{paper_id}/progress
+    """
+    try:
+        with get_profile_conn() as pconn:
+            ensure_auto_save(pconn)
+            return progress_service.get_progress_summary(pconn, slot_id)
+    except Exception as e:
+        print(f"[exam] Progress summary failed: {e}")
+        return {}
+
+
+@router.get("/exam/recommend")
+def recommend_questions(slot_id: int = 0, n: int = Query(10, ge=1, le=100), section_type: Optional[str] = None):
+    """
+    [Stage 39.0] 弱项驱动推荐: 按期望学习收益返回 Top-N 题目
+    可选 section_type 限定题型
+    """
+    try:
+        with get_profile_conn() as pconn:
+            ensure_auto_save(pconn)
+            return recommender_service.recommend(pconn, slot_id, n=n, section_type=section_type)
+    except Exception as e:
+        print(f"[exam] Recommend failed: {e}")
+        return []
+
+
+@router.get("/exam/mistakes", response_model=Dict[str, Any])
+def get_mistake_paper(slot_id: int = 0, paper_id: Optional[str] = None):
+    """
+    [Stage 40.0] 错题重练: 当前面板所有答错的题组装成一份试卷
+    payload 与 /exam/{paper_id} 相同 (另附 count)，可选 paper_id 限定单卷
+    """
+    try:
+        with get_profile_conn() as pconn:
+            ensure_auto_save(pconn)
+            return paper_service.get_mistake_paper(pconn, slot_id, paper_id)
+    except Exception as e:
+        print(f"[exam] Mistake paper failed: {e}")
+        raise HTTPException(status_code=500, detail="Failed to build mistake paper")
+
+
 @router.get("/exam/{paper_id}", response_model=Dict[str, Any])
-def get_exam_detail(paper_id: str, db: Session = Depends(get_static_db)):
-    """获取试卷详情，聚合为前端可用结构"""
-    paper = db.query(Paper).filter(Paper.paper_id == paper_id).first()
-    if not paper:
+def get_exam_detail(paper_id: str):
+    """获取试卷详情，聚合为前端可用结构 (片段缓存见 paper_service)"""
+    detail = paper_service.get_exam_detail(paper_id)
+    if not detail:
         raise HTTPException(status_code=404, detail="Paper not found")
+    return detail
 
-    questions = db.query(Question).filter(Question.paper_id == paper_id).all()
 
-    sections = {
-        "use_of_english": None,
-        "reading_a": [],
-        "reading_b": [],
-        "translation": None,
-        "writing_a": None,
-        "writing_b": None,
-    }
-
-    grouped_reading = {}
+def _record_objective_answer(slot_id, q_id, section_type, user_ans, is_correct, score, paper_id):
+    """客观题答题记录写库 (线程池中执行)"""
+    try:
+        with get_profile_conn() as pconn:
+            ensure_auto_save(pconn)
+            progress_service.record_answer(
+                pconn, slot_id, q_id, section_type,
+                user_answer=str(user_ans),
+                is_correct=is_correct,
+                score=score,  # objective score
+                ai_feedback=None,  # No AI feedback for objective
+                paper_id=paper_id,
+            )
+    except Exception as e:
+        print(f"[exam] 答题记录写库失败: {e}")
 
-    # reading_b 默认 A-G 选项 (7选5题型)
-    READING_B_DEFAULT_OPTIONS = {k: k for k in "ABCDEFG"}
 
-    for q in questions:
-        # 解析选项；reading_b 如果 DB 中无选项则兜底 A-G
-        raw_options = q.options_json
-        if isinstance(raw_options, str):
-            try:
-                raw_options = json.loads(raw_options)
-            except:
-                raw_options = None
-        
-        if raw_options is None and q.section_type == "reading_b":
-            raw_options = READING_B_DEFAULT_OPTIONS
-
-        q_data = {
-            "q_id": q.q_id,
-            "question_number": q.question_number,
-            "content": q.content,
-            "options": raw_options,
-            "q_type": q.q_type,
-            "score": q.score,
+def _load_subjective_question(q_id):
+    """
+    主观题批改上下文 (线程池中执行)
+    Returns: (paper_id, context_info 补充字段, 参考答案)
+    """
+    from app.db.session import StaticSessionLocal
+    sdb = StaticSessionLocal()
+    try:
+        q_obj = sdb.query(Question).filter(Question.q_id == q_id).first()
+        if not q_obj:
+            return None, {}, "略"
+        context = {
+            "source_text": q_obj.content or q_obj.passage_text or "",
+            "topic": q_obj.content or "",
+            "image_base64": q_obj.image_base64,  # <--- FIXED: 传递图片
         }
+        return q_obj.paper_id, context, q_obj.official_analysis or q_obj.correct_answer or "略"
+    except Exception:
+        return None, {}, "略"
+    finally:
+        sdb.close()
 
-        st = q.section_type
-
-        if st == "use_of_english":
-            if not sections["use_of_english"]:
-                sections["use_of_english"] = {"passage": q.passage_text, "questions": []}
-            sections["use_of_english"]["questions"].append(q_data)
-
-        elif st in ["reading_a", "reading_b"]:
-            gn = q.group_name or "Text 1"
-            if st not in grouped_reading:
-                grouped_reading[st] = {}
-            if gn not in grouped_reading[st]:
-                grouped_reading[st][gn] = {"group_name": gn, "passage": q.passage_text, "questions": []}
-            grouped_reading[st][gn]["questions"].append(q_data)
-
-        elif st == "translation":
-            if not sections["translation"]:
-                sections["translation"] = {"passage": q.passage_text, "questions": []}
-            sections["translation"]["questions"].append(q_data)
-
-        elif st in ["writing_a", "writing_b"]:
-            if not sections[st]:
-                sections[st] = {
-                    "q_id": q.q_id,
-                    "prompt": q.content,
-                    "image":  None,   # 收齐后填充
-                    "passage": q.passage_text,
-                    "questions": [],
-                }
-            # 优先提取图片：只要找到第一张有效图就定下
-            if not sections[st]["image"] and q.image_base64 and len(q.image_base64) > 100:
-                sections[st]["image"] = q.image_base64
-            # prompt 也优先取非空的
-            if not sections[st]["prompt"] and q.content:
-                sections[st]["prompt"] = q.content
-            # questions 列表（主观题可能有多行）
-            sections[st]["questions"].append(q_data)
-
-    if sections["use_of_english"]:
-        sections["use_of_english"]["questions"].sort(key=lambda x: x["question_number"] or 0)
-    if sections["translation"]:
-        sections["translation"]["questions"].sort(key=lambda x: x["question_number"] or 0)
-
-    for st in ["reading_a", "reading_b"]:
-        if st in grouped_reading:
-            groups = list(grouped_reading[st].values())
-            for g in groups:
-                g["questions"].sort(key=lambda x: x["question_number"] or 0)
-            groups.sort(key=lambda g: g["questions"][0]["question_number"] if g["questions"] else 0)
-            sections[st] = groups
 
-    return {
-        "id": paper.paper_id,
-        "title": paper.title,
-        "year": paper.year,
-        "sections": sections,
-    }
+def _record_subjective_answer(slot_id, q_id, section_type, answer, is_correct, score, feedback, paper_id):
+    """主观题答题记录写库 (线程池中执行)"""
+    try:
+        with get_profile_conn() as pconn:
+            ensure_auto_save(pconn)
+            progress_service.record_answer(
+                pconn, slot_id, q_id, section_type,
+                user_answer=answer,
+                is_correct=is_correct,
+                score=score,
+                ai_feedback=feedback,
+                paper_id=paper_id,
+            )
+    except Exception as e:
+        print(f"[exam] subjective 答题记录写库失败: {e}")
 
 
 @router.post("/exam/submit_objective")
-def submit_objective(data: Dict[str, Any], db: Session = Depends(get_static_db)):
+async def submit_objective(data: Dict[str, Any], db: Session = Depends(get_static_db)):
     """
     提交客观题答案。
     - 判断正误
     - 计算伤害（按题型）
-    - 写入 femo_profile.db (HP 持久化)
+    - HP 交给 game_state_service (内存结算，write-behind 持久化)
     - 返回判题结果 + 最新 HP
+    - [Stage 52.0] 附上预生成的 Mia 台词 (按答对 / 答错挑选，无台词时为 null)
     """
     q_id     = data.get("q_id")
     user_ans = data.get("answer")
@@ -184,7 +199,8 @@ def submit_objective(data: Dict[str, Any], db: Session = Depends(get_static_db))
     
     print(f"[DEBUG] submit_objective: q_id={q_id}, ans={user_ans}, slot={slot_id}")
 
-    q = db.query(Question).filter(Question.q_id == q_id).first()
+    # 阻塞的 sqlite 读写一律放到线程池，事件循环只做 await (SSE 等不被拖住)
+    q = await asyncio.to_thread(db.query(Question).filter(Question.q_id == q_id).first)
     if not q:
         print(f"[DEBUG] Question not found: {q_id}")
         return {"correct": False, "correct_answer": None, "hp_change": 0, "hp": 100}
@@ -209,70 +225,21 @@ def submit_objective(data: Dict[str, Any], db: Session = Depends(get_static_db))
         damage = weight_map.get(section_type, 2.0)
         hp_change = -damage
 
-    # ── 写入数据库 HP ─────────────────────────────────────────
-    new_hp = 100  # fallback
-    try:
-        with get_profile_conn() as pconn:
-            ensure_auto_save(pconn)
-            
-            # Ensure slot exists if not 0? 
-            # Ideally slot should exist if user selected it. 
-            # But let's be safe: (though helper might not support arbitrary slot creation easily without full schema check)
-            # helper ensure_auto_save only checks slot 0.
-            # So we might fail if slot doesn't exist.
-            # Let's try insert ignore for slot first?
-            pconn.execute("INSERT OR IGNORE INTO game_saves (slot_id) VALUES (?)", (slot_id,))
-            
-            # Read current HP from specific slot
-            row = pconn.execute("SELECT hp, max_hp FROM game_saves WHERE slot_id = ?", (slot_id,)).fetchone()
-            if row:
-                current_hp = row["hp"]
-                max_hp     = row["max_hp"]
-            else:
-                current_hp = 100
-                max_hp     = 100
-                
-            new_hp = max(0, min(max_hp, current_hp + hp_change))
-            
-            if hp_change != 0:
-                pconn.execute("UPDATE game_saves SET hp=?, updated_at=datetime('now', 'localtime') WHERE slot_id=?", (new_hp, slot_id))
-                pconn.commit()
-            
-            # ── [Stage 14.0] 答题记录持久化 ──
-            try:
-                pconn.execute("""
-                    INSERT OR REPLACE INTO user_answers 
-                    (slot_id, q_id, section_type, user_answer, is_correct, score, ai_feedback, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now', 'localtime'))
-                """, (
-                    slot_id,
-                    q_id,
-                    section_type,
-                    str(user_ans),
-                    is_correct,
-                    q.score if is_correct else 0, # objective score
-                    None, # No AI feedback for objective
-                ))
-                pconn.commit()
-            except Exception as e:
-                print(f"[exam] Objective save answer failed: {e}")
-
-            # ── [Stage 17.0] 答题轨迹日志 (Append-only, never deleted) ──
-            try:
-                pconn.execute("""
-                    INSERT INTO answer_history_logs
-                    (slot_id, q_id, user_answer, score, updated_at)
-                    VALUES (?, ?, ?, ?, datetime('now', 'localtime'))
-                """, (slot_id, q_id, str(user_ans), q.score if is_correct else 0))
-                pconn.commit()
-            except Exception as e:
-                print(f"[exam] History log insert failed: {e}")
+    # ── HP 结算 (内存状态，按 slot 串行，后台批量写回) ──────────
+    state = await game_state_service.apply(slot_id, hp=hp_change)
+    new_hp = state["hp"]
+    max_hp = state["max_hp"]
 
-    except Exception as e:
-        print(f"[exam] HP 写库失败: {e}")
+    # ── [Stage 14.0 / 17.0] 答题记录 + 轨迹日志 ──
+    await asyncio.to_thread(
+        _record_objective_answer, slot_id, q_id, section_type, user_ans, is_correct,
+        q.score if is_correct else 0, q.paper_id,
+    )
 
     # ── 通知 Mia 情绪 ─────────────────────────────────────────
     mood_info = game_mechanics.get_mia_mood(new_hp, max_hp)
+    # 内存查表；到期的水位线检查会查库，同样放到线程池
+    story = await asyncio.to_thread(story_service.line_for, q_id, is_correct)
 
     return {
         "correct":        is_correct,
@@ -281,6 +248,7 @@ def submit_objective(data: Dict[str, Any], db: Session = Depends(get_static_db))
         "hp":             new_hp,
         "max_hp":         max_hp,
         "mood":           mood_info["mood"],
+        "story":          story,
     }
 
 
@@ -310,6 +278,7 @@ async def submit_subjective(data: Dict[str, Any]):
     score      = 0.0
     feedback   = ""
     detailed_analysis = ""
+    q_paper_id = None
 
     try:
         from app.services.llm_service import llm_service
@@ -318,23 +287,8 @@ async def submit_subjective(data: Dict[str, Any]):
         context_info = {"section_type": section_type}
         
         # 尝试获取题目 context (图、文、参考答案)
-        q_image = None
-        standard_ans = "略"
-        
-        from app.db.session import StaticSessionLocal
-        sdb = StaticSessionLocal()
-        try:
-            q_obj = sdb.query(Question).filter(Question.q_id == q_id).first()
-            if q_obj:
-                # 补充 context_info
-                context_info["source_text"] = q_obj.content or q_obj.passage_text or ""
-                context_info["topic"] = q_obj.content or ""
-                context_info["image_base64"] = q_obj.image_base64  # <--- FIXED: 传递图片
-                standard_ans = q_obj.official_analysis or q_obj.correct_answer or "略"
-        except Exception:
-            pass
-        finally:
-            sdb.close()
+        q_paper_id, q_context, standard_ans = await asyncio.to_thread(_load_subjective_question, q_id)
+        context_info.update(q_context)
 
         # 调用 Service
         result = await llm_service.grade_subjective_question(
@@ -365,61 +319,16 @@ async def submit_subjective(data: Dict[str, Any]):
     # 丢多少分，扣多少血
     lost_score = max_score - score
     hp_change  = -lost_score
-    new_hp    = 100
-    max_hp    = 100
-    try:
-        with get_profile_conn() as pconn:
-            ensure_auto_save(pconn)
-            
-            # Ensure slot exists
-            pconn.execute("INSERT OR IGNORE INTO game_saves (slot_id) VALUES (?)", (slot_id,))
-            
-            # Read HP
-            row = pconn.execute("SELECT hp, max_hp FROM game_saves WHERE slot_id = ?", (slot_id,)).fetchone()
-            if row:
-                current_hp = row["hp"]
-                max_hp     = row["max_hp"]
-            else:
-                current_hp = 100
-                max_hp     = 100
-            
-            new_hp     = max(0, min(max_hp, current_hp + hp_change)) # 允许扣为0
-            
-            pconn.execute("UPDATE game_saves SET hp=?, updated_at=datetime('now', 'localtime') WHERE slot_id=?", (new_hp, slot_id))
-            pconn.commit()
-
-            # ── [Stage 14.0] 答题记录持久化 ──
-            try:
-                pconn.execute("""
-                    INSERT OR REPLACE INTO user_answers 
-                    (slot_id, q_id, section_type, user_answer, is_correct, score, ai_feedback, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now', 'localtime'))
-                """, (
-                    slot_id,
-                    q_id,
-                    section_type,
-                    answer,
-                    (score >= max_score * 0.6), # Pass/Fail heuristic
-                    score,
-                    feedback,
-                ))
-                pconn.commit()
-            except Exception as e:
-                print(f"[exam] Subjective save answer failed: {e}")
-
-            # ── [Stage 17.0] 答题轨迹日志 (Append-only) ──
-            try:
-                pconn.execute("""
-                    INSERT INTO answer_history_logs
-                    (slot_id, q_id, user_answer, score, updated_at)
-                    VALUES (?, ?, ?, ?, datetime('now', 'localtime'))
-                """, (slot_id, q_id, answer, score))
-                pconn.commit()
-            except Exception as e:
-                print(f"[exam] History log insert (subjective) failed: {e}")
+    state = await game_state_service.apply(slot_id, hp=hp_change)
+    new_hp = state["hp"]
+    max_hp = state["max_hp"]
 
-    except Exception as e:
-        print(f"[exam] subjective HP 写库失败: {e}")
+    # ── [Stage 14.0 / 17.0] 答题记录 + 轨迹日志 ──
+    await asyncio.to_thread(
+        _record_subjective_answer, slot_id, q_id, section_type, answer,
+        score >= max_score * 0.6,  # Pass/Fail heuristic
+        score, feedback, q_paper_id,
+    )
 
     return {
         "score":        score,
@@ -433,27 +342,19 @@ async def submit_subjective(data: Dict[str, Any]):
 
 
 @router.get("/exam/{paper_id}/progress")
-def get_exam_progress(paper_id: str, slot_id: int = 0, db: Session = Depends(get_static_db)):
+def get_exam_progress(paper_id: str, slot_id: int = 0):
     """
     [Stage 17.0] 获取试卷作答进度
+    [Stage 36.0] total 来自缓存的题库统计，answered 为一次 (slot_id, paper_id) 索引 COUNT
     Returns: { answered, total, percentage }
     """
-    # Get total questions from static DB
-    total = db.query(Question).filter(Question.paper_id == paper_id).count()
+    total = progress_service.get_paper_total(paper_id)
 
     answered = 0
     try:
         with get_profile_conn() as pconn:
             ensure_auto_save(pconn)
-            # Get q_ids for this paper
-            q_ids = [q.q_id for q in db.query(Question).filter(Question.paper_id == paper_id).all()]
-            if q_ids:
-                placeholders = ",".join(["?"] * len(q_ids))
-                row = pconn.execute(
-                    f"SELECT COUNT(*) as cnt FROM user_answers WHERE slot_id=? AND q_id IN ({placeholders})",
-                    (slot_id, *q_ids)
-                ).fetchone()
-                answered = row["cnt"] if row else 0
+            answered = progress_service.count_answered(pconn, slot_id, paper_id)
     except Exception as e:
         print(f"[exam] Progress calc failed: {e}")
 
@@ -462,7 +363,7 @@ def get_exam_progress(paper_id: str, slot_id: int = 0, db: Session = Depends(get
 
 
 @router.delete("/exam/{paper_id}/reset")
-def reset_paper_progress(paper_id: str, slot_id: int = 0, db: Session = Depends(get_static_db)):
+def reset_paper_progress(paper_id: str, slot_id: int = 0):
     """
     [Stage 17.0] 重置试卷当前面板 (保留 answer_history_logs)
     Deletes all user_answers for slot+paper. Historical logs survive.
@@ -471,16 +372,8 @@ def reset_paper_progress(paper_id: str, slot_id: int = 0, db: Session = Depends(
     try:
         with get_profile_conn() as pconn:
             ensure_auto_save(pconn)
-            q_ids = [q.q_id for q in db.query(Question).filter(Question.paper_id == paper_id).all()]
-            if q_ids:
-                placeholders = ",".join(["?"] * len(q_ids))
-                cursor = pconn.execute(
-                    f"DELETE FROM user_answers WHERE slot_id=? AND q_id IN ({placeholders})",
-                    (slot_id, *q_ids)
-                )
-                pconn.commit()
-                deleted = cursor.rowcount
-                print(f"[exam] Reset paper {paper_id} slot {slot_id}: deleted {deleted} rows")
+            deleted = progress_service.reset_paper(pconn, slot_id, paper_id)
+            print(f"[exam] Reset paper {paper_id} slot {slot_id}: deleted {deleted} rows")
     except Exception as e:
         print(f"[exam] Reset failed: {e}")
         return {"success": False, "error": str(e)}
@@ -0,0 +1,32 @@
+"""
+Metrics 导出接口 (挂载前缀 /metrics)
+GET /metrics         — Prometheus text format，指标定义见 app/core/metrics.py
+GET /metrics/queries — 查询分析器汇总 (N+1 / 慢查询 / 各路由语句数)
+需同时安装请求中间件: app.add_middleware(MetricsMiddleware) / QueryProfilerMiddleware
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core import metrics
+from app.core.query_profiler import query_profiler
+
+router = APIRouter()
+
+
+@router.get("", response_class=PlainTextResponse)
+def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@router.get("/queries")
+def get_query_profile():
+    return query_profiler.report()
+
+
+@router.on_event("shutdown")
+def write_query_profile():
+    """关停时把分析报告落盘"""
+    if query_profiler.enabled:
+        path = query_profiler.write_report()
+        print(f"[profiler] Report written to {path}")
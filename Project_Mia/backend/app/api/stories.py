@@ -0,0 +1,33 @@
+"""
+Stories 路由 — Mia 预生成剧情台词 (内存查表，不查库 / 不调用 LLM)
+GET  /api/stories/{q_id}  — 某题答对 / 答错的中英台词
+POST /api/stories/reload  — generate_stories.py 重新生成后立即刷新内存台词
+"""
+
+import asyncio
+
+from fastapi import APIRouter, HTTPException
+
+from app.services.story_service import story_service
+
+router = APIRouter()
+
+
+@router.on_event("startup")
+async def preload_stories():
+    """启动时在线程池整表加载，首个答题请求不再同步查库"""
+    count = await asyncio.to_thread(story_service.reload)
+    print(f"[story] Loaded {count} story lines")
+
+
+@router.post("/reload")
+def reload_stories():
+    return {"success": True, "count": story_service.reload()}
+
+
+@router.get("/{q_id}")
+def get_story(q_id: str):
+    story = story_service.get(q_id)
+    if not story:
+        raise HTTPException(status_code=404, detail="Story not found")
+    return {"q_id": q_id, **story}
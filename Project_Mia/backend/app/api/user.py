@@ -1,19 +1,40 @@
 """
 User 状态接口
-GET  /api/user/status  — 从 femo_profile.db 读取当前 HP/等级
+GET  /api/user/status  — 当前 HP/等级 (game_state_service 内存状态)
 POST /api/user/status  — 前端手动同步状态（备用）
 [Stage 20.0] PUT /api/user/slots/{slot_id} — 更新存档设置
 [Stage 20.0] DELETE /api/user/slots/{slot_id} — 删除存档
+[Stage 43.0] GET  /api/user/slots/{slot_id}/export — 导出存档归档 (.miaslot)
+[Stage 43.0] POST /api/user/slots/import           — 导入归档为新存档 (请求体为归档字节)
+[Stage 43.0] POST /api/user/slots/{slot_id}/clone  — 服务端克隆存档
 """
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from typing import Dict, Any, Optional
 from pydantic import BaseModel
 
-from app.db.helpers import get_profile_conn, get_user_hp, get_user_max_hp, ensure_auto_save
+from app.db.helpers import get_profile_conn, ensure_auto_save
+from app.services.progress_service import progress_service
+from app.services.recommender_service import recommender_service
+from app.services.game_state_service import game_state_service
+from app.services.slot_archive_service import slot_archive_service, SlotArchiveError
+from app.services.vocab_progress_service import vocab_progress_service
 from contextlib import closing
+import asyncio
 import json
 
+# 查询语句 (登记在 indexes.hot_queries，scripts/test_query_plans.py 检查查询计划)
+SLOTS_SQL = (
+    "SELECT slot_id, hp, level, updated_at, slot_name, daily_new_words_limit, daily_reset_time "
+    "FROM game_saves ORDER BY slot_id ASC"
+)
+# 删档时按 slot_id 级联清理的表 (user_vocab_memory 由 vocab_progress_service 清理，game_saves 最后删)
+SLOT_DELETE_TABLES = (
+    "user_answers", "answer_history_logs", "answer_stats_daily", "answer_stats_question", "game_saves",
+)
+SLOT_DELETE_SQL = "DELETE FROM {table} WHERE slot_id = ?"
+
 router = APIRouter()
 
 
@@ -29,37 +50,29 @@ class UpdateSlotRequest(BaseModel):
 
 
 @router.get("/status", response_model=Dict[str, Any])
-def get_user_status(slot_id: int = 0):
+async def get_user_status(slot_id: int = 0):
     """
-    返回玩家当前状态（从 femo_profile.db 读取）。
+    返回玩家当前状态。
     前端启动时调用，获取真实 HP。
+    [Stage 41.0] 读 game_state_service 的内存状态 (首次访问才查库)
     """
-    with get_profile_conn() as conn:
-        ensure_auto_save(conn)
-        # 统一从 game_saves 读取
-        row = conn.execute(
-            "SELECT hp, max_hp, level, exp, mia_mood FROM game_saves WHERE slot_id = ?",
-            (slot_id,)
-        ).fetchone()
-
-    if not row:
-         # 尝试初始化该 slot (fallback)
-         try:
-             conn.execute("INSERT OR IGNORE INTO game_saves (slot_id) VALUES (?)", (slot_id,))
-             conn.commit()
-         except:
-             pass
-         return {"hp": 100, "maxHp": 100, "level": 1, "mood": "focused", "exp": 0}
-
+    state = await game_state_service.get(slot_id)
     return {
-        "hp":     row["hp"],
-        "maxHp":  row["max_hp"],
-        "level":  row["level"],
-        "mood":   row["mia_mood"] or "focused",
-        "exp":    row["exp"],
+        "hp":     state["hp"],
+        "maxHp":  state["max_hp"],
+        "level":  state["level"],
+        "mood":   state["mia_mood"] or "focused",
+        "exp":    state["exp"],
     }
 
 
+@router.on_event("shutdown")
+def flush_game_state():
+    """[Stage 41.0] 关停前把未落盘的数值写回 game_saves"""
+    written = game_state_service.flush()
+    print(f"[user] Game state flushed on shutdown ({written} slots).")
+
+
 @router.get("/slots")
 def get_user_slots():
     """
@@ -69,14 +82,14 @@ def get_user_slots():
     try:
         with get_profile_conn() as conn:
             ensure_auto_save(conn)
-            rows = conn.execute(
-                "SELECT slot_id, hp, level, updated_at, slot_name, daily_new_words_limit, daily_reset_time FROM game_saves ORDER BY slot_id ASC"
-            ).fetchall()
+            rows = conn.execute(SLOTS_SQL).fetchall()
             for r in rows:
+                # 未落盘的数值以内存状态为准
+                live = game_state_service.cached(r["slot_id"]) or r
                 slots.append({
                     "slot_id": r["slot_id"],
                     "slot_name": r.get("slot_name") or f"Save {r['slot_id']}",
-                    "summary": f"Lv.{r['level']} HP:{r['hp']}",
+                    "summary": f"Lv.{live['level']} HP:{live['hp']}",
                     "daily_new_words_limit": r.get("daily_new_words_limit", 30),
                     "daily_reset_time": r.get("daily_reset_time", "04:00"),
                     "updated_at": r["updated_at"]
@@ -171,6 +184,7 @@ def update_slot(slot_id: int, body: UpdateSlotRequest):
 def delete_slot(slot_id: int):
     """
     [Stage 20.0] 删除存档（级联清理 user_vocab_memory, user_answers, answer_history_logs）
+    [Stage 38.0] 同时清理统计汇总表
     禁止删除 slot_id=0 (主存档)。
     """
     if slot_id == 0:
@@ -186,11 +200,13 @@ def delete_slot(slot_id: int):
                 return {"success": False, "error": f"Slot {slot_id} not found"}
             
             # Cascade delete related records
-            conn.execute("DELETE FROM user_vocab_memory WHERE slot_id = ?", (slot_id,))
-            conn.execute("DELETE FROM user_answers WHERE slot_id = ?", (slot_id,))
-            conn.execute("DELETE FROM answer_history_logs WHERE slot_id = ?", (slot_id,))
-            conn.execute("DELETE FROM game_saves WHERE slot_id = ?", (slot_id,))
+            vocab_progress_service.delete_slot(conn, slot_id)
+            for table in SLOT_DELETE_TABLES:
+                conn.execute(SLOT_DELETE_SQL.format(table=table), (slot_id,))
             conn.commit()
+            progress_service.invalidate(slot_id)
+            recommender_service.invalidate(slot_id)
+            game_state_service.invalidate(slot_id)
             print(f"[user] Deleted slot {slot_id} and all related records.")
     except Exception as e:
         print(f"[user] Delete slot failed: {e}")
@@ -199,35 +215,100 @@ def delete_slot(slot_id: int):
     return {"success": True, "slot_id": slot_id}
 
 
+@router.get("/slots/{slot_id}/export")
+def export_slot(slot_id: int):
+    """
+    [Stage 43.0] 导出存档: 该 slot 在各用户表中的所有行，流式压缩输出
+    """
+    if not slot_archive_service.check_exists(slot_id):
+        raise HTTPException(status_code=404, detail=f"Slot {slot_id} not found")
+    # 先落盘内存中的数值，保证 game_saves 是最新的
+    game_state_service.flush()
+    return StreamingResponse(
+        slot_archive_service.iter_export(slot_id),
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="slot_{slot_id}.miaslot"'},
+    )
+
+
+@router.post("/slots/import")
+async def import_slot(request: Request, slot_name: Optional[str] = None):
+    """
+    [Stage 43.0] 导入归档为新存档 (slot_id 自动分配)
+    请求体直接是 .miaslot 字节 (application/octet-stream)，接收完毕后单事务写入
+    """
+    try:
+        result = await slot_archive_service.import_stream(request.stream(), slot_name)
+    except SlotArchiveError as e:
+        return {"success": False, "error": str(e)}
+    except Exception as e:
+        print(f"[user] Import slot failed: {e}")
+        return {"success": False, "error": str(e)}
+
+    print(f"[user] Imported slot {result['slot_id']}: {result['counts']}")
+    return {"success": True, **result}
+
+
+@router.post("/slots/{slot_id}/clone")
+def clone_slot(slot_id: int, body: CreateSlotRequest = CreateSlotRequest()):
+    """
+    [Stage 43.0] 克隆存档: 服务端 INSERT ... SELECT，一个事务完成
+    """
+    game_state_service.flush()
+    try:
+        with get_profile_conn() as conn:
+            ensure_auto_save(conn)
+            result = slot_archive_service.clone(conn, slot_id, body.slot_name)
+    except SlotArchiveError as e:
+        return {"success": False, "error": str(e)}
+    except Exception as e:
+        print(f"[user] Clone slot failed: {e}")
+        return {"success": False, "error": str(e)}
+
+    print(f"[user] Cloned slot {slot_id} -> {result['slot_id']}: {result['counts']}")
+    return {"success": True, **result}
+
+
+def _save_snapshot(slot_id: int, current_paper_id: str, snapshot_json: str):
+    """快照字段落盘 (线程池中执行)"""
+    with get_profile_conn() as conn:
+        ensure_auto_save(conn)
+        conn.execute("""
+            UPDATE game_saves 
+            SET current_paper_id=?, snapshot_json=?, updated_at=datetime('now', 'localtime')
+            WHERE slot_id=?
+        """, (current_paper_id, snapshot_json, slot_id))
+        conn.commit()
+
+
+def _load_snapshot(slot_id: int) -> Optional[Dict[str, Any]]:
+    """读取存档行 (线程池中执行)"""
+    with get_profile_conn() as conn:
+        ensure_auto_save(conn)
+        return conn.execute("""
+            SELECT hp, max_hp, level, exp, mia_mood, snapshot_json 
+            FROM game_saves WHERE slot_id=?
+        """, (slot_id,)).fetchone()
+
+
 @router.post("/save")
-def save_game_progress(data: Dict[str, Any]):
+async def save_game_progress(data: Dict[str, Any]):
     """
     保存游戏进度 [Stage 16.0 Updated: Leveling System]
     Payload: { "slot_id": 0, "hp": 90, ... }
+    [Stage 41.0] 数值与升级结算交给 game_state_service，此处只落盘快照字段
     """
     slot_id = data.get("slot_id", 0)
-    current_hp = data.get("hp", 100) # Use different var name to avoid confusion
-    max_hp = data.get("max_hp", 100)
-    level = data.get("level", 1)
-    exp = data.get("exp", 0)
     current_paper_id = data.get("current_paper_id", "")
-    mia_mood = data.get("mia_mood", "normal")
-    
-    # [Stage 16.0] Level Up Logic
-    # Next Level EXP = Level * 100
-    # Loop to handle multiple level ups at once (if massive EXP gain)
-    leveled_up = False
-    while True:
-        needed_exp = level * 100
-        if exp >= needed_exp:
-            exp -= needed_exp
-            level += 1
-            current_hp = max_hp # Heal on level up
-            leveled_up = True
-            print(f"[user] Slot {slot_id} Leveled Up! Lv.{level}, HP Restored.")
-        else:
-            break
-            
+
+    state = await game_state_service.apply(slot_id, assign={
+        "hp":       data.get("hp", 100),
+        "max_hp":   data.get("max_hp", 100),
+        "level":    data.get("level", 1),
+        "exp":      data.get("exp", 0),
+        "mia_mood": data.get("mia_mood", "normal"),
+    })
+
     # 将复杂结构存入 snapshot_json
     completed = data.get("completed_questions", [])
     snapshot = {
@@ -237,30 +318,17 @@ def save_game_progress(data: Dict[str, Any]):
     snapshot_json = json.dumps(snapshot)
 
     try:
-        with get_profile_conn() as conn:
-            ensure_auto_save(conn)
-            
-            # 确保 Slot 存在
-            conn.execute("INSERT OR IGNORE INTO game_saves (slot_id) VALUES (?)", (slot_id,))
-            conn.commit()
-            
-            # Update
-            conn.execute("""
-                UPDATE game_saves 
-                SET hp=?, max_hp=?, level=?, exp=?, mia_mood=?, current_paper_id=?, snapshot_json=?, updated_at=datetime('now', 'localtime')
-                WHERE slot_id=?
-            """, (current_hp, max_hp, level, exp, mia_mood, current_paper_id, snapshot_json, slot_id))
-            conn.commit()
+        await asyncio.to_thread(_save_snapshot, slot_id, current_paper_id, snapshot_json)
     except Exception as e:
         print(f"[user] Save failed: {e}")
         return {"success": False, "error": str(e)}
 
     return {
         "success": True, 
-        "leveled_up": leveled_up, 
-        "new_level": level, 
-        "new_hp": current_hp,
-        "new_exp": exp
+        "leveled_up": state["leveled_up"], 
+        "new_level": state["level"], 
+        "new_hp": state["hp"],
+        "new_exp": state["exp"]
     }
 
 
@@ -275,16 +343,14 @@ def save_game_progress(data: Dict[str, Any]):
 # Task says GET /api/user/load. So I stick to GET.
 
 @router.get("/load", response_model=Dict[str, Any])
-def load_game_progress(slot_id: int = 0):
+async def load_game_progress(slot_id: int = 0):
     """
     读取游戏进度
     """
-    with get_profile_conn() as conn:
-        ensure_auto_save(conn)
-        row = conn.execute("""
-            SELECT hp, max_hp, level, exp, mia_mood, snapshot_json 
-            FROM game_saves WHERE slot_id=?
-        """, (slot_id,)).fetchone()
+    row = await asyncio.to_thread(_load_snapshot, slot_id)
+    if row:
+        # 数值以内存状态为准 (可能尚未写回)
+        row.update(await game_state_service.get(slot_id))
     
     if not row:
         return {
@@ -1,9 +1,17 @@
 from fastapi import APIRouter, Depends, Query
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+import asyncio
 from datetime import datetime, timedelta, timezone
 import json
 
-from app.db.helpers import get_profile_conn, get_static_conn, ensure_auto_save, update_user_hp
+from app.db.helpers import get_profile_conn, get_static_conn, ensure_auto_save
+from app.services.game_state_service import game_state_service
+from app.services.event_bus import event_bus
+from app.services.vocab_search_service import vocab_search_service
+from app.services.vocab_progress_service import vocab_progress_service
+
+# 查询语句 (登记在 indexes.hot_queries，scripts/test_query_plans.py 检查查询计划)
+AI_CACHE_SQL = "SELECT ai_explanation FROM vocab_ai_cache WHERE word = ?"
 
 router = APIRouter()
 
@@ -77,13 +85,7 @@ def get_todays_vocab(slot_id: int = 0):
         today_str = get_logical_date(reset_time)
         
         # 1. Get Due Reviews
-        rows = conn.execute("""
-            SELECT word, easiness_factor, interval, repetitions 
-            FROM user_vocab_memory
-            WHERE slot_id = ? AND next_review_date <= ?
-            ORDER BY next_review_date ASC
-            LIMIT 20
-        """, (slot_id, today_str)).fetchall()
+        rows = vocab_progress_service.due(conn, slot_id, today_str, limit=20)
         
         for r in rows:
             static_row = static_conn.execute("SELECT * FROM vocabulary WHERE word=?", (r["word"],)).fetchone()
@@ -100,7 +102,7 @@ def get_todays_vocab(slot_id: int = 0):
             
         # 2. Get New Words — respect per-slot daily_new_words_limit
         if len(review_words) < 50:  # Only fetch new words when not already overwhelmed
-            existing = {r["word"] for r in conn.execute("SELECT word FROM user_vocab_memory WHERE slot_id=?", (slot_id,)).fetchall()}
+            existing = vocab_progress_service.learned_words(conn, slot_id)
             
             # Fetch all vocabulary words, prioritize ones with sentences
             all_static_words = static_conn.execute("SELECT word, sentences FROM vocabulary").fetchall()
@@ -140,25 +142,18 @@ def get_todays_vocab(slot_id: int = 0):
         "total_count": len(review_words) + len(new_words)
     }
 
-@router.post("/review")
-def submit_review(data: Dict[str, Any]):
+def _settle_review(slot_id: int, word: str, quality: int):
     """
-    [Stage 21.0] 深度复习与进度结算
+    SM-2 结算并写入 user_vocab_memory (线程池中执行)
+    返回 (reward, next_review, success_streak, mastery_level)
     """
-    slot_id = data.get("slot_id", 0)
-    word = data.get("word")
-    quality = data.get("quality", 0) # 0-5
-    
     now_utc8 = datetime.now(UTC8)
     today = now_utc8.date()
     
     with get_profile_conn() as conn:
         ensure_auto_save(conn)
         
-        row = conn.execute(
-            "SELECT easiness_factor, interval, repetitions, mastery_level, success_streak, total_recall_count, total_error_count FROM user_vocab_memory WHERE slot_id=? AND word=?",
-            (slot_id, word)
-        ).fetchone()
+        row = vocab_progress_service.get(conn, slot_id, word)
         
         if row:
             ef = row["easiness_factor"]
@@ -219,58 +214,55 @@ def submit_review(data: Dict[str, Any]):
         next_date = today + timedelta(days=interval)
         next_date_str = next_date.strftime("%Y-%m-%d")
         
-        # Save to user_vocab_memory
-        conn.execute("""
-            INSERT OR REPLACE INTO user_vocab_memory 
-            (slot_id, word, easiness_factor, interval, repetitions, next_review_date, last_review_date, 
-             mastery_level, success_streak, total_recall_count, total_error_count, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now', 'localtime'))
-        """, (slot_id, word, ef, interval, reps, next_date_str, today.strftime("%Y-%m-%d"), 
-              mastery_level, success_streak, total_recall_count, total_error_count))
-        
-        # Apply HP / EXP to game_saves
-        user_row = conn.execute("SELECT hp, max_hp, exp, level FROM game_saves WHERE slot_id=?", (slot_id,)).fetchone()
-        if user_row:
-            cur_hp = user_row["hp"]
-            max_hp = user_row["max_hp"]
-            cur_exp = user_row["exp"]
-            cur_level = user_row["level"]
-            
-            new_hp = cur_hp
-            new_exp = cur_exp
-            leveled_up = False
-            
-            if reward["hp"] != 0:
-                new_hp = min(float(max_hp), float(cur_hp) + reward["hp"])
-                if new_hp < 0: new_hp = 0
-                
-            if reward["exp"] > 0:
-                new_exp += reward["exp"]
-                # Seamless Level Up Loop (EXP Overflow)
-                while True:
-                    needed_exp = cur_level * 100
-                    if new_exp >= needed_exp:
-                        new_exp -= needed_exp
-                        cur_level += 1
-                        new_hp = max_hp # Full heal on level up
-                        leveled_up = True
-                    else:
-                        break
-                        
-                if leveled_up:
-                    print(f"[vocab] Slot {slot_id} Leveled Up to {cur_level}!")
-            
-            conn.execute("""
-                UPDATE game_saves SET hp=?, exp=?, level=? WHERE slot_id=?
-            """, (new_hp, new_exp, cur_level, slot_id))
-            
-            reward["leveled_up"] = leveled_up
-            reward["new_level"] = cur_level
-            reward["new_hp"] = new_hp
-            reward["new_exp"] = new_exp
+        # [Stage 50.0] Save via the unified progress store (user_vocab_memory)
+        vocab_progress_service.save(conn, slot_id, word, {
+            "easiness_factor": ef,
+            "interval": interval,
+            "repetitions": reps,
+            "next_review_date": next_date_str,
+            "last_review_date": today.strftime("%Y-%m-%d"),
+            "mastery_level": mastery_level,
+            "success_streak": success_streak,
+            "total_recall_count": total_recall_count,
+            "total_error_count": total_error_count,
+        })
         
         conn.commit()
 
+    return reward, next_date_str, success_streak, mastery_level
+
+
+@router.post("/review")
+async def submit_review(data: Dict[str, Any]):
+    """
+    [Stage 21.0] 深度复习与进度结算
+    """
+    slot_id = data.get("slot_id", 0)
+    word = data.get("word")
+    quality = data.get("quality", 0) # 0-5
+    
+    # SM-2 结算读写 sqlite，放到线程池执行 (不阻塞事件循环)
+    reward, next_date_str, success_streak, mastery_level = await asyncio.to_thread(
+        _settle_review, slot_id, word, quality
+    )
+
+    # Apply HP / EXP (升级结算统一在 game_state_service)
+    state = await game_state_service.apply(slot_id, hp=reward["hp"], exp=reward["exp"])
+    reward["leveled_up"] = state["leveled_up"]
+    reward["new_level"] = state["level"]
+    reward["new_hp"] = state["hp"]
+    reward["new_exp"] = state["exp"]
+
+    # [Stage 42.0] 推送复习结算
+    event_bus.publish(slot_id, "vocab_progress", {
+        "word": word,
+        "quality": quality,
+        "next_review": next_date_str,
+        "streak": success_streak,
+        "mastery": mastery_level,
+        "reward": reward,
+    })
+
     return {
         "success": True,
         "word": word,
@@ -291,12 +283,7 @@ def get_vocab_list(slot_id: int = 0):
     """
     with get_profile_conn() as conn, get_static_conn() as static_conn:
         ensure_auto_save(conn)
-        rows = conn.execute("""
-            SELECT word, mastery_level, success_streak, next_review_date
-            FROM user_vocab_memory
-            WHERE slot_id = ?
-        """, (slot_id,)).fetchall()
-        memory_map = {r["word"]: r for r in rows}
+        memory_map = vocab_progress_service.all_for_slot(conn, slot_id)
         
         static_words = static_conn.execute("SELECT * FROM vocabulary").fetchall()
         
@@ -338,6 +325,20 @@ def get_vocab_list(slot_id: int = 0):
     }
 
 
+@router.get("/search")
+def search_vocab(
+    q: str = Query(..., min_length=1, max_length=100),
+    k: int = Query(10, ge=1, le=50),
+    field: Optional[str] = Query(None, pattern="^(word|meaning|sentences)$"),
+):
+    """
+    [Stage 47.0] 词典检索 / 输入联想
+    英文按单词前缀联想 (同时命中例句)，中文检索释义；bm25 排序返回 top-k
+    """
+    with get_static_conn() as static_conn:
+        return vocab_search_service.search(static_conn, q, k, field)
+
+
 @router.post("/explain")
 async def explain_word(data: Dict[str, Any]):
     """
@@ -352,9 +353,7 @@ async def explain_word(data: Dict[str, Any]):
     # 1. Cache Hit Check
     with get_profile_conn() as conn:
         ensure_auto_save(conn)
-        row = conn.execute(
-            "SELECT ai_explanation FROM vocab_ai_cache WHERE word=?", (word,)
-        ).fetchone()
+        row = conn.execute(AI_CACHE_SQL, (word,)).fetchone()
         if row:
             print(f"[vocab] Cache HIT for '{word}'")
             return {"success": True, "word": word, "explanation": row["ai_explanation"], "cached": True}
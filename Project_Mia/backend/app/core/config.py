@@ -25,6 +25,14 @@ class Settings(BaseSettings):
     # 数据库
     DATABASE_DIR: Path = Path(__file__).parent.parent.parent / "data"
     
+    # [Stage 49.0] 查询分析器 (开发环境全量开启，生产按比例采样)
+    QUERY_PROFILER_ENABLED: bool = False
+    QUERY_PROFILER_SAMPLE_RATE: float = 1.0
+    QUERY_PROFILER_SLOW_MS: float = 50.0
+    QUERY_PROFILER_N_PLUS_ONE: int = 10       # 单次请求内同一语句指纹执行次数达到即视为 N+1
+    QUERY_PROFILER_ROUTE_BUDGET: int = 50     # 单次请求语句总数超过即标记该路由
+    QUERY_PROFILER_REPORT: Path = Path(__file__).parent.parent.parent / "data" / "query_profile.json"
+    
     # CORS
     CORS_ORIGINS: list = ["http://localhost:5173", "http://localhost:3000"]
     
@@ -0,0 +1,437 @@
+"""
+性能指标 — 请求 / 数据库 / LLM 埋点，Prometheus 文本格式导出
+用法:
+  app.add_middleware(MetricsMiddleware)                          # 请求级指标
+  app.include_router(metrics.router, prefix="/metrics")          # app/api/metrics.py
+
+埋点开销:
+  - 计数器无锁: 每个线程写自己的分片 (threading.local)，只在抓取时汇总，
+    热路径只有一次 dict 查找 + 浮点加法；锁仅在线程首次写入时注册分片用
+  - 直方图桶边界预先分配，落桶用 bisect
+  - 单次请求内的 DB 次数 / 耗时经 contextvar 累加，请求结束时写入直方图
+
+Author: Femo
+Date: 2026-03-15
+"""
+
+import contextvars
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+# 默认桶 (秒)，覆盖 1ms ~ 10s
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# DB 单条语句更细
+DB_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5)
+# LLM 慢得多
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 8.0, 13.0, 21.0, 34.0, 60.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+
+# ==================================================================
+#  指标类型
+# ==================================================================
+
+class _Metric:
+    """按线程分片的指标存储: 分片 {labels: [cell, ...]}，抓取时求和"""
+
+    kind = ""
+    width = 1
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[Dict[Tuple, List[float]]] = []
+        self._register_lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _cells(self, labels: Tuple) -> List[float]:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._register_lock:
+                self._shards.append(shard)
+        cells = shard.get(labels)
+        if cells is None:
+            cells = shard[labels] = [0.0] * self.width
+        return cells
+
+    def collect(self) -> Dict[Tuple, List[float]]:
+        with self._register_lock:
+            shards = list(self._shards)
+        totals: Dict[Tuple, List[float]] = {}
+        for shard in shards:
+            for labels, cells in list(shard.items()):
+                acc = totals.get(labels)
+                if acc is None:
+                    totals[labels] = list(cells)
+                else:
+                    for i, v in enumerate(cells):
+                        acc[i] += v
+        return totals
+
+    def _label_str(self, labels: Tuple, extra: str = "") -> str:
+        parts = [f'{k}="{_escape(str(v))}"' for k, v in zip(self.labelnames, labels)]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for labels, cells in sorted(self.collect().items()):
+            lines.extend(self._render_series(labels, cells))
+        return lines
+
+    def _render_series(self, labels: Tuple, cells: List[float]) -> List[str]:
+        return [f"{self.name}{self._label_str(labels)} {_fmt(cells[0])}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1.0):
+        self._cells(labels)[0] += amount
+
+
+class Gauge(_Metric):
+    """只支持增减 (各线程分片求和即为当前值)"""
+
+    kind = "gauge"
+
+    def inc(self, *labels, amount: float = 1.0):
+        self._cells(labels)[0] += amount
+
+    def dec(self, *labels, amount: float = 1.0):
+        self._cells(labels)[0] -= amount
+
+
+class Histogram(_Metric):
+    """cells = [各桶计数 (非累计)..., +Inf 桶, 总和]"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.width = len(self.buckets) + 2
+        super().__init__(name, help_text, labelnames)
+
+    def observe(self, value: float, *labels):
+        cells = self._cells(labels)
+        cells[bisect_left(self.buckets, value)] += 1
+        cells[-1] += value
+
+    def _render_series(self, labels: Tuple, cells: List[float]) -> List[str]:
+        lines = []
+        cumulative = 0.0
+        for bound, n in zip(self.buckets, cells):
+            cumulative += n
+            le = 'le="%s"' % _fmt(bound)
+            lines.append(f"{self.name}_bucket{self._label_str(labels, le)} {_fmt(cumulative)}")
+        cumulative += cells[len(self.buckets)]
+        le = 'le="+Inf"'
+        lines.append(f"{self.name}_bucket{self._label_str(labels, le)} {_fmt(cumulative)}")
+        lines.append(f"{self.name}_sum{self._label_str(labels)} {_fmt(cells[-1])}")
+        lines.append(f"{self.name}_count{self._label_str(labels)} {_fmt(cumulative)}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+REGISTRY: List[_Metric] = []
+
+
+def render() -> str:
+    """Prometheus text exposition format 0.0.4"""
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ==================================================================
+#  指标定义
+# ==================================================================
+
+HTTP_REQUESTS = Counter("mia_http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+HTTP_LATENCY = Histogram("mia_http_request_duration_seconds", "HTTP request latency (until last body byte)", ("method", "route"))
+HTTP_IN_FLIGHT = Gauge("mia_http_requests_in_flight", "HTTP requests currently being served", ("method",))
+HTTP_RESPONSE_SIZE = Histogram("mia_http_response_size_bytes", "HTTP response body size", ("method", "route"), SIZE_BUCKETS)
+HTTP_DB_QUERIES = Histogram("mia_http_db_queries_per_request", "SQLite statements executed per request", ("method", "route"), COUNT_BUCKETS)
+HTTP_DB_TIME = Histogram("mia_http_db_seconds_per_request", "SQLite time spent per request", ("method", "route"))
+
+DB_QUERIES = Counter("mia_db_queries_total", "SQLite statements executed", ("db", "op"))
+DB_LATENCY = Histogram("mia_db_query_duration_seconds", "SQLite statement latency (execute + fetch)", ("db", "op"), DB_BUCKETS)
+
+LLM_REQUESTS = Counter("mia_llm_requests_total", "LLM calls by outcome", ("provider", "op", "outcome"))
+LLM_QUEUE_WAIT = Histogram("mia_llm_queue_wait_seconds", "Time until the provider starts responding", ("provider", "op"), LLM_BUCKETS)
+LLM_TTFT = Histogram("mia_llm_time_to_first_token_seconds", "Time to first streamed token", ("provider", "op"), LLM_BUCKETS)
+LLM_DURATION = Histogram("mia_llm_request_duration_seconds", "Total LLM call duration", ("provider", "op"), LLM_BUCKETS)
+LLM_TOKENS = Counter("mia_llm_tokens_streamed_total", "Streamed chunks (≈ tokens) received from the provider", ("provider", "op"))
+
+
+# ==================================================================
+#  请求级 DB 统计
+# ==================================================================
+
+class RequestStats:
+    __slots__ = ("db_queries", "db_seconds")
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+
+
+_request_stats: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar("mia_request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+
+# ==================================================================
+#  ASGI 中间件
+# ==================================================================
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def route_template(scope) -> str:
+    """
+    路由模板 (含 include_router 前缀)。新版 FastAPI 的 route.path 不带前缀，
+    前缀从真实路径中按模板段数截取 (前缀本身是静态的)。
+    """
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if template is None:
+        return UNMATCHED_ROUTE
+    segments = template.count("/")
+    parts = scope.get("path", "").split("/")
+    prefix = "/".join(parts[:len(parts) - segments])
+    return prefix + template
+
+
+class MetricsMiddleware:
+    """
+    纯 ASGI 中间件 (不经过 BaseHTTPMiddleware，流式响应不被缓冲)
+    route 标签取路由模板 (/api/mia/conversations/{conversation_id})，避免按真实路径爆炸
+    响应头附带 Server-Timing: db;dur=..;desc="N queries" (截至响应头发出时)
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        start = time.perf_counter()
+        status = 500
+        size = 0
+        HTTP_IN_FLIGHT.inc(method)
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((
+                    b"server-timing",
+                    f'db;dur={stats.db_seconds * 1000:.2f};desc="{stats.db_queries} queries"'.encode(),
+                ))
+                message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            route_label = route_template(scope)
+            HTTP_IN_FLIGHT.dec(method)
+            HTTP_REQUESTS.inc(method, route_label, str(status))
+            HTTP_LATENCY.observe(elapsed, method, route_label)
+            HTTP_RESPONSE_SIZE.observe(size, method, route_label)
+            HTTP_DB_QUERIES.observe(stats.db_queries, method, route_label)
+            HTTP_DB_TIME.observe(stats.db_seconds, method, route_label)
+            _request_stats.reset(token)
+
+
+# ==================================================================
+#  SQLite 埋点 (连接工厂)
+# ==================================================================
+
+def _op_of(sql: str) -> str:
+    head = sql.lstrip()[:10].split(None, 1)
+    return head[0].lower() if head else "other"
+
+
+# 语句级监听 (query_profiler 注册): fn(db, sql, parameters, elapsed, cursor)
+DB_LISTENERS: List = []
+
+
+def record_db(db: str, sql: str, elapsed: float, parameters=None, cursor=None):
+    op = _op_of(sql)
+    DB_QUERIES.inc(db, op)
+    DB_LATENCY.observe(elapsed, db, op)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.db_queries += 1
+        stats.db_seconds += elapsed
+    for listener in DB_LISTENERS:
+        listener(db, sql, parameters, elapsed, cursor)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """计时 execute + fetch*；按语句计数 (fetch 时间计入同一语句)"""
+
+    _db = "sqlite"
+    _sql = ""
+
+    def execute(self, sql, parameters=()):
+        self._sql = sql
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            record_db(self._db, sql, time.perf_counter() - start, parameters, self)
+
+    def executemany(self, sql, seq_of_parameters):
+        self._sql = sql
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            record_db(self._db, sql, time.perf_counter() - start)
+
+    def _timed_fetch(self, fetch, *args):
+        start = time.perf_counter()
+        try:
+            return fetch(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            DB_LATENCY.observe(elapsed, self._db, _op_of(self._sql))
+            stats = _request_stats.get()
+            if stats is not None:
+                stats.db_seconds += elapsed
+
+    def fetchone(self):
+        return self._timed_fetch(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._timed_fetch(super().fetchmany, self.arraysize if size is None else size)
+
+    def fetchall(self):
+        return self._timed_fetch(super().fetchall)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """
+    sqlite3.connect(..., factory=connection_factory("profile"))
+    Connection.execute 在 C 层直接执行，不经过 cursor.execute，这里统一改走可计时的游标
+    """
+
+    db_label = "sqlite"
+
+    def cursor(self, factory=None):
+        cur = super().cursor(factory or InstrumentedCursor)
+        if isinstance(cur, InstrumentedCursor):
+            cur._db = self.db_label
+        return cur
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        start = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            record_db(self.db_label, "script", time.perf_counter() - start)
+
+
+_factories: Dict[str, type] = {}
+
+
+def connection_factory(db: str) -> type:
+    """按库名生成连接类 (标签 db=profile / static)"""
+    cls = _factories.get(db)
+    if cls is None:
+        cls = _factories[db] = type(f"InstrumentedConnection_{db}", (InstrumentedConnection,), {"db_label": db})
+    return cls
+
+
+# ==================================================================
+#  LLM 埋点
+# ==================================================================
+
+class LLMSpan:
+    """
+    with llm_span("stream", provider) as span:
+        resp = await open_stream(...)
+        span.opened()          # 服务端开始响应 → queue wait
+        async for chunk in resp:
+            span.token()       # 首个 → TTFT
+    退出时记录总耗时与结果 (ok / error / cancelled)
+    """
+
+    __slots__ = ("provider", "op", "start", "first_token_at", "opened_at", "tokens")
+
+    def __init__(self, op: str, provider: str):
+        self.op = op
+        self.provider = provider
+        self.start = 0.0
+        self.opened_at: Optional[float] = None
+        self.first_token_at: Optional[float] = None
+        self.tokens = 0
+
+    def __enter__(self) -> "LLMSpan":
+        self.start = time.perf_counter()
+        return self
+
+    def opened(self):
+        if self.opened_at is None:
+            self.opened_at = time.perf_counter()
+            LLM_QUEUE_WAIT.observe(self.opened_at - self.start, self.provider, self.op)
+
+    def token(self, n: int = 1):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+            LLM_TTFT.observe(self.first_token_at - self.start, self.provider, self.op)
+        self.tokens += n
+
+    def __exit__(self, exc_type, exc, tb):
+        LLM_DURATION.observe(time.perf_counter() - self.start, self.provider, self.op)
+        if self.tokens:
+            LLM_TOKENS.inc(self.provider, self.op, amount=self.tokens)
+        if exc_type is None:
+            outcome = "ok"
+        elif issubclass(exc_type, GeneratorExit) or exc_type.__name__ == "CancelledError":
+            outcome = "cancelled"
+        else:
+            outcome = "error"
+        LLM_REQUESTS.inc(self.provider, self.op, outcome)
+        return False
+
+
+def llm_span(op: str, provider: str) -> LLMSpan:
+    return LLMSpan(op, provider)
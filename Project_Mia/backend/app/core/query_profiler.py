@@ -0,0 +1,263 @@
+"""
+查询分析器 — N+1 检测 / 慢查询日志 / 按路由汇总
+数据来源: app/core/metrics 的语句级监听 (get_profile_conn / get_static_conn 连接)
+          + SQLAlchemy 引擎事件 (instrument_engine)
+用法:
+  QUERY_PROFILER_ENABLED=true                        # 开发环境
+  QUERY_PROFILER_SAMPLE_RATE=0.05                    # 生产: 5% 请求采样
+  app.add_middleware(QueryProfilerMiddleware)
+  GET /metrics/queries                               # 当前汇总 (关停时写入 QUERY_PROFILER_REPORT)
+
+每个被采样的请求:
+  - 语句按指纹归并 (字面量 → ?，IN (...) 折叠)，同一指纹执行次数 ≥ N_PLUS_ONE 记为 N+1
+  - 语句总数超过 ROUTE_BUDGET 的请求打印一行警告
+慢查询 (≥ SLOW_MS) 不受采样限制，连同 EXPLAIN QUERY PLAN 一并记录。
+
+Author: Femo
+Date: 2026-03-15
+"""
+
+import contextvars
+import json
+import random
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+from app.core import metrics
+from app.core.config import settings
+
+
+SLOW_LOG_SIZE = 200
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(sql: str) -> str:
+    """语句指纹: 归一化空白与大小写，字面量替换为 ?，IN (?, ?, ...) 折叠为 (?+)"""
+    fp = _STRING.sub("?", sql)
+    fp = _NUMBER.sub("?", fp)
+    fp = _SPACES.sub(" ", fp).strip().lower()
+    return _IN_LIST.sub("(?+)", fp)
+
+
+def _explain(cursor, sql: str, parameters) -> List[str]:
+    """在同一连接上取查询计划 (用未埋点的裸游标，避免递归)"""
+    if cursor is None or not sql.lstrip().lower().startswith(("select", "with", "update", "delete", "insert")):
+        return []
+    try:
+        raw = cursor.connection.cursor(sqlite3.Cursor)
+        raw.row_factory = None
+        rows = raw.execute("EXPLAIN QUERY PLAN " + sql, parameters or ()).fetchall()
+        return [r[3] for r in rows]
+    except Exception as e:
+        return [f"(explain failed: {e})"]
+
+
+class RequestProfile:
+    """单次请求内的语句统计: 指纹 → [次数, 耗时, 原始 SQL]"""
+
+    __slots__ = ("statements", "seconds", "by_fingerprint")
+
+    def __init__(self):
+        self.statements = 0
+        self.seconds = 0.0
+        self.by_fingerprint: Dict[str, list] = {}
+
+    def add(self, sql: str, elapsed: float):
+        self.statements += 1
+        self.seconds += elapsed
+        fp = fingerprint(sql)
+        entry = self.by_fingerprint.get(fp)
+        if entry is None:
+            self.by_fingerprint[fp] = [1, elapsed, sql]
+        else:
+            entry[0] += 1
+            entry[1] += elapsed
+
+
+_profile: contextvars.ContextVar[Optional[RequestProfile]] = contextvars.ContextVar("mia_query_profile", default=None)
+_current_route: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("mia_query_route", default=None)
+
+
+class QueryProfiler:
+    """按路由汇总 + 慢查询环形日志"""
+
+    def __init__(self):
+        self.slow_ms = settings.QUERY_PROFILER_SLOW_MS
+        self.n_plus_one = settings.QUERY_PROFILER_N_PLUS_ONE
+        self.route_budget = settings.QUERY_PROFILER_ROUTE_BUDGET
+        self.sample_rate = settings.QUERY_PROFILER_SAMPLE_RATE
+        self._routes: Dict[str, Dict[str, Any]] = {}
+        self._slow: deque = deque(maxlen=SLOW_LOG_SIZE)
+        self._lock = threading.Lock()
+        self.enabled = False
+
+    def enable(self):
+        if not self.enabled:
+            metrics.DB_LISTENERS.append(self._on_statement)
+            self.enabled = True
+
+    def disable(self):
+        if self.enabled:
+            metrics.DB_LISTENERS.remove(self._on_statement)
+            self.enabled = False
+
+    # ---- 语句级 ----
+
+    def _on_statement(self, db: str, sql: str, parameters, elapsed: float, cursor):
+        profile = _profile.get()
+        if profile is not None:
+            profile.add(sql, elapsed)
+        if elapsed * 1000 >= self.slow_ms:
+            self._log_slow(db, sql, parameters, elapsed, cursor)
+
+    def _log_slow(self, db: str, sql: str, parameters, elapsed: float, cursor):
+        plan = _explain(cursor, sql, parameters if isinstance(parameters, (tuple, list, dict)) else None)
+        entry = {
+            "at": datetime.now().isoformat(timespec="seconds"),
+            "db": db,
+            "ms": round(elapsed * 1000, 2),
+            "route": _current_route.get(),
+            "fingerprint": fingerprint(sql),
+            "plan": plan,
+        }
+        with self._lock:
+            self._slow.append(entry)
+        print(f"[profiler] Slow query {entry['ms']}ms ({db}, {entry['route'] or '-'}): {entry['fingerprint'][:160]}")
+        for line in plan:
+            print(f"[profiler]     {line}")
+
+    # ---- 请求级 ----
+
+    def sampled(self) -> bool:
+        return self.enabled and (self.sample_rate >= 1.0 or random.random() < self.sample_rate)
+
+    def finish_request(self, route: str, profile: RequestProfile):
+        repeated = {
+            fp: entry for fp, entry in profile.by_fingerprint.items()
+            if entry[0] >= self.n_plus_one
+        }
+        over_budget = profile.statements > self.route_budget
+
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = self._routes[route] = {
+                    "requests": 0,
+                    "statements_total": 0,
+                    "statements_max": 0,
+                    "db_seconds_total": 0.0,
+                    "over_budget": 0,
+                    "n_plus_one": {},
+                }
+            stats["requests"] += 1
+            stats["statements_total"] += profile.statements
+            stats["statements_max"] = max(stats["statements_max"], profile.statements)
+            stats["db_seconds_total"] += profile.seconds
+            stats["over_budget"] += int(over_budget)
+            for fp, (count, seconds, sql) in repeated.items():
+                n1 = stats["n_plus_one"].setdefault(fp, {"requests": 0, "max_repeats": 0, "example": sql.strip()})
+                n1["requests"] += 1
+                n1["max_repeats"] = max(n1["max_repeats"], count)
+
+        if over_budget or repeated:
+            worst = max(repeated.items(), key=lambda kv: kv[1][0]) if repeated else None
+            detail = f"; N+1: {worst[1][0]}× {worst[0][:120]}" if worst else ""
+            print(f"[profiler] {route}: {profile.statements} statements, {profile.seconds * 1000:.1f}ms{detail}")
+
+    # ---- 报告 ----
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            routes = {
+                route: {
+                    **{k: v for k, v in s.items() if k != "n_plus_one"},
+                    "statements_avg": round(s["statements_total"] / s["requests"], 1),
+                    "db_ms_avg": round(s["db_seconds_total"] * 1000 / s["requests"], 2),
+                    "n_plus_one": sorted(
+                        ({"fingerprint": fp, **v} for fp, v in s["n_plus_one"].items()),
+                        key=lambda x: -x["max_repeats"],
+                    ),
+                }
+                for route, s in self._routes.items()
+            }
+            slow = list(self._slow)
+        return {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "thresholds": {
+                "slow_ms": self.slow_ms,
+                "n_plus_one": self.n_plus_one,
+                "route_budget": self.route_budget,
+                "sample_rate": self.sample_rate,
+            },
+            "routes": dict(sorted(routes.items(), key=lambda kv: -kv[1]["statements_avg"])),
+            "slow_queries": slow,
+        }
+
+    def write_report(self, path: Optional[Path] = None) -> Path:
+        path = Path(path or settings.QUERY_PROFILER_REPORT)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.report(), ensure_ascii=False, indent=2), encoding="utf-8")
+        return path
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+            self._slow.clear()
+
+
+class QueryProfilerMiddleware:
+    """采样请求: 收集语句统计，请求结束后按路由模板汇总"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not query_profiler.sampled():
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        token = _profile.set(profile)
+        route_token = _current_route.set(f"{scope['method']} {scope['path']}")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _profile.reset(token)
+            _current_route.reset(route_token)
+            query_profiler.finish_request(f"{scope['method']} {metrics.route_template(scope)}", profile)
+
+
+# ==================================================================
+#  SQLAlchemy 引擎
+# ==================================================================
+
+def instrument_engine(engine, db: str):
+    """ORM 语句同样计入指标与分析器"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("mia_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["mia_query_start"].pop()
+        metrics.record_db(db, statement, elapsed, None if executemany else parameters, cursor)
+
+
+# 单例
+query_profiler = QueryProfiler()
+if settings.QUERY_PROFILER_ENABLED:
+    query_profiler.enable()
@@ -0,0 +1,119 @@
+"""
+FTS5 全文检索辅助 — 中英混排分词
+SQLite 的 unicode61 分词器把连续汉字当成一个 token，"过去完成时" 无法用 "完成" 命中。
+这里在写入索引前先做 CJK 二元切分 (bigram)：
+  "讲讲 past perfect 过去完成时" → "讲讲 past perfect 过去 去完 完成 成时"
+英文部分原样交给 unicode61 (大小写 / 变音符折叠)，汉字部分每两个字一个 token。
+查询侧用同样的切分把关键词转成 FTS5 短语，保证两边 token 一致。
+
+索引列存的是切分后的文本，高亮偏移量在原文上单独计算 (highlight_spans)。
+
+Author: Femo
+Date: 2026-03-14
+"""
+
+import re
+from typing import List, Tuple
+
+# 汉字 / 假名 / 谚文 — 按 bigram 切分的字符
+_CJK = r"぀-ヿ㐀-䶿一-鿿가-힯豈-﫿"
+_CJK_RUN = re.compile(f"[{_CJK}]+")
+# 查询词: 连续汉字 或 连续字母数字 (其余标点 / 运算符一律视为分隔)
+_QUERY_TERM = re.compile(f"[{_CJK}]+|[^\\W{_CJK}_]+")
+
+
+def _bigrams(run: str) -> List[str]:
+    if len(run) == 1:
+        return [run]
+    return [run[i:i + 2] for i in range(len(run) - 1)]
+
+
+def is_cjk(term: str) -> bool:
+    return _CJK_RUN.fullmatch(term) is not None
+
+
+def segment(text: str) -> str:
+    """索引侧切分: 汉字串展开为 bigram，其余保持原样"""
+    if not text:
+        return ""
+    parts = []
+    last = 0
+    for m in _CJK_RUN.finditer(text):
+        parts.append(text[last:m.start()])
+        parts.append(" " + " ".join(_bigrams(m.group())) + " ")
+        last = m.end()
+    parts.append(text[last:])
+    return "".join(parts)
+
+
+def query_terms(q: str) -> List[str]:
+    """用户输入 → 检索词 (去重，保持顺序)"""
+    seen = []
+    for term in _QUERY_TERM.findall(q or ""):
+        term = term.lower()
+        if term not in seen:
+            seen.append(term)
+    return seen
+
+
+def build_match(q: str) -> str:
+    """
+    用户输入 → FTS5 MATCH 表达式，词与词之间 AND:
+      汉字串   → bigram 短语 "过去 去完 完成"；单字 → 前缀 "过"*
+      英文单词 → 带引号的词，末词加前缀匹配 (边输边搜)
+    返回空串表示没有可检索的词
+    """
+    terms = query_terms(q)
+    clauses = []
+    for i, term in enumerate(terms):
+        if is_cjk(term):
+            if len(term) == 1:
+                clauses.append(f'"{term}"*')
+            else:
+                clauses.append('"' + " ".join(_bigrams(term)) + '"')
+        else:
+            escaped = term.replace('"', '""')
+            clauses.append(f'"{escaped}"*' if i == len(terms) - 1 else f'"{escaped}"')
+    return " ".join(clauses)
+
+
+def highlight_spans(text: str, q: str) -> List[Tuple[int, int]]:
+    """原文中所有命中区间 [start, end)，已排序并合并重叠"""
+    if not text:
+        return []
+    lowered = text.lower()
+    spans = []
+    for term in query_terms(q):
+        start = lowered.find(term)
+        while start != -1:
+            spans.append((start, start + len(term)))
+            start = lowered.find(term, start + 1)
+    spans.sort()
+    merged: List[Tuple[int, int]] = []
+    for s, e in spans:
+        if merged and s <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], e))
+        else:
+            merged.append((s, e))
+    return merged
+
+
+def make_snippet(text: str, spans: List[Tuple[int, int]], width: int = 80) -> Tuple[str, List[Tuple[int, int]]]:
+    """
+    截取首个命中附近 width 个字符的片段，返回 (片段, 片段内的高亮区间)
+    片段被截断的一侧以 "…" 标记，偏移量已计入该字符
+    """
+    text = text or ""
+    if len(text) <= width:
+        return text, spans
+    anchor = spans[0][0] if spans else 0
+    start = max(0, min(anchor - width // 4, len(text) - width))
+    end = start + width
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if end < len(text) else ""
+    shift = len(prefix) - start
+    inner = [
+        (max(s, start) + shift, min(e, end) + shift)
+        for s, e in spans if s < end and e > start
+    ]
+    return prefix + text[start:end] + suffix, inner
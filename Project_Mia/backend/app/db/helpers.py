@@ -11,6 +11,9 @@ from pathlib import Path
 from contextlib import contextmanager
 from typing import Optional, Dict, List, Any
 
+from app.core import metrics
+from app.db import fts, indexes
+
 # 数据库文件路径
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 DATA_DIR = BASE_DIR / "data"
@@ -27,7 +30,7 @@ def _dict_factory(cursor, row):
 @contextmanager
 def get_static_conn():
     """获取只读静态内容数据库连接"""
-    conn = sqlite3.connect(STATIC_DB, timeout=20.0)
+    conn = sqlite3.connect(STATIC_DB, timeout=20.0, factory=metrics.connection_factory("static"))
     conn.row_factory = _dict_factory
     try:
         yield conn
@@ -36,9 +39,15 @@ def get_static_conn():
 
 
 @contextmanager
-def get_profile_conn():
-    """获取读写用户数据库连接"""
-    conn = sqlite3.connect(PROFILE_DB, timeout=20.0)
+def get_profile_conn(check_same_thread: bool = True):
+    """
+    获取读写用户数据库连接
+    check_same_thread=False 供流式响应使用 (生成器每次迭代可能在不同线程池线程，串行访问)
+    """
+    conn = sqlite3.connect(
+        PROFILE_DB, timeout=20.0, check_same_thread=check_same_thread,
+        factory=metrics.connection_factory("profile"),
+    )
     conn.row_factory = _dict_factory
     try:
         yield conn
@@ -46,6 +55,20 @@ def get_profile_conn():
         conn.close()
 
 
+def paper_id_from_q_id(q_id: str) -> str:
+    """从 q_id 前缀推导 paper_id: '2023-eng1-reading_a-q21' → '2023-eng1'"""
+    parts = (q_id or "").split("-")
+    return "-".join(parts[:2])
+
+
+# 会话列表中最后一条消息预览的长度 (字符)
+MESSAGE_PREVIEW_LEN = 80
+
+# [Stage 54.0] femo_profile.db 的 Schema 版本 (PRAGMA user_version)。
+# migrate_profile_schema 新增迁移步骤 / indexes 登记新索引时递增，已迁移的库下次访问会重跑一次
+PROFILE_SCHEMA_VERSION = 54
+
+
 # ---- 用户状态快捷读写 ----
 
 # ---- 用户状态快捷读写 ----
@@ -83,8 +106,98 @@ def update_user_hp(conn: sqlite3.Connection, new_hp: int):
     conn.commit()
 
 
-def ensure_auto_save(conn: sqlite3.Connection):
-    """确保 slot_id=0 的自动存档存在 (严查 Schema)"""
+def _merge_legacy_vocab_progress(conn: sqlite3.Connection):
+    """
+    [Stage 50.0] 旧单存档 vocab_progress 表 → user_vocab_memory (slot 0)
+    合并时同一单词保留最近复习过的一条；旧表改名为 vocab_progress_legacy 留档，
+    原名改为 slot 0 的只读视图 (+ INSTEAD OF INSERT 触发器，已有单词不覆盖) 兼容旧脚本；
+    新写入一律走 vocab_progress_service
+    """
+    kind = conn.execute("SELECT type FROM sqlite_master WHERE name = 'vocab_progress'").fetchone()
+    if kind and kind["type"] == "view":
+        return
+
+    if kind and kind["type"] == "table":
+        print("[helpers] Merging legacy vocab_progress into user_vocab_memory (slot 0)...")
+        conn.execute("""
+            INSERT INTO user_vocab_memory
+            (slot_id, word, easiness_factor, interval, repetitions, next_review_date, last_review_date,
+             success_streak, total_recall_count, total_error_count, updated_at)
+            SELECT 0, word, COALESCE(easiness_factor, 2.5), COALESCE(interval, 0), COALESCE(repetition, 0),
+                   date(next_review), date(last_review), COALESCE(consecutive_correct, 0),
+                   COALESCE(correct_reviews, 0),
+                   MAX(COALESCE(mistake_count, 0), COALESCE(total_reviews, 0) - COALESCE(correct_reviews, 0)),
+                   COALESCE(updated_at, CURRENT_TIMESTAMP)
+            FROM vocab_progress
+            WHERE true
+            ON CONFLICT(slot_id, word) DO UPDATE SET
+                easiness_factor    = excluded.easiness_factor,
+                interval           = excluded.interval,
+                repetitions        = excluded.repetitions,
+                next_review_date   = excluded.next_review_date,
+                last_review_date   = excluded.last_review_date,
+                success_streak     = excluded.success_streak,
+                total_recall_count = excluded.total_recall_count,
+                total_error_count  = excluded.total_error_count
+            WHERE excluded.last_review_date > COALESCE(user_vocab_memory.last_review_date, '')
+        """)
+        conn.execute("ALTER TABLE vocab_progress RENAME TO vocab_progress_legacy")
+
+    # 列名与旧表一致
+    conn.execute("""
+        CREATE VIEW IF NOT EXISTS vocab_progress AS
+        SELECT id, word,
+               repetitions AS repetition, easiness_factor, interval,
+               next_review_date AS next_review, last_review_date AS last_review,
+               total_error_count AS mistake_count, success_streak AS consecutive_correct,
+               CASE WHEN total_error_count > 0 AND success_streak = 0 THEN 1 ELSE 0 END AS is_in_mistake_book,
+               total_recall_count + total_error_count AS total_reviews,
+               total_recall_count AS correct_reviews,
+               updated_at AS created_at, updated_at
+        FROM user_vocab_memory
+        WHERE slot_id = 0
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS vocab_progress_insert INSTEAD OF INSERT ON vocab_progress
+        BEGIN
+            INSERT OR IGNORE INTO user_vocab_memory
+            (slot_id, word, easiness_factor, interval, repetitions, next_review_date, last_review_date,
+             success_streak, total_recall_count, total_error_count)
+            VALUES (0, NEW.word, COALESCE(NEW.easiness_factor, 2.5), COALESCE(NEW.interval, 0),
+                    COALESCE(NEW.repetition, 0), date(NEW.next_review), date(NEW.last_review),
+                    COALESCE(NEW.consecutive_correct, 0), COALESCE(NEW.correct_reviews, 0),
+                    COALESCE(NEW.mistake_count, 0));
+        END
+    """)
+    conn.commit()
+
+
+def rebuild_messages_fts(conn: sqlite3.Connection) -> int:
+    """
+    [Stage 46.0] 按 messages 当前内容整体重建 messages_fts (调用方提交)，返回索引条数
+    用于首次建表回填，以及绕过 conversation_service 直接删改 messages 之后的修复
+    """
+    conn.execute("INSERT INTO messages_fts(messages_fts) VALUES ('delete-all')")
+    cursor = conn.execute("SELECT id, content FROM messages")
+    total = 0
+    while True:
+        rows = cursor.fetchmany(1000)
+        if not rows:
+            break
+        conn.executemany(
+            "INSERT INTO messages_fts(rowid, body) VALUES (?, ?)",
+            [(r["id"], fts.segment(r["content"])) for r in rows],
+        )
+        total += len(rows)
+    return total
+
+
+def migrate_profile_schema(conn: sqlite3.Connection) -> bool:
+    """
+    建表 + 历次 Schema 迁移 (幂等)；全部成功后写入 PRAGMA user_version，
+    返回是否成功 (失败的步骤下次 ensure_auto_save 时重试)
+    """
+    ok = True
     # 1. 创建表 (完全对齐 models.py)
     conn.execute("""
         CREATE TABLE IF NOT EXISTS game_saves (
@@ -112,6 +225,7 @@ def ensure_auto_save(conn: sqlite3.Connection):
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             slot_id INTEGER DEFAULT 0,
             q_id TEXT NOT NULL,
+            paper_id TEXT,                            -- [Stage 36.0]
             section_type TEXT,
             user_answer TEXT,
             score REAL,
@@ -144,8 +258,10 @@ def ensure_auto_save(conn: sqlite3.Connection):
                 conn.commit()
             except Exception as e:
                 print(f"[helpers] Migration failed: {e}")
+                ok = False
     except Exception as e:
         print(f"[helpers] Schema check failed: {e}")
+        ok = False
 
     # [Stage 17.0] Migrations for daily_new_words_limit
     try:
@@ -158,8 +274,10 @@ def ensure_auto_save(conn: sqlite3.Connection):
                 conn.commit()
             except Exception as e:
                 print(f"[helpers] Migration failed for daily_new_words_limit: {e}")
+                ok = False
     except Exception as e:
         print(f"[helpers] Schema check failed for game_saves: {e}")
+        ok = False
 
     # [Stage 20.0] Migrations for slot_name and daily_reset_time
     try:
@@ -172,6 +290,7 @@ def ensure_auto_save(conn: sqlite3.Connection):
                 conn.commit()
             except Exception as e:
                 print(f"[helpers] Migration failed for slot_name: {e}")
+                ok = False
         if "daily_reset_time" not in columns:
             print("[helpers] Migrating game_saves: Adding daily_reset_time column...")
             try:
@@ -179,8 +298,10 @@ def ensure_auto_save(conn: sqlite3.Connection):
                 conn.commit()
             except Exception as e:
                 print(f"[helpers] Migration failed for daily_reset_time: {e}")
+                ok = False
     except Exception as e:
         print(f"[helpers] Schema check failed for slot_name/daily_reset_time: {e}")
+        ok = False
 
     # [Stage 17.0] Attempt History Logs (Replayability)
     conn.execute("""
@@ -188,12 +309,179 @@ def ensure_auto_save(conn: sqlite3.Connection):
             log_id INTEGER PRIMARY KEY AUTOINCREMENT,
             slot_id INTEGER DEFAULT 0,
             q_id TEXT NOT NULL,
+            paper_id TEXT,                            -- [Stage 36.0]
+            section_type TEXT,                        -- [Stage 38.0]
+            is_correct BOOLEAN,                       -- [Stage 38.0]
             user_answer TEXT,
             score REAL,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     """)
 
+    # [Stage 36.0] paper_id 冗余列 + (slot_id, paper_id) 复合索引
+    # 进度 / 重置接口直接按 paper_id 走索引，不再回查 static_content.db 的题目列表
+    for table in ("user_answers", "answer_history_logs"):
+        try:
+            cursor = conn.execute(f"PRAGMA table_info({table})")
+            columns = [col["name"] for col in cursor.fetchall()]
+            if "paper_id" not in columns:
+                print(f"[helpers] Migrating {table}: Adding paper_id column...")
+                try:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN paper_id TEXT")
+                    # Backfill: 旧数据从 q_id 前缀推导
+                    q_rows = conn.execute(
+                        f"SELECT DISTINCT q_id FROM {table} WHERE paper_id IS NULL"
+                    ).fetchall()
+                    conn.executemany(
+                        f"UPDATE {table} SET paper_id = ? WHERE paper_id IS NULL AND q_id = ?",
+                        [(paper_id_from_q_id(r["q_id"]), r["q_id"]) for r in q_rows],
+                    )
+                    conn.commit()
+                except Exception as e:
+                    print(f"[helpers] Migration failed for {table}.paper_id: {e}")
+                    ok = False
+            indexes.apply(conn, table)
+        except Exception as e:
+            print(f"[helpers] Schema check failed for {table}.paper_id: {e}")
+            ok = False
+
+    # [Stage 38.0] answer_history_logs 补充 section_type / is_correct (汇总表重建用)
+    try:
+        cursor = conn.execute("PRAGMA table_info(answer_history_logs)")
+        columns = [col["name"] for col in cursor.fetchall()]
+        for col_name, col_def in (("section_type", "TEXT"), ("is_correct", "BOOLEAN")):
+            if col_name not in columns:
+                print(f"[helpers] Migrating answer_history_logs: Adding {col_name} column...")
+                try:
+                    conn.execute(f"ALTER TABLE answer_history_logs ADD COLUMN {col_name} {col_def}")
+                    conn.commit()
+                except Exception as e:
+                    print(f"[helpers] Migration failed for {col_name}: {e}")
+                    ok = False
+    except Exception as e:
+        print(f"[helpers] Schema check failed for answer_history_logs 38.0 columns: {e}")
+        ok = False
+
+    # [Stage 38.0] Analytics Rollups (由 analytics_service 在答题事务内增量维护)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS answer_stats_daily (
+            slot_id INTEGER NOT NULL,
+            day TEXT NOT NULL,                 -- YYYY-MM-DD (localtime)
+            section_type TEXT NOT NULL,
+            attempts INTEGER DEFAULT 0,
+            correct INTEGER DEFAULT 0,
+            score_sum REAL DEFAULT 0,
+            PRIMARY KEY (slot_id, day, section_type)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS answer_stats_question (
+            slot_id INTEGER NOT NULL,
+            q_id TEXT NOT NULL,
+            paper_id TEXT,
+            section_type TEXT,
+            attempts INTEGER DEFAULT 0,
+            correct INTEGER DEFAULT 0,
+            score_sum REAL DEFAULT 0,
+            last_correct INTEGER DEFAULT 0,
+            last_score REAL,
+            last_at TIMESTAMP,
+            PRIMARY KEY (slot_id, q_id)
+        )
+    """)
+    indexes.apply(conn, "answer_stats_question")
+
+    # [Stage 40.0] 错题本: 部分索引只收录答错的行 + 只读视图
+    # 查询条件须写成 is_correct = 0 才能命中部分索引
+    indexes.apply(conn, "user_answers")
+    conn.execute("""
+        CREATE VIEW IF NOT EXISTS mistake_questions AS
+        SELECT slot_id, q_id, paper_id, section_type, user_answer, score, ai_feedback, updated_at
+        FROM user_answers
+        WHERE is_correct = 0
+    """)
+
+    # [Stage 44.0] 会话列表反规范化: 最近一条消息预览 + 消息数，由 insert_message 维护
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS conversations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT,
+            bound_q_id TEXT,
+            attempt_id INTEGER,
+            word_id INTEGER,
+            last_message_preview TEXT,                -- [Stage 44.0]
+            message_count INTEGER DEFAULT 0,          -- [Stage 44.0]
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            conversation_id INTEGER NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            image_base64 TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (conversation_id) REFERENCES conversations(id) ON DELETE CASCADE
+        )
+    """)
+    try:
+        cursor = conn.execute("PRAGMA table_info(conversations)")
+        columns = [col["name"] for col in cursor.fetchall()]
+        missing = [
+            (name, ddl) for name, ddl in (
+                ("attempt_id", "INTEGER"),
+                ("word_id", "INTEGER"),
+                ("last_message_preview", "TEXT"),
+                ("message_count", "INTEGER DEFAULT 0"),
+            ) if name not in columns
+        ]
+        for col_name, col_def in missing:
+            print(f"[helpers] Migrating conversations: Adding {col_name} column...")
+            conn.execute(f"ALTER TABLE conversations ADD COLUMN {col_name} {col_def}")
+        if any(name == "message_count" for name, _ in missing):
+            # Backfill (一次性): 旧会话的消息数与最后一条消息
+            conn.execute(f"""
+                UPDATE conversations SET
+                    message_count = (SELECT COUNT(*) FROM messages m WHERE m.conversation_id = conversations.id),
+                    last_message_preview = (
+                        SELECT substr(content, 1, {MESSAGE_PREVIEW_LEN}) FROM messages m
+                        WHERE m.conversation_id = conversations.id
+                        ORDER BY m.id DESC LIMIT 1
+                    )
+            """)
+        if missing:
+            conn.commit()
+    except Exception as e:
+        print(f"[helpers] Schema check failed for conversations 44.0 columns: {e}")
+        ok = False
+    indexes.apply(conn, "conversations", "messages")
+
+    # [Stage 46.0] 消息全文检索: 无内容 FTS5 表 (rowid = messages.id)，
+    # 索引切分后的文本 (fts.segment)，由 conversation_service.insert_message 同步写入。
+    # 不用触发器: 切分是 Python 函数，触发器会让其他连接 (sqlite CLI / ORM / 脚本)
+    # 写 messages 时报 no such function
+    try:
+        has_fts = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages_fts'"
+        ).fetchone()
+        if not has_fts:
+            conn.execute("""
+                CREATE VIRTUAL TABLE messages_fts USING fts5(
+                    body, content='', tokenize='unicode61 remove_diacritics 2'
+                )
+            """)
+            print("[helpers] Building messages_fts index...")
+            rebuild_messages_fts(conn)
+        # 早期版本的同步触发器 (依赖连接级 UDF)
+        for trigger in ("trg_messages_fts_ai", "trg_messages_fts_ad", "trg_messages_fts_au"):
+            conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        conn.commit()
+    except Exception as e:
+        print(f"[helpers] messages_fts setup failed: {e}")
+        ok = False
+
     # [Stage 17.0] Vocab AI Cache Table
     conn.execute("""
         CREATE TABLE IF NOT EXISTS vocab_ai_cache (
@@ -234,6 +522,7 @@ def ensure_auto_save(conn: sqlite3.Connection):
                 conn.commit()
             except Exception as e:
                 print(f"[helpers] Migration failed for today_learned_count: {e}")
+                ok = False
                 
         if "today_reviewed_count" not in columns:
             try:
@@ -241,6 +530,7 @@ def ensure_auto_save(conn: sqlite3.Connection):
                 conn.commit()
             except Exception as e:
                 print(f"[helpers] Migration failed for today_reviewed_count: {e}")
+                ok = False
 
         if "last_reset_day" not in columns:
             try:
@@ -248,9 +538,11 @@ def ensure_auto_save(conn: sqlite3.Connection):
                 conn.commit()
             except Exception as e:
                 print(f"[helpers] Migration failed for last_reset_day: {e}")
+                ok = False
 
     except Exception as e:
         print(f"[helpers] Schema check failed for game_saves 21.0 columns: {e}")
+        ok = False
 
     # [Stage 21.0] Migrations for user_vocab_memory Pro-Level SRS Schema
     try:
@@ -272,10 +564,39 @@ def ensure_auto_save(conn: sqlite3.Connection):
                     conn.commit()
                 except Exception as e:
                     print(f"[helpers] Migration failed for {col_name}: {e}")
+                    ok = False
                     
     except Exception as e:
         print(f"[helpers] Schema check failed for user_vocab_memory extensions: {e}")
-    
+        ok = False
+
+    # [Stage 50.0] 背词进度统一到 user_vocab_memory (见 vocab_progress_service)
+    try:
+        _merge_legacy_vocab_progress(conn)
+    except Exception as e:
+        conn.rollback()
+        print(f"[helpers] vocab_progress merge failed: {e}")
+        ok = False
+
+    # [Stage 51.0] 热点查询索引统一由 app.db.indexes 登记；此处补齐上面未覆盖的表
+    # (exam_history / user_vocab_memory 弱词索引等)，已存在的只查一次 sqlite_master
+    indexes.apply(conn)
+
+    if ok:
+        conn.execute(f"PRAGMA user_version = {PROFILE_SCHEMA_VERSION}")
+        conn.commit()
+    return ok
+
+
+def ensure_auto_save(conn: sqlite3.Connection):
+    """
+    确保 slot_id=0 的自动存档存在
+    [Stage 54.0] Schema 迁移每个库只跑一次 (user_version 标记)，之后每次调用只有两条轻量查询
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()["user_version"]
+    if version < PROFILE_SCHEMA_VERSION:
+        migrate_profile_schema(conn)
+
     # 2. 检查 slot_id=0 是否存在
     try:
         row = conn.execute("SELECT save_id FROM game_saves WHERE slot_id = 0").fetchone()
@@ -0,0 +1,234 @@
+"""
+索引登记表 — femo_profile.db 的二级索引统一在此声明
+helpers.migrate_profile_schema 调用 apply() 建索引 (只对已存在的表、只执行缺失的索引)；
+迁移每个库只跑一次，新增 / 修改索引时须递增 helpers.PROFILE_SCHEMA_VERSION；
+hot_queries() 登记 api/*.py、services/*.py 中的热点查询及其应命中的索引，
+SQL 直接引用各模块的查询常量 / 构造函数 (与线上执行的语句为同一份)，
+scripts/test_query_plans.py 在种子库上逐条 EXPLAIN QUERY PLAN，出现整表扫描即失败。
+
+新增热点查询时先在所属模块定义为常量再登记；改写 WHERE、ORDER BY 时同步调整这里的索引。
+
+Author: Femo
+Date: 2026-03-17
+"""
+
+import sqlite3
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+
+class Index(NamedTuple):
+    name: str
+    table: str
+    columns: str                 # "slot_id, next_review_date"
+    where: Optional[str] = None  # 部分索引条件
+
+    @property
+    def ddl(self) -> str:
+        sql = f"CREATE INDEX IF NOT EXISTS {self.name} ON {self.table}({self.columns})"
+        return f"{sql} WHERE {self.where}" if self.where else sql
+
+
+class HotQuery(NamedTuple):
+    name: str
+    db: str                       # "profile" | "static"
+    sql: str
+    params: Tuple = ()
+    source: str = ""              # 出处 (文件::函数)
+    index: Optional[str] = None   # 查询计划中必须出现的索引名
+    ordered: bool = False         # ORDER BY 须由索引满足 (不允许 TEMP B-TREE)
+    allow_scan: bool = False      # 小表 / 有意全表 (如存档列表)
+
+
+PROFILE_INDEXES: List[Index] = [
+    # [Stage 36.0] 进度 / 重置 / 进度汇总: slot + paper；带上 is_correct, score 后 GROUP BY paper_id 只读索引
+    Index("idx_user_answers_slot_paper_cov", "user_answers", "slot_id, paper_id, is_correct, score"),
+    Index("idx_answer_history_logs_slot_paper", "answer_history_logs", "slot_id, paper_id"),
+    # [Stage 38.0] 单卷逐题统计
+    Index("idx_answer_stats_question_slot_paper", "answer_stats_question", "slot_id, paper_id"),
+    # [Stage 40.0] 错题本部分索引: 查询条件须写成 is_correct = 0
+    Index("idx_user_answers_mistakes", "user_answers", "slot_id, paper_id", where="is_correct = 0"),
+    # [Stage 44.0] 会话列表 keyset 分页 / 会话内消息分页
+    Index("idx_conversations_updated", "conversations", "updated_at DESC, id DESC"),
+    Index("idx_messages_conv_msg", "messages", "conversation_id, id"),
+    # [Stage 50.0] 到期复习
+    Index("idx_user_vocab_memory_due", "user_vocab_memory", "slot_id, next_review_date"),
+    # [Stage 51.0] 已学 / 死对头统计只读索引
+    Index("idx_user_vocab_memory_weak", "user_vocab_memory", "slot_id, easiness_factor, total_error_count"),
+    # [Stage 51.0] 按题取最近一次作答 (mia_interact)，免去 q_id 命中后的排序
+    Index("idx_exam_history_qid_created", "exam_history", "q_id, created_at"),
+]
+
+# 被上面的索引取代、需要删除的旧索引
+RETIRED_INDEXES: Dict[str, str] = {
+    "idx_user_answers_slot_paper": "idx_user_answers_slot_paper_cov",
+}
+
+
+def apply(conn: sqlite3.Connection, *tables: str) -> int:
+    """
+    建立登记表中缺失的索引 (可限定表)，跳过尚不存在的表；返回新建数量
+    已齐全时只有一次 sqlite_master 查询
+    """
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    existing = dict(cursor.execute("SELECT name, type FROM sqlite_master WHERE type IN ('table', 'index')").fetchall())
+
+    created = []
+    for idx in PROFILE_INDEXES:
+        if tables and idx.table not in tables:
+            continue
+        if existing.get(idx.table) != "table" or idx.name in existing:
+            continue
+        conn.execute(idx.ddl)
+        created.append(idx.name)
+
+    dropped = False
+    for old, replacement in RETIRED_INDEXES.items():
+        if old in existing and (replacement in existing or replacement in created):
+            conn.execute(f"DROP INDEX IF EXISTS {old}")
+            dropped = True
+    if created or dropped:
+        conn.commit()
+    return len(created)
+
+
+# ==================================================================
+#  热点查询登记 (参数为任意合法值，只看计划)
+# ==================================================================
+
+def hot_queries() -> List[HotQuery]:
+    """各模块导入 helpers (进而导入本模块)，登记表在调用时才导入它们"""
+    from app.api import agent, exam, user, vocab
+    from app.services import (
+        analytics_service, context_service, conversation_service, game_state_service,
+        paper_service, progress_service, recommender_service, story_service, vocab_progress_service,
+    )
+
+    queries = [
+        # ---- user_vocab_memory (vocab_progress_service) ----
+        HotQuery("vocab.due", "profile", vocab_progress_service.DUE_SQL,
+                 (0, "2026-03-01", 20), "services/vocab_progress_service.py::due",
+                 index="idx_user_vocab_memory_due", ordered=True),
+        HotQuery("vocab.get", "profile", vocab_progress_service.GET_SQL,
+                 (0, "ability"), "services/vocab_progress_service.py::get"),
+        HotQuery("vocab.get_many", "profile", vocab_progress_service.get_many_sql(3),
+                 (0, "ability", "absorb", "abandon"), "services/vocab_progress_service.py::get_many"),
+        HotQuery("vocab.learned_words", "profile", vocab_progress_service.LEARNED_WORDS_SQL,
+                 (0,), "services/vocab_progress_service.py::learned_words"),
+        HotQuery("vocab.all_for_slot", "profile", vocab_progress_service.ALL_FOR_SLOT_SQL,
+                 (0,), "services/vocab_progress_service.py::all_for_slot"),
+        HotQuery("vocab.summary", "profile", vocab_progress_service.SUMMARY_SQL,
+                 (0,), "services/vocab_progress_service.py::summary", index="idx_user_vocab_memory_weak"),
+
+        # ---- exam_history ----
+        HotQuery("exam_history.latest_for_question", "profile", agent.LATEST_SUBMISSION_SQL,
+                 ("2023-eng1-reading_a-q21",), "api/agent.py::mia_interact",
+                 index="idx_exam_history_qid_created", ordered=True),
+        HotQuery("exam_history.recent", "profile", context_service.RECENT_HISTORY_SQL,
+                 (), "services/context_service.py::get_user_status_snapshot", ordered=True),
+
+        # ---- user_answers / answer_history_logs ----
+        HotQuery("answers.by_slot", "profile", exam.EXAM_HISTORY_SQL,
+                 (0,), "api/exam.py::get_exam_history"),
+        HotQuery("answers.paper_count", "profile", progress_service.COUNT_ANSWERED_SQL,
+                 (0, "2023-eng1"), "services/progress_service.py::count_answered"),
+        HotQuery("answers.summary", "profile", progress_service.PROGRESS_SUMMARY_SQL,
+                 (0,), "services/progress_service.py::get_progress_summary",
+                 index="idx_user_answers_slot_paper_cov", ordered=True),
+        HotQuery("answers.mistakes", "profile", paper_service.mistakes_sql(False),
+                 (0,), "services/paper_service.py::get_mistake_paper", index="idx_user_answers_mistakes"),
+        # 带 paper_id 时 (slot_id, paper_id, is_correct) 覆盖索引同样是精确定位，不强制部分索引
+        HotQuery("answers.mistakes_by_paper", "profile", paper_service.mistakes_sql(True),
+                 (0, "2023-eng1"), "services/paper_service.py::get_mistake_paper"),
+        # 重建为维护脚本 (scripts/rebuild_analytics.py)；有统计信息时 SQLite 按 log_id 顺序扫描免排序
+        HotQuery("history_logs.rebuild_slot", "profile", analytics_service.rebuild_logs_sql(True),
+                 (0,), "services/analytics_service.py::rebuild", allow_scan=True),
+        HotQuery("history_logs.rebuild_all", "profile", analytics_service.rebuild_logs_sql(False),
+                 (), "services/analytics_service.py::rebuild", allow_scan=True),
+
+        # ---- 统计汇总表 ----
+        HotQuery("stats.sections", "profile", analytics_service.SECTION_ACCURACY_SQL,
+                 (0,), "services/analytics_service.py::get_section_accuracy"),
+        # 每个 slot 至多题库规模行；存档少时 ANALYZE 后 SQLite 会改选全表扫描
+        HotQuery("stats.years", "profile", analytics_service.YEAR_ACCURACY_SQL,
+                 (0,), "services/analytics_service.py::get_year_accuracy", allow_scan=True),
+        HotQuery("stats.timeline", "profile", analytics_service.TIMELINE_SQL,
+                 (0, "-29 days"), "services/analytics_service.py::get_timeline", ordered=True),
+        HotQuery("stats.question_by_paper", "profile", analytics_service.QUESTION_STATS_SQL,
+                 (0, "2023-eng1"), "services/analytics_service.py::get_question_stats"),
+        HotQuery("stats.question_by_slot", "profile", recommender_service.MASTERY_SQL,
+                 (0,), "services/recommender_service.py::_get_mastery"),
+
+        # ---- 存档 ----
+        HotQuery("saves.by_slot", "profile", game_state_service.LOAD_ROW_SQL,
+                 (0,), "services/game_state_service.py::_load_row"),
+        HotQuery("saves.list", "profile", user.SLOTS_SQL,
+                 (), "api/user.py::get_user_slots", allow_scan=True),
+
+        # ---- 会话 ----
+        HotQuery("conversations.page", "profile", conversation_service.list_conversations_sql(False),
+                 (20,), "services/conversation_service.py::list_conversations",
+                 index="idx_conversations_updated", ordered=True),
+        HotQuery("conversations.page_keyset", "profile", conversation_service.list_conversations_sql(True),
+                 ("2026-03-01 00:00:00", "2026-03-01 00:00:00", 1000, 20),
+                 "services/conversation_service.py::list_conversations",
+                 index="idx_conversations_updated", ordered=True),
+        HotQuery("messages.page", "profile", conversation_service.messages_page_sql(False),
+                 (1, 31), "services/conversation_service.py::get_messages_page",
+                 index="idx_messages_conv_msg", ordered=True),
+        HotQuery("messages.page_before", "profile", conversation_service.messages_page_sql(True),
+                 (1, 1000, 31), "services/conversation_service.py::get_messages_page",
+                 index="idx_messages_conv_msg", ordered=True),
+        HotQuery("messages.search", "profile", conversation_service.search_messages_sql(False, False),
+                 ("ability", 21), "services/conversation_service.py::search_messages"),
+        HotQuery("messages.search_role_after", "profile", conversation_service.search_messages_sql(True, True),
+                 ("ability", "user", -1.0, -1.0, 10, 21), "services/conversation_service.py::search_messages"),
+        HotQuery("vocab_ai_cache.get", "profile", vocab.AI_CACHE_SQL,
+                 ("ability",), "api/vocab.py::explain_word"),
+
+        # ---- static_content.db (索引由 models.py / 导入脚本建立) ----
+        HotQuery("questions.by_paper", "static", paper_service.fragments_sql(2),
+                 ("2022-eng1", "2023-eng1"), "services/paper_service.py::_load"),
+        HotQuery("questions.by_id", "static", agent.QUESTION_CONTEXT_SQL,
+                 ("2023-eng1-reading_a-q21",), "api/agent.py::_fetch_question_context"),
+        HotQuery("questions.paper_passage", "static", agent.PAPER_PASSAGE_SQL,
+                 ("2023-eng1",), "api/agent.py::_fetch_question_context"),
+        HotQuery("stories.watermark", "static", story_service.WATERMARK_SQL,
+                 (), "services/story_service.py::_read_watermark", allow_scan=True),
+        HotQuery("stories.load", "static", story_service.LOAD_SQL,
+                 (), "services/story_service.py::_load", allow_scan=True),
+        HotQuery("dictionary.by_words", "static", context_service.meanings_sql(2),
+                 ("ability", "absorb"), "services/context_service.py::get_vocab_resonance"),
+    ]
+    queries += [
+        HotQuery(f"delete_slot.{table}", "profile", user.SLOT_DELETE_SQL.format(table=table),
+                 (99,), "api/user.py::delete_slot")
+        for table in user.SLOT_DELETE_TABLES
+    ]
+    return queries
+
+
+def explain(conn: sqlite3.Connection, query: HotQuery) -> List[str]:
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    return [r[3] for r in cursor.execute("EXPLAIN QUERY PLAN " + query.sql, query.params).fetchall()]
+
+
+def plan_problems(query: HotQuery, plan: List[str]) -> List[str]:
+    """计划中的问题: 整表扫描 / 未命中指定索引 / ORDER BY 需要临时排序"""
+    problems = []
+    if not query.allow_scan:
+        for line in plan:
+            # SCAN 虚表 (FTS) / 常量行 / 子查询物化 不算整表扫描；
+            # ordered 查询按索引顺序扫描 (配合 LIMIT 提前结束) 也不算
+            if not line.startswith("SCAN ") or "VIRTUAL TABLE" in line or "CONSTANT ROW" in line \
+                    or line.startswith("SCAN (subquery"):
+                continue
+            if query.ordered and "USING" in line and "INDEX" in line:
+                continue
+            problems.append(f"full scan: {line}")
+    if query.index and not any(query.index in line for line in plan):
+        problems.append(f"expected index {query.index} not used")
+    if query.ordered and any("TEMP B-TREE" in line for line in plan):
+        problems.append("ORDER BY / GROUP BY needs a temp b-tree")
+    return problems
@@ -5,7 +5,7 @@
 
 from sqlalchemy import Column, Integer, String, Text, Float, Boolean, DateTime, ForeignKey, JSON
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 
 # ============================================================================
@@ -51,7 +51,13 @@ class Question(StaticBase):
     correct_answer = Column(String(10))  # 'C' 或 null (主观题)
     
     # 图片 (大作文配图)
-    image_base64 = Column(Text, nullable=True)  # Writing B 配图 Base64
+    image_base64 = Column(Text, nullable=True)  # Writing B 配图 data URI (导入时已归一化)
+    # 归一化派生列 (ETL v3 起写入)；deferred: ORM 默认不查询，旧库缺列时不报错
+    image_thumb_base64 = deferred(Column(Text, nullable=True))  # 缩略图 data URI
+    image_width = deferred(Column(Integer, nullable=True))
+    image_height = deferred(Column(Integer, nullable=True))
+    image_bytes = deferred(Column(Integer, nullable=True))  # 配图解码后字节数
+    image_thumb_bytes = deferred(Column(Integer, nullable=True))
     
     # 解析
     official_analysis = Column(Text)  # 官方解析
@@ -77,6 +83,7 @@ class Dictionary(StaticBase):
     pos = Column(String(20))  # 'n.', 'v.', 'adj.'
     frequency = Column(Integer, default=0)  # 在真题中出现次数
     example_sentences = Column(JSON)  # 从sentences表预处理的例句列表
+    content_hash = Column(String(40), nullable=True)  # 源条目哈希 (import_vocab --delta)
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
@@ -103,7 +110,11 @@ class Story(StaticBase):
 ProfileBase = declarative_base()
 
 class VocabProgress(ProfileBase):
-    """词汇学习进度表 - SuperMemo 2算法"""
+    """
+    词汇学习进度表 - SuperMemo 2算法
+    [Stage 50.0] 已废弃: 数据并入 user_vocab_memory (slot 0)，同名对象改为只读兼容视图，
+    读写请走 app.services.vocab_progress_service
+    """
     __tablename__ = 'vocab_progress'
     
     id = Column(Integer, primary_key=True, autoincrement=True)
@@ -298,6 +309,7 @@ CREATE TABLE IF NOT EXISTS dictionary (
     pos TEXT,
     frequency INTEGER DEFAULT 0,
     example_sentences TEXT,  -- JSON
+    content_hash TEXT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
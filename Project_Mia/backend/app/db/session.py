@@ -4,6 +4,8 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from pathlib import Path
 
+from app.core.query_profiler import instrument_engine
+
 # 数据库文件路径
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 DATA_DIR = BASE_DIR / "data"
@@ -14,6 +16,8 @@ PROFILE_DB_PATH = DATA_DIR / "femo_profile.db"
 # SQLAlchemy引擎
 static_engine = create_engine(f"sqlite:///{STATIC_DB_PATH}", echo=False)
 profile_engine = create_engine(f"sqlite:///{PROFILE_DB_PATH}", echo=False)
+instrument_engine(static_engine, "static")
+instrument_engine(profile_engine, "profile")
 
 # Session工厂
 StaticSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=static_engine)
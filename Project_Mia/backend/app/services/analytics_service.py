@@ -0,0 +1,254 @@
+"""
+AnalyticsService — 答题统计汇总表 (Rollups)
+answer_history_logs 只追加、无限增长；报表与 Mia 上下文只读汇总表:
+  - answer_stats_daily    : slot × 日期 × 题型
+  - answer_stats_question : slot × 题目
+汇总表在答题写入的同一事务内增量更新，rebuild() 可从原始日志完整重算。
+
+Author: Femo
+Date: 2026-03-10
+"""
+
+import sqlite3
+from typing import Dict, List, Any, Optional
+
+from app.db.helpers import get_static_conn, paper_id_from_q_id
+
+
+# 主观题满分 (与 submit_subjective 的 type_cfg 一致)，用于旧日志的及格判定
+SUBJECTIVE_MAX_SCORE = {"translation": 10, "writing_a": 10, "writing_b": 20}
+
+# 查询语句 (登记在 indexes.hot_queries，scripts/test_query_plans.py 检查查询计划)
+SECTION_ACCURACY_SQL = """
+    SELECT section_type, SUM(attempts) AS attempts, SUM(correct) AS correct, SUM(score_sum) AS score_sum
+    FROM answer_stats_daily
+    WHERE slot_id = ?
+    GROUP BY section_type
+    ORDER BY section_type
+"""
+YEAR_ACCURACY_SQL = """
+    SELECT substr(paper_id, 1, 4) AS year,
+           COUNT(*) AS questions, SUM(attempts) AS attempts,
+           SUM(correct) AS correct, SUM(last_correct) AS last_correct
+    FROM answer_stats_question
+    WHERE slot_id = ?
+    GROUP BY year
+    ORDER BY year DESC
+"""
+TIMELINE_SQL = """
+    SELECT day, SUM(attempts) AS attempts, SUM(correct) AS correct
+    FROM answer_stats_daily
+    WHERE slot_id = ? AND day >= date('now', 'localtime', ?)
+    GROUP BY day
+    ORDER BY day ASC
+"""
+QUESTION_STATS_SQL = """
+    SELECT q_id, attempts, correct, last_correct, last_score, last_at
+    FROM answer_stats_question
+    WHERE slot_id = ? AND paper_id = ?
+"""
+
+
+def rebuild_logs_sql(by_slot: bool) -> str:
+    sql = """
+        SELECT slot_id, q_id, paper_id, section_type, is_correct, score,
+               date(updated_at) AS day, updated_at
+        FROM answer_history_logs
+    """
+    if by_slot:
+        sql += " WHERE slot_id = ?"
+    return sql + " ORDER BY log_id ASC"
+
+
+def _rate(correct: int, attempts: int) -> float:
+    return round(correct / attempts, 3) if attempts else 0.0
+
+
+class AnalyticsService:
+    """统计汇总 — 增量维护 + 只读查询"""
+
+    # ---- 写入 (在 record_answer 的事务内调用，不 commit) ----
+
+    @staticmethod
+    def apply_attempt(
+        pconn: sqlite3.Connection,
+        slot_id: int,
+        q_id: str,
+        paper_id: str,
+        section_type: str,
+        is_correct: bool,
+        score: float,
+    ):
+        """一次作答 → 两条 UPSERT"""
+        correct = 1 if is_correct else 0
+        score = score or 0
+        pconn.execute("""
+            INSERT INTO answer_stats_daily (slot_id, day, section_type, attempts, correct, score_sum)
+            VALUES (?, date('now', 'localtime'), ?, 1, ?, ?)
+            ON CONFLICT(slot_id, day, section_type) DO UPDATE SET
+                attempts  = attempts + 1,
+                correct   = correct + excluded.correct,
+                score_sum = score_sum + excluded.score_sum
+        """, (slot_id, section_type, correct, score))
+        pconn.execute("""
+            INSERT INTO answer_stats_question
+            (slot_id, q_id, paper_id, section_type, attempts, correct, score_sum, last_correct, last_score, last_at)
+            VALUES (?, ?, ?, ?, 1, ?, ?, ?, ?, datetime('now', 'localtime'))
+            ON CONFLICT(slot_id, q_id) DO UPDATE SET
+                attempts     = attempts + 1,
+                correct      = correct + excluded.correct,
+                score_sum    = score_sum + excluded.score_sum,
+                last_correct = excluded.last_correct,
+                last_score   = excluded.last_score,
+                last_at      = excluded.last_at
+        """, (slot_id, q_id, paper_id, section_type, correct, score, correct, score))
+
+    # ---- 重建 (从原始日志) ----
+
+    def rebuild(self, pconn: sqlite3.Connection, slot_id: Optional[int] = None) -> Dict[str, int]:
+        """
+        清空并从 answer_history_logs 重算汇总表 (可限定单个 slot)。
+        旧日志缺 section_type / is_correct 时从题库与分数推断。
+        """
+        section_map = self._load_section_map()
+
+        daily: Dict[tuple, List[float]] = {}
+        per_q: Dict[tuple, Dict[str, Any]] = {}
+
+        params: tuple = (slot_id,) if slot_id is not None else ()
+
+        logs = 0
+        for r in pconn.execute(rebuild_logs_sql(slot_id is not None), params):
+            logs += 1
+            q_id = r["q_id"]
+            st = r["section_type"] or section_map.get(q_id) or _section_from_q_id(q_id)
+            score = r["score"] or 0
+            is_correct = r["is_correct"]
+            if is_correct is None:
+                is_correct = _infer_correct(st, score)
+            correct = 1 if is_correct else 0
+
+            d = daily.setdefault((r["slot_id"], r["day"], st), [0, 0, 0.0])
+            d[0] += 1
+            d[1] += correct
+            d[2] += score
+
+            q = per_q.setdefault((r["slot_id"], q_id), {
+                "paper_id": r["paper_id"] or paper_id_from_q_id(q_id),
+                "section_type": st, "attempts": 0, "correct": 0, "score_sum": 0.0,
+            })
+            q["attempts"] += 1
+            q["correct"] += correct
+            q["score_sum"] += score
+            q["last_correct"] = correct
+            q["last_score"] = score
+            q["last_at"] = r["updated_at"]
+
+        if slot_id is None:
+            pconn.execute("DELETE FROM answer_stats_daily")
+            pconn.execute("DELETE FROM answer_stats_question")
+        else:
+            pconn.execute("DELETE FROM answer_stats_daily WHERE slot_id = ?", (slot_id,))
+            pconn.execute("DELETE FROM answer_stats_question WHERE slot_id = ?", (slot_id,))
+
+        pconn.executemany(
+            "INSERT INTO answer_stats_daily (slot_id, day, section_type, attempts, correct, score_sum) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(k[0], k[1], k[2], v[0], v[1], v[2]) for k, v in daily.items()],
+        )
+        pconn.executemany("""
+            INSERT INTO answer_stats_question
+            (slot_id, q_id, paper_id, section_type, attempts, correct, score_sum, last_correct, last_score, last_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (k[0], k[1], v["paper_id"], v["section_type"], v["attempts"], v["correct"],
+             v["score_sum"], v["last_correct"], v["last_score"], v["last_at"])
+            for k, v in per_q.items()
+        ])
+        pconn.commit()
+
+        return {"logs": logs, "daily_rows": len(daily), "question_rows": len(per_q)}
+
+    @staticmethod
+    def _load_section_map() -> Dict[str, str]:
+        try:
+            with get_static_conn() as sconn:
+                rows = sconn.execute("SELECT q_id, section_type FROM questions").fetchall()
+            return {r["q_id"]: r["section_type"] for r in rows if r["section_type"]}
+        except sqlite3.Error:
+            return {}
+
+    # ---- 读取 (只读汇总表) ----
+
+    @staticmethod
+    def get_section_accuracy(pconn: sqlite3.Connection, slot_id: int) -> List[Dict[str, Any]]:
+        """按题型: 累计作答 / 正确率 / 平均分"""
+        rows = pconn.execute(SECTION_ACCURACY_SQL, (slot_id,)).fetchall()
+        return [
+            {
+                "section_type": r["section_type"],
+                "attempts": r["attempts"],
+                "correct": r["correct"],
+                "accuracy": _rate(r["correct"], r["attempts"]),
+                "avg_score": round(r["score_sum"] / r["attempts"], 2) if r["attempts"] else 0.0,
+            }
+            for r in rows
+        ]
+
+    @staticmethod
+    def get_year_accuracy(pconn: sqlite3.Connection, slot_id: int) -> List[Dict[str, Any]]:
+        """按年份 (paper_id 前缀): 题目覆盖数 / 作答 / 正确率"""
+        rows = pconn.execute(YEAR_ACCURACY_SQL, (slot_id,)).fetchall()
+        return [
+            {
+                "year": r["year"],
+                "questions": r["questions"],
+                "attempts": r["attempts"],
+                "accuracy": _rate(r["correct"], r["attempts"]),
+                "latest_accuracy": _rate(r["last_correct"], r["questions"]),
+            }
+            for r in rows
+        ]
+
+    @staticmethod
+    def get_timeline(pconn: sqlite3.Connection, slot_id: int, days: int = 30) -> List[Dict[str, Any]]:
+        """最近 N 天的每日作答量与正确率"""
+        rows = pconn.execute(TIMELINE_SQL, (slot_id, f"-{max(0, days - 1)} days")).fetchall()
+        return [
+            {"day": r["day"], "attempts": r["attempts"], "accuracy": _rate(r["correct"], r["attempts"])}
+            for r in rows
+        ]
+
+    @staticmethod
+    def get_question_stats(pconn: sqlite3.Connection, slot_id: int, paper_id: str) -> Dict[str, Dict[str, Any]]:
+        """单卷逐题统计: q_id → {attempts, correct, accuracy, last_correct, last_score, last_at}"""
+        rows = pconn.execute(QUESTION_STATS_SQL, (slot_id, paper_id)).fetchall()
+        return {
+            r["q_id"]: {
+                "attempts": r["attempts"],
+                "correct": r["correct"],
+                "accuracy": _rate(r["correct"], r["attempts"]),
+                "last_correct": bool(r["last_correct"]),
+                "last_score": r["last_score"],
+                "last_at": r["last_at"],
+            }
+            for r in rows
+        }
+
+
+def _section_from_q_id(q_id: str) -> str:
+    """'2023-eng1-reading_a-q21' → 'reading_a'"""
+    parts = (q_id or "").split("-")
+    return parts[2] if len(parts) >= 4 else "unknown"
+
+
+def _infer_correct(section_type: str, score: float) -> bool:
+    """旧日志无 is_correct: 客观题看得分，主观题沿用 60% 及格线"""
+    max_score = SUBJECTIVE_MAX_SCORE.get(section_type)
+    if max_score:
+        return score >= max_score * 0.6
+    return score > 0
+
+
+# 单例
+analytics_service = AnalyticsService()
@@ -9,9 +9,11 @@ Date: 2026-02-18
 import re
 import sqlite3
 from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
 
-from app.db.helpers import get_profile_conn, get_static_conn, get_user_hp, get_user_max_hp, ensure_auto_save
+from app.db.helpers import get_profile_conn, get_static_conn, ensure_auto_save
+from app.services.analytics_service import analytics_service
+from app.services.game_state_service import game_state_service
+from app.services.vocab_progress_service import vocab_progress_service, STATUS_PRIORITY
 
 
 # ---- 英语停用词（高频无意义词，不纳入记忆扫描）----
@@ -32,6 +34,17 @@ STOP_WORDS = frozenset({
     "also", "still", "even", "much", "many", "well", "back", "new",
 })
 
+# 查询语句 (登记在 indexes.hot_queries，scripts/test_query_plans.py 检查查询计划)
+RECENT_HISTORY_SQL = """
+    SELECT q_id, user_answer, is_correct, created_at
+    FROM exam_history
+    ORDER BY created_at DESC LIMIT 5
+"""
+
+
+def meanings_sql(n: int) -> str:
+    return f"SELECT word, meaning FROM dictionary WHERE word IN ({','.join('?' * n)})"
+
 
 def _tokenize(text: str) -> set:
     """分词：转小写，去标点，去停用词，返回去重词集"""
@@ -43,9 +56,10 @@ class MiaContextService:
     """记忆雷达 — 实时读取用户学习状态，构建上下文"""
 
     @staticmethod
-    def get_vocab_resonance(text_content: str) -> List[Dict[str, Any]]:
+    def get_vocab_resonance(text_content: str, slot_id: int = 0) -> List[Dict[str, Any]]:
         """
-        扫描文本中出现的单词，匹配 vocab_progress 表，返回有学习记录的词汇列表。
+        扫描文本中出现的单词，匹配当前存档的背词进度，返回有学习记录的词汇列表。
+        [Stage 50.0] 进度改读 user_vocab_memory (按 slot)，与复习结算写入同一份数据。
 
         返回格式:
         [
@@ -58,90 +72,49 @@ class MiaContextService:
         if not tokens:
             return []
 
-        results = []
-        now = datetime.utcnow()
-
         with get_profile_conn() as pconn:
             # 批量查: 只查有学习记录的词
-            placeholders = ",".join("?" for _ in tokens)
-            rows = pconn.execute(
-                f"""SELECT word, repetition, easiness_factor, interval,
-                           next_review, mistake_count, consecutive_correct
-                    FROM vocab_progress
-                    WHERE word IN ({placeholders})""",
-                list(tokens),
-            ).fetchall()
-
-        if not rows:
+            progress = vocab_progress_service.get_many(pconn, slot_id, tokens)
+
+        if not progress:
             return []
 
         # 查释义(从 static 库)
-        found_words = [r["word"] for r in rows]
+        found_words = list(progress)
         meanings_map = {}
         with get_static_conn() as sconn:
-            ph2 = ",".join("?" for _ in found_words)
-            mrows = sconn.execute(
-                f"SELECT word, meaning FROM dictionary WHERE word IN ({ph2})",
-                found_words,
-            ).fetchall()
+            mrows = sconn.execute(meanings_sql(len(found_words)), found_words).fetchall()
             for mr in mrows:
                 meanings_map[mr["word"]] = mr["meaning"]
 
-        for row in rows:
-            word = row["word"]
-            ef = row["easiness_factor"] or 2.5
-            reps = row["repetition"] or 0
-            mistakes = row["mistake_count"] or 0
-            consec = row["consecutive_correct"] or 0
-            next_rev = row["next_review"]
-
-            # 状态判定
-            is_due = False
-            if next_rev:
-                try:
-                    next_dt = datetime.fromisoformat(next_rev.replace("Z", "+00:00"))
-                    is_due = next_dt <= now
-                except (ValueError, TypeError):
-                    pass
-
-            if ef < 2.0 or mistakes >= 2:
-                status = "weak"       # 死对头
-                history = f"错过{mistakes}次, EF={ef:.1f}"
-            elif reps >= 5 and consec >= 3:
-                status = "mastered"   # 老朋友
-                history = f"已复习{reps}次, 连对{consec}次"
-            elif is_due:
-                status = "due"        # 急需复习
-                history = f"已过期, 上次复习距今较久"
-            else:
-                status = "learning"   # 正在学
-                history = f"复习{reps}次, EF={ef:.1f}"
-
+        results = []
+        for word, row in progress.items():
             meaning_short = meanings_map.get(word, "")
             if meaning_short:
                 # 取第一行释义
                 meaning_short = meaning_short.split("\n")[0][:40]
 
+            state = vocab_progress_service.classify(row)
             results.append({
                 "word": word,
-                "status": status,
-                "ef": ef,
-                "reps": reps,
-                "mistakes": mistakes,
+                "status": state["status"],
+                "ef": state["ef"],
+                "reps": state["reps"],
+                "mistakes": state["mistakes"],
                 "meaning": meaning_short,
-                "history": history,
+                "history": state["history"],
             })
 
         # 按优先级排序: weak > due > learning > mastered
-        priority = {"weak": 0, "due": 1, "learning": 2, "mastered": 3}
-        results.sort(key=lambda x: priority.get(x["status"], 9))
+        results.sort(key=lambda x: STATUS_PRIORITY.get(x["status"], 9))
 
         return results
 
     @staticmethod
-    def get_user_status_snapshot() -> Dict[str, Any]:
+    def get_user_status_snapshot(slot_id: int = 0) -> Dict[str, Any]:
         """
         获取用户当前 RPG 状态快照。
+        [Stage 38.0] section_accuracy 读统计汇总表，不扫描答题日志。
 
         返回:
         {
@@ -150,29 +123,28 @@ class MiaContextService:
           "recent_history": [...],   # 近5条答题记录
           "total_vocab_learned": 61, # 已背词数
           "weak_vocab_count": 3,     # 死对头数
+          "section_accuracy": [...], # 按题型累计正确率
         }
         """
         snapshot = {
             "hp": 100, "max_hp": 100, "hp_pct": 100.0,
             "recent_accuracy": 1.0, "recent_history": [],
             "total_vocab_learned": 0, "weak_vocab_count": 0,
+            "section_accuracy": [],
         }
 
         with get_profile_conn() as pconn:
             ensure_auto_save(pconn)
-            hp = get_user_hp(pconn)
-            max_hp = get_user_max_hp(pconn)
+            state = game_state_service.peek(slot_id)
+            hp = state["hp"]
+            max_hp = state["max_hp"]
             snapshot["hp"] = hp
             snapshot["max_hp"] = max_hp
             snapshot["hp_pct"] = round(hp / max(max_hp, 1) * 100, 1)
 
             # 近5次答题记录
             try:
-                history = pconn.execute(
-                    """SELECT q_id, user_answer, is_correct, created_at
-                       FROM exam_history
-                       ORDER BY created_at DESC LIMIT 5"""
-                ).fetchall()
+                history = pconn.execute(RECENT_HISTORY_SQL).fetchall()
                 snapshot["recent_history"] = history
                 if history:
                     correct_count = sum(1 for h in history if h.get("is_correct"))
@@ -180,16 +152,17 @@ class MiaContextService:
             except Exception:
                 pass  # 表可能不存在
 
-            # 词汇统计
+            # 词汇统计 (当前存档)
+            try:
+                vocab_stats = vocab_progress_service.summary(pconn, slot_id)
+                snapshot["total_vocab_learned"] = vocab_stats["total"]
+                snapshot["weak_vocab_count"] = vocab_stats["weak"]
+            except Exception:
+                pass
+
+            # 题型正确率 (汇总表)
             try:
-                vocab_stats = pconn.execute(
-                    """SELECT COUNT(*) as total,
-                              SUM(CASE WHEN easiness_factor < 2.0 OR mistake_count >= 2 THEN 1 ELSE 0 END) as weak
-                       FROM vocab_progress"""
-                ).fetchone()
-                if vocab_stats:
-                    snapshot["total_vocab_learned"] = vocab_stats["total"] or 0
-                    snapshot["weak_vocab_count"] = vocab_stats["weak"] or 0
+                snapshot["section_accuracy"] = analytics_service.get_section_accuracy(pconn, slot_id)
             except Exception:
                 pass
 
@@ -0,0 +1,212 @@
+"""
+ConversationService — Mia 会话与消息的读写
+消息只通过 insert_message 写入，同一事务内维护 conversations 上的
+last_message_preview / message_count / updated_at，会话列表因此是
+idx_conversations_updated 上的一次范围扫描，与消息总量无关。
+[Stage 46.0] messages_fts 也在 insert_message 中同步 (无触发器)；
+目前没有删改消息的代码路径；库外直接改过 messages 则用 helpers.rebuild_messages_fts 重建。
+
+Author: Femo
+Date: 2026-03-13
+"""
+
+import sqlite3
+from typing import Dict, List, Any, Optional
+
+from app.db import fts
+from app.db.helpers import MESSAGE_PREVIEW_LEN
+
+
+# 会话列表每页上限
+MAX_PAGE_SIZE = 100
+
+
+# 查询语句构造 (登记在 indexes.hot_queries，scripts/test_query_plans.py 检查查询计划)
+def list_conversations_sql(keyset: bool) -> str:
+    """keyset=True 时带 (updated_at, id) 翻页游标条件"""
+    sql = """
+        SELECT id, title, updated_at, last_message_preview, message_count
+        FROM conversations
+    """
+    if keyset:
+        # 前一个条件让 SQLite 在索引上做范围定位 (而不是从头扫描)
+        sql += " WHERE updated_at <= ? AND (updated_at < ? OR id < ?)"
+    return sql + " ORDER BY updated_at DESC, id DESC LIMIT ?"
+
+
+def messages_page_sql(before: bool) -> str:
+    """图片不随消息返回，只给 has_image 标记"""
+    sql = """
+        SELECT id, role, content, created_at,
+               (image_base64 IS NOT NULL AND image_base64 != '') AS has_image
+        FROM messages
+        WHERE conversation_id = ?
+    """
+    if before:
+        sql += " AND id < ?"
+    return sql + " ORDER BY id DESC LIMIT ?"
+
+
+def search_messages_sql(by_role: bool, after: bool) -> str:
+    """by_role: 限定角色；after: 带 (score, rowid) 续页游标"""
+    sql = """
+        SELECT h.score, m.id, m.conversation_id, m.role, m.content, m.created_at,
+               c.title AS conversation_title
+        FROM (
+            SELECT rowid AS id, rank AS score FROM messages_fts WHERE messages_fts MATCH ?
+        ) h
+        JOIN messages m ON m.id = h.id
+        LEFT JOIN conversations c ON c.id = m.conversation_id
+        WHERE 1 = 1
+    """
+    if by_role:
+        sql += " AND m.role = ?"
+    if after:
+        sql += " AND (h.score > ? OR (h.score = ? AND h.id > ?))"
+    return sql + " ORDER BY h.score, h.id LIMIT ?"
+
+
+class ConversationService:
+    """会话 / 消息存取"""
+
+    @staticmethod
+    def insert_message(
+        conn: sqlite3.Connection,
+        conversation_id: int,
+        role: str,
+        content: str,
+        created_at: str,
+        image_base64: Optional[str] = None,
+    ) -> int:
+        """写入一条消息并更新会话摘要 (不 commit，由调用方提交)；返回消息 id"""
+        cursor = conn.execute(
+            "INSERT INTO messages (conversation_id, role, content, image_base64, created_at) VALUES (?, ?, ?, ?, ?)",
+            (conversation_id, role, content, image_base64, created_at),
+        )
+        conn.execute("""
+            UPDATE conversations
+            SET last_message_preview = ?,
+                message_count = COALESCE(message_count, 0) + 1,
+                updated_at = ?
+            WHERE id = ?
+        """, ((content or "")[:MESSAGE_PREVIEW_LEN], created_at, conversation_id))
+        conn.execute(
+            "INSERT INTO messages_fts(rowid, body) VALUES (?, ?)",
+            (cursor.lastrowid, fts.segment(content)),
+        )
+        return cursor.lastrowid
+
+    @staticmethod
+    def list_conversations(
+        conn: sqlite3.Connection,
+        limit: int = 50,
+        before_updated_at: Optional[str] = None,
+        before_id: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        最近活跃在前；翻页游标为上一页最后一条的 (updated_at, id)
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        keyset = before_updated_at is not None and before_id is not None
+        params: list = []
+        if keyset:
+            params += [before_updated_at, before_updated_at, before_id]
+        params.append(limit)
+        return conn.execute(list_conversations_sql(keyset), params).fetchall()
+
+    @staticmethod
+    def get_conversation(conn: sqlite3.Connection, conversation_id: int) -> Optional[Dict[str, Any]]:
+        return conn.execute(
+            "SELECT id, title, created_at, message_count FROM conversations WHERE id = ?",
+            (conversation_id,),
+        ).fetchone()
+
+    @staticmethod
+    def get_messages_page(
+        conn: sqlite3.Connection,
+        conversation_id: int,
+        limit: int = 30,
+        before_id: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        [Stage 45.0] 消息分页: 最新一页优先，before_id 加载更早的消息
+        图片不随消息返回，只给 has_image 标记 (走 idx_messages_conv_msg，多取一行判断 has_more)
+        返回: {"messages": [...按 id 升序], "has_more": bool, "next_before_id": int | None}
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        params: list = [conversation_id]
+        if before_id is not None:
+            params.append(before_id)
+        params.append(limit + 1)
+
+        rows = conn.execute(messages_page_sql(before_id is not None), params).fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        rows.reverse()
+        return {
+            "messages": rows,
+            "has_more": has_more,
+            "next_before_id": rows[0]["id"] if has_more and rows else None,
+        }
+
+    @staticmethod
+    def get_message_image(conn: sqlite3.Connection, message_id: int) -> Optional[str]:
+        row = conn.execute("SELECT image_base64 FROM messages WHERE id = ?", (message_id,)).fetchone()
+        return row["image_base64"] if row else None
+
+    @staticmethod
+    def search_messages(
+        conn: sqlite3.Connection,
+        q: str,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        role: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        [Stage 46.0] 全文检索消息 (messages_fts，bm25 相关度优先)
+        游标为上一页最后一条的 "score:rowid"，按 (score, rowid) 做 keyset 续页。
+        返回: {"results": [...], "next_cursor": str | None}
+        """
+        match = fts.build_match(q)
+        if not match:
+            return {"results": [], "next_cursor": None}
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+        params: list = [match]
+        if role:
+            params.append(role)
+        if cursor:
+            try:
+                score, _, rowid = cursor.rpartition(":")
+                after_score, after_id = float(score), int(rowid)
+            except ValueError:
+                raise ValueError(f"Invalid cursor: {cursor}")
+            params += [after_score, after_score, after_id]
+        params.append(limit + 1)
+
+        rows = conn.execute(search_messages_sql(bool(role), bool(cursor)), params).fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        results = []
+        for r in rows:
+            snippet, highlights = fts.make_snippet(r["content"], fts.highlight_spans(r["content"], q))
+            results.append({
+                "message_id": r["id"],
+                "conversation_id": r["conversation_id"],
+                "conversation_title": r["conversation_title"] or "New Chat",
+                "role": r["role"],
+                "snippet": snippet,
+                "highlights": [list(span) for span in highlights],
+                "score": r["score"],
+                "created_at": str(r["created_at"]),
+            })
+        last = rows[-1] if rows else None
+        return {
+            "results": results,
+            "next_cursor": f"{last['score']!r}:{last['id']}" if has_more and last else None,
+        }
+
+
+# 单例
+conversation_service = ConversationService()
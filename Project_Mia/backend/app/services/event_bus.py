@@ -0,0 +1,103 @@
+"""
+EventBus — 按 slot 的进程内发布 / 订阅 (SSE 推送用)
+事件类型:
+  - hp_change      HP 变化
+  - level_up       升级
+  - mood_change    Mia 情绪档位变化 (由 HP 比例决定)
+  - vocab_progress 单词复习结算
+每个订阅者一条有界队列；消费太慢时丢弃最旧事件并累计丢弃数，
+由 SSE 流发出 resync 事件提示前端整体刷新一次。
+
+Author: Femo
+Date: 2026-03-12
+"""
+
+import asyncio
+import itertools
+import threading
+from typing import Dict, Any, Optional, Set
+
+
+# 单个订阅者最多缓存的事件数
+QUEUE_SIZE = 64
+
+
+class Subscriber:
+    """一个 SSE 连接"""
+
+    def __init__(self, slot_id: int, maxsize: int = QUEUE_SIZE):
+        self.slot_id = slot_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def offer(self, message: Dict[str, Any]):
+        """入队 (必须在订阅者所在 loop 中调用)；队列满则丢弃最旧的一条"""
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait(message)
+
+    def take_dropped(self) -> int:
+        dropped, self.dropped = self.dropped, 0
+        return dropped
+
+
+class EventBus:
+    """进程内事件总线 — publish 可在任意线程调用"""
+
+    def __init__(self):
+        self._subscribers: Dict[int, Set[Subscriber]] = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def subscribe(self, slot_id: int) -> Subscriber:
+        """在事件循环中调用 (SSE 路由)"""
+        sub = Subscriber(slot_id)
+        with self._lock:
+            self._subscribers.setdefault(slot_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber):
+        with self._lock:
+            subs = self._subscribers.get(sub.slot_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[sub.slot_id]
+
+    def subscriber_count(self, slot_id: Optional[int] = None) -> int:
+        with self._lock:
+            if slot_id is None:
+                return sum(len(s) for s in self._subscribers.values())
+            return len(self._subscribers.get(slot_id, ()))
+
+    def publish(self, slot_id: int, event: str, data: Dict[str, Any]):
+        """向 slot 的所有订阅者广播；无订阅者时几乎零开销"""
+        with self._lock:
+            subs = list(self._subscribers.get(slot_id, ()))
+        if not subs:
+            return
+
+        message = {"id": next(self._ids), "event": event, "data": data}
+        try:
+            current = asyncio.get_running_loop()
+        except RuntimeError:
+            current = None
+
+        for sub in subs:
+            if sub.loop is current:
+                sub.offer(message)
+                continue
+            try:
+                sub.loop.call_soon_threadsafe(sub.offer, message)
+            except RuntimeError:
+                # 订阅者的 loop 已关闭 (连接早已断开)
+                self.unsubscribe(sub)
+
+
+# 单例
+event_bus = EventBus()
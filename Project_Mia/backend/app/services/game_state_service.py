@@ -0,0 +1,254 @@
+"""
+GameStateService — 存档数值 (HP / EXP / 等级 / 情绪) 的内存权威副本
+- 每个 slot 一份常驻状态，首次访问从 game_saves 加载
+- 所有变化 (扣血 / 回血 / 加经验 / 升级 / 前端覆盖) 只走 apply()，按 slot 串行
+- 写回采用 write-behind: 脏 slot 合并为一次 executemany，最长延迟 FLUSH_DELAY 秒
+- 关停时 (router shutdown / atexit) 同步落盘
+- 变化同时发布到 event_bus (hp_change / level_up / mood_change)
+
+Author: Femo
+Date: 2026-03-12
+"""
+
+import asyncio
+import atexit
+import threading
+import weakref
+from typing import Dict, Any, Optional, Set
+
+from app.db.helpers import get_profile_conn, ensure_auto_save
+from app.services.event_bus import event_bus
+from app.services.game_mechanics import game_mechanics
+
+
+# 写回最长延迟 (秒)
+FLUSH_DELAY = 2.0
+
+# 前端可覆盖的字段 (/api/user/save)
+ASSIGNABLE_FIELDS = ("hp", "max_hp", "level", "exp", "mia_mood")
+
+# 查询语句 (登记在 indexes.hot_queries，scripts/test_query_plans.py 检查查询计划)
+LOAD_ROW_SQL = "SELECT hp, max_hp, level, exp, mia_mood FROM game_saves WHERE slot_id = ?"
+
+
+class SlotState:
+    """单个存档的数值状态"""
+
+    __slots__ = ("slot_id", "hp", "max_hp", "level", "exp", "mia_mood")
+
+    def __init__(self, slot_id: int, hp=100, max_hp=100, level=1, exp=0, mia_mood=None):
+        self.slot_id = slot_id
+        self.hp = hp
+        self.max_hp = max_hp
+        self.level = level
+        self.exp = exp
+        self.mia_mood = mia_mood
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "hp": self.hp,
+            "max_hp": self.max_hp,
+            "level": self.level,
+            "exp": self.exp,
+            "mia_mood": self.mia_mood,
+        }
+
+
+class GameStateService:
+    """存档数值 — 内存读写 + 批量写回"""
+
+    def __init__(self, flush_delay: float = FLUSH_DELAY):
+        self.flush_delay = flush_delay
+        self._states: Dict[int, SlotState] = {}
+        self._dirty: Set[int] = set()
+        # 保护 _states / _dirty 的短临界区 (flush 在定时器线程执行)
+        self._mutex = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        # asyncio.Lock 绑定事件循环，按 loop 分组 (测试客户端每个请求可能是新 loop)
+        self._locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[int, asyncio.Lock]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    # ---- 加载 ----
+
+    @staticmethod
+    def _load_row(slot_id: int) -> SlotState:
+        with get_profile_conn() as conn:
+            ensure_auto_save(conn)
+            conn.execute("INSERT OR IGNORE INTO game_saves (slot_id) VALUES (?)", (slot_id,))
+            conn.commit()
+            row = conn.execute(LOAD_ROW_SQL, (slot_id,)).fetchone()
+        if not row:
+            return SlotState(slot_id)
+        return SlotState(
+            slot_id,
+            hp=row["hp"] if row["hp"] is not None else 100,
+            max_hp=row["max_hp"] or 100,
+            level=row["level"] or 1,
+            exp=row["exp"] or 0,
+            mia_mood=row["mia_mood"],
+        )
+
+    def _ensure_loaded(self, slot_id: int) -> SlotState:
+        state = self._states.get(slot_id)
+        if state is None:
+            loaded = self._load_row(slot_id)
+            with self._mutex:
+                # 并发加载时保留先到的那份
+                state = self._states.setdefault(slot_id, loaded)
+        return state
+
+    def _lock_for(self, slot_id: int) -> asyncio.Lock:
+        locks = self._locks.setdefault(asyncio.get_running_loop(), {})
+        lock = locks.get(slot_id)
+        if lock is None:
+            lock = locks[slot_id] = asyncio.Lock()
+        return lock
+
+    # ---- 读取 (纯内存) ----
+
+    async def get(self, slot_id: int) -> Dict[str, Any]:
+        state = self._states.get(slot_id)
+        if state is None:
+            async with self._lock_for(slot_id):
+                state = self._states.get(slot_id) or await asyncio.to_thread(self._ensure_loaded, slot_id)
+        with self._mutex:
+            return state.to_dict()
+
+    def peek(self, slot_id: int) -> Dict[str, Any]:
+        """同步读取 (供同步代码路径如 context_service 使用)"""
+        state = self._ensure_loaded(slot_id)
+        with self._mutex:
+            return state.to_dict()
+
+    def cached(self, slot_id: int) -> Optional[Dict[str, Any]]:
+        """仅返回已加载的状态 (存档列表等只需覆盖未落盘数值的场景)"""
+        state = self._states.get(slot_id)
+        if state is None:
+            return None
+        with self._mutex:
+            return state.to_dict()
+
+    # ---- 写入 (唯一入口) ----
+
+    async def apply(
+        self,
+        slot_id: int,
+        hp: float = 0,
+        exp: int = 0,
+        full_heal: bool = False,
+        assign: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        对 slot 应用一次变化，返回变化后的状态:
+          hp        HP 增量 (负数为伤害)，结果夹在 [0, max_hp]
+          exp       EXP 增量，溢出自动连续升级 (每级所需 = 等级 × 100，升级回满血)
+          full_heal 直接回满
+          assign    先整体覆盖的字段 (前端 /save 同步)，随后同样结算升级
+        返回: {hp, max_hp, level, exp, mia_mood, hp_change, leveled_up, levels_gained}
+        """
+        async with self._lock_for(slot_id):
+            state = self._states.get(slot_id) or await asyncio.to_thread(self._ensure_loaded, slot_id)
+
+            with self._mutex:
+                if assign:
+                    for field in ASSIGNABLE_FIELDS:
+                        if field in assign and assign[field] is not None:
+                            setattr(state, field, assign[field])
+
+                hp_before = state.hp
+                mood_before = game_mechanics.get_mia_mood(state.hp, state.max_hp)["mood"]
+                if full_heal:
+                    state.hp = state.max_hp
+                if hp:
+                    state.hp = max(0, min(state.max_hp, state.hp + hp))
+
+                levels_gained = 0
+                if exp:
+                    state.exp += exp
+                # 经验溢出连续升级 (assign 传入的经验同样结算)
+                while state.exp >= state.level * 100:
+                    state.exp -= state.level * 100
+                    state.level += 1
+                    state.hp = state.max_hp
+                    levels_gained += 1
+
+                result = state.to_dict()
+                self._dirty.add(slot_id)
+                self._schedule_flush()
+
+        if levels_gained:
+            print(f"[game_state] Slot {slot_id} Leveled Up! Lv.{result['level']}, HP Restored.")
+
+        result["hp_change"] = result["hp"] - hp_before
+        result["leveled_up"] = levels_gained > 0
+        result["levels_gained"] = levels_gained
+        self._publish(slot_id, result, mood_before)
+        return result
+
+    @staticmethod
+    def _publish(slot_id: int, result: Dict[str, Any], mood_before: str):
+        """[Stage 42.0] 状态变化推送到 SSE 事件总线"""
+        state = {k: result[k] for k in ASSIGNABLE_FIELDS}
+        if result["hp_change"]:
+            event_bus.publish(slot_id, "hp_change", {**state, "delta": result["hp_change"]})
+        if result["leveled_up"]:
+            event_bus.publish(slot_id, "level_up", {**state, "levels_gained": result["levels_gained"]})
+        mood = game_mechanics.get_mia_mood(result["hp"], result["max_hp"])["mood"]
+        if mood != mood_before:
+            event_bus.publish(slot_id, "mood_change", {"mood": mood, "previous": mood_before, "hp": result["hp"]})
+
+    def invalidate(self, slot_id: int):
+        """删档后丢弃内存状态与未落盘的变化"""
+        with self._mutex:
+            self._states.pop(slot_id, None)
+            self._dirty.discard(slot_id)
+
+    # ---- 写回 ----
+
+    def _schedule_flush(self):
+        """调用方持有 _mutex；一批变化只挂一个定时器，保证最长延迟"""
+        if self._timer is None:
+            self._timer = threading.Timer(self.flush_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> int:
+        """把所有脏 slot 写回 game_saves (一次事务)，返回写入条数"""
+        with self._mutex:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            dirty = self._dirty
+            self._dirty = set()
+            rows = [
+                (s.hp, s.max_hp, s.level, s.exp, s.mia_mood, s.slot_id)
+                for s in (self._states.get(sid) for sid in dirty)
+                if s is not None
+            ]
+        if not rows:
+            return 0
+
+        try:
+            with get_profile_conn() as conn:
+                conn.executemany("""
+                    UPDATE game_saves
+                    SET hp = ?, max_hp = ?, level = ?, exp = ?, mia_mood = ?,
+                        updated_at = datetime('now', 'localtime')
+                    WHERE slot_id = ?
+                """, rows)
+                conn.commit()
+        except Exception as e:
+            print(f"[game_state] Flush failed, will retry: {e}")
+            with self._mutex:
+                self._dirty.update(r[-1] for r in rows)
+                self._schedule_flush()
+            return 0
+        return len(rows)
+
+
+# 单例
+game_state_service = GameStateService()
+
+# 进程退出兜底 (正常关停由 user router 的 shutdown 事件落盘)
+atexit.register(game_state_service.flush)
@@ -0,0 +1,150 @@
+"""
+ImageService — 题目配图归一化 (导入期一次性处理)
+原始配图多为扫描 / 截图，尺寸与格式不一 (数 MB 的 PNG 常见)，直接入库会:
+  - 每次请求试卷都随 payload 传输整张原图
+  - 批改时原图送入视觉模型，按像素计费且上传慢
+导入时统一处理:
+  1. 长边限制到 MAX_EDGE (视觉模型的有效分辨率上限，再大无收益)
+  2. 透明通道铺白底，重编码为 WebP (Pillow 不支持时回退 JPEG)
+  3. 额外生成 THUMB_EDGE 缩略图供前端列表 / 预览
+  4. 有损编码反而更大时 (线稿 / 漫画类配图常见) 改试无损编码；仍不如原图且无需缩放则保留原图
+Pillow 为可选依赖: 未安装时原样保留，只记录字节数。
+
+Author: Femo
+Date: 2026-03-19
+"""
+
+import base64
+import io
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # pragma: no cover - 可选依赖
+    Image = None
+
+
+class ImageService:
+    """配图 → 归一化 data URI + 缩略图 + 尺寸 / 字节数"""
+
+    MAX_EDGE = 1536
+    THUMB_EDGE = 320
+    QUALITY = 82
+    THUMB_QUALITY = 70
+
+    def __init__(self):
+        self.available = Image is not None
+        self.webp = self.available and features.check("webp")
+
+    # ------------------------------------------------------------------
+    #  data URI
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def to_data_uri(data: bytes, mime: str) -> str:
+        return f"data:{mime};base64,{base64.b64encode(data).decode('ascii')}"
+
+    @staticmethod
+    def from_data_uri(value: str) -> Tuple[bytes, Optional[str]]:
+        """data URI 或裸 base64 → (字节, mime)；裸 base64 的 mime 为 None"""
+        mime = None
+        if value.startswith("data:") and "," in value:
+            header, value = value.split(",", 1)
+            mime = header[5:].split(";", 1)[0] or None
+        return base64.b64decode(value), mime
+
+    @staticmethod
+    def mime_of(value: str, default: str = "image/jpeg") -> str:
+        """data URI 声明的 mime；裸 base64 返回 default"""
+        if value.startswith("data:"):
+            return value[5:].split(";", 1)[0].split(",", 1)[0] or default
+        return default
+
+    # ------------------------------------------------------------------
+    #  归一化
+    # ------------------------------------------------------------------
+
+    def _encode(self, img, quality: int, lossless: bool = False) -> Tuple[bytes, str]:
+        buf = io.BytesIO()
+        if self.webp:
+            img.save(buf, "WEBP", quality=quality, method=4, lossless=lossless)
+            return buf.getvalue(), "image/webp"
+        if lossless:
+            img.save(buf, "PNG", optimize=True)
+            return buf.getvalue(), "image/png"
+        img.save(buf, "JPEG", quality=quality, optimize=True, progressive=True)
+        return buf.getvalue(), "image/jpeg"
+
+    @staticmethod
+    def _flatten(img):
+        """透明通道铺白底，其余模式统一转 RGB"""
+        if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+            rgba = img.convert("RGBA")
+            canvas = Image.new("RGB", rgba.size, (255, 255, 255))
+            canvas.paste(rgba, mask=rgba.getchannel("A"))
+            return canvas
+        return img.convert("RGB") if img.mode != "RGB" else img
+
+    def normalize(self, data: bytes, mime: Optional[str] = None) -> Dict[str, Any]:
+        """
+        原图字节 → questions 表配图列
+
+        Returns:
+            {"image_base64", "image_thumb_base64", "image_width", "image_height",
+             "image_bytes", "image_thumb_bytes", "original_bytes"}
+            Pillow 不可用或无法识别时 image_base64 为原图，缩略图 / 尺寸为 None
+        """
+        result = {
+            "image_base64": self.to_data_uri(data, mime or "image/jpeg"),
+            "image_thumb_base64": None,
+            "image_width": None,
+            "image_height": None,
+            "image_bytes": len(data),
+            "image_thumb_bytes": None,
+            "original_bytes": len(data),
+        }
+        if not self.available:
+            return result
+        try:
+            img = Image.open(io.BytesIO(data))
+            img.load()
+        except Exception as e:
+            print(f"[image] unreadable image ({len(data)} bytes): {e}")
+            return result
+
+        src_mime = Image.MIME.get(img.format) or mime or "image/jpeg"
+        src_size = img.size
+        img = self._flatten(ImageOps.exif_transpose(img))
+        if max(img.size) > self.MAX_EDGE:
+            img.thumbnail((self.MAX_EDGE, self.MAX_EDGE), Image.LANCZOS)
+
+        encoded, out_mime = self._encode(img, self.QUALITY)
+        if len(encoded) >= len(data):
+            encoded, out_mime = min(
+                (encoded, out_mime), self._encode(img, self.QUALITY, lossless=True),
+                key=lambda c: len(c[0]),
+            )
+        if img.size == src_size and len(encoded) >= len(data):
+            encoded, out_mime = data, src_mime
+
+        thumb = img.copy()
+        thumb.thumbnail((self.THUMB_EDGE, self.THUMB_EDGE), Image.LANCZOS)
+        thumb_bytes, thumb_mime = self._encode(thumb, self.THUMB_QUALITY)
+
+        result.update({
+            "image_base64": self.to_data_uri(encoded, out_mime),
+            "image_thumb_base64": self.to_data_uri(thumb_bytes, thumb_mime),
+            "image_width": img.size[0],
+            "image_height": img.size[1],
+            "image_bytes": len(encoded),
+            "image_thumb_bytes": len(thumb_bytes),
+        })
+        return result
+
+    def normalize_data_uri(self, value: str) -> Dict[str, Any]:
+        data, mime = self.from_data_uri(value)
+        return self.normalize(data, mime)
+
+
+# 单例
+image_service = ImageService()
@@ -10,11 +10,14 @@ Author: Femo
 Date: 2026-02-18
 """
 
+from contextlib import aclosing
 from typing import Optional, Dict, Any
 import json
 import re
 import httpx
+from app.core import metrics
 from app.core.config import settings
+from app.services.image_service import image_service
 
 
 class LLMService:
@@ -70,6 +73,26 @@ class LLMService:
         # Added default None for image_base64 just in case, though it's already in sig
     ):
         """Streaming generator that supports conversation history"""
+        # [Stage 48.0] queue wait / 首 token / 总耗时 / token 数埋点
+        with metrics.llm_span("stream", self.provider) as span:
+            async with aclosing(self._provider_stream(
+                span, prompt, image_base64, system_prompt, temperature, max_tokens, history
+            )) as chunks:
+                async for chunk in chunks:
+                    span.token()
+                    yield chunk
+
+    async def _provider_stream(
+        self,
+        span: "metrics.LLMSpan",
+        prompt: str,
+        image_base64: Optional[str],
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        history: Optional[list],
+    ):
+        """按 provider 发起流式请求；服务端开始响应时调用 span.opened()"""
         history = history or []
         
         if self.provider == "openai":
@@ -107,6 +130,7 @@ class LLMService:
                 max_tokens=max_tokens,
                 stream=True
             )
+            span.opened()
             async for chunk in stream:
                 content = chunk.choices[0].delta.content or ""
                 if content:
@@ -162,7 +186,8 @@ class LLMService:
                 
                 user_parts.append({
                     "inlineData": {
-                        "mimeType": "image/jpeg",
+                        # 导入时配图已重编码 (多为 WebP)，按 data URI 声明的类型传
+                        "mimeType": image_service.mime_of(image_base64),
                         "data": raw_b64
                     }
                 })
@@ -178,6 +203,7 @@ class LLMService:
             async with httpx.AsyncClient() as client:
                 async with client.stream("POST", url, json=payload, headers=headers, timeout=60.0) as resp:
                     resp.raise_for_status()
+                    span.opened()
                     async for line in resp.aiter_lines():
                         if line.startswith("data:"):
                             try:
@@ -213,13 +239,17 @@ class LLMService:
 
         if self.provider == "openai":
             try:
-                resp = await self.client.chat.completions.create(
-                    model=self.model,
-                    messages=msgs,
-                    temperature=temperature,
-                    max_tokens=max_tokens,
-                    stream=False
-                )
+                with metrics.llm_span("block", self.provider) as span:
+                    resp = await self.client.chat.completions.create(
+                        model=self.model,
+                        messages=msgs,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        stream=False
+                    )
+                    span.opened()
+                    usage = getattr(resp, "usage", None)
+                    span.token(getattr(usage, "completion_tokens", None) or 1)
                 return resp.choices[0].message.content or ""
             except Exception as e:
                 with open("llm_debug.log", "a") as f:
@@ -0,0 +1,233 @@
+"""
+PaperService — 试卷结构组装
+题库只读：每道题解析一次为「片段」(前端 q_data + 所属题型/分组/文章/图片)，按试卷常驻内存。
+get_exam_detail 与错题重练共用 assemble_sections，输出同一 payload 格式。
+
+Author: Femo
+Date: 2026-03-11
+"""
+
+import json
+import sqlite3
+import threading
+from typing import Dict, List, Any, Iterable, Optional
+
+from app.db.helpers import get_static_conn
+
+
+# reading_b 默认 A-G 选项 (7选5题型)
+READING_B_DEFAULT_OPTIONS = {k: k for k in "ABCDEFG"}
+
+
+# 查询语句构造 (登记在 indexes.hot_queries，scripts/test_query_plans.py 检查查询计划)
+def fragments_sql(n: int) -> str:
+    """n 份试卷的题目片段"""
+    return f"""
+        SELECT q_id, paper_id, q_type, section_type, group_name, question_number,
+               passage_text, content, options_json, score, image_base64
+        FROM questions
+        WHERE paper_id IN ({",".join("?" * n)})
+        ORDER BY paper_id, question_number
+    """
+
+
+def mistakes_sql(by_paper: bool) -> str:
+    sql = "SELECT q_id, paper_id FROM mistake_questions WHERE slot_id = ?"
+    return sql + " AND paper_id = ?" if by_paper else sql
+
+
+def _parse_options(raw, section_type: str):
+    """解析选项；reading_b 如果 DB 中无选项则兜底 A-G"""
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except (ValueError, TypeError):
+            raw = None
+    if raw is None and section_type == "reading_b":
+        raw = READING_B_DEFAULT_OPTIONS
+    return raw
+
+
+def _build_fragment(r: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "paper_id": r["paper_id"],
+        "section_type": r["section_type"],
+        "group_name": r["group_name"],
+        "passage": r["passage_text"],
+        "image": r["image_base64"],
+        "q_data": {
+            "q_id": r["q_id"],
+            "question_number": r["question_number"],
+            "content": r["content"],
+            "options": _parse_options(r["options_json"], r["section_type"]),
+            "q_type": r["q_type"],
+            "score": r["score"],
+        },
+    }
+
+
+def _qnum(q: Dict[str, Any]) -> int:
+    return q["question_number"] or 0
+
+
+def assemble_sections(fragments: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    片段列表 → 前端 sections 结构
+    片段来自多份试卷时 (错题重练)，阅读按 (试卷, 分组) 分组并在组名前标注试卷，
+    完形 / 翻译的文章按试卷顺序拼接。片段中的 q_data 为共享缓存，只读。
+    """
+    fragments = list(fragments)
+    multi_paper = len({f["paper_id"] for f in fragments}) > 1
+
+    sections = {
+        "use_of_english": None,
+        "reading_a": [],
+        "reading_b": [],
+        "translation": None,
+        "writing_a": None,
+        "writing_b": None,
+    }
+    grouped_reading: Dict[str, Dict[tuple, Dict[str, Any]]] = {}
+    passages: Dict[str, Dict[str, str]] = {"use_of_english": {}, "translation": {}}
+
+    for f in fragments:
+        st = f["section_type"]
+        q_data = f["q_data"]
+
+        if st in ("use_of_english", "translation"):
+            if not sections[st]:
+                sections[st] = {"passage": None, "questions": []}
+            passages[st].setdefault(f["paper_id"], f["passage"])
+            sections[st]["questions"].append(q_data)
+
+        elif st in ("reading_a", "reading_b"):
+            gn = f["group_name"] or "Text 1"
+            groups = grouped_reading.setdefault(st, {})
+            key = (f["paper_id"], gn)
+            if key not in groups:
+                label = f"{f['paper_id']} · {gn}" if multi_paper else gn
+                groups[key] = {"group_name": label, "passage": f["passage"], "questions": []}
+            groups[key]["questions"].append(q_data)
+
+        elif st in ("writing_a", "writing_b"):
+            if not sections[st]:
+                sections[st] = {
+                    "q_id": q_data["q_id"],
+                    "prompt": q_data["content"],
+                    "image":  None,   # 收齐后填充
+                    "passage": f["passage"],
+                    "questions": [],
+                }
+            # 优先提取图片：只要找到第一张有效图就定下
+            if not sections[st]["image"] and f["image"] and len(f["image"]) > 100:
+                sections[st]["image"] = f["image"]
+            # prompt 也优先取非空的
+            if not sections[st]["prompt"] and q_data["content"]:
+                sections[st]["prompt"] = q_data["content"]
+            # questions 列表（主观题可能有多行）
+            sections[st]["questions"].append(q_data)
+
+    for st in ("use_of_english", "translation"):
+        if sections[st]:
+            sections[st]["questions"].sort(key=_qnum)
+            by_paper = passages[st]
+            if multi_paper:
+                sections[st]["passage"] = "\n\n".join(
+                    f"【{pid}】\n{text}" for pid, text in sorted(by_paper.items()) if text
+                )
+            else:
+                sections[st]["passage"] = next(iter(by_paper.values()), None)
+
+    for st in ("reading_a", "reading_b"):
+        if st in grouped_reading:
+            items = list(grouped_reading[st].items())
+            for _, g in items:
+                g["questions"].sort(key=_qnum)
+            # 先按试卷，再按组内首题题号
+            items.sort(key=lambda kv: (kv[0][0], _qnum(kv[1]["questions"][0])))
+            sections[st] = [g for _, g in items]
+
+    return sections
+
+
+class PaperService:
+    """试卷片段缓存 — 每份试卷首次访问时一次查询解析，之后纯内存组装"""
+
+    def __init__(self):
+        self._papers: Optional[Dict[str, Dict[str, Any]]] = None
+        self._fragments: Dict[str, List[Dict[str, Any]]] = {}
+        self._by_q_id: Dict[str, Dict[str, Any]] = {}
+        # 发布新片段的临界区: 并发首访不会看到半份试卷
+        self._lock = threading.Lock()
+
+    def get_paper(self, paper_id: str) -> Optional[Dict[str, Any]]:
+        if self._papers is None:
+            with get_static_conn() as sconn:
+                rows = sconn.execute("SELECT paper_id, year, title, exam_type FROM papers").fetchall()
+            self._papers = {r["paper_id"]: r for r in rows}
+        return self._papers.get(paper_id)
+
+    def _load(self, paper_ids: List[str]):
+        """批量加载尚未缓存的试卷片段 (一次 IN 查询)"""
+        missing = [pid for pid in paper_ids if pid not in self._fragments]
+        if not missing:
+            return
+        with get_static_conn() as sconn:
+            rows = sconn.execute(fragments_sql(len(missing)), missing).fetchall()
+        # 先在本地组装完整，再一次性发布 (先 q_id 索引，后试卷)
+        fragments: Dict[str, List[Dict[str, Any]]] = {pid: [] for pid in missing}
+        by_q_id: Dict[str, Dict[str, Any]] = {}
+        for r in rows:
+            frag = _build_fragment(r)
+            fragments[r["paper_id"]].append(frag)
+            by_q_id[r["q_id"]] = frag
+        with self._lock:
+            self._by_q_id.update(by_q_id)
+            for pid, frags in fragments.items():
+                self._fragments.setdefault(pid, frags)
+
+    def get_fragments(self, paper_id: str) -> List[Dict[str, Any]]:
+        self._load([paper_id])
+        return self._fragments[paper_id]
+
+    def get_question_fragments(self, q_ids: List[str], paper_ids: Iterable[str]) -> List[Dict[str, Any]]:
+        """按 q_id 取片段；paper_ids 为这些题目所属试卷 (用于批量预加载)"""
+        self._load(sorted(set(p for p in paper_ids if p)))
+        return [self._by_q_id[q] for q in q_ids if q in self._by_q_id]
+
+    def get_exam_detail(self, paper_id: str) -> Optional[Dict[str, Any]]:
+        paper = self.get_paper(paper_id)
+        if not paper:
+            return None
+        return {
+            "id": paper["paper_id"],
+            "title": paper["title"],
+            "year": paper["year"],
+            "sections": assemble_sections(self.get_fragments(paper_id)),
+        }
+
+    def get_mistake_paper(
+        self, pconn: sqlite3.Connection, slot_id: int, paper_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        [Stage 40.0] 错题重练卷: mistake_questions 视图 (走部分索引) + 缓存片段
+        可选 paper_id 只重练单卷错题
+        """
+        params: tuple = (slot_id, paper_id) if paper_id else (slot_id,)
+        rows = pconn.execute(mistakes_sql(bool(paper_id)), params).fetchall()
+
+        fragments = self.get_question_fragments(
+            [r["q_id"] for r in rows], (r["paper_id"] for r in rows)
+        )
+        paper = self.get_paper(paper_id) if paper_id else None
+        return {
+            "id": f"mistakes-{slot_id}" + (f"-{paper_id}" if paper_id else ""),
+            "title": f"错题重练 · {paper['title']}" if paper else "错题重练",
+            "year": paper["year"] if paper else None,
+            "count": len(fragments),
+            "sections": assemble_sections(fragments),
+        }
+
+
+# 单例
+paper_service = PaperService()
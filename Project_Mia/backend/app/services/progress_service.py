@@ -0,0 +1,197 @@
+"""
+ProgressService — 试卷作答进度
+user_answers / answer_history_logs 自带 paper_id，进度与重置都是一次索引查询；
+每份试卷的题目总数来自 static_content.db，进程内缓存（题库只读）。
+Dashboard 汇总按 slot 缓存，答题写入 / 重置时失效；失效递增该 slot 的代数，
+读库前后代数不一致的汇总不入缓存 (避免并发写入后回填旧结果)。
+
+Author: Femo
+Date: 2026-03-10
+"""
+
+import sqlite3
+import threading
+from typing import Dict, Optional, Any
+
+from app.db.helpers import get_static_conn, paper_id_from_q_id
+from app.services.analytics_service import analytics_service
+from app.services.recommender_service import recommender_service
+
+
+# 查询语句 (登记在 indexes.hot_queries，scripts/test_query_plans.py 检查查询计划)
+COUNT_ANSWERED_SQL = "SELECT COUNT(*) AS cnt FROM user_answers WHERE slot_id = ? AND paper_id = ?"
+PROGRESS_SUMMARY_SQL = """
+    SELECT paper_id,
+           COUNT(*) AS answered,
+           SUM(CASE WHEN is_correct THEN 1 ELSE 0 END) AS correct,
+           COALESCE(SUM(score), 0) AS score
+    FROM user_answers
+    WHERE slot_id = ?
+    GROUP BY paper_id
+"""
+
+class ProgressService:
+    """作答进度 — 答题写入的统一入口 + 按试卷聚合"""
+
+    def __init__(self):
+        self._paper_stats: Optional[Dict[str, Dict[str, Any]]] = None
+        self._summary_cache: Dict[int, Dict[str, Dict[str, Any]]] = {}
+        # 汇总缓存代数: invalidate 递增 (slot_id=None 递增全局代数)，存入前比对
+        self._summary_gen: Dict[int, int] = {}
+        self._summary_epoch = 0
+        self._summary_lock = threading.Lock()
+
+    # ---- 静态题库统计 (缓存) ----
+
+    def get_paper_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        paper_id → {"total": 题目数, "max_score": 满分合计}
+        一次 GROUP BY，之后常驻内存；papers 表中无题目的试卷 total 为 0。
+        """
+        if self._paper_stats is None:
+            with get_static_conn() as sconn:
+                papers = sconn.execute("SELECT paper_id FROM papers").fetchall()
+                rows = sconn.execute("""
+                    SELECT paper_id, COUNT(*) AS cnt, COALESCE(SUM(score), 0) AS max_score
+                    FROM questions GROUP BY paper_id
+                """).fetchall()
+            stats = {p["paper_id"]: {"total": 0, "max_score": 0.0} for p in papers}
+            for r in rows:
+                stats[r["paper_id"]] = {"total": r["cnt"], "max_score": round(r["max_score"], 1)}
+            self._paper_stats = stats
+        return self._paper_stats
+
+    def get_paper_totals(self) -> Dict[str, int]:
+        """paper_id → 题目总数"""
+        return {pid: st["total"] for pid, st in self.get_paper_stats().items()}
+
+    def get_paper_total(self, paper_id: str) -> int:
+        stats = self.get_paper_stats().get(paper_id)
+        return stats["total"] if stats else 0
+
+    # ---- 用户进度 ----
+
+    @staticmethod
+    def count_answered(pconn: sqlite3.Connection, slot_id: int, paper_id: str) -> int:
+        """当前面板已作答题数 (走 idx_user_answers_slot_paper)"""
+        row = pconn.execute(COUNT_ANSWERED_SQL, (slot_id, paper_id)).fetchone()
+        return row["cnt"] if row else 0
+
+    def reset_paper(self, pconn: sqlite3.Connection, slot_id: int, paper_id: str) -> int:
+        """清空当前面板 (answer_history_logs 保留)，返回删除行数"""
+        cursor = pconn.execute(
+            "DELETE FROM user_answers WHERE slot_id = ? AND paper_id = ?",
+            (slot_id, paper_id),
+        )
+        pconn.commit()
+        self.invalidate(slot_id)
+        return cursor.rowcount
+
+    def get_progress_summary(self, pconn: sqlite3.Connection, slot_id: int) -> Dict[str, Dict[str, Any]]:
+        """
+        [Stage 37.0] 所有试卷的进度汇总 (Dashboard 一次拉取)
+        一条 GROUP BY paper_id 聚合 + 缓存的题库统计，结果按 slot 缓存。
+
+        返回:
+        {
+          "2023-eng1": {"answered": 12, "total": 52, "percentage": 23.1,
+                        "correct": 9, "accuracy": 0.75, "score": 14.5, "max_score": 100.0},
+          ...
+        }
+        """
+        with self._summary_lock:
+            cached = self._summary_cache.get(slot_id)
+            if cached is not None:
+                return cached
+            gen = self._summary_generation(slot_id)
+
+        rows = pconn.execute(PROGRESS_SUMMARY_SQL, (slot_id,)).fetchall()
+        answered_map = {r["paper_id"]: r for r in rows}
+
+        summary = {}
+        for paper_id, stats in self.get_paper_stats().items():
+            r = answered_map.get(paper_id)
+            answered = r["answered"] if r else 0
+            correct = (r["correct"] or 0) if r else 0
+            total = stats["total"]
+            summary[paper_id] = {
+                "answered":   answered,
+                "total":      total,
+                "percentage": round(answered / total * 100, 1) if total > 0 else 0.0,
+                "correct":    correct,
+                "accuracy":   round(correct / answered, 3) if answered else 0.0,
+                "score":      round(r["score"], 1) if r else 0.0,
+                "max_score":  stats["max_score"],
+            }
+
+        with self._summary_lock:
+            # 读库期间有写入 (invalidate 已执行) 则本次结果可能是旧的，只返回不缓存
+            if self._summary_generation(slot_id) == gen:
+                self._summary_cache[slot_id] = summary
+        return summary
+
+    def _summary_generation(self, slot_id: int):
+        return self._summary_epoch, self._summary_gen.get(slot_id, 0)
+
+    def invalidate(self, slot_id: Optional[int] = None):
+        """答题写入 / 重置 / 删档后调用；slot_id=None 清空全部"""
+        with self._summary_lock:
+            if slot_id is None:
+                self._summary_epoch += 1
+                self._summary_cache.clear()
+            else:
+                self._summary_gen[slot_id] = self._summary_gen.get(slot_id, 0) + 1
+                self._summary_cache.pop(slot_id, None)
+
+    # ---- 答题写入 ----
+
+    def record_answer(
+        self,
+        pconn: sqlite3.Connection,
+        slot_id: int,
+        q_id: str,
+        section_type: str,
+        user_answer: Any,
+        is_correct: bool,
+        score: float,
+        ai_feedback: Optional[str] = None,
+        paper_id: Optional[str] = None,
+    ):
+        """
+        答题落库: user_answers (当前面板, 覆盖) + answer_history_logs (轨迹, 只追加)
+        + 统计汇总表，同一事务提交。paper_id 缺省时从 q_id 前缀推导。
+        """
+        paper_id = paper_id or paper_id_from_q_id(q_id)
+
+        try:
+            # ── [Stage 14.0] 答题记录持久化 ──
+            pconn.execute("""
+                INSERT OR REPLACE INTO user_answers
+                (slot_id, q_id, paper_id, section_type, user_answer, is_correct, score, ai_feedback, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, datetime('now', 'localtime'))
+            """, (slot_id, q_id, paper_id, section_type, user_answer, is_correct, score, ai_feedback))
+
+            # ── [Stage 17.0] 答题轨迹日志 (Append-only, never deleted) ──
+            pconn.execute("""
+                INSERT INTO answer_history_logs
+                (slot_id, q_id, paper_id, section_type, is_correct, user_answer, score, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now', 'localtime'))
+            """, (slot_id, q_id, paper_id, section_type, is_correct, user_answer, score))
+
+            # ── [Stage 38.0] 统计汇总增量更新 ──
+            analytics_service.apply_attempt(
+                pconn, slot_id, q_id, paper_id, section_type, is_correct, score
+            )
+            pconn.commit()
+        except Exception as e:
+            pconn.rollback()
+            print(f"[progress] Save answer failed: {e}")
+        else:
+            # ── [Stage 39.0] 推荐模型增量更新 ──
+            recommender_service.observe(slot_id, q_id, section_type, is_correct)
+        finally:
+            self.invalidate(slot_id)
+
+
+# 单例
+progress_service = ProgressService()
@@ -0,0 +1,220 @@
+"""
+RecommenderService — 弱项驱动的自适应选题
+三部分:
+  1. 题库特征 (启动后首次使用时从 static_content.db 预计算, 常驻内存)
+       题型 one-hot / 难度 / 分值权重
+  2. 每个 slot 的掌握度模型
+       题型能力 θ (Beta(1,1) 平滑正确率的 logit) + 逐题最近作答结果
+       首次使用从 answer_stats_question 汇总表加载，之后由答题写入增量更新
+  3. 打分: 整个题库一次 numpy 向量运算
+       P(答对) = sigmoid(θ_题型 - κ·(难度 - 0.5))
+       期望收益 = 分值权重 × (1 - P) × 新鲜度
+
+Author: Femo
+Date: 2026-03-11
+"""
+
+import sqlite3
+import threading
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+
+from app.db.helpers import get_static_conn
+
+
+SECTIONS = ("use_of_english", "reading_a", "reading_b", "translation", "writing_a", "writing_b")
+SECTION_INDEX = {s: i for i, s in enumerate(SECTIONS)}
+
+# 难度对答对概率的影响强度
+DIFFICULTY_SLOPE = 2.0
+
+# 新鲜度: 没做过 / 上次做错 (错题回炉) / 上次做对
+NOVELTY_UNSEEN = 1.0
+NOVELTY_LAST_WRONG = 1.2
+NOVELTY_LAST_CORRECT = 0.15
+
+# 查询语句 (登记在 indexes.hot_queries，scripts/test_query_plans.py 检查查询计划)
+MASTERY_SQL = """
+    SELECT q_id, section_type, attempts, correct, last_correct
+    FROM answer_stats_question
+    WHERE slot_id = ?
+"""
+
+
+class _QuestionBank:
+    """题库特征矩阵 (只读)"""
+
+    def __init__(self, rows: List[Dict[str, Any]]):
+        self.q_ids = [r["q_id"] for r in rows]
+        self.index = {q_id: i for i, q_id in enumerate(self.q_ids)}
+        self.paper_ids = [r["paper_id"] for r in rows]
+
+        n = len(rows)
+        self.section = np.array(
+            [SECTION_INDEX.get(r["section_type"] or "", -1) for r in rows], dtype=np.int16
+        )
+        # 难度 1-5 → 0-1
+        self.difficulty = np.clip(
+            (np.array([r["difficulty"] or 3 for r in rows], dtype=np.float32) - 1.0) / 4.0, 0.0, 1.0
+        )
+        # 分值权重: 按题库最高单题分值归一化 (大作文 20 分 → 1.0)
+        score = np.array([r["score"] or 2.0 for r in rows], dtype=np.float32)
+        self.weight = score / score.max() if n else score
+        # 题型 one-hot (n × S)
+        self.section_onehot = np.zeros((n, len(SECTIONS)), dtype=np.float32)
+        valid = self.section >= 0
+        self.section_onehot[np.nonzero(valid)[0], self.section[valid]] = 1.0
+        self.valid = valid
+
+    def __len__(self):
+        return len(self.q_ids)
+
+
+class _SlotMastery:
+    """单个 slot 的掌握度 (与题库对齐的向量)"""
+
+    def __init__(self, bank_size: int):
+        self.section_attempts = np.zeros(len(SECTIONS), dtype=np.float32)
+        self.section_correct = np.zeros(len(SECTIONS), dtype=np.float32)
+        self.q_attempts = np.zeros(bank_size, dtype=np.int32)
+        self.q_last_correct = np.zeros(bank_size, dtype=np.int8)
+
+    def observe(self, bank_idx: Optional[int], section_idx: int, is_correct: bool, times: int = 1, correct: int = None):
+        if correct is None:
+            correct = times if is_correct else 0
+        if section_idx >= 0:
+            self.section_attempts[section_idx] += times
+            self.section_correct[section_idx] += correct
+        if bank_idx is not None:
+            self.q_attempts[bank_idx] += times
+            self.q_last_correct[bank_idx] = 1 if is_correct else 0
+
+    def theta(self) -> np.ndarray:
+        """各题型能力: logit((c+1)/(a+2))"""
+        p = (self.section_correct + 1.0) / (self.section_attempts + 2.0)
+        return np.log(p / (1.0 - p))
+
+
+class RecommenderService:
+    """自适应推荐 — 向量化打分，单次推荐为毫秒级"""
+
+    def __init__(self):
+        self._bank: Optional[_QuestionBank] = None
+        self._slots: Dict[int, _SlotMastery] = {}
+        self._lock = threading.Lock()
+
+    # ---- 题库特征 ----
+
+    def _get_bank(self) -> _QuestionBank:
+        if self._bank is None:
+            with get_static_conn() as sconn:
+                rows = sconn.execute("""
+                    SELECT q_id, paper_id, section_type, difficulty, score
+                    FROM questions
+                    ORDER BY paper_id, question_number
+                """).fetchall()
+            self._bank = _QuestionBank(rows)
+        return self._bank
+
+    # ---- 掌握度模型 ----
+
+    def _get_mastery(self, pconn: sqlite3.Connection, slot_id: int) -> _SlotMastery:
+        mastery = self._slots.get(slot_id)
+        if mastery is not None:
+            return mastery
+
+        bank = self._get_bank()
+        mastery = _SlotMastery(len(bank))
+        rows = pconn.execute(MASTERY_SQL, (slot_id,)).fetchall()
+        for r in rows:
+            mastery.observe(
+                bank.index.get(r["q_id"]),
+                SECTION_INDEX.get(r["section_type"] or "", -1),
+                bool(r["last_correct"]),
+                times=r["attempts"] or 0,
+                correct=r["correct"] or 0,
+            )
+        self._slots[slot_id] = mastery
+        return mastery
+
+    def observe(self, slot_id: int, q_id: str, section_type: str, is_correct: bool):
+        """答题写入后的增量更新 (slot 未加载时跳过，首次使用会从汇总表加载)"""
+        with self._lock:
+            mastery = self._slots.get(slot_id)
+            if mastery is None or self._bank is None:
+                return
+            mastery.observe(
+                self._bank.index.get(q_id),
+                SECTION_INDEX.get(section_type or "", -1),
+                is_correct,
+            )
+
+    def invalidate(self, slot_id: Optional[int] = None):
+        """删档 / 导入存档后丢弃内存模型"""
+        with self._lock:
+            if slot_id is None:
+                self._slots.clear()
+            else:
+                self._slots.pop(slot_id, None)
+
+    # ---- 推荐 ----
+
+    def recommend(
+        self,
+        pconn: sqlite3.Connection,
+        slot_id: int,
+        n: int = 10,
+        section_type: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """按期望学习收益返回 Top-N 题目"""
+        with self._lock:
+            bank = self._get_bank()
+            if not len(bank):
+                return []
+            mastery = self._get_mastery(pconn, slot_id)
+
+            theta = bank.section_onehot @ mastery.theta()
+            p_correct = 1.0 / (1.0 + np.exp(-(theta - DIFFICULTY_SLOPE * (bank.difficulty - 0.5))))
+
+            novelty = np.where(
+                mastery.q_attempts == 0,
+                NOVELTY_UNSEEN,
+                np.where(mastery.q_last_correct == 1, NOVELTY_LAST_CORRECT, NOVELTY_LAST_WRONG),
+            ).astype(np.float32)
+
+            gain = bank.weight * (1.0 - p_correct) * novelty
+            gain = np.where(bank.valid, gain, -1.0)
+            if section_type:
+                gain = np.where(bank.section == SECTION_INDEX.get(section_type, -2), gain, -1.0)
+
+            n = max(1, min(n, len(bank)))
+            top = np.argpartition(-gain, n - 1)[:n]
+            top = top[np.argsort(-gain[top])]
+
+            results = []
+            for i in top:
+                if gain[i] < 0:
+                    break
+                attempts = int(mastery.q_attempts[i])
+                if attempts == 0:
+                    reason = "unseen"
+                elif mastery.q_last_correct[i]:
+                    reason = "review"
+                else:
+                    reason = "mistake"
+                results.append({
+                    "q_id": bank.q_ids[i],
+                    "paper_id": bank.paper_ids[i],
+                    "section_type": SECTIONS[bank.section[i]],
+                    "difficulty": round(float(bank.difficulty[i]) * 4 + 1),
+                    "p_correct": round(float(p_correct[i]), 3),
+                    "expected_gain": round(float(gain[i]), 4),
+                    "attempts": attempts,
+                    "reason": reason,
+                })
+            return results
+
+
+# 单例
+recommender_service = RecommenderService()
@@ -0,0 +1,307 @@
+"""
+SlotArchiveService — 存档导出 / 导入 / 克隆
+归档格式 (.miaslot，版本化):
+  MAGIC (7 字节 b"MIASLOT") + 版本号 (1 字节)
+  + zlib 流，内含若干帧: [4 字节大端长度][JSON 帧]
+      {"type": "header", "version": 1, "slot_id": 3, "exported_at": "..."}
+      {"type": "table", "name": "user_answers", "columns": [...]}
+      {"type": "rows", "rows": [[...], ...]}            # 每帧最多 BATCH_SIZE 行
+      {"type": "end", "counts": {"user_answers": 120, ...}}
+导出按 BATCH_SIZE fetchmany 边读边压缩，内存占用与存档大小无关；
+导入先把请求体落到临时文件 (上传慢不占写锁)，再在线程池里 BEGIN IMMEDIATE
+边解压边写入，整体一个事务；克隆直接 INSERT ... SELECT，不经过归档。
+新 slot_id 都在写事务内分配，并发导入 / 克隆不会撞号。
+
+Author: Femo
+Date: 2026-03-12
+"""
+
+import asyncio
+import json
+import sqlite3
+import struct
+import tempfile
+import zlib
+from datetime import datetime
+from typing import Dict, List, Any, Iterator, AsyncIterable, BinaryIO, Optional, Tuple
+
+from app.db.helpers import get_profile_conn, ensure_auto_save
+
+
+ARCHIVE_MAGIC = b"MIASLOT"
+ARCHIVE_VERSION = 1
+BATCH_SIZE = 500
+# 导入缓冲: 小于此大小的归档留在内存，超出转存临时文件
+SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+READ_SIZE = 64 * 1024
+
+# 按 slot 划分的用户表: (表名, 自增代理键 — 导出 / 复制时丢弃)
+SLOT_TABLES: List[Tuple[str, Optional[str]]] = [
+    ("game_saves", "save_id"),
+    ("user_vocab_memory", "id"),
+    ("user_answers", "id"),
+    ("answer_history_logs", "log_id"),
+    ("answer_stats_daily", None),
+    ("answer_stats_question", None),
+]
+
+_LEN = struct.Struct(">I")
+
+
+class SlotArchiveError(ValueError):
+    """归档格式错误 / 版本不兼容"""
+
+
+def _table_columns(conn: sqlite3.Connection, table: str, surrogate: Optional[str]) -> List[str]:
+    return [
+        c["name"] for c in conn.execute(f"PRAGMA table_info({table})").fetchall()
+        if c["name"] != surrogate
+    ]
+
+
+def _begin_write(conn: sqlite3.Connection):
+    """立即取得写锁 (之后的 MAX(slot_id) 读取与插入不会被并发写者插队)"""
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+
+
+def _next_slot_id(conn: sqlite3.Connection) -> int:
+    """调用方须已持有写锁 (_begin_write)"""
+    row = conn.execute("SELECT MAX(slot_id) AS max_id FROM game_saves").fetchone()
+    return (row["max_id"] + 1) if row and row["max_id"] is not None else 0
+
+
+def _encode_frame(frame: Dict[str, Any]) -> bytes:
+    payload = json.dumps(frame, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return _LEN.pack(len(payload)) + payload
+
+
+class _FrameReader:
+    """增量解析: feed() 压缩字节，产出完整帧"""
+
+    def __init__(self):
+        self._header = b""
+        self._decomp = zlib.decompressobj()
+        self._buf = bytearray()
+
+    def feed(self, chunk: bytes) -> Iterator[Dict[str, Any]]:
+        if len(self._header) < len(ARCHIVE_MAGIC) + 1:
+            need = len(ARCHIVE_MAGIC) + 1 - len(self._header)
+            self._header += chunk[:need]
+            chunk = chunk[need:]
+            if len(self._header) < len(ARCHIVE_MAGIC) + 1:
+                return
+            if self._header[:-1] != ARCHIVE_MAGIC:
+                raise SlotArchiveError("Not a slot archive")
+            if self._header[-1] > ARCHIVE_VERSION:
+                raise SlotArchiveError(f"Unsupported archive version {self._header[-1]}")
+        try:
+            self._buf += self._decomp.decompress(chunk)
+        except zlib.error as e:
+            raise SlotArchiveError(f"Corrupted archive: {e}")
+        yield from self._drain()
+
+    def _drain(self) -> Iterator[Dict[str, Any]]:
+        while len(self._buf) >= _LEN.size:
+            (size,) = _LEN.unpack_from(self._buf)
+            if len(self._buf) < _LEN.size + size:
+                break
+            payload = bytes(self._buf[_LEN.size:_LEN.size + size])
+            del self._buf[:_LEN.size + size]
+            yield json.loads(payload)
+
+
+class _Importer:
+    """把帧写入目标 slot (调用方负责事务)"""
+
+    def __init__(self, conn: sqlite3.Connection, target_slot_id: int, slot_name: Optional[str]):
+        self.conn = conn
+        self.target_slot_id = target_slot_id
+        self.slot_name = slot_name
+        self.known = {t for t, _ in SLOT_TABLES}
+        self.counts: Dict[str, int] = {}
+        self.finished = False
+        self._sql: Optional[str] = None
+        self._slot_idx = -1
+        self._name_idx = -1
+        self._cols: List[int] = []
+        self._table: Optional[str] = None
+
+    def handle(self, frame: Dict[str, Any]):
+        kind = frame.get("type")
+        if kind == "header":
+            return
+        if kind == "table":
+            self._begin_table(frame["name"], frame["columns"])
+        elif kind == "rows":
+            self._insert(frame["rows"])
+        elif kind == "end":
+            self.finished = True
+        else:
+            raise SlotArchiveError(f"Unknown frame type: {kind}")
+
+    def _begin_table(self, table: str, columns: List[str]):
+        if table not in self.known:
+            raise SlotArchiveError(f"Unknown table in archive: {table}")
+        if "slot_id" not in columns:
+            raise SlotArchiveError(f"Table {table} missing slot_id column")
+        surrogate = dict(SLOT_TABLES)[table]
+        current = set(_table_columns(self.conn, table, surrogate))
+        # 旧版本归档的列可能少于 / 多于当前 schema，只导入两边都有的列
+        keep = [c for c in columns if c in current]
+        self._cols = [columns.index(c) for c in keep]
+        self._slot_idx = keep.index("slot_id")
+        self._name_idx = keep.index("slot_name") if table == "game_saves" and "slot_name" in keep else -1
+        self._table = table
+        self._sql = f"INSERT INTO {table} ({', '.join(keep)}) VALUES ({', '.join('?' * len(keep))})"
+        self.counts.setdefault(table, 0)
+
+    def _insert(self, rows: List[List[Any]]):
+        if self._sql is None:
+            raise SlotArchiveError("Rows frame before table frame")
+        batch = []
+        for row in rows:
+            values = [row[i] for i in self._cols]
+            values[self._slot_idx] = self.target_slot_id
+            if self._name_idx >= 0 and self.slot_name:
+                values[self._name_idx] = self.slot_name
+            batch.append(values)
+        self.conn.executemany(self._sql, batch)
+        self.counts[self._table] += len(batch)
+
+
+class SlotArchiveService:
+    """存档归档 — 流式导出 / 导入，服务端克隆"""
+
+    # ---- 导出 ----
+
+    def iter_export(self, slot_id: int) -> Iterator[bytes]:
+        """
+        逐块产出压缩后的归档字节 (StreamingResponse 直接消费)。
+        连接允许跨线程: 同步生成器的每次迭代可能落在不同线程池线程。
+        """
+        compressor = zlib.compressobj(6)
+        yield ARCHIVE_MAGIC + bytes([ARCHIVE_VERSION])
+
+        with get_profile_conn(check_same_thread=False) as conn:
+            ensure_auto_save(conn)
+            row = conn.execute("SELECT save_id FROM game_saves WHERE slot_id = ?", (slot_id,)).fetchone()
+            if not row:
+                raise SlotArchiveError(f"Slot {slot_id} not found")
+            # 读事务: 各表来自同一快照
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+
+            yield compressor.compress(_encode_frame({
+                "type": "header",
+                "version": ARCHIVE_VERSION,
+                "slot_id": slot_id,
+                "exported_at": datetime.now().isoformat(timespec="seconds"),
+            }))
+
+            counts = {}
+            for table, surrogate in SLOT_TABLES:
+                columns = _table_columns(conn, table, surrogate)
+                yield compressor.compress(_encode_frame({"type": "table", "name": table, "columns": columns}))
+
+                cursor = conn.cursor()
+                cursor.row_factory = None  # 直接取 tuple，省去 dict 构造
+                cursor.execute(f"SELECT {', '.join(columns)} FROM {table} WHERE slot_id = ?", (slot_id,))
+                counts[table] = 0
+                while True:
+                    rows = cursor.fetchmany(BATCH_SIZE)
+                    if not rows:
+                        break
+                    counts[table] += len(rows)
+                    chunk = compressor.compress(_encode_frame({"type": "rows", "rows": rows}))
+                    if chunk:
+                        yield chunk
+
+        yield compressor.compress(_encode_frame({"type": "end", "counts": counts}))
+        yield compressor.flush()
+
+    def check_exists(self, slot_id: int) -> bool:
+        with get_profile_conn() as conn:
+            ensure_auto_save(conn)
+            return conn.execute("SELECT 1 FROM game_saves WHERE slot_id = ?", (slot_id,)).fetchone() is not None
+
+    # ---- 导入 ----
+
+    async def import_stream(self, chunks: AsyncIterable[bytes], slot_name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        从字节流导入为新存档 (slot_id = 当前最大 + 1)。
+        先完整接收到临时缓冲 (不持有数据库锁)，再交给线程池写库。
+        """
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY) as spool:
+            async for chunk in chunks:
+                spool.write(chunk)
+            spool.seek(0)
+            return await asyncio.to_thread(self.import_file, spool, slot_name)
+
+    def import_file(self, fileobj: BinaryIO, slot_name: Optional[str] = None) -> Dict[str, Any]:
+        """从已接收完的归档导入，整体一个写事务；任何错误回滚，不留半个存档。"""
+        reader = _FrameReader()
+        with get_profile_conn() as conn:
+            ensure_auto_save(conn)
+            try:
+                _begin_write(conn)
+                new_slot_id = _next_slot_id(conn)
+                importer = _Importer(conn, new_slot_id, slot_name)
+                while True:
+                    chunk = fileobj.read(READ_SIZE)
+                    if not chunk:
+                        break
+                    for frame in reader.feed(chunk):
+                        importer.handle(frame)
+                if not importer.finished:
+                    raise SlotArchiveError("Truncated archive")
+                if not importer.counts.get("game_saves"):
+                    raise SlotArchiveError("Archive has no game_saves row")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+        return {"slot_id": new_slot_id, "counts": importer.counts}
+
+    # ---- 克隆 ----
+
+    def clone(self, conn: sqlite3.Connection, source_slot_id: int, slot_name: Optional[str] = None) -> Dict[str, Any]:
+        """服务端一次性复制: 每张表一条 INSERT ... SELECT，同一写事务"""
+        counts = {}
+        try:
+            _begin_write(conn)
+            if not conn.execute("SELECT 1 FROM game_saves WHERE slot_id = ?", (source_slot_id,)).fetchone():
+                raise SlotArchiveError(f"Slot {source_slot_id} not found")
+            new_slot_id = _next_slot_id(conn)
+            for table, surrogate in SLOT_TABLES:
+                columns = _table_columns(conn, table, surrogate)
+                select_cols = []
+                params: List[Any] = []
+                for c in columns:
+                    if c == "slot_id":
+                        select_cols.append("?")
+                        params.append(new_slot_id)
+                    elif c == "slot_name" and table == "game_saves" and slot_name:
+                        select_cols.append("?")
+                        params.append(slot_name)
+                    else:
+                        select_cols.append(c)
+                params.append(source_slot_id)
+                cursor = conn.execute(
+                    f"INSERT INTO {table} ({', '.join(columns)}) "
+                    f"SELECT {', '.join(select_cols)} FROM {table} WHERE slot_id = ?",
+                    params,
+                )
+                counts[table] = cursor.rowcount
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        return {"slot_id": new_slot_id, "counts": counts}
+
+
+# 单例
+slot_archive_service = SlotArchiveService()
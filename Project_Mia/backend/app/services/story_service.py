@@ -0,0 +1,112 @@
+"""
+StoryService — Mia 预生成剧情台词
+stories 表 (scripts/generate_stories.py 生成) 整表读入内存，按 q_id 查询:
+  - submit_objective 按答题结果附上对应台词，答错即时有 Mia 的反应，无需调用 LLM
+  - GET /api/stories/{q_id} 供前端预取 / 回看
+全部台词约 1k 题 × 4 段文本，常驻内存开销可忽略。
+stories 路由启动时在线程池预加载；之后每 RECHECK_INTERVAL 秒比对一次水位线
+(COUNT(*) / MAX(id))，表后建 / 台词重新生成后自动重载；POST /api/stories/reload 立即刷新。
+
+Author: Femo
+Date: 2026-03-18
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Optional, Tuple
+
+from app.db.helpers import get_static_conn
+
+
+# 水位线检查间隔 (秒)
+RECHECK_INTERVAL = 30.0
+
+# 查询语句 (登记在 indexes.hot_queries，scripts/test_query_plans.py 检查查询计划)
+WATERMARK_SQL = "SELECT COUNT(*) AS n, MAX(id) AS max_id FROM stories"
+# 同一 q_id 有多行时 (旧库未去重) 保留最新一行
+LOAD_SQL = """
+    SELECT q_id, correct_cn, wrong_cn, correct_en, wrong_en
+    FROM stories
+    ORDER BY id
+"""
+
+Lines = Dict[str, Dict[str, Optional[str]]]
+
+
+class StoryService:
+    """q_id → 答对 / 答错中英台词 (只读缓存)"""
+
+    def __init__(self):
+        self._lines: Optional[Lines] = None
+        self._watermark: Optional[Tuple[int, Optional[int]]] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _read_watermark(sconn: sqlite3.Connection) -> Optional[Tuple[int, Optional[int]]]:
+        """(行数, 最大 id)；表不存在时为 None"""
+        try:
+            row = sconn.execute(WATERMARK_SQL).fetchone()
+        except sqlite3.OperationalError:
+            return None
+        return row["n"], row["max_id"]
+
+    def _load(self) -> Tuple[Lines, Optional[Tuple[int, Optional[int]]]]:
+        with get_static_conn() as sconn:
+            watermark = self._read_watermark(sconn)
+            if watermark is None:
+                print("[story] stories table unavailable")
+                return {}, None
+            rows = sconn.execute(LOAD_SQL).fetchall()
+        lines = {
+            r["q_id"]: {
+                "correct_cn": r["correct_cn"], "wrong_cn": r["wrong_cn"],
+                "correct_en": r["correct_en"], "wrong_en": r["wrong_en"],
+            }
+            for r in rows
+        }
+        return lines, watermark
+
+    def _get_lines(self) -> Lines:
+        if self._lines is not None and time.monotonic() - self._checked_at < RECHECK_INTERVAL:
+            return self._lines
+        with self._lock:
+            now = time.monotonic()
+            if self._lines is None:
+                self._reload_locked()
+            elif now - self._checked_at >= RECHECK_INTERVAL:
+                self._checked_at = now
+                with get_static_conn() as sconn:
+                    changed = self._read_watermark(sconn) != self._watermark
+                if changed:
+                    self._reload_locked()
+        return self._lines
+
+    def _reload_locked(self):
+        self._lines, self._watermark = self._load()
+        self._checked_at = time.monotonic()
+
+    def reload(self) -> int:
+        """重新读取 stories 表，返回台词条数"""
+        with self._lock:
+            self._reload_locked()
+            return len(self._lines)
+
+    def get(self, q_id: str) -> Optional[Dict[str, Optional[str]]]:
+        return self._get_lines().get(q_id)
+
+    def line_for(self, q_id: str, is_correct: bool) -> Optional[Dict[str, Any]]:
+        """按答题结果取一句台词: {"outcome", "cn", "en"}；无台词返回 None"""
+        story = self.get(q_id)
+        if not story:
+            return None
+        outcome = "correct" if is_correct else "wrong"
+        cn = story[f"{outcome}_cn"]
+        if not cn:
+            return None
+        return {"outcome": outcome, "cn": cn, "en": story[f"{outcome}_en"]}
+
+
+# 单例
+story_service = StoryService()
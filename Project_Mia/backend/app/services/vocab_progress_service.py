@@ -0,0 +1,157 @@
+"""
+VocabProgressService — 背词进度唯一入口
+存储: femo_profile.db 的 user_vocab_memory (按存档 slot 隔离，UNIQUE(slot_id, word))
+  - 复习结算 / 今日任务 / 单词本 / 记忆雷达 / 状态快照都经由本服务读写
+  - 旧 vocab_progress 表已合并进 slot 0 并改为同名只读视图 (helpers [Stage 50.0])，
+    仅供尚未迁移的脚本读取；新代码不要再查 vocab_progress
+所有方法接收调用方的连接、不 commit，可与同一请求内的其它写入共用事务。
+行以 dict 返回 (连接需使用 _dict_factory)。
+
+Author: Femo
+Date: 2026-03-16
+"""
+
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Any, Iterable, Optional
+
+
+UTC8 = timezone(timedelta(hours=8))
+
+# SQLite 单条语句绑定参数上限 (旧版本为 999)
+_IN_CHUNK = 900
+
+_COLUMNS = (
+    "word, easiness_factor, interval, repetitions, next_review_date, last_review_date, "
+    "mastery_level, success_streak, total_recall_count, total_error_count"
+)
+
+# 查询语句 (登记在 indexes.hot_queries，scripts/test_query_plans.py 检查查询计划)
+GET_SQL = f"SELECT {_COLUMNS} FROM user_vocab_memory WHERE slot_id = ? AND word = ?"
+DUE_SQL = f"""
+    SELECT {_COLUMNS} FROM user_vocab_memory
+    WHERE slot_id = ? AND next_review_date <= ?
+    ORDER BY next_review_date ASC
+    LIMIT ?
+"""
+LEARNED_WORDS_SQL = "SELECT word FROM user_vocab_memory WHERE slot_id = ?"
+ALL_FOR_SLOT_SQL = f"SELECT {_COLUMNS} FROM user_vocab_memory WHERE slot_id = ?"
+SUMMARY_SQL = """
+    SELECT COUNT(*) AS total,
+           SUM(CASE WHEN easiness_factor < 2.0 OR total_error_count >= 2 THEN 1 ELSE 0 END) AS weak
+    FROM user_vocab_memory WHERE slot_id = ?
+"""
+
+
+def get_many_sql(n: int) -> str:
+    return f"SELECT {_COLUMNS} FROM user_vocab_memory WHERE slot_id = ? AND word IN ({','.join('?' * n)})"
+
+
+# 记忆雷达状态优先级: 死对头 > 急需复习 > 正在学 > 老朋友
+STATUS_PRIORITY = {"weak": 0, "due": 1, "learning": 2, "mastered": 3}
+
+
+def _today() -> str:
+    return datetime.now(UTC8).strftime("%Y-%m-%d")
+
+
+class VocabProgressService:
+    """按 slot 的 SM-2 进度读写"""
+
+    # ---- 读取 ----
+
+    @staticmethod
+    def get(conn: sqlite3.Connection, slot_id: int, word: str) -> Optional[Dict[str, Any]]:
+        return conn.execute(GET_SQL, (slot_id, word)).fetchone()
+
+    @staticmethod
+    def get_many(conn: sqlite3.Connection, slot_id: int, words: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """批量查: word → 进度行 (只含有记录的词)"""
+        words = list(dict.fromkeys(words))
+        result: Dict[str, Dict[str, Any]] = {}
+        for i in range(0, len(words), _IN_CHUNK):
+            chunk = words[i:i + _IN_CHUNK]
+            rows = conn.execute(get_many_sql(len(chunk)), (slot_id, *chunk)).fetchall()
+            result.update((r["word"], r) for r in rows)
+        return result
+
+    @staticmethod
+    def due(conn: sqlite3.Connection, slot_id: int, day: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """到期复习 (next_review_date <= day)，最早到期在前；走 (slot_id, next_review_date) 索引"""
+        return conn.execute(DUE_SQL, (slot_id, day, limit)).fetchall()
+
+    @staticmethod
+    def learned_words(conn: sqlite3.Connection, slot_id: int) -> set:
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        return {r[0] for r in cursor.execute(LEARNED_WORDS_SQL, (slot_id,))}
+
+    @staticmethod
+    def all_for_slot(conn: sqlite3.Connection, slot_id: int) -> Dict[str, Dict[str, Any]]:
+        rows = conn.execute(ALL_FOR_SLOT_SQL, (slot_id,)).fetchall()
+        return {r["word"]: r for r in rows}
+
+    @staticmethod
+    def summary(conn: sqlite3.Connection, slot_id: int) -> Dict[str, int]:
+        """已学词数 / 死对头数 (判定与 classify 一致)"""
+        row = conn.execute(SUMMARY_SQL, (slot_id,)).fetchone()
+        return {"total": row["total"] or 0, "weak": row["weak"] or 0}
+
+    @staticmethod
+    def classify(row: Dict[str, Any], today: Optional[str] = None) -> Dict[str, Any]:
+        """进度行 → 记忆雷达状态 (weak / due / learning / mastered) + 一句话描述"""
+        ef = row["easiness_factor"] or 2.5
+        reps = row["repetitions"] or 0
+        mistakes = row["total_error_count"] or 0
+        streak = row["success_streak"] or 0
+        next_review = row["next_review_date"]
+
+        if ef < 2.0 or mistakes >= 2:
+            status, history = "weak", f"错过{mistakes}次, EF={ef:.1f}"
+        elif reps >= 5 and streak >= 3:
+            status, history = "mastered", f"已复习{reps}次, 连对{streak}次"
+        elif next_review and next_review <= (today or _today()):
+            status, history = "due", "已过期, 上次复习距今较久"
+        else:
+            status, history = "learning", f"复习{reps}次, EF={ef:.1f}"
+
+        return {"status": status, "ef": ef, "reps": reps, "mistakes": mistakes, "history": history}
+
+    # ---- 写入 (调用方提交) ----
+
+    @staticmethod
+    def save(conn: sqlite3.Connection, slot_id: int, word: str, state: Dict[str, Any]):
+        """UPSERT 一条进度；state 含 _COLUMNS 中除 word 外的全部字段"""
+        conn.execute("""
+            INSERT INTO user_vocab_memory
+            (slot_id, word, easiness_factor, interval, repetitions, next_review_date, last_review_date,
+             mastery_level, success_streak, total_recall_count, total_error_count, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now', 'localtime'))
+            ON CONFLICT(slot_id, word) DO UPDATE SET
+                easiness_factor    = excluded.easiness_factor,
+                interval           = excluded.interval,
+                repetitions        = excluded.repetitions,
+                next_review_date   = excluded.next_review_date,
+                last_review_date   = excluded.last_review_date,
+                mastery_level      = excluded.mastery_level,
+                success_streak     = excluded.success_streak,
+                total_recall_count = excluded.total_recall_count,
+                total_error_count  = excluded.total_error_count,
+                updated_at         = excluded.updated_at
+        """, (
+            slot_id, word, state["easiness_factor"], state["interval"], state["repetitions"],
+            state["next_review_date"], state["last_review_date"], state["mastery_level"],
+            state["success_streak"], state["total_recall_count"], state["total_error_count"],
+        ))
+
+    @staticmethod
+    def delete(conn: sqlite3.Connection, slot_id: int, word: str):
+        conn.execute("DELETE FROM user_vocab_memory WHERE slot_id = ? AND word = ?", (slot_id, word))
+
+    @staticmethod
+    def delete_slot(conn: sqlite3.Connection, slot_id: int):
+        conn.execute("DELETE FROM user_vocab_memory WHERE slot_id = ?", (slot_id,))
+
+
+# 单例
+vocab_progress_service = VocabProgressService()
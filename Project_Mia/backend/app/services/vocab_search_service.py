@@ -0,0 +1,208 @@
+"""
+VocabSearchService — 词典全文检索 / 前缀联想
+索引: static_content.db 中的 dictionary_fts (FTS5，无内容表，rowid = dictionary.id)
+  列: word / meaning (CJK bigram 切分) / sentences (真题例句英文原文)
+  prefix='2 3' 为 2、3 字母前缀建专用索引，联想输入 "ab" / "abs" 无需扫描词项表
+  rank 固定为 bm25(10, 3, 1)，词条本身命中远高于释义、例句命中
+由 scripts/import_vocab.py 导入后整体重建 (rebuild_index)，增量导入只改动变化词条 (update_index)；
+旧库没有索引时退化为 word 前缀范围查询，只支持英文前缀。
+
+Author: Femo
+Date: 2026-03-14
+"""
+
+import json
+import sqlite3
+from typing import Dict, List, Any, Optional
+
+from app.db import fts
+
+
+DEFAULT_K = 10
+MAX_K = 50
+
+# 列权重: word, meaning, sentences
+RANK_WEIGHTS = (10.0, 3.0, 1.0)
+
+def _sentence_text(example_sentences: Optional[str]) -> str:
+    """例句 JSON → 英文原文拼接 (只索引 en，年份 / 出处不进索引)"""
+    if not example_sentences:
+        return ""
+    try:
+        items = json.loads(example_sentences)
+    except (TypeError, ValueError):
+        return ""
+    return "\n".join(s.get("en", "") for s in items if isinstance(s, dict) and s.get("en"))
+
+
+class VocabSearchService:
+    """词典检索"""
+
+    def __init__(self):
+        self._has_index: Optional[bool] = None
+
+    # ---- 建索引 (导入脚本调用) ----
+
+    @staticmethod
+    def rebuild_index(conn: sqlite3.Connection) -> int:
+        """按 dictionary 当前内容整体重建 dictionary_fts (调用方提交)，返回索引条数"""
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS dictionary_fts USING fts5(
+                word, meaning, sentences,
+                content='', prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+            )
+        """)
+        conn.execute("INSERT INTO dictionary_fts(dictionary_fts) VALUES ('delete-all')")
+        conn.execute(
+            "INSERT INTO dictionary_fts(dictionary_fts, rank) VALUES ('rank', ?)",
+            ("bm25({}, {}, {})".format(*RANK_WEIGHTS),),
+        )
+
+        cursor = conn.cursor()
+        cursor.row_factory = None  # tuple 行，兼容脚本里的裸连接
+        cursor.execute("SELECT id, word, meaning, example_sentences FROM dictionary")
+        total = 0
+        while True:
+            rows = cursor.fetchmany(1000)
+            if not rows:
+                break
+            conn.executemany(
+                "INSERT INTO dictionary_fts(rowid, word, meaning, sentences) VALUES (?, ?, ?, ?)",
+                [(r[0], r[1], fts.segment(r[2] or ""), _sentence_text(r[3])) for r in rows],
+            )
+            total += len(rows)
+        # 合并 b-tree 段，查询只需访问一棵树
+        conn.execute("INSERT INTO dictionary_fts(dictionary_fts) VALUES ('optimize')")
+        return total
+
+    @staticmethod
+    def update_index(conn: sqlite3.Connection, removed: List[tuple], added: List[tuple]) -> bool:
+        """
+        增量维护 (调用方提交)；行格式均为 (id, word, meaning, example_sentences)
+        无内容表删除需给出当初写入的原值，removed 必须是改动前的行
+        索引不存在时返回 False，由调用方决定是否整体重建
+        """
+        if conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'dictionary_fts'"
+        ).fetchone() is None:
+            return False
+        if removed:
+            conn.executemany(
+                "INSERT INTO dictionary_fts(dictionary_fts, rowid, word, meaning, sentences) VALUES ('delete', ?, ?, ?, ?)",
+                [(r[0], r[1], fts.segment(r[2] or ""), _sentence_text(r[3])) for r in removed],
+            )
+        if added:
+            conn.executemany(
+                "INSERT INTO dictionary_fts(rowid, word, meaning, sentences) VALUES (?, ?, ?, ?)",
+                [(r[0], r[1], fts.segment(r[2] or ""), _sentence_text(r[3])) for r in added],
+            )
+        return True
+
+    # ---- 查询 ----
+
+    def _index_ready(self, conn: sqlite3.Connection) -> bool:
+        if not self._has_index:
+            self._has_index = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'dictionary_fts'"
+            ).fetchone() is not None
+        return self._has_index
+
+    def search(
+        self,
+        conn: sqlite3.Connection,
+        q: str,
+        k: int = DEFAULT_K,
+        field: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        检索词典，返回 top-k:
+          单个英文词 → 联想: 以其为前缀的词条 (高频在前)，不足 k 条再补全文命中
+          其余       → 全文: 释义 (中文) / 例句 / 词条，bm25 排序
+          field 限定只搜某一列 (word / meaning / sentences)
+        返回: {"query": q, "mode": "fts" | "prefix", "items": [...]}
+        """
+        k = max(1, min(k, MAX_K))
+        terms = fts.query_terms(q)
+        if not terms:
+            return {"query": q, "mode": "fts", "items": []}
+
+        if not self._index_ready(conn):
+            rows = self._prefix_fallback(conn, terms[0], k)
+            return {"query": q, "mode": "prefix", "items": [self._item(r, q) for r in rows]}
+
+        rows: List[Dict[str, Any]] = []
+        autocomplete = field in (None, "word") and len(terms) == 1 and not fts.is_cjk(terms[0])
+        if autocomplete:
+            rows = self._word_prefix(conn, terms[0], k)
+        if len(rows) < k and not (autocomplete and field == "word"):
+            seen = {r["id"] for r in rows}
+            rows += [r for r in self._ranked(conn, q, k, field) if r["id"] not in seen][:k - len(rows)]
+
+        return {"query": q, "mode": "fts", "items": [self._item(r, q) for r in rows]}
+
+    @staticmethod
+    def _word_prefix(conn: sqlite3.Connection, prefix: str, k: int) -> List[Dict[str, Any]]:
+        """词条前缀联想: 2/3 字母前缀直接命中 prefix 索引；完全匹配 > 真题频次 > 词长"""
+        return conn.execute("""
+            SELECT d.id, d.word, d.pos, d.meaning, d.frequency, d.example_sentences, NULL AS score
+            FROM dictionary_fts f
+            JOIN dictionary d ON d.id = f.rowid
+            WHERE dictionary_fts MATCH ?
+            ORDER BY (d.word = ?) DESC, d.frequency DESC, length(d.word), d.word
+            LIMIT ?
+        """, (f'word : "{prefix}"*', prefix, k)).fetchall()
+
+    @staticmethod
+    def _ranked(conn: sqlite3.Connection, q: str, k: int, field: Optional[str]) -> List[Dict[str, Any]]:
+        """全文检索，bm25(10, 3, 1) 排序"""
+        match = fts.build_match(q)
+        if field:
+            match = f"{field} : ({match})"
+        return conn.execute("""
+            SELECT d.id, d.word, d.pos, d.meaning, d.frequency, d.example_sentences, h.score
+            FROM (
+                SELECT rowid AS id, rank AS score FROM dictionary_fts
+                WHERE dictionary_fts MATCH ? ORDER BY rank LIMIT ?
+            ) h
+            JOIN dictionary d ON d.id = h.id
+            ORDER BY h.score
+        """, (match, k)).fetchall()
+
+    @staticmethod
+    def _prefix_fallback(conn: sqlite3.Connection, prefix: str, k: int) -> List[Dict[str, Any]]:
+        """无索引: word 上的前缀范围查询 (走 ix_dictionary_word)"""
+        return conn.execute("""
+            SELECT id, word, pos, meaning, frequency, example_sentences, NULL AS score
+            FROM dictionary
+            WHERE word >= ? AND word < ?
+            ORDER BY word
+            LIMIT ?
+        """, (prefix, prefix + "\uffff", k)).fetchall()
+
+    @staticmethod
+    def _item(row: Dict[str, Any], q: str) -> Dict[str, Any]:
+        """结果条目；非词条命中时附带第一条命中的例句"""
+        example = None
+        terms = fts.query_terms(q)
+        if row["example_sentences"] and not row["word"].lower().startswith(terms[0] if terms else ""):
+            try:
+                sentences = json.loads(row["example_sentences"])
+            except (TypeError, ValueError):
+                sentences = []
+            for s in sentences:
+                en = s.get("en", "") if isinstance(s, dict) else ""
+                if fts.highlight_spans(en, q):
+                    example = {"en": en, "year": s.get("year"), "source": s.get("source", "")}
+                    break
+        return {
+            "word": row["word"],
+            "pos": row["pos"],
+            "meaning": row["meaning"],
+            "frequency": row["frequency"] or 0,
+            "score": row["score"],
+            "example": example,
+        }
+
+
+# 单例
+vocab_search_service = VocabSearchService()
@@ -7,6 +7,7 @@ export const useExamStore = defineStore('exam', {
         paperId: null,
         currentPaper: null, // 试卷详情
         examList: [], // 试卷列表
+        progressSummary: {}, // [Stage 37.0] { [paperId]: { answered, total, percentage, accuracy, score } }
         loading: false,
         lastError: null, // [Stage 25.0] User-facing error message
 
@@ -126,6 +127,19 @@ export const useExamStore = defineStore('exam', {
             }
         },
 
+        // [Stage 37.0] Dashboard 批量进度 (一次请求覆盖所有试卷)
+        async fetchProgressSummary() {
+            try {
+                const userStore = useUserStore()
+                const res = await request.get('/exam/progress_summary', {
+                    params: { slot_id: userStore.currentSlotId }
+                })
+                if (res) this.progressSummary = res
+            } catch (e) {
+                console.error("Failed to fetch progress summary:", e)
+            }
+        },
+
         async fetchPaper(id) {
             this.loading = true
             this.lastError = null
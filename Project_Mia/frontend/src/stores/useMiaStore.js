@@ -1,6 +1,13 @@
 import { defineStore } from 'pinia'
 import request from '../utils/request'
 
+// 后端消息 → 对话框条目 (图片只带引用地址，<img> 按需加载)
+const toHistoryItem = (m) => ({
+    role: m.role === 'user' ? 'user' : 'assistant',
+    content: m.content,
+    imageUrl: m.image_url || null
+})
+
 export const useMiaStore = defineStore('mia', {
     state: () => ({
         dialogVisible: true,
@@ -10,6 +17,8 @@ export const useMiaStore = defineStore('mia', {
         conversationId: null,
         conversationList: [],
         showHistoryPanel: false,
+        historyCursor: null,     // [Stage 45.0] 加载更早消息的游标
+        hasMoreHistory: false,
     }),
 
     actions: {
@@ -29,6 +38,8 @@ export const useMiaStore = defineStore('mia', {
         startNewChat() {
             this.conversationId = null
             this.history = []
+            this.historyCursor = null
+            this.hasMoreHistory = false
             this.currentText = "让我们开始新的话题吧！"
             this.showHistoryPanel = false
         },
@@ -49,10 +60,9 @@ export const useMiaStore = defineStore('mia', {
                 const res = await request.get(`/mia/conversations/${id}`)
                 if (res) {
                     this.conversationId = res.id
-                    this.history = (res.messages || []).map(m => ({
-                        role: m.role === 'user' ? 'user' : 'assistant',
-                        content: m.content
-                    }))
+                    this.history = (res.messages || []).map(toHistoryItem)
+                    this.historyCursor = res.next_before_id
+                    this.hasMoreHistory = !!res.has_more
 
                     const lastMia = [...this.history].reverse().find(m => m.role === 'assistant')
                     if (lastMia) this.currentText = lastMia.content
@@ -65,6 +75,23 @@ export const useMiaStore = defineStore('mia', {
             }
         },
 
+        // [Stage 45.0] 向上翻页: 加载更早的一页消息并插到前面
+        async loadOlderMessages() {
+            if (!this.conversationId || !this.hasMoreHistory) return
+            try {
+                const res = await request.get(`/mia/conversations/${this.conversationId}`, {
+                    params: { before_id: this.historyCursor }
+                })
+                if (res) {
+                    this.history = [...(res.messages || []).map(toHistoryItem), ...this.history]
+                    this.historyCursor = res.next_before_id
+                    this.hasMoreHistory = !!res.has_more
+                }
+            } catch (e) {
+                console.error("Failed to load older messages", e)
+            }
+        },
+
         // --- Stream-Based Interact ---
         async interact(contextType, contextData) {
             try {
@@ -1,6 +1,10 @@
 import { defineStore } from 'pinia'
 import request from '../utils/request'
 
+// [Stage 42.0] 状态推送连接 (非响应式，不放进 state)
+let eventSource = null
+let eventSlotId = null
+
 export const useUserStore = defineStore('user', {
     state: () => ({
         hp: 100,
@@ -50,9 +54,35 @@ export const useUserStore = defineStore('user', {
             }
         },
 
+        // [Stage 42.0] 订阅 /api/events (SSE)，HP / 等级 / 情绪由服务端推送，无需轮询 status
+        connectEvents() {
+            if (typeof EventSource === 'undefined') return
+            if (eventSource) eventSource.close()
+            eventSlotId = this.currentSlotId
+            eventSource = new EventSource(`/api/events?slot_id=${eventSlotId}`)
+
+            const applyState = (e) => {
+                const s = JSON.parse(e.data)
+                this.updateStatus({ hp: s.hp, maxHp: s.max_hp, level: s.level, exp: s.exp })
+                this.updateMood()
+            }
+            eventSource.addEventListener('state', applyState)
+            eventSource.addEventListener('hp_change', applyState)
+            eventSource.addEventListener('level_up', applyState)
+            eventSource.addEventListener('mood_change', (e) => this.setMood(JSON.parse(e.data).mood))
+            eventSource.addEventListener('vocab_progress', (e) => {
+                const { reward } = JSON.parse(e.data)
+                if (reward) this.updateStatus({ hp: reward.new_hp, level: reward.new_level, exp: reward.new_exp })
+            })
+            // 推送积压被丢弃时整体刷新一次
+            eventSource.addEventListener('resync', () => this.loadUser())
+        },
+
         // 从后端加载用户进度
         async loadUser(slotId = null) {
             if (slotId !== null) this.currentSlotId = slotId
+            // 切换存档后推送连接跟随
+            if (eventSource && eventSlotId !== this.currentSlotId) this.connectEvents()
 
             try {
                 // GET /api/user/load?slot_id=...
@@ -150,6 +180,7 @@ export const useUserStore = defineStore('user', {
         async init() {
             await this.fetchSlots()
             await this.loadUser()
+            this.connectEvents()
         },
 
         // [Stage 16.0 / 21.0] Fetch available slots
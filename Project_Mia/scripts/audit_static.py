@@ -0,0 +1,628 @@
+"""
+audit_static.py — static_content.db 统一质检引擎
+=================================================
+quality_check.py / vocab_audit.py / audit_db.py 的判定规则统一登记为检查项 (CHECKS)，
+一次扫描全部完成:
+  - 行级检查: 谓词作用于「列批次」(每列一个 numpy 数组)，返回不合格行掩码；
+    按 rowid 区间切块，多进程并行 (每个 worker 一条只读连接)
+  - 库级检查: 单条 SQL (试卷题量、孤立题目)
+  - 输出 JSON / CSV 报告: 不含时间戳 / 耗时，发现项按 (检查项, 主键) 排序，
+    两次构建的报告可直接 diff；--diff 打印新增 / 已解决的发现项
+
+Usage:
+    python scripts/audit_static.py
+    python scripts/audit_static.py --json audit.json --csv audit.csv
+    python scripts/audit_static.py --only answer.,image. -v       # 只跑部分检查并列出明细
+    python scripts/audit_static.py --json new.json --diff old.json
+    python scripts/audit_static.py --workers 8 --chunk-size 20000 --fail-on warning
+
+Author: Femo
+Date: 2026-03-20
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DB_PATH = PROJECT_ROOT / "backend" / "data" / "static_content.db"
+
+# --- 颜色 ---
+RED    = "\033[91m"
+GREEN  = "\033[92m"
+YELLOW = "\033[93m"
+CYAN   = "\033[96m"
+BOLD   = "\033[1m"
+RESET  = "\033[0m"
+
+ERROR, WARNING, INFO = "error", "warning", "info"
+SEVERITY_RANK = {ERROR: 2, WARNING: 1, INFO: 0}
+SEVERITY_COLOR = {ERROR: RED, WARNING: YELLOW, INFO: CYAN}
+
+REPORT_VERSION = 1
+
+# 表 → 发现项主键列
+TABLE_KEYS = {"questions": "q_id", "dictionary": "word"}
+
+# --- 题型分类 (与 quality_check.py 一致) ---
+OBJECTIVE_CA = ("use_of_english", "reading_a")          # correct_answer = 字母
+OBJECTIVE_EITHER = ("reading_b",)                       # correct_answer 或 answer_key = 字母
+SUBJECTIVE = ("translation", "writing_a", "writing_b")  # answer_key = 参考文本
+PASSAGE_SECTIONS = ("use_of_english", "reading_a", "reading_b", "translation")
+KNOWN_SECTIONS = OBJECTIVE_CA + OBJECTIVE_EITHER + SUBJECTIVE
+VALID_OBJECTIVE = tuple("ABCDEFGH")
+REQUIRED_OPTIONS = set("ABCD")
+
+# 2025 年大作文是数据表格题，无配图
+NO_IMAGE_PAPERS = {"2025-eng1"}
+MIN_PAPER_QUESTIONS = 51
+
+
+# ============================================================================
+#  列批次
+# ============================================================================
+
+class Batch:
+    """一个 rowid 区间的列式数据；派生数组 (去空白文本 / 长度) 按需计算并缓存"""
+
+    def __init__(self, columns: List[str], rows: List[tuple]):
+        self.size = len(rows)
+        self._raw = {
+            name: np.array(values, dtype=object)
+            for name, values in zip(columns, zip(*rows) if rows else [()] * len(columns))
+        }
+        self._text: Dict[str, np.ndarray] = {}
+        self._len: Dict[str, np.ndarray] = {}
+        self._memo: Dict[str, object] = {}
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self._raw[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._raw
+
+    def text(self, name: str) -> np.ndarray:
+        """去首尾空白的字符串数组，NULL → ''"""
+        if name not in self._text:
+            self._text[name] = np.array(
+                [v.strip() if isinstance(v, str) else ("" if v is None else str(v)) for v in self._raw[name]],
+                dtype=object,
+            )
+        return self._text[name]
+
+    def length(self, name: str) -> np.ndarray:
+        if name not in self._len:
+            self._len[name] = np.fromiter((len(v) for v in self.text(name)), dtype=np.int64, count=self.size)
+        return self._len[name]
+
+    def isin(self, name: str, values: Iterable) -> np.ndarray:
+        return np.isin(self._raw[name], list(values))
+
+    def blank(self, name: str) -> np.ndarray:
+        return self.length(name) == 0
+
+    def ints(self, name: str) -> np.ndarray:
+        """整数列 (派生长度等)，NULL → 0"""
+        return np.fromiter((v or 0 for v in self._raw[name]), dtype=np.int64, count=self.size)
+
+    def memo(self, key: str, fn: Callable[["Batch"], object]):
+        """多个检查项共用的派生结果，每批只算一次"""
+        if key not in self._memo:
+            self._memo[key] = fn(self)
+        return self._memo[key]
+
+
+# ============================================================================
+#  检查项登记
+# ============================================================================
+
+class Check(NamedTuple):
+    name: str
+    table: str
+    columns: Tuple[str, ...]
+    severity: str
+    description: str
+    predicate: Callable[[Batch], np.ndarray]           # 不合格行掩码
+    detail: Optional[Callable[[Batch, int], str]]      # 单行问题描述 (只对不合格行调用)
+    sections: Optional[Tuple[str, ...]]                # 只检查这些 section_type (questions)
+
+
+class SqlCheck(NamedTuple):
+    name: str
+    severity: str
+    description: str
+    sql: str                                           # 返回 (key, detail)
+    tables: Tuple[str, ...]
+
+
+CHECKS: List[Check] = []
+SQL_CHECKS: List[SqlCheck] = []
+
+# 派生列: 在 SQL 端计算，谓词直接使用结果 —— 长文本 / 配图只需长度时不必整列搬进 Python，
+# 选项 JSON 用 JSON1 校验，免去逐行 json.loads。别名 → (表达式, 依赖的原始列)
+_TRIM = "' ' || char(9, 10, 13)"
+DERIVED_COLUMNS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "passage_len": (f"length(trim(passage_text, {_TRIM}))", ("passage_text",)),
+    "analysis_len": (f"length(trim(official_analysis, {_TRIM}))", ("official_analysis",)),
+    "image_len": ("length(image_base64)", ("image_base64",)),
+    "image_prefix": ("substr(image_base64, 1, 5)", ("image_base64",)),
+    # NULL = 无选项, 0 = 非法 / 缺 A-D (完形、阅读A) / 有空选项, 1 = 合法
+    "options_valid": (f"""
+        CASE
+            WHEN options_json IS NULL OR options_json = '' THEN NULL
+            WHEN NOT json_valid(options_json) OR json_type(options_json) != 'object' THEN 0
+            WHEN section_type IN ({", ".join(f"'{s}'" for s in OBJECTIVE_CA)})
+                 AND ({" OR ".join(f"json_type(options_json, '$.{k}') IS NULL" for k in sorted(REQUIRED_OPTIONS))}) THEN 0
+            WHEN EXISTS (SELECT 1 FROM json_each(options_json) WHERE value IS NULL OR trim(value) = '') THEN 0
+            ELSE 1
+        END""", ("options_json", "section_type")),
+}
+
+
+def row_check(name: str, table: str, columns: Tuple[str, ...], severity: str, description: str,
+              sections: Optional[Tuple[str, ...]] = None, detail: Optional[Callable] = None):
+    """登记行级检查；被装饰函数为谓词 batch → 不合格掩码"""
+    def register(fn: Callable[[Batch], np.ndarray]):
+        cols = columns + (("section_type",) if sections and "section_type" not in columns else ())
+        CHECKS.append(Check(name, table, cols, severity, description, fn, detail, sections))
+        return fn
+    return register
+
+
+# --- 客观题答案 ---
+
+_ANSWER_PREFIX = re.compile(r"^(answer\s*[:：]\s*)", re.IGNORECASE)
+
+
+def _objective_value(b: Batch) -> np.ndarray:
+    """reading_b 导入不一致: correct_answer 为空时取 answer_key"""
+    ca = b.text("correct_answer")
+    use_key = (ca == "") & (b["section_type"] == "reading_b")
+    return np.where(use_key, b.text("answer_key"), ca)
+
+
+def _clean_answer(value: str) -> str:
+    cleaned = _ANSWER_PREFIX.sub("", value.upper())
+    return cleaned.rstrip(".").strip()
+
+
+def _answer_state(b: Batch) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(取值, 合法掩码, 需清洗掩码)；快路径向量化，仅对非单字母行逐个清洗"""
+    value = b.memo("objective_value", _objective_value)
+    exact = np.isin(value, VALID_OBJECTIVE)
+    cleanable = np.zeros(b.size, dtype=bool)
+    for i in np.nonzero(~exact & (value != ""))[0]:
+        cleaned = _clean_answer(value[i])
+        cleanable[i] = len(cleaned) == 1 and cleaned in VALID_OBJECTIVE
+    return value, exact | cleanable, cleanable
+
+
+def _answer_detail(b: Batch, i: int) -> str:
+    value = b.memo("objective_value", _objective_value)[i]
+    if not value:
+        return "MISSING"
+    cleaned = _clean_answer(value)
+    if len(cleaned) == 1 and cleaned in VALID_OBJECTIVE:
+        return f"DIRTY_FORMAT({value}->{cleaned})"
+    return f"INVALID_FORMAT({value!r})"
+
+
+@row_check("answer.objective", "questions", ("correct_answer", "answer_key"), ERROR,
+           "客观题答案缺失或不是单个选项字母", sections=OBJECTIVE_CA + OBJECTIVE_EITHER, detail=_answer_detail)
+def answer_objective(b: Batch) -> np.ndarray:
+    return ~b.memo("answer_state", _answer_state)[1]
+
+
+@row_check("answer.dirty", "questions", ("correct_answer", "answer_key"), WARNING,
+           "客观题答案可清洗为单字母 (如 'A.' / 'Answer: A')", sections=OBJECTIVE_CA + OBJECTIVE_EITHER,
+           detail=_answer_detail)
+def answer_dirty(b: Batch) -> np.ndarray:
+    return b.memo("answer_state", _answer_state)[2]
+
+
+def _reference_detail(b: Batch, i: int) -> str:
+    text = b.text("answer_key")[i]
+    if not text:
+        return "MISSING_REFERENCE_ANSWER"
+    if text.startswith("[待补充"):
+        return "PLACEHOLDER"
+    return f"TOO_SHORT(len={len(text)})"
+
+
+@row_check("answer.reference", "questions", ("answer_key",), ERROR,
+           "主观题参考译文 / 范文缺失、过短或为占位符", sections=SUBJECTIVE, detail=_reference_detail)
+def answer_reference(b: Batch) -> np.ndarray:
+    placeholder = np.fromiter((t.startswith("[待补充") for t in b.text("answer_key")), dtype=bool, count=b.size)
+    return (b.length("answer_key") < 10) | placeholder
+
+
+# --- 题目结构 ---
+
+@row_check("section.unknown", "questions", ("section_type",), ERROR, "无法识别的 section_type",
+           detail=lambda b, i: f"UNKNOWN_TYPE({b['section_type'][i]})")
+def section_unknown(b: Batch) -> np.ndarray:
+    return ~b.isin("section_type", KNOWN_SECTIONS)
+
+
+@row_check("passage.missing", "questions", ("passage_len",), ERROR, "完形 / 阅读 / 翻译缺少文章",
+           sections=PASSAGE_SECTIONS, detail=lambda b, i: "MISSING_PASSAGE")
+def passage_missing(b: Batch) -> np.ndarray:
+    return b.ints("passage_len") == 0
+
+
+def _options_problem(raw, required: bool) -> Optional[str]:
+    if raw is None or raw == "":
+        return "MISSING_OPTIONS" if required else None
+    try:
+        opts = json.loads(raw) if isinstance(raw, str) else raw
+    except (ValueError, TypeError):
+        return "INVALID_JSON"
+    if not isinstance(opts, dict):
+        return f"NOT_AN_OBJECT({type(opts).__name__})"
+    if required and not REQUIRED_OPTIONS <= set(opts):
+        return f"MISSING_KEYS({','.join(sorted(REQUIRED_OPTIONS - set(opts)))})"
+    empty = sorted(k for k, v in opts.items() if not (str(v).strip() if v is not None else ""))
+    if empty:
+        return f"EMPTY_OPTIONS({','.join(empty)})"
+    return None
+
+
+@row_check("options.json", "questions", ("options_json", "options_valid", "section_type"), ERROR,
+           "选项 JSON 无法解析 / 非对象 / 缺 A-D / 有空选项 (完形、阅读A 必须有选项)",
+           detail=lambda b, i: _options_problem(b["options_json"][i], b["section_type"][i] in OBJECTIVE_CA))
+def options_json(b: Batch) -> np.ndarray:
+    valid = b["options_valid"]
+    missing = np.equal(valid, None) & b.isin("section_type", OBJECTIVE_CA)
+    return missing | np.equal(valid, 0)
+
+
+@row_check("analysis.missing", "questions", ("analysis_len",), INFO, "缺少官方解析 (覆盖率指标)",
+           detail=lambda b, i: "MISSING_ANALYSIS")
+def analysis_missing(b: Batch) -> np.ndarray:
+    return b.ints("analysis_len") <= 5
+
+
+# --- 配图 ---
+
+@row_check("image.writing_b", "questions", ("paper_id", "image_len"), WARNING, "大作文缺少配图",
+           sections=("writing_b",), detail=lambda b, i: "MISSING_IMAGE")
+def image_writing_b(b: Batch) -> np.ndarray:
+    return (b.ints("image_len") <= 100) & ~b.isin("paper_id", NO_IMAGE_PAPERS)
+
+
+@row_check("image.not_normalized", "questions", ("image_len", "image_prefix", "image_width"), INFO,
+           "配图未经归一化 (旧库；运行 normalize_question_images.py)",
+           detail=lambda b, i: "NO_METADATA" if b["image_prefix"][i] == "data:" else "RAW_BASE64")
+def image_not_normalized(b: Batch) -> np.ndarray:
+    present = b.ints("image_len") > 100
+    return present & b.blank("image_width")
+
+
+# --- 词典 ---
+
+@row_check("dictionary.meaning", "dictionary", ("meaning",), ERROR, "词条缺少释义",
+           detail=lambda b, i: "MISSING_MEANING")
+def dictionary_meaning(b: Batch) -> np.ndarray:
+    return b.blank("meaning")
+
+
+@row_check("dictionary.pos", "dictionary", ("pos",), WARNING, "词条缺少词性",
+           detail=lambda b, i: "MISSING_POS")
+def dictionary_pos(b: Batch) -> np.ndarray:
+    return b.blank("pos")
+
+
+def _sentences_problem(raw) -> Optional[str]:
+    if not isinstance(raw, str) or not raw.strip():
+        return None
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        return "INVALID_JSON"
+    return None if isinstance(value, list) else f"NOT_A_LIST({type(value).__name__})"
+
+
+@row_check("dictionary.sentences", "dictionary", ("example_sentences",), INFO, "词条无例句 (覆盖率指标)",
+           detail=lambda b, i: "NO_SENTENCES")
+def dictionary_sentences(b: Batch) -> np.ndarray:
+    return b.blank("example_sentences") | b.isin("example_sentences", ("[]", "null"))
+
+
+@row_check("dictionary.sentences_json", "dictionary", ("example_sentences",), ERROR, "例句 JSON 无法解析或不是数组",
+           detail=lambda b, i: _sentences_problem(b["example_sentences"][i]))
+def dictionary_sentences_json(b: Batch) -> np.ndarray:
+    # 合法数组必以 '[' 开头、']' 结尾；只对不符合的行真正解析
+    text = b.text("example_sentences")
+    suspect = np.fromiter((bool(t) and not (t[0] == "[" and t[-1] == "]") for t in text), dtype=bool, count=b.size)
+    bad = np.zeros(b.size, dtype=bool)
+    for i in np.nonzero(suspect)[0]:
+        bad[i] = _sentences_problem(text[i]) is not None
+    return bad
+
+
+# --- 库级 ---
+
+SQL_CHECKS.extend([
+    SqlCheck(
+        "paper.question_count", ERROR, f"英语一试卷题目少于 {MIN_PAPER_QUESTIONS} 道 / 任何试卷无题目",
+        f"""
+        SELECT p.paper_id, 'QUESTIONS(' || COUNT(q.q_id) || ')'
+        FROM papers p LEFT JOIN questions q ON q.paper_id = p.paper_id
+        GROUP BY p.paper_id
+        HAVING COUNT(q.q_id) = 0 OR (p.exam_type = 'English I' AND COUNT(q.q_id) < {MIN_PAPER_QUESTIONS})
+        """,
+        ("papers", "questions"),
+    ),
+    SqlCheck(
+        "paper.orphan_questions", ERROR, "题目引用的试卷不存在",
+        """
+        SELECT q.q_id, 'UNKNOWN_PAPER(' || q.paper_id || ')'
+        FROM questions q LEFT JOIN papers p ON p.paper_id = q.paper_id
+        WHERE p.paper_id IS NULL
+        """,
+        ("papers", "questions"),
+    ),
+])
+
+
+# ============================================================================
+#  执行 (进程池 worker，每进程一条只读连接)
+# ============================================================================
+
+_conn: Optional[sqlite3.Connection] = None
+
+
+def _open_readonly(db_path: str) -> sqlite3.Connection:
+    return sqlite3.connect(f"{Path(db_path).resolve().as_uri()}?mode=ro", uri=True)
+
+
+def _init_worker(db_path: str):
+    global _conn
+    _conn = _open_readonly(db_path)
+
+
+def run_chunk(table: str, lo: int, hi: int, check_names: List[str]) -> Dict[str, Tuple[int, List[Tuple[str, str]]]]:
+    """rowid ∈ [lo, hi) 的一块数据上执行检查，返回 {检查项: (检查行数, [(主键, 问题)])}"""
+    checks = [c for c in CHECKS if c.name in check_names]
+    key = TABLE_KEYS[table]
+    columns = [key] + sorted({col for c in checks for col in c.columns} - {key})
+    select = [f"{DERIVED_COLUMNS[c][0]} AS {c}" if c in DERIVED_COLUMNS else c for c in columns]
+    rows = _conn.execute(
+        f"SELECT {', '.join(select)} FROM {table} WHERE rowid >= ? AND rowid < ?", (lo, hi)
+    ).fetchall()
+    batch = Batch(columns, rows)
+    keys = batch[key]
+
+    out = {}
+    for c in checks:
+        scope = batch.isin("section_type", c.sections) if c.sections else np.ones(batch.size, dtype=bool)
+        failed = np.nonzero(scope & c.predicate(batch))[0]
+        findings = [(str(keys[i]), c.detail(batch, i) if c.detail else "") for i in failed]
+        out[c.name] = (int(scope.sum()), findings)
+    return out
+
+
+def plan_chunks(conn: sqlite3.Connection, table: str, chunk_size: int) -> List[Tuple[int, int]]:
+    lo, hi = conn.execute(f"SELECT MIN(rowid), MAX(rowid) FROM {table}").fetchone()
+    if lo is None:
+        return []
+    return [(start, min(start + chunk_size, hi + 1)) for start in range(lo, hi + 1, chunk_size)]
+
+
+def select_checks(only: Optional[str]) -> Tuple[List[Check], List[SqlCheck]]:
+    if not only:
+        return list(CHECKS), list(SQL_CHECKS)
+    prefixes = tuple(p.strip() for p in only.split(",") if p.strip())
+    return ([c for c in CHECKS if c.name.startswith(prefixes)],
+            [c for c in SQL_CHECKS if c.name.startswith(prefixes)])
+
+
+def run_audit(db_path: Path, only: Optional[str] = None, workers: Optional[int] = None,
+              chunk_size: int = 10000) -> dict:
+    """执行全部检查，返回报告 dict (结构见 write_json)"""
+    checks, sql_checks = select_checks(only)
+    conn = _open_readonly(str(db_path))
+    skipped: Dict[str, str] = {}
+    try:
+        tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")}
+        columns = {t: {r[1] for r in conn.execute(f"PRAGMA table_info({t})")} for t in tables}
+
+        runnable = []
+        for c in checks:
+            needed = {base for col in c.columns for base in DERIVED_COLUMNS.get(col, ((), (col,)))[1]}
+            missing = sorted(col for col in needed if col not in columns.get(c.table, ()))
+            if c.table not in tables:
+                skipped[c.name] = f"table {c.table} not found"
+            elif missing:
+                skipped[c.name] = f"column {', '.join(missing)} not found"
+            else:
+                runnable.append(c)
+
+        tasks = []
+        for table in sorted({c.table for c in runnable}):
+            names = [c.name for c in runnable if c.table == table]
+            tasks.extend((table, lo, hi, names) for lo, hi in plan_chunks(conn, table, chunk_size))
+
+        results = {c.name: [0, []] for c in runnable}
+
+        def merge(part: dict):
+            for name, (checked, findings) in part.items():
+                results[name][0] += checked
+                results[name][1].extend(findings)
+
+        workers = max(1, min(workers or os.cpu_count() or 1, len(tasks) or 1))
+        if workers == 1:
+            _init_worker(str(db_path))
+            try:
+                for t in tasks:
+                    merge(run_chunk(*t))
+            finally:
+                _conn.close()
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(str(db_path),)) as pool:
+                for part in pool.map(run_chunk, *zip(*tasks)):
+                    merge(part)
+
+        for c in sql_checks:
+            if not all(t in tables for t in c.tables):
+                skipped[c.name] = f"table {', '.join(t for t in c.tables if t not in tables)} not found"
+                continue
+            rows = conn.execute(c.sql).fetchall()
+            results[c.name] = [None, [(str(k), d) for k, d in rows]]
+    finally:
+        conn.close()
+
+    summary, findings = {}, []
+    for c in [*runnable, *(c for c in sql_checks if c.name in results)]:
+        checked, items = results[c.name]
+        summary[c.name] = {
+            "severity": c.severity,
+            "description": c.description,
+            "checked": checked,
+            "failed": len(items),
+            "pass_rate": round(1 - len(items) / checked, 4) if checked else None,
+        }
+        findings.extend({"check": c.name, "severity": c.severity, "key": k, "detail": d} for k, d in items)
+    for name, reason in skipped.items():
+        summary[name] = {"severity": None, "skipped": reason}
+    findings.sort(key=lambda f: (f["check"], f["key"], f["detail"]))
+
+    return {
+        "version": REPORT_VERSION,
+        "database": Path(db_path).name,
+        "summary": dict(sorted(summary.items())),
+        "findings": findings,
+    }
+
+
+# ============================================================================
+#  报告
+# ============================================================================
+
+def write_json(report: dict, path: Path):
+    path.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+
+
+def write_csv(report: dict, path: Path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(("check", "severity", "key", "detail"))
+        for item in report["findings"]:
+            writer.writerow((item["check"], item["severity"], item["key"], item["detail"]))
+
+
+def finding_keys(report: dict, checks: set) -> set:
+    return {(f["check"], f["key"], f["detail"]) for f in report["findings"] if f["check"] in checks}
+
+
+def ran_checks(report: dict) -> set:
+    return {name for name, s in report["summary"].items() if "skipped" not in s}
+
+
+def print_summary(report: dict, verbose: bool, limit: int = 20):
+    print(f"  {BOLD}{'Check':<28}{'Severity':<10}{'Checked':>9}{'Failed':>8}{'Pass':>8}{RESET}")
+    print(f"  {'─'*63}")
+    for name, s in report["summary"].items():
+        if "skipped" in s:
+            print(f"  {name:<28}{YELLOW}{'skipped':<10}{RESET}  {s['skipped']}")
+            continue
+        color = SEVERITY_COLOR[s["severity"]] if s["failed"] else GREEN
+        checked = "-" if s["checked"] is None else s["checked"]
+        rate = "-" if s["pass_rate"] is None else f"{s['pass_rate']:.1%}"
+        print(f"  {name:<28}{s['severity']:<10}{checked:>9}{color}{s['failed']:>8}{RESET}{rate:>8}")
+
+    if verbose and report["findings"]:
+        print(f"\n{BOLD}  Findings{RESET}")
+        shown: Dict[str, int] = {}
+        for f in report["findings"]:
+            shown[f["check"]] = shown.get(f["check"], 0) + 1
+            if shown[f["check"]] <= limit:
+                color = SEVERITY_COLOR[f["severity"]]
+                print(f"  {color}{f['check']:<28}{RESET}{f['key']:<36}{f['detail']}")
+        for name, n in shown.items():
+            if n > limit:
+                print(f"  {name:<28}... and {n - limit} more")
+
+
+def print_diff(report: dict, old: dict, limit: int = 20):
+    # 只比较两次都执行了的检查项 (--only / 缺列跳过的不算作新增或解决)
+    common = ran_checks(report) & ran_checks(old)
+    new_keys, old_keys = finding_keys(report, common), finding_keys(old, common)
+    added, resolved = sorted(new_keys - old_keys), sorted(old_keys - new_keys)
+    print(f"\n{BOLD}  Diff vs previous report{RESET}: "
+          f"{RED}+{len(added)} new{RESET}, {GREEN}-{len(resolved)} resolved{RESET}")
+    for sign, color, items in (("+", RED, added), ("-", GREEN, resolved)):
+        for check, key, detail in items[:limit]:
+            print(f"  {color}{sign} {check:<28}{RESET}{key:<36}{detail}")
+        if len(items) > limit:
+            print(f"  {color}{sign}{RESET} ... and {len(items) - limit} more")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audit static_content.db with the registered checks")
+    parser.add_argument("--db-path", type=Path, default=DB_PATH, help="Path to static_content.db")
+    parser.add_argument("--json", type=Path, help="Write the full report as JSON")
+    parser.add_argument("--csv", type=Path, help="Write findings as CSV")
+    parser.add_argument("--diff", type=Path, help="Previous JSON report to compare against")
+    parser.add_argument("--only", type=str, help="Comma-separated check name prefixes (e.g. answer.,image.)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Rows per work unit (rowid range)")
+    parser.add_argument("--fail-on", choices=(ERROR, WARNING, "never"), default=ERROR,
+                        help="Exit 1 when findings at or above this severity exist")
+    parser.add_argument("--list", action="store_true", help="List registered checks and exit")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Print individual findings")
+    args = parser.parse_args()
+
+    if args.list:
+        for c in CHECKS:
+            print(f"  {c.name:<28}{c.severity:<10}{c.table:<12}{c.description}")
+        for c in SQL_CHECKS:
+            print(f"  {c.name:<28}{c.severity:<10}{'(sql)':<12}{c.description}")
+        return
+    if not args.db_path.exists():
+        print(f"{RED}[ERROR] Database not found: {args.db_path}{RESET}")
+        sys.exit(1)
+
+    print(f"\n{BOLD}{CYAN}{'='*66}")
+    print(f"  🔍 Project_Mia — Static Content Audit")
+    print(f"{'='*66}{RESET}\n")
+    print(f"  Database: {args.db_path}\n")
+
+    started = time.perf_counter()
+    report = run_audit(args.db_path, args.only, args.workers, args.chunk_size)
+    elapsed = time.perf_counter() - started
+
+    print_summary(report, args.verbose)
+    if args.diff:
+        print_diff(report, json.loads(args.diff.read_text(encoding="utf-8")))
+    if args.json:
+        write_json(report, args.json)
+        print(f"\n  JSON report: {args.json}")
+    if args.csv:
+        write_csv(report, args.csv)
+        print(f"  CSV findings: {args.csv}")
+
+    counts = {sev: sum(1 for f in report["findings"] if f["severity"] == sev) for sev in SEVERITY_RANK}
+    print(f"\n  {BOLD}{len(report['findings'])} findings{RESET}: "
+          f"{RED}{counts[ERROR]} errors{RESET}, {YELLOW}{counts[WARNING]} warnings{RESET}, "
+          f"{CYAN}{counts[INFO]} info{RESET}  ({elapsed:.2f}s)\n")
+
+    if args.fail_on != "never" and any(
+        counts[sev] for sev in SEVERITY_RANK if SEVERITY_RANK[sev] >= SEVERITY_RANK[args.fail_on]
+    ):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+bench_seed.py — 基准测试用合成数据库
+==============================================
+按规模与随机种子生成 static_content.db + femo_profile.db，同一 (规模, 种子) 数据内容完全一致
+(时间戳以固定基准日 BASE_DAY 推算，不读当前时间)。
+
+  static_content.db  papers / questions (按真实卷面结构) / dictionary (+ FTS 索引) / vocabulary / stories
+  femo_profile.db    game_saves / answer_history_logs → user_answers + 统计汇总表 (analytics rebuild)
+                     user_vocab_memory / conversations + messages (+ FTS)
+
+Usage:
+    python scripts/bench_seed.py --scale medium --seed 42 --out /tmp/mia_bench
+    python scripts/bench_seed.py --scale small --history 20000 --out ./bench_db
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Any, List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from sqlalchemy import create_engine
+
+from app.db import helpers, session, models
+from app.db.helpers import get_profile_conn, get_static_conn, ensure_auto_save
+from app.core.query_profiler import instrument_engine
+
+# --- 颜色 ---
+GREEN  = "\033[92m"
+CYAN   = "\033[96m"
+BOLD   = "\033[1m"
+RESET  = "\033[0m"
+
+# 规模预设 (可被命令行单项覆盖)
+SCALES: Dict[str, Dict[str, int]] = {
+    "small":  {"papers": 4,  "dictionary": 1000, "slots": 2, "history": 500,   "conversations": 20,  "messages": 20},
+    "medium": {"papers": 16, "dictionary": 6500, "slots": 4, "history": 5000,  "conversations": 100, "messages": 30},
+    "large":  {"papers": 32, "dictionary": 6500, "slots": 8, "history": 50000, "conversations": 400, "messages": 50},
+}
+
+BASE_DAY = date(2026, 3, 1)
+
+# 种子库 / context.json 结构变化时 +1 (benchmark.py 的缓存键包含它)
+SEED_FORMAT = 2
+
+# 卷面结构: (section_type, 题量, 单题分值)
+PAPER_LAYOUT = [
+    ("use_of_english", 20, 0.5),
+    ("reading_a", 20, 2.0),
+    ("reading_b", 5, 2.0),
+    ("translation", 5, 2.0),
+    ("writing_a", 1, 10.0),
+    ("writing_b", 1, 20.0),
+]
+OBJECTIVE = {"use_of_english", "reading_a", "reading_b"}
+# 各题型模拟正确率
+ACCURACY = {"use_of_english": 0.6, "reading_a": 0.7, "reading_b": 0.55}
+
+_MEANINGS = ["能力", "放弃", "吸收", "抽象", "加速", "进入", "陪伴", "影响", "发展", "经济", "政策",
+             "社会", "过程", "结构", "证据", "假设", "态度", "倾向", "资源", "环境", "竞争", "价值"]
+_POS = ["n.", "v.", "adj.", "adv."]
+_SYLLABLES = ["ab", "ac", "con", "de", "dis", "ex", "in", "pro", "re", "sub", "trans", "ver",
+              "ment", "tion", "able", "ous", "ive", "al", "ate", "ize", "ance", "ity", "or", "er"]
+
+
+def scale_params(scale: str, **overrides) -> Dict[str, int]:
+    params = dict(SCALES[scale])
+    params.update({k: v for k, v in overrides.items() if v is not None})
+    return params
+
+
+def configure_paths(static_db: Path, profile_db: Path):
+    """把 helpers / SQLAlchemy 会话指向给定的库文件 (进程内生效)"""
+    helpers.STATIC_DB = Path(static_db)
+    helpers.PROFILE_DB = Path(profile_db)
+    session.static_engine = create_engine(f"sqlite:///{static_db}", echo=False)
+    session.profile_engine = create_engine(f"sqlite:///{profile_db}", echo=False)
+    instrument_engine(session.static_engine, "static")
+    instrument_engine(session.profile_engine, "profile")
+    session.StaticSessionLocal.configure(bind=session.static_engine)
+    session.ProfileSessionLocal.configure(bind=session.profile_engine)
+
+
+# ==================================================================
+#  static_content.db
+# ==================================================================
+
+def _words(rng: random.Random, n: int) -> List[str]:
+    seen, words = set(), []
+    while len(words) < n:
+        w = "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4)))
+        if w not in seen:
+            seen.add(w)
+            words.append(w)
+    return words
+
+
+def _sentence(rng: random.Random, words: List[str], must: str) -> str:
+    body = rng.sample(words, 12)
+    body.insert(rng.randint(0, 12), must)
+    return " ".join(body).capitalize() + "."
+
+
+def seed_static(rng: random.Random, params: Dict[str, int]) -> Dict[str, Any]:
+    models.StaticBase.metadata.create_all(session.static_engine)
+    words = _words(rng, params["dictionary"])
+    papers: List[str] = []
+    objective: List[Dict[str, Any]] = []
+    stories: List[str] = []
+
+    with get_static_conn() as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS vocabulary (
+                word TEXT PRIMARY KEY, phonetic TEXT, pos TEXT, meanings TEXT, sentences TEXT
+            )
+        """)
+        q_rows, story_rows = [], []
+        for i in range(params["papers"]):
+            year = 2010 + i // 2
+            exam = "eng1" if i % 2 == 0 else "eng2"
+            paper_id = f"{year}-{exam}"
+            papers.append(paper_id)
+            conn.execute(
+                "INSERT INTO papers (paper_id, year, exam_type, title, total_score, time_limit) VALUES (?, ?, ?, ?, 100.0, 180)",
+                (paper_id, year, "English I" if exam == "eng1" else "English II", f"{year}年考研英语{'一' if exam == 'eng1' else '二'}真题"),
+            )
+            n = 1
+            for section, count, score in PAPER_LAYOUT:
+                passage = " ".join(_sentence(rng, words, rng.choice(words)) for _ in range(12))
+                for j in range(count):
+                    q_id = f"{paper_id}-{section}-q{n}"
+                    is_obj = section in OBJECTIVE
+                    answer = rng.choice("ABCD") if is_obj else None
+                    group = f"Text {j // 5 + 1}" if section == "reading_a" else None
+                    q_rows.append((
+                        q_id, paper_id, "reading" if is_obj else section.split("_")[0], section, group, n,
+                        passage if section in ("use_of_english", "reading_a", "reading_b") else None,
+                        _sentence(rng, words, rng.choice(words)),
+                        json.dumps({k: rng.choice(words) for k in "ABCD"}) if is_obj else None,
+                        answer, score, rng.randint(1, 5), json.dumps(["inference"]),
+                        "iVBORw0KGgo" + "A" * 4000 if section == "writing_b" else None,
+                        "参考答案" if not is_obj else None,
+                    ))
+                    if is_obj:
+                        objective.append({"q_id": q_id, "paper_id": paper_id, "section": section, "answer": answer})
+                        if rng.random() < 0.3:
+                            story_rows.append((q_id, year, section, "对了喵", "错了喵", "Right", "Wrong"))
+                            stories.append(q_id)
+                    n += 1
+        conn.executemany("""
+            INSERT INTO questions (q_id, paper_id, q_type, section_type, group_name, question_number,
+                                   passage_text, content, options_json, correct_answer, score, difficulty,
+                                   tags, image_base64, answer_key)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, q_rows)
+        conn.executemany("""
+            INSERT INTO stories (q_id, year, section_type, correct_cn, wrong_cn, correct_en, wrong_en)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, story_rows)
+
+        dict_rows, vocab_rows = [], []
+        for w in words:
+            meaning = f"{rng.choice(_POS)} {rng.choice(_MEANINGS)}；{rng.choice(_MEANINGS)}"
+            sentences = [
+                {"en": _sentence(rng, words, w), "cn": "", "year": rng.randint(2010, 2025), "source": "bench"}
+                for _ in range(rng.choice((0, 1, 1, 2, 3, 5)))
+            ]
+            dict_rows.append((w, meaning, meaning.split()[0], len(sentences), json.dumps(sentences, ensure_ascii=False)))
+            vocab_rows.append((
+                w, f"/{w}/", meaning.split()[0], json.dumps([meaning], ensure_ascii=False),
+                json.dumps([{"sentence": s["en"], "year": s["year"]} for s in sentences], ensure_ascii=False),
+            ))
+        conn.executemany(
+            "INSERT INTO dictionary (word, meaning, pos, frequency, example_sentences) VALUES (?, ?, ?, ?, ?)",
+            dict_rows,
+        )
+        conn.executemany("INSERT INTO vocabulary (word, phonetic, pos, meanings, sentences) VALUES (?, ?, ?, ?, ?)", vocab_rows)
+
+        from app.services.vocab_search_service import vocab_search_service
+        vocab_search_service.rebuild_index(conn)
+        conn.commit()
+
+    return {"papers": papers, "objective": objective, "stories": stories, "words": words}
+
+
+# ==================================================================
+#  femo_profile.db
+# ==================================================================
+
+def seed_profile(rng: random.Random, params: Dict[str, int], static: Dict[str, Any]) -> Dict[str, Any]:
+    models.ProfileBase.metadata.create_all(session.profile_engine)
+    objective = static["objective"]
+    words = static["words"]
+
+    with get_profile_conn() as conn:
+        ensure_auto_save(conn)
+        slots = list(range(params["slots"]))
+        for slot_id in slots:
+            conn.execute("""
+                INSERT INTO game_saves (slot_id, slot_name, hp, max_hp, level, exp) VALUES (?, ?, ?, 100, ?, ?)
+                ON CONFLICT(slot_id) DO UPDATE SET
+                    slot_name = excluded.slot_name, hp = excluded.hp, level = excluded.level, exp = excluded.exp
+            """, (slot_id, f"Bench {slot_id}", rng.randint(30, 100), rng.randint(1, 10), rng.randint(0, 90)))
+
+            logs, latest = [], {}
+            for i in range(params["history"]):
+                q = rng.choice(objective)
+                correct = rng.random() < ACCURACY[q["section"]]
+                answer = q["answer"] if correct else rng.choice([c for c in "ABCD" if c != q["answer"]])
+                ts = (BASE_DAY - timedelta(days=rng.randint(0, 119))).isoformat() + f" {rng.randint(8, 23):02d}:{rng.randint(0, 59):02d}:00"
+                score = 2.0 if correct else 0.0
+                logs.append((slot_id, q["q_id"], q["paper_id"], q["section"], int(correct), answer, score, ts))
+                prev = latest.get(q["q_id"])
+                if prev is None or prev[-1] <= ts:
+                    latest[q["q_id"]] = (slot_id, q["q_id"], q["paper_id"], q["section"], answer, score, int(correct), ts)
+            conn.executemany("""
+                INSERT INTO answer_history_logs (slot_id, q_id, paper_id, section_type, is_correct, user_answer, score, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, logs)
+            conn.executemany("""
+                INSERT INTO user_answers (slot_id, q_id, paper_id, section_type, user_answer, score, is_correct, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, latest.values())
+
+            memory = []
+            for w in rng.sample(words, min(len(words), len(words) // 5)):
+                due = BASE_DAY + timedelta(days=rng.randint(-10, 30))
+                memory.append((
+                    slot_id, w, round(rng.uniform(1.3, 2.8), 2), rng.randint(0, 40), rng.randint(0, 8),
+                    due.isoformat(), (due - timedelta(days=3)).isoformat(), rng.randint(0, 5), rng.randint(0, 6),
+                ))
+            conn.executemany("""
+                INSERT INTO user_vocab_memory (slot_id, word, easiness_factor, interval, repetitions,
+                                               next_review_date, last_review_date, mastery_level, success_streak)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, memory)
+        conn.commit()
+
+        from app.services.analytics_service import analytics_service
+        analytics_service.rebuild(conn)
+
+        from app.services.conversation_service import conversation_service
+        conversations = []
+        for c in range(params["conversations"]):
+            started = BASE_DAY - timedelta(days=rng.randint(0, 90))
+            cursor = conn.execute(
+                "INSERT INTO conversations (title, created_at, updated_at) VALUES (?, ?, ?)",
+                (f"Bench chat {c}", started.isoformat(), started.isoformat()),
+            )
+            conv_id = cursor.lastrowid
+            conversations.append(conv_id)
+            for m in range(params["messages"]):
+                role = "user" if m % 2 == 0 else "assistant"
+                text = " ".join(rng.sample(words, 8)) + f" {rng.choice(_MEANINGS)}{rng.choice(_MEANINGS)}"
+                conversation_service.insert_message(conn, conv_id, role, text, f"{started.isoformat()} 12:{m % 60:02d}:00")
+        conn.commit()
+
+    return {"slots": slots, "conversations": conversations}
+
+
+def seed(out_dir: Path, params: Dict[str, int], seed_value: int) -> Dict[str, Any]:
+    """生成一套库，返回供基准场景取样的上下文 (并写入 out_dir/context.json)"""
+    out_dir = Path(out_dir)
+    if out_dir.resolve() == (BACKEND_DIR / "data").resolve():
+        raise SystemExit("Refusing to overwrite the real backend/data databases")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for name in ("static_content.db", "femo_profile.db", "context.json"):
+        (out_dir / name).unlink(missing_ok=True)
+    configure_paths(out_dir / "static_content.db", out_dir / "femo_profile.db")
+
+    rng = random.Random(seed_value)
+    static = seed_static(rng, params)
+    profile = seed_profile(rng, params, static)
+    context = {
+        "params": params,
+        "seed": seed_value,
+        "papers": static["papers"],
+        "objective": static["objective"],
+        "stories": static["stories"],
+        "words": static["words"],
+        "slots": profile["slots"],
+        "conversations": profile["conversations"],
+    }
+    (out_dir / "context.json").write_text(json.dumps(context, ensure_ascii=False), encoding="utf-8")
+    return context
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate seeded synthetic databases for benchmarking")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="medium")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", type=Path, required=True, help="Output directory")
+    for key in SCALES["small"]:
+        parser.add_argument(f"--{key}", type=int, default=None, help=f"Override {key}")
+    args = parser.parse_args()
+
+    params = scale_params(args.scale, **{k: getattr(args, k) for k in SCALES["small"]})
+    print(f"\n{BOLD}{CYAN}  🧪 Seeding benchmark databases ({args.scale}, seed={args.seed}){RESET}")
+    print(f"  {params}")
+    start = time.perf_counter()
+    seed(args.out, params, args.seed)
+    print(f"\n  {GREEN}{BOLD}✅ Done in {time.perf_counter() - start:.1f}s → {args.out}{RESET}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+"""
+benchmark.py — 接口基准测试 (进程内，可复现)
+==============================================
+不依赖运行中的服务器: 用 bench_seed.py 生成的合成库 + llm_stub.py 替身模型，
+经 httpx ASGITransport 直接驱动各个 router。每个场景:
+  - 顺序请求 N 次 → p50 / p95 / p99 / mean / max 延迟
+  - 并发 C 路请求 N 次 → 吞吐 (req/s)
+  - tracemalloc 下再跑 A 次 → 单请求内存峰值 / 净增
+结果可存为 JSON 基线 (--save)，之后用 --compare 对比并标出回归。
+
+每次运行都从种子库的干净副本开始 (写接口不会污染下一次运行)。
+
+Usage:
+    python scripts/benchmark.py                                   # medium 规模, seed 42
+    python scripts/benchmark.py --scale large -n 300 -c 8
+    python scripts/benchmark.py --only vocab. --only mia.search
+    python scripts/benchmark.py --save benchmarks/baseline.json
+    python scripts/benchmark.py --compare benchmarks/baseline.json --fail-on-regression
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Callable, Optional
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = SCRIPTS_DIR.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import httpx
+from fastapi import FastAPI
+
+import bench_seed
+import llm_stub
+
+# --- 颜色 ---
+RED    = "\033[91m"
+GREEN  = "\033[92m"
+YELLOW = "\033[93m"
+CYAN   = "\033[96m"
+BOLD   = "\033[1m"
+RESET  = "\033[0m"
+
+# 回归判定: p95 变慢超过阈值且绝对值超过 NOISE_FLOOR_MS
+DEFAULT_THRESHOLD = 0.20
+NOISE_FLOOR_MS = 0.5
+
+
+# ==================================================================
+#  场景
+# ==================================================================
+
+class Scenario:
+    """一个被测接口: build(rng, ctx) 返回 (method, url, kwargs)"""
+
+    def __init__(self, name: str, build: Callable, weight: float = 1.0):
+        self.name = name
+        self.build = build
+        # 相对迭代次数 (LLM 场景有人为延迟，少跑几次)
+        self.weight = weight
+
+
+def _paper(rng, ctx):
+    return rng.choice(ctx["papers"])
+
+
+def _slot(rng, ctx):
+    return rng.choice(ctx["slots"])
+
+
+def _objective_submit(rng, ctx):
+    q = rng.choice(ctx["objective"])
+    answer = q["answer"] if rng.random() < 0.6 else rng.choice("ABCD")
+    return "POST", "/api/exam/submit_objective", {"json": {"q_id": q["q_id"], "answer": answer, "slot_id": _slot(rng, ctx)}}
+
+
+def _vocab_review(rng, ctx):
+    return "POST", "/api/vocab/review", {"json": {"slot_id": _slot(rng, ctx), "word": rng.choice(ctx["words"]), "quality": rng.randint(0, 5)}}
+
+
+def _mia_interact(rng, ctx):
+    return "POST", "/api/mia/interact", {"json": {
+        "context_type": "chat",
+        # 不开 rpg_mode: 前面的答题场景可能把 HP 扣到 0，届时只会走"体力耗尽"的短路分支
+        "context_data": {"text": "讲讲 " + rng.choice(ctx["words"])},
+    }}
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario("exam.list",            lambda r, c: ("GET", "/api/exams", {})),
+    Scenario("exam.detail",          lambda r, c: ("GET", f"/api/exam/{_paper(r, c)}", {})),
+    Scenario("exam.progress",        lambda r, c: ("GET", f"/api/exam/{_paper(r, c)}/progress", {"params": {"slot_id": _slot(r, c)}})),
+    Scenario("exam.progress_summary", lambda r, c: ("GET", "/api/exam/progress_summary", {"params": {"slot_id": _slot(r, c)}})),
+    Scenario("exam.recommend",       lambda r, c: ("GET", "/api/exam/recommend", {"params": {"slot_id": _slot(r, c), "n": 20}})),
+    Scenario("exam.mistakes",        lambda r, c: ("GET", "/api/exam/mistakes", {"params": {"slot_id": _slot(r, c)}})),
+    Scenario("exam.submit_objective", _objective_submit),
+    Scenario("user.status",          lambda r, c: ("GET", "/api/user/status", {"params": {"slot_id": _slot(r, c)}})),
+    Scenario("user.slots",           lambda r, c: ("GET", "/api/user/slots", {})),
+    Scenario("vocab.today",          lambda r, c: ("GET", "/api/vocab/today", {"params": {"slot_id": _slot(r, c)}})),
+    Scenario("vocab.list",           lambda r, c: ("GET", "/api/vocab/list", {"params": {"slot_id": _slot(r, c)}}), 0.2),
+    Scenario("vocab.search",         lambda r, c: ("GET", "/api/vocab/search", {"params": {"q": r.choice(c["words"])[:r.randint(2, 4)]}})),
+    Scenario("vocab.review",         _vocab_review),
+    Scenario("stories.get",          lambda r, c: ("GET", f"/api/stories/{r.choice(c['stories'])}", {})),
+    Scenario("analytics.sections",   lambda r, c: ("GET", "/api/analytics/sections", {"params": {"slot_id": _slot(r, c)}})),
+    Scenario("analytics.timeline",   lambda r, c: ("GET", "/api/analytics/timeline", {"params": {"slot_id": _slot(r, c)}})),
+    Scenario("mia.conversations",    lambda r, c: ("GET", "/api/mia/conversations", {})),
+    Scenario("mia.conversation",     lambda r, c: ("GET", f"/api/mia/conversations/{r.choice(c['conversations'])}", {})),
+    Scenario("mia.search",           lambda r, c: ("GET", "/api/mia/search", {"params": {"q": r.choice(c["words"])}})),
+    Scenario("mia.interact",         _mia_interact, 0.1),
+]
+
+
+# ==================================================================
+#  环境
+# ==================================================================
+
+def prepare_databases(cache_dir: Path, params: Dict[str, int], seed: int, reseed: bool) -> Dict[str, Any]:
+    """种子库按 (规模, 种子) 缓存；每次运行复制一份干净副本"""
+    key = "-".join(f"{k}{v}" for k, v in sorted(params.items())) + f"-s{seed}-f{bench_seed.SEED_FORMAT}"
+    pristine = cache_dir / key
+    if reseed or not (pristine / "context.json").exists():
+        print(f"  Seeding {pristine} ...")
+        bench_seed.seed(pristine, params, seed)
+
+    run_dir = Path(tempfile.mkdtemp(prefix="mia_bench_run_"))
+    for name in ("static_content.db", "femo_profile.db"):
+        shutil.copy(pristine / name, run_dir / name)
+    bench_seed.configure_paths(run_dir / "static_content.db", run_dir / "femo_profile.db")
+    ctx = json.loads((pristine / "context.json").read_text(encoding="utf-8"))
+    ctx["run_dir"] = str(run_dir)
+    return ctx
+
+
+def build_app() -> FastAPI:
+    from app.api import exam, user, vocab, agent, analytics, stories
+    from app.core.metrics import MetricsMiddleware
+
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(exam.router, prefix="/api")
+    app.include_router(user.router, prefix="/api/user")
+    app.include_router(vocab.router, prefix="/api/vocab")
+    app.include_router(agent.router, prefix="/api/mia")
+    app.include_router(analytics.router, prefix="/api/analytics")
+    app.include_router(stories.router, prefix="/api/stories")
+    return app
+
+
+# ==================================================================
+#  测量
+# ==================================================================
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """最近秩百分位"""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(p * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+async def _request(client: httpx.AsyncClient, method: str, url: str, kwargs: Dict[str, Any]) -> int:
+    resp = await client.request(method, url, **kwargs)
+    await resp.aread()
+    return resp.status_code
+
+
+async def run_scenario(client, scenario: Scenario, ctx, iterations: int, concurrency: int,
+                       alloc_iterations: int, warmup: int, seed: int) -> Dict[str, Any]:
+    rng = random.Random(f"{seed}:{scenario.name}")
+    n = max(5, int(iterations * scenario.weight))
+    requests = [scenario.build(rng, ctx) for _ in range(warmup + n + n + alloc_iterations)]
+    warm, seq, par, alloc = (
+        requests[:warmup],
+        requests[warmup:warmup + n],
+        requests[warmup + n:warmup + 2 * n],
+        requests[warmup + 2 * n:],
+    )
+    errors = 0
+
+    for method, url, kwargs in warm:
+        await _request(client, method, url, kwargs)
+
+    # 1) 顺序延迟
+    latencies = []
+    for method, url, kwargs in seq:
+        start = time.perf_counter()
+        status = await _request(client, method, url, kwargs)
+        latencies.append((time.perf_counter() - start) * 1000)
+        errors += status >= 400
+    latencies.sort()
+
+    # 2) 并发吞吐
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(req):
+        async with sem:
+            return await _request(client, *req)
+
+    start = time.perf_counter()
+    statuses = await asyncio.gather(*(one(req) for req in par))
+    wall = time.perf_counter() - start
+    errors += sum(s >= 400 for s in statuses)
+
+    # 3) 内存分配
+    peaks, retained = [], 0
+    if alloc:
+        tracemalloc.start()
+        before_all = tracemalloc.get_traced_memory()[0]
+        for method, url, kwargs in alloc:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            await _request(client, method, url, kwargs)
+            peaks.append(tracemalloc.get_traced_memory()[1] - base)
+        retained = tracemalloc.get_traced_memory()[0] - before_all
+        tracemalloc.stop()
+    peaks.sort()
+
+    return {
+        "requests": n,
+        "errors": int(errors),
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3),
+        "max_ms": round(latencies[-1], 3),
+        "rps": round(len(par) / wall, 1) if wall > 0 else 0.0,
+        "alloc_peak_kb": round(percentile(peaks, 0.5) / 1024, 1) if peaks else None,
+        "alloc_retained_kb": round(retained / 1024 / max(1, len(alloc)), 2) if alloc else None,
+    }
+
+
+async def run_all(app, scenarios: List[Scenario], ctx, args) -> Dict[str, Dict[str, Any]]:
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60.0) as client:
+        for scenario in scenarios:
+            sink = io.StringIO()
+            with contextlib.redirect_stdout(sink):
+                results[scenario.name] = await run_scenario(
+                    client, scenario, ctx, args.iterations, args.concurrency,
+                    args.alloc_iterations, args.warmup, args.seed,
+                )
+            r = results[scenario.name]
+            err = f"  {RED}{r['errors']} errors{RESET}" if r["errors"] else ""
+            print(f"  {scenario.name:<24} p50 {r['p50_ms']:>8.2f}  p95 {r['p95_ms']:>8.2f}  p99 {r['p99_ms']:>8.2f} ms"
+                  f"  {r['rps']:>8.1f} req/s  peak {r['alloc_peak_kb'] or 0:>8.1f} KB{err}")
+    return results
+
+
+# ==================================================================
+#  基线
+# ==================================================================
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float, partial: bool = False) -> List[str]:
+    """打印逐场景对比，返回回归的场景名"""
+    regressions = []
+    print(f"\n{BOLD}  📈 Compared with baseline ({baseline['meta'].get('created_at', '?')}){RESET}")
+    for name, cur in current["results"].items():
+        base = baseline["results"].get(name)
+        if not base:
+            print(f"  {name:<24} (new)")
+            continue
+
+        def delta(key):
+            if not base.get(key) or cur.get(key) is None:
+                return "      -"
+            return f"{(cur[key] - base[key]) / base[key] * 100:+6.1f}%"
+
+        slower = cur["p95_ms"] - base["p95_ms"]
+        regressed = slower > NOISE_FLOOR_MS and base["p95_ms"] > 0 and slower / base["p95_ms"] > threshold
+        if regressed:
+            regressions.append(name)
+        mark = f"{RED}REGRESSION{RESET}" if regressed else ""
+        print(f"  {name:<24} p50 {delta('p50_ms')}  p95 {delta('p95_ms')}  p99 {delta('p99_ms')}"
+              f"  rps {delta('rps')}  peak {delta('alloc_peak_kb')}  {mark}")
+    for name in baseline["results"]:
+        if not partial and name not in current["results"]:
+            print(f"  {name:<24} (missing in this run)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-process endpoint benchmark with seeded synthetic databases")
+    parser.add_argument("--scale", choices=sorted(bench_seed.SCALES), default="medium")
+    parser.add_argument("--seed", type=int, default=42)
+    for key in bench_seed.SCALES["small"]:
+        parser.add_argument(f"--{key}", type=int, default=None, help=f"Override scale parameter {key}")
+    parser.add_argument("-n", "--iterations", type=int, default=100, help="Sequential requests per scenario")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="Concurrent requests for throughput")
+    parser.add_argument("--alloc-iterations", type=int, default=20, help="Requests measured under tracemalloc")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--only", action="append", default=[], help="Run scenarios whose name starts with this (repeatable)")
+    parser.add_argument("--llm-ttft-ms", type=float, default=20.0)
+    parser.add_argument("--llm-token-ms", type=float, default=2.0)
+    parser.add_argument("--llm-tokens", type=int, default=40)
+    parser.add_argument("--cache-dir", type=Path, default=Path(tempfile.gettempdir()) / "mia_bench")
+    parser.add_argument("--reseed", action="store_true", help="Regenerate the seeded databases")
+    parser.add_argument("--save", type=Path, help="Write results as a JSON baseline")
+    parser.add_argument("--compare", type=Path, help="Compare with a saved baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="p95 slowdown ratio counted as regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    params = bench_seed.scale_params(args.scale, **{k: getattr(args, k) for k in bench_seed.SCALES["small"]})
+    scenarios = [s for s in SCENARIOS if not args.only or any(s.name.startswith(p) for p in args.only)]
+
+    print(f"\n{BOLD}{CYAN}{'='*60}")
+    print(f"  ⏱  Project_Mia — Endpoint Benchmark")
+    print(f"{'='*60}{RESET}\n")
+    print(f"  Scale: {args.scale} {params}  seed={args.seed}")
+    print(f"  Iterations: {args.iterations}  concurrency: {args.concurrency}  alloc: {args.alloc_iterations}\n")
+
+    ctx = prepare_databases(args.cache_dir, params, args.seed, args.reseed)
+    llm_stub.install(args.llm_ttft_ms, args.llm_token_ms, args.llm_tokens)
+    app = build_app()
+
+    started = time.perf_counter()
+    results = asyncio.run(run_all(app, scenarios, ctx, args))
+    elapsed = time.perf_counter() - started
+
+    from app.services.game_state_service import game_state_service
+    with contextlib.redirect_stdout(io.StringIO()):
+        game_state_service.flush()
+    shutil.rmtree(ctx["run_dir"], ignore_errors=True)
+
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "scale": args.scale,
+            "params": params,
+            "seed": args.seed,
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+            "llm_stub": {"ttft_ms": args.llm_ttft_ms, "token_ms": args.llm_token_ms, "tokens": args.llm_tokens},
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+    print(f"\n  Finished {len(results)} scenarios in {elapsed:.1f}s")
+
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"  {GREEN}Baseline saved → {args.save}{RESET}")
+
+    regressions: List[str] = []
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        if baseline["meta"].get("params") != params or baseline["meta"].get("seed") != args.seed:
+            print(f"  {YELLOW}⚠ Baseline was recorded with different scale/seed; deltas are not comparable{RESET}")
+        regressions = compare(baseline, report, args.threshold, partial=bool(args.only))
+        if regressions:
+            print(f"\n  {RED}{BOLD}✖ {len(regressions)} regression(s): {', '.join(regressions)}{RESET}\n")
+        else:
+            print(f"\n  {GREEN}{BOLD}✅ No regressions beyond {args.threshold:.0%}{RESET}\n")
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,402 @@
+"""
+generate_stories.py — Mia 剧情台词批量生成 (stories 表)
+=========================================================
+从 static_content.db 的 questions 读题，为每道题生成答对 / 答错两组中英台词，
+写回同库的 stories 表。取代 _archive_legacy/EnglishExamWeb/generate_stories.py
+(串行 requests.post + sleep，中断后从头再来)。
+
+  - asyncio + N 个并发 worker，经 llm_service.generate_block 调用模型
+  - 令牌桶限速 (--rate 次/秒，--burst 突发)，不再固定 sleep
+  - 失败按指数退避 + 抖动重试 (--retries)，单次调用有超时 (--timeout)
+  - 单写者批量落库: 每批一个事务 (stories 替换 + 检查点更新)
+  - story_checkpoints 表按 q_id 记录 done / failed 及 PROMPT_VERSION；
+    重跑只处理未完成、失败或提示词版本变化的题目，中断 (Ctrl+C) 后直接续跑
+
+Usage:
+    python scripts/generate_stories.py                                   # 全部未完成题目
+    python scripts/generate_stories.py --years 2010-2025 --workers 16 --rate 8
+    python scripts/generate_stories.py --sections reading_a,reading_b --limit 50
+    python scripts/generate_stories.py --force                           # 忽略检查点全部重生成
+    python scripts/generate_stories.py --fake-llm --db-path /tmp/static_content.db
+    python scripts/generate_stories.py --fake-llm --fake-fail-rate 0.2   # 演练重试
+
+Author: Femo
+Date: 2026-03-18
+"""
+
+import argparse
+import asyncio
+import random
+import signal
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = SCRIPTS_DIR.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from sqlalchemy import create_engine
+
+from app.db.models import StaticBase
+from app.services.llm_service import llm_service, LLMService
+
+# --- 颜色 ---
+RED    = "\033[91m"
+GREEN  = "\033[92m"
+YELLOW = "\033[93m"
+CYAN   = "\033[96m"
+BOLD   = "\033[1m"
+RESET  = "\033[0m"
+
+DEFAULT_DB = BACKEND_DIR / "data" / "static_content.db"
+
+# 提示词 / 输出格式变化时 +1，旧版本生成的台词会在下次运行时重生成
+PROMPT_VERSION = 1
+
+STORY_FIELDS = ("correct_cn", "wrong_cn", "correct_en", "wrong_en")
+
+CHECKPOINT_DDL = """
+CREATE TABLE IF NOT EXISTS story_checkpoints (
+    q_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,              -- done / failed
+    attempts INTEGER DEFAULT 0,
+    prompt_version INTEGER,
+    error TEXT,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+SYSTEM_PROMPT = (
+    "你是 Galgame 编剧，为考研英语一学习游戏编写猫娘 Mia 的答题反馈台词。\n"
+    "角色: Mia (ミア)，傲娇赛博猫娘；主人'绯墨' (Femo) 正在备考考研英语一。\n"
+    "嘴上嫌弃他笨，心里很在乎他；口癖 '喵~'、'哼！'，可用颜文字。\n"
+    "要求:\n"
+    "1. 答对: 惊讶 / 得意 + 傲娇夸奖，鼓励保持；答错: 安慰不责怪，承诺一起攻克\n"
+    "2. 中文台词 60-120 字，英文台词为同一情绪的简短英文版 (1-2 句)\n"
+    "3. 不要复述题目原文，重点是情感互动\n"
+    "Output JSON only: "
+    '{"correct_cn": "...", "wrong_cn": "...", "correct_en": "...", "wrong_en": "..."}'
+)
+
+SECTION_LABELS = {
+    "use_of_english": "完形填空",
+    "reading_a": "阅读理解 Part A",
+    "reading_b": "阅读理解 Part B",
+    "translation": "翻译",
+    "writing_a": "小作文",
+    "writing_b": "大作文",
+}
+
+
+# ==================================================================
+#  数据库
+# ==================================================================
+
+def open_db(db_path: Path) -> sqlite3.Connection:
+    """建表 (沿用 ORM 模型定义) 后返回裸连接 (autocommit，事务显式 BEGIN)"""
+    engine = create_engine(f"sqlite:///{db_path}", echo=False)
+    StaticBase.metadata.create_all(engine)
+    engine.dispose()
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(CHECKPOINT_DDL)
+    return conn
+
+
+def parse_years(spec: Optional[str]) -> Optional[List[int]]:
+    """'2010-2012,2015' → [2010, 2011, 2012, 2015]"""
+    if not spec:
+        return None
+    years = []
+    for part in spec.split(","):
+        part = part.strip()
+        if "-" in part:
+            lo, hi = part.split("-", 1)
+            years.extend(range(int(lo), int(hi) + 1))
+        elif part:
+            years.append(int(part))
+    return years
+
+
+def load_pending(conn: sqlite3.Connection, years: Optional[List[int]], sections: Optional[List[str]],
+                 force: bool, limit: Optional[int]) -> List[Dict[str, Any]]:
+    """待生成题目: 无检查点 / 失败 / 提示词版本过期 (--force 时全部)"""
+    where, params = [], []
+    if not force:
+        where.append("(c.q_id IS NULL OR c.status != 'done' OR c.prompt_version IS NOT ?)")
+        params.append(PROMPT_VERSION)
+    if years:
+        where.append(f"p.year IN ({','.join('?' * len(years))})")
+        params.extend(years)
+    if sections:
+        where.append(f"q.section_type IN ({','.join('?' * len(sections))})")
+        params.extend(sections)
+    sql = f"""
+        SELECT q.q_id, q.section_type, q.content, q.passage_text, q.correct_answer, p.year,
+               COALESCE(c.attempts, 0) AS attempts
+        FROM questions q
+        JOIN papers p ON p.paper_id = q.paper_id
+        LEFT JOIN story_checkpoints c ON c.q_id = q.q_id
+        {"WHERE " + " AND ".join(where) if where else ""}
+        ORDER BY p.year, q.q_id
+    """
+    if limit:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return [dict(r) for r in conn.execute(sql, params).fetchall()]
+
+
+def flush(conn: sqlite3.Connection, batch: List[Dict[str, Any]]):
+    """一批结果一个事务: 成功的替换 stories 行，所有结果更新检查点"""
+    done = [r for r in batch if r["story"]]
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if done:
+            conn.executemany("DELETE FROM stories WHERE q_id = ?", [(r["q_id"],) for r in done])
+            conn.executemany(
+                "INSERT INTO stories (q_id, year, section_type, correct_cn, wrong_cn, correct_en, wrong_en) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(r["q_id"], r["year"], r["section_type"], *(r["story"][f] for f in STORY_FIELDS)) for r in done],
+            )
+        conn.executemany("""
+            INSERT INTO story_checkpoints (q_id, status, attempts, prompt_version, error, updated_at)
+            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(q_id) DO UPDATE SET
+                status = excluded.status, attempts = excluded.attempts,
+                prompt_version = excluded.prompt_version, error = excluded.error,
+                updated_at = excluded.updated_at
+        """, [
+            (r["q_id"], "done" if r["story"] else "failed", r["attempts"], PROMPT_VERSION, r["error"])
+            for r in batch
+        ])
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+# ==================================================================
+#  生成
+# ==================================================================
+
+class TokenBucket:
+    """令牌桶: 平均 rate 次/秒，最多攒 capacity 次突发"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        # 持锁等待: 先到先得，不会有大量协程同时醒来争抢
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def build_prompt(q: Dict[str, Any]) -> str:
+    label = SECTION_LABELS.get(q["section_type"], q["section_type"] or "题目")
+    snippet = (q["content"] or q["passage_text"] or "").strip().replace("\n", " ")[:160]
+    lines = [
+        f"【题目来源】{q['year']} 年考研英语一 · {label}",
+        f"【题目片段】{snippet}",
+    ]
+    if q["correct_answer"]:
+        lines.append(f"【正确答案】{q['correct_answer']}")
+    lines.append("请为这道题写出答对 / 答错两组台词。")
+    return "\n".join(lines)
+
+
+def parse_story(text: str) -> Dict[str, str]:
+    data = LLMService._extract_json(text or "")
+    if not isinstance(data, dict):
+        raise ValueError("response is not a JSON object")
+    missing = [f for f in ("correct_cn", "wrong_cn") if not str(data.get(f) or "").strip()]
+    if missing:
+        raise ValueError(f"missing fields: {', '.join(missing)}")
+    return {f: str(data.get(f) or "").strip() for f in STORY_FIELDS}
+
+
+async def generate_one(q: Dict[str, Any], bucket: TokenBucket, args) -> Dict[str, Any]:
+    """带限速 / 超时 / 退避重试地生成一道题；失败不抛出，记入结果"""
+    prompt = build_prompt(q)
+    error = None
+    for attempt in range(1, args.retries + 2):
+        await bucket.acquire()
+        try:
+            text = await asyncio.wait_for(
+                llm_service.generate_block(prompt, system_prompt=SYSTEM_PROMPT, temperature=0.9, max_tokens=600),
+                timeout=args.timeout,
+            )
+            story = parse_story(text)
+            return {**q, "story": story, "error": None, "attempts": q["attempts"] + attempt}
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"[:300]
+            if attempt <= args.retries:
+                delay = min(args.backoff * 2 ** (attempt - 1), 30.0)
+                await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+    return {**q, "story": None, "error": error, "attempts": q["attempts"] + args.retries + 1}
+
+
+async def run(conn: sqlite3.Connection, pending: List[Dict[str, Any]], args) -> Dict[str, int]:
+    bucket = TokenBucket(args.rate, args.burst)
+    jobs: asyncio.Queue = asyncio.Queue()
+    results: asyncio.Queue = asyncio.Queue()
+    for q in pending:
+        jobs.put_nowait(q)
+
+    # Ctrl+C: 不再领新题，等在途请求返回并落库后退出；再按一次直接中断
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    def on_sigint():
+        print(f"\n  {YELLOW}⏸️  Stopping — finishing in-flight requests (Ctrl+C again to abort){RESET}")
+        stop.set()
+        loop.remove_signal_handler(signal.SIGINT)
+
+    try:
+        loop.add_signal_handler(signal.SIGINT, on_sigint)
+    except (NotImplementedError, RuntimeError):
+        pass  # Windows: 退回默认 KeyboardInterrupt
+
+    async def worker():
+        while not stop.is_set():
+            try:
+                q = jobs.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            results.put_nowait(await generate_one(q, bucket, args))
+
+    stats = {"done": 0, "failed": 0, "interrupted": False}
+    total = len(pending)
+    start = time.perf_counter()
+    batch: List[Dict[str, Any]] = []
+
+    def commit_batch():
+        if not batch:
+            return
+        flush(conn, batch)
+        for r in batch:
+            stats["done" if r["story"] else "failed"] += 1
+            if not r["story"]:
+                print(f"  {RED}✗ {r['q_id']}{RESET} {r['error']}")
+        batch.clear()
+        finished = stats["done"] + stats["failed"]
+        elapsed = time.perf_counter() - start
+        print(f"  {CYAN}💾 {finished}/{total}{RESET}  ok={stats['done']} failed={stats['failed']}  "
+              f"{finished / max(elapsed, 1e-9):.1f} q/s")
+
+    workers = [asyncio.create_task(worker()) for _ in range(min(args.workers, total))]
+    all_done = asyncio.gather(*workers)
+    try:
+        # 单写者: 攒满一批或超过 flush 间隔就落库
+        while not (all_done.done() and results.empty()):
+            try:
+                batch.append(await asyncio.wait_for(results.get(), timeout=args.flush_interval))
+            except asyncio.TimeoutError:
+                commit_batch()
+                continue
+            if len(batch) >= args.batch_size:
+                commit_batch()
+        await all_done
+    finally:
+        # 中断时也把已拿到的结果写入，下次从检查点续跑
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        while not results.empty():
+            batch.append(results.get_nowait())
+        commit_batch()
+        try:
+            loop.remove_signal_handler(signal.SIGINT)
+        except (NotImplementedError, RuntimeError):
+            pass
+    stats["interrupted"] = stop.is_set()
+    return stats
+
+
+# ==================================================================
+#  入口
+# ==================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate Mia story lines for questions (resumable)")
+    parser.add_argument("--db-path", type=Path, default=DEFAULT_DB)
+    parser.add_argument("--years", help="e.g. 2010-2025 or 2019,2021")
+    parser.add_argument("--sections", help="Comma-separated section_type filter")
+    parser.add_argument("--limit", type=int, help="At most N questions this run")
+    parser.add_argument("--force", action="store_true", help="Ignore checkpoints and regenerate")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent LLM calls")
+    parser.add_argument("--rate", type=float, default=5.0, help="Requests per second (token bucket)")
+    parser.add_argument("--burst", type=int, default=5, help="Token bucket capacity")
+    parser.add_argument("--retries", type=int, default=3, help="Retries per question")
+    parser.add_argument("--backoff", type=float, default=1.0, help="First retry delay (s), doubles each retry")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-call timeout (s)")
+    parser.add_argument("--batch-size", type=int, default=20, help="Results per write transaction")
+    parser.add_argument("--flush-interval", type=float, default=2.0, help="Max seconds between writes")
+    parser.add_argument("--fake-llm", action="store_true", help="Use the local LLM stand-in (llm_stub)")
+    parser.add_argument("--fake-ttft-ms", type=float, default=300.0)
+    parser.add_argument("--fake-fail-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    if args.rate <= 0:
+        parser.error("--rate must be positive")
+    if not args.db_path.exists():
+        print(f"{RED}❌ Database not found: {args.db_path}{RESET}")
+        sys.exit(1)
+
+    stub = None
+    if args.fake_llm:
+        import llm_stub
+        stub = llm_stub.install(ttft_ms=args.fake_ttft_ms, token_ms=2, tokens=30, fail_rate=args.fake_fail_rate)
+
+    conn = open_db(args.db_path)
+    sections = [s.strip() for s in args.sections.split(",") if s.strip()] if args.sections else None
+    pending = load_pending(conn, parse_years(args.years), sections, args.force, args.limit)
+
+    mode = "fake LLM" if stub else f"{llm_service.provider}"
+    print(f"\n{BOLD}{CYAN}  🎬 Story generation ({mode}, {args.workers} workers, {args.rate:g} req/s){RESET}")
+    print(f"  {len(pending)} question(s) pending → {args.db_path}")
+    if not pending:
+        print(f"\n  {GREEN}{BOLD}✅ Nothing to do{RESET}\n")
+        return
+
+    start = time.perf_counter()
+    try:
+        stats = asyncio.run(run(conn, pending, args))
+    except KeyboardInterrupt:
+        print(f"\n  {YELLOW}⏸️  Interrupted — progress saved, rerun to resume{RESET}\n")
+        sys.exit(130)
+    finally:
+        conn.close()
+
+    elapsed = time.perf_counter() - start
+    if stats["interrupted"]:
+        print(f"\n  {YELLOW}⏸️  Interrupted after {stats['done']} generated — progress saved, rerun to resume{RESET}\n")
+        sys.exit(130)
+    calls = f", {stub.calls} LLM calls ({stub.failures} simulated failures)" if stub else ""
+    color = GREEN if not stats["failed"] else YELLOW
+    print(f"\n  {color}{BOLD}{'✅' if not stats['failed'] else '⚠️ '} {stats['done']} generated, "
+          f"{stats['failed']} failed in {elapsed:.1f}s{calls}{RESET}")
+    if stats["failed"]:
+        print(f"  {YELLOW}Failed questions stay in story_checkpoints; rerun to retry them.{RESET}")
+    print()
+
+
+if __name__ == "__main__":
+    main()
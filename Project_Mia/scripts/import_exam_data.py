@@ -2,9 +2,20 @@
 import_exam_data.py — 考研英语一真题 ETL 导入工具
 按年份将 JSON 数据导入 static_content.db，含图片自动匹配 + Base64 转码
 
+import-all 模式 (--all):
+  - JSON 解析 + 图片转码在进程池中并行 (每年一个任务)
+  - 主进程单写者: 每份试卷一个事务，executemany 批量写入题目
+  - import_manifest 表记录每份试卷的内容哈希 (JSON + 配图 + ETL_VERSION)，
+    未变化的年份直接跳过；--force 强制重导
+  - 配图在 worker 内归一化 (限制分辨率 + WebP 重编码 + 缩略图)，见 app/services/image_service.py
+
 使用:
     python scripts/import_exam_data.py --year 2010
     python scripts/import_exam_data.py --year 2010 --db-path backend/data/static_content.db
+    python scripts/import_exam_data.py --all                          # 源目录下全部 *_full.json
+                                                                      # (默认 $MIA_SOURCE_ROOT 或 Project_Mia/exam_sources)
+    python scripts/import_exam_data.py --all --years 2010-2025 --workers 8
+    python scripts/import_exam_data.py --all --force --source-root D:/exam_json
 
 Author: Femo
 Date: 2026-02-18
@@ -12,27 +23,34 @@ Date: 2026-02-18
 
 import argparse
 import base64
+import hashlib
 import json
 import os
 import re
+import sqlite3
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
 # 确保 backend 可被 import
-PROJECT_ROOT = Path(__file__).resolve().parent.parent
+SCRIPTS_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPTS_DIR.parent
 sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(SCRIPTS_DIR))
 
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine
 
-from backend.app.db.models import StaticBase, Paper, Question
+from backend.app.db.models import StaticBase
+from backend.app.services.image_service import image_service
+from ingest_exam_sources import DEFAULT_SOURCE_ROOT
 
 # ============================================================================
 #  配置常量
 # ============================================================================
 
-# 源数据根目录
-SOURCE_ROOT = Path(r"F:\sanity_check_avg")
+# 源数据根目录 = ingest_exam_sources.py 的产物目录 ($MIA_SOURCE_ROOT 或 Project_Mia/exam_sources)
+SOURCE_ROOT = DEFAULT_SOURCE_ROOT
 IMAGE_ROOT = SOURCE_ROOT / "extracted_images"
 
 # Section Type 映射
@@ -54,6 +72,10 @@ SCORE_MAP = {
     "writing_b":      20.0,
 }
 
+# 解析/入库规则变更时递增，使已导入试卷的哈希失效
+# v3: 配图归一化 + 缩略图 / 尺寸列
+ETL_VERSION = 3
+
 # 颜色输出
 RED    = "\033[91m"
 GREEN  = "\033[92m"
@@ -109,14 +131,14 @@ def resolve_section_type(section_info: dict) -> tuple[str, str | None]:
     return "unknown", None
 
 
-def find_writing_b_image(year: int) -> str | None:
+def find_writing_b_image(year: int, image_root: Path = IMAGE_ROOT) -> str | None:
     """
     在 extracted_images/{year}/ 下查找 writing_b 图片并转 Base64
 
     Returns:
         "data:image/{ext};base64,..." 或 None
     """
-    year_dir = IMAGE_ROOT / str(year)
+    year_dir = image_root / str(year)
     if not year_dir.exists():
         return None
 
@@ -148,63 +170,79 @@ def build_q_id(year: int, section_type: str, question_id: int) -> str:
 
 
 # ============================================================================
-#  主导入逻辑
+#  解析 (进程池 worker，只读文件，不碰数据库)
 # ============================================================================
 
-def import_year(year: int, db_path: str):
-    """核心 ETL: 导入指定年份的真题数据"""
+QUESTION_COLUMNS = (
+    "q_id", "paper_id", "q_type", "section_type", "section_name", "group_name",
+    "question_number", "passage_text", "content", "options_json", "correct_answer",
+    "answer_key", "image_base64", "official_analysis", "ai_persona_prompt",
+    "score", "difficulty", "tags",
+    "image_thumb_base64", "image_width", "image_height", "image_bytes", "image_thumb_bytes",
+)
+_IMAGE_COL = QUESTION_COLUMNS.index("image_base64")
+# 配图派生列 (与 image_service.normalize 返回的键同名)
+IMAGE_META_COLUMNS = QUESTION_COLUMNS[QUESTION_COLUMNS.index("image_thumb_base64"):]
+_SECTION_COL = QUESTION_COLUMNS.index("section_type")
+
+
+def content_hash(json_bytes: bytes, year: int, image_root: Path) -> str:
+    """试卷内容哈希: ETL 版本 + JSON 原文 + 该年份配图目录下的所有图片"""
+    h = hashlib.sha256(f"etl-v{ETL_VERSION}\n".encode())
+    h.update(json_bytes)
+    year_dir = image_root / str(year)
+    if year_dir.is_dir():
+        for f in sorted(year_dir.iterdir()):
+            if f.is_file():
+                h.update(f.name.encode("utf-8"))
+                h.update(f.read_bytes())
+    return h.hexdigest()
+
+
+def prepare_year(year: int, source_root: str, known_hash: str | None = None) -> dict:
+    """
+    读取并解析一年的 JSON，返回可直接入库的行数据
 
-    # === 1. 查找 JSON ===
-    json_path = SOURCE_ROOT / f"{year}_full.json"
-    if not json_path.exists():
-        print(f"{RED}[ERROR] JSON not found: {json_path}{RESET}")
-        return
+    Returns:
+        {"year", "status": "ready" | "unchanged" | "missing" | "skipped", "paper_id",
+         "hash", "paper", "rows", "stats", "errors", "image": "embedded" | "external" | None,
+         "image_bytes": (原图字节, 归一化后字节) | None}
+    """
+    source_root = Path(source_root)
+    image_root = source_root / "extracted_images"
+    paper_id = f"{year}-eng1"
+    result = {"year": year, "paper_id": paper_id, "status": "ready", "hash": None,
+              "paper": None, "rows": [], "stats": {}, "errors": [], "image": None,
+              "image_bytes": None}
 
-    print(f"\n{BOLD}{CYAN}{'='*60}")
-    print(f"  🐾 Project_Mia ETL — Importing {year} English I")
-    print(f"{'='*60}{RESET}\n")
+    # === 1. 查找 JSON + 哈希 ===
+    json_path = source_root / f"{year}_full.json"
+    if not json_path.exists():
+        result["status"] = "missing"
+        result["errors"].append(f"JSON not found: {json_path}")
+        return result
 
-    with open(json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    raw = json_path.read_bytes()
+    result["hash"] = content_hash(raw, year, image_root)
+    if known_hash and known_hash == result["hash"]:
+        result["status"] = "unchanged"
+        return result
 
+    data = json.loads(raw.decode("utf-8"))
     meta = data.get("meta", {})
     sections = data.get("sections", [])
 
     if meta.get("exam_type") and "II" in str(meta.get("exam_type")):
-        print(f"{YELLOW}[SKIP] {year} appears to be English II. Skipping.{RESET}")
-        return
+        result["status"] = "skipped"
+        result["errors"].append(f"{year} appears to be English II")
+        return result
 
-    # === 2. 初始化数据库 ===
-    db_file = Path(db_path)
-    db_file.parent.mkdir(parents=True, exist_ok=True)
-    engine = create_engine(f"sqlite:///{db_file}", echo=False)
-    StaticBase.metadata.create_all(engine)
-    Session = sessionmaker(bind=engine)
-    session = Session()
+    result["paper"] = (paper_id, year, "English I", f"{year}年考研英语一真题", 100.0, 180)
 
-    # === 3. 创建 Paper 记录 ===
-    paper_id = f"{year}-eng1"
-    existing = session.query(Paper).filter_by(paper_id=paper_id).first()
-    if existing:
-        print(f"{YELLOW}[INFO] Paper '{paper_id}' exists. Replacing questions...{RESET}")
-        session.query(Question).filter_by(paper_id=paper_id).delete()
-    else:
-        paper = Paper(
-            paper_id=paper_id,
-            year=year,
-            exam_type="English I",
-            title=f"{year}年考研英语一真题",
-            total_score=100.0,
-            time_limit=180,
-        )
-        session.add(paper)
-
-    session.flush()
-
-    # === 4. 遍历 sections ===
-    stats = {}   # section_type → count
-    errors = []
-    image_found = False
+    # === 2. 遍历 sections ===
+    stats = result["stats"]
+    rows = result["rows"]
+    seen = set()
 
     for sec in sections:
         sec_info = sec.get("section_info", {})
@@ -218,16 +256,18 @@ def import_year(year: int, db_path: str):
         # 词汇表 (存入 tags)
         vocab_list = sec.get("vocabulary", [])
         vocab_words = [v.get("word") for v in vocab_list if v.get("word")]
+        tags = json.dumps(vocab_words, ensure_ascii=False) if vocab_words else None
 
-        questions = sec.get("questions", [])
-
-        for q in questions:
+        for q in sec.get("questions", []):
             try:
                 qid_num = q.get("id")
                 if qid_num is None:
                     continue
 
                 q_id = build_q_id(year, section_type, qid_num)
+                if q_id in seen:
+                    result["errors"].append(f"Q{qid_num}: duplicate q_id {q_id}, later one ignored")
+                    continue
 
                 # 判断客观/主观
                 options = q.get("options", {})
@@ -250,85 +290,169 @@ def import_year(year: int, db_path: str):
                     else:
                         q_type = "reading"  # fallback (如 reading_b 排序题无选项)
 
-                # 处理 Writing B 图片
+                # Writing B 图片: 优先 JSON 内嵌
                 img_b64 = None
-                if section_type == "writing_b":
-                    # 优先: JSON 内嵌
-                    if q.get("image"):
-                        img_b64 = q["image"]
-                        image_found = True
-
-                # 分值
-                score = SCORE_MAP.get(section_type, 2.0)
-
-                # 构造 Question 对象
-                question = Question(
-                    q_id=q_id,
-                    paper_id=paper_id,
-                    q_type=q_type,
-                    section_type=section_type,
-                    section_name=sec_info.get("name"),
-                    group_name=group_name,
-                    question_number=qid_num,
-                    passage_text=passage_text,
-                    content=q.get("text"),
-                    options_json=json.dumps(options, ensure_ascii=False) if has_options else None,
-                    correct_answer=correct_answer,
-                    answer_key=answer_key,
-                    image_base64=img_b64,
-                    official_analysis=q.get("analysis_raw"),
-                    ai_persona_prompt=q.get("ai_persona_prompt"),
-                    score=score,
-                    difficulty=3,
-                    tags=json.dumps(vocab_words, ensure_ascii=False) if vocab_words else None,
-                )
-                session.add(question)
-
-                # 统计
+                if section_type == "writing_b" and q.get("image"):
+                    img_b64 = q["image"]
+                    result["image"] = "embedded"
+
+                rows.append((
+                    q_id, paper_id, q_type, section_type, sec_info.get("name"), group_name,
+                    qid_num, passage_text, q.get("text"),
+                    json.dumps(options, ensure_ascii=False) if has_options else None,
+                    correct_answer, answer_key, img_b64,
+                    q.get("analysis_raw"), q.get("ai_persona_prompt"),
+                    SCORE_MAP.get(section_type, 2.0), 3, tags,
+                ) + (None,) * len(IMAGE_META_COLUMNS))
+                seen.add(q_id)
                 stats[section_type] = stats.get(section_type, 0) + 1
 
             except Exception as e:
-                errors.append(f"Q{q.get('id', '?')}: {e}")
+                result["errors"].append(f"Q{q.get('id', '?')}: {e}")
                 continue
 
-    # === 5. 图片补全 — 从 extracted_images/ ===
-    if not image_found:
-        ext_img = find_writing_b_image(year)
+    # === 3. 图片补全 — 从 extracted_images/ ===
+    if result["image"] is None and stats.get("writing_b"):
+        ext_img = find_writing_b_image(year, image_root)
         if ext_img:
-            # 找到 Writing B 题目并补图
-            wb_q = session.query(Question).filter(
-                Question.paper_id == paper_id,
-                Question.section_type == "writing_b"
-            ).first()
-            if wb_q:
-                wb_q.image_base64 = ext_img
-                image_found = True
-                print(f"{GREEN}[IMAGE] Found external image for {year} Writing B{RESET}")
-
-    if not image_found:
-        # 检查是否有 writing_b 题目
-        has_wb = stats.get("writing_b", 0) > 0
-        if has_wb:
-            print(f"{RED}{BOLD}[WARNING] No image found for {year} Writing Part B!{RESET}")
-
-    # === 6. 提交 ===
-    session.commit()
-    session.close()
-
-    # === 7. 打印报告 ===
+            for i, row in enumerate(rows):
+                if row[_SECTION_COL] == "writing_b":
+                    rows[i] = row[:_IMAGE_COL] + (ext_img,) + row[_IMAGE_COL + 1:]
+                    result["image"] = "external"
+                    break
+
+    # === 4. 配图归一化 ===
+    for i, row in enumerate(rows):
+        if not row[_IMAGE_COL]:
+            continue
+        try:
+            rows[i], norm = normalize_row_image(row)
+        except Exception as e:
+            result["errors"].append(f"{row[0]}: image normalize failed, kept original ({e})")
+            continue
+        before, after = result["image_bytes"] or (0, 0)
+        result["image_bytes"] = (before + norm["original_bytes"], after + norm["image_bytes"])
+
+    return result
+
+
+def normalize_row_image(row: tuple) -> tuple[tuple, dict]:
+    """题目行的 image_base64 → 归一化配图 + 缩略图 / 尺寸 / 字节数列"""
+    norm = image_service.normalize_data_uri(row[_IMAGE_COL])
+    row = row[:_IMAGE_COL] + (norm["image_base64"],) + row[_IMAGE_COL + 1:]
+    meta = tuple(norm[col] for col in IMAGE_META_COLUMNS)
+    return row[:len(QUESTION_COLUMNS) - len(IMAGE_META_COLUMNS)] + meta, norm
+
+
+# ============================================================================
+#  入库 (主进程单写者)
+# ============================================================================
+
+MANIFEST_DDL = """
+CREATE TABLE IF NOT EXISTS import_manifest (
+    paper_id TEXT PRIMARY KEY,
+    year INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    question_count INTEGER NOT NULL,
+    imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+_INSERT_QUESTION = (
+    f"INSERT INTO questions ({', '.join(QUESTION_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(QUESTION_COLUMNS))})"
+)
+
+
+def open_db(db_path: str) -> sqlite3.Connection:
+    """建表 (沿用 ORM 模型定义) 后返回裸连接"""
+    db_file = Path(db_path)
+    db_file.parent.mkdir(parents=True, exist_ok=True)
+    engine = create_engine(f"sqlite:///{db_file}", echo=False)
+    StaticBase.metadata.create_all(engine)
+    engine.dispose()
+
+    conn = sqlite3.connect(db_file, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(MANIFEST_DDL)
+    ensure_image_columns(conn)
+    return conn
+
+
+def ensure_image_columns(conn: sqlite3.Connection):
+    """旧库 questions 表补齐配图派生列 (create_all 不会给已有表加列)"""
+    existing = {r[1] for r in conn.execute("PRAGMA table_info(questions)")}
+    for col in IMAGE_META_COLUMNS:
+        if col not in existing:
+            col_type = "TEXT" if col.endswith("_base64") else "INTEGER"
+            conn.execute(f"ALTER TABLE questions ADD COLUMN {col} {col_type}")
+
+
+def load_manifest(conn: sqlite3.Connection) -> dict:
+    return dict(conn.execute("SELECT paper_id, content_hash FROM import_manifest").fetchall())
+
+
+def write_paper(conn: sqlite3.Connection, result: dict):
+    """一份试卷一个事务: 试卷 upsert → 旧题删除 → 新题批量插入 → 清单更新"""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("""
+            INSERT INTO papers (paper_id, year, exam_type, title, total_score, time_limit, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(paper_id) DO UPDATE SET
+                year = excluded.year, exam_type = excluded.exam_type, title = excluded.title,
+                total_score = excluded.total_score, time_limit = excluded.time_limit
+        """, result["paper"])
+        conn.execute("DELETE FROM questions WHERE paper_id = ?", (result["paper_id"],))
+        conn.executemany(_INSERT_QUESTION, result["rows"])
+        conn.execute("""
+            INSERT INTO import_manifest (paper_id, year, content_hash, question_count, imported_at)
+            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(paper_id) DO UPDATE SET
+                year = excluded.year, content_hash = excluded.content_hash,
+                question_count = excluded.question_count, imported_at = excluded.imported_at
+        """, (result["paper_id"], result["year"], result["hash"], len(result["rows"])))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+# ============================================================================
+#  报告
+# ============================================================================
+
+TYPE_LABELS = {
+    "use_of_english": "完形填空 (Cloze)",
+    "reading_a":      "阅读A (Text 1-4)",
+    "reading_b":      "阅读B (Part B)",
+    "translation":    "翻译 (Translation)",
+    "writing_a":      "小作文 (Writing A)",
+    "writing_b":      "大作文 (Writing B)",
+}
+
+
+def format_image_bytes(sizes: tuple[int, int]) -> str:
+    before, after = sizes
+    return f"{before / 1024:.0f}KB → {after / 1024:.0f}KB"
+
+
+def print_report(result: dict):
+    """单年详细报告"""
+    year, stats, errors = result["year"], result["stats"], result["errors"]
+    image_found = result["image"] is not None
+
+    if result["image"] == "external":
+        print(f"{GREEN}[IMAGE] Found external image for {year} Writing B{RESET}")
+    if not image_found and stats.get("writing_b", 0) > 0:
+        print(f"{RED}{BOLD}[WARNING] No image found for {year} Writing Part B!{RESET}")
+
     total = sum(stats.values())
     print(f"\n{GREEN}{BOLD}✅ Imported {year}: {total} questions total{RESET}")
     print(f"{'─'*40}")
 
-    type_labels = {
-        "use_of_english": "完形填空 (Cloze)",
-        "reading_a":      "阅读A (Text 1-4)",
-        "reading_b":      "阅读B (Part B)",
-        "translation":    "翻译 (Translation)",
-        "writing_a":      "小作文 (Writing A)",
-        "writing_b":      "大作文 (Writing B)",
-    }
-    for st, label in type_labels.items():
+    for st, label in TYPE_LABELS.items():
         count = stats.get(st, 0)
         if count:
             img_note = " 📷" if st == "writing_b" and image_found else ""
@@ -336,6 +460,8 @@ def import_year(year: int, db_path: str):
 
     if image_found:
         print(f"\n  {GREEN}Images: ✓ Writing Part B image loaded{RESET}")
+        if result["image_bytes"]:
+            print(f"  Image size: {format_image_bytes(result['image_bytes'])}")
     elif stats.get("writing_b", 0) > 0:
         print(f"\n  {RED}Images: ✗ MISSING Writing Part B image!{RESET}")
     else:
@@ -348,10 +474,135 @@ def import_year(year: int, db_path: str):
         if len(errors) > 10:
             print(f"  ... and {len(errors)-10} more")
 
-    print(f"\n{CYAN}Database: {db_file.resolve()}{RESET}")
+
+def print_line(result: dict):
+    """import-all 每年一行"""
+    year, status = result["year"], result["status"]
+    if status == "unchanged":
+        print(f"  {year}  {CYAN}unchanged{RESET}")
+    elif status == "missing":
+        print(f"  {year}  {RED}missing{RESET}   {result['errors'][0]}")
+    elif status == "skipped":
+        print(f"  {year}  {YELLOW}skipped{RESET}   {result['errors'][0]}")
+    else:
+        stats = result["stats"]
+        img = "📷" if result["image"] else (f"{RED}no image{RESET}" if stats.get("writing_b") else "")
+        if result["image_bytes"]:
+            img += f" {format_image_bytes(result['image_bytes'])}"
+        err = f"  {YELLOW}{len(result['errors'])} errors{RESET}" if result["errors"] else ""
+        print(f"  {year}  {GREEN}imported{RESET}  {sum(stats.values()):>3} questions  {img}{err}")
+
+
+# ============================================================================
+#  主导入逻辑
+# ============================================================================
+
+def import_year(year: int, db_path: str, source_root: Path = SOURCE_ROOT):
+    """核心 ETL: 导入指定年份的真题数据 (总是重导)"""
+    print(f"\n{BOLD}{CYAN}{'='*60}")
+    print(f"  🐾 Project_Mia ETL — Importing {year} English I")
+    print(f"{'='*60}{RESET}\n")
+
+    result = prepare_year(year, str(source_root))
+    if result["status"] == "missing":
+        print(f"{RED}[ERROR] {result['errors'][0]}{RESET}")
+        return
+    if result["status"] == "skipped":
+        print(f"{YELLOW}[SKIP] {result['errors'][0]}. Skipping.{RESET}")
+        return
+
+    conn = open_db(db_path)
+    try:
+        if conn.execute("SELECT 1 FROM papers WHERE paper_id = ?", (result["paper_id"],)).fetchone():
+            print(f"{YELLOW}[INFO] Paper '{result['paper_id']}' exists. Replacing questions...{RESET}")
+        write_paper(conn, result)
+    finally:
+        conn.close()
+
+    print_report(result)
+    print(f"\n{CYAN}Database: {Path(db_path).resolve()}{RESET}")
     print()
 
 
+def discover_years(source_root: Path) -> list[int]:
+    """源目录下所有 {year}_full.json"""
+    years = []
+    for f in source_root.glob("*_full.json"):
+        m = re.fullmatch(r"(\d{4})_full\.json", f.name)
+        if m:
+            years.append(int(m.group(1)))
+    return sorted(years)
+
+
+def parse_years(spec: str) -> list[int]:
+    """'2010-2025' / '2010,2012,2015-2017'"""
+    years = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if "-" in part:
+            lo, hi = part.split("-", 1)
+            years.update(range(int(lo), int(hi) + 1))
+        elif part:
+            years.add(int(part))
+    return sorted(years)
+
+
+def import_all(db_path: str, source_root: Path = SOURCE_ROOT, years: list[int] | None = None,
+               workers: int | None = None, force: bool = False) -> dict:
+    """
+    并行解析 + 单写者入库；返回 {status: count}
+    解析任务按完成顺序逐份写入，写库与其余年份的解析重叠进行
+    """
+    years = years or discover_years(source_root)
+    counts = {"imported": 0, "unchanged": 0, "skipped": 0, "missing": 0, "failed": 0}
+    if not years:
+        print(f"{RED}[ERROR] No *_full.json found in {source_root}{RESET}")
+        return counts
+
+    print(f"\n{BOLD}{CYAN}{'='*60}")
+    print(f"  🐾 Project_Mia ETL — Importing {len(years)} papers ({years[0]}–{years[-1]})")
+    print(f"{'='*60}{RESET}\n")
+
+    started = time.perf_counter()
+    conn = open_db(db_path)
+    manifest = {} if force else load_manifest(conn)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(years)))
+
+    def handle(result: dict):
+        status = result["status"]
+        if status == "ready":
+            write_paper(conn, result)
+            status = "imported"
+        counts[status] += 1
+        print_line(result)
+
+    try:
+        if workers == 1:
+            for y in years:
+                handle(prepare_year(y, str(source_root), manifest.get(f"{y}-eng1")))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {
+                    pool.submit(prepare_year, y, str(source_root), manifest.get(f"{y}-eng1")): y
+                    for y in years
+                }
+                for fut in as_completed(futures):
+                    try:
+                        handle(fut.result())
+                    except Exception as e:
+                        counts["failed"] += 1
+                        print(f"  {futures[fut]}  {RED}failed{RESET}    {e}")
+    finally:
+        conn.close()
+
+    elapsed = time.perf_counter() - started
+    summary = ", ".join(f"{v} {k}" for k, v in counts.items() if v)
+    color = RED if counts["failed"] or counts["missing"] else GREEN
+    print(f"\n{color}{BOLD}Done in {elapsed:.2f}s ({workers} workers): {summary}{RESET}")
+    print(f"{CYAN}Database: {Path(db_path).resolve()}{RESET}\n")
+    return counts
+
+
 # ============================================================================
 #  CLI 入口
 # ============================================================================
@@ -360,10 +611,31 @@ def main():
     parser = argparse.ArgumentParser(
         description="🐾 Project_Mia ETL — Import English I exam data by year"
     )
-    parser.add_argument(
-        "--year", type=int, required=True,
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument(
+        "--year", type=int,
         help="Year to import (e.g. 2010)"
     )
+    mode.add_argument(
+        "--all", action="store_true",
+        help="Import every year found in the source root (parallel, incremental)"
+    )
+    parser.add_argument(
+        "--years", type=str, default=None,
+        help="With --all: restrict to years, e.g. 2010-2025 or 2010,2012"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="With --all: parser processes (default: CPU count)"
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="With --all: re-import even if the content hash is unchanged"
+    )
+    parser.add_argument(
+        "--source-root", type=Path, default=SOURCE_ROOT,
+        help="Directory with {year}_full.json and extracted_images/ (default: $MIA_SOURCE_ROOT or Project_Mia/exam_sources)"
+    )
     parser.add_argument(
         "--db-path", type=str,
         default=str(PROJECT_ROOT / "backend" / "data" / "static_content.db"),
@@ -371,7 +643,13 @@ def main():
     )
 
     args = parser.parse_args()
-    import_year(args.year, args.db_path)
+    if args.all:
+        years = parse_years(args.years) if args.years else None
+        counts = import_all(args.db_path, args.source_root, years, args.workers, args.force)
+        if counts["failed"]:
+            sys.exit(1)
+    else:
+        import_year(args.year, args.db_path, args.source_root)
 
 
 if __name__ == "__main__":
@@ -18,18 +18,38 @@ import_vocab.py — 阶段 2.9: 词汇核心装载
   pos            → pos
   len(sentences) → frequency (真题出现次数)
   sentences[]    → example_sentences (JSON)
+  上述字段的哈希 → content_hash
+
+流式导入 (内存占用与源文件大小无关):
+  - iter_json_array 按块读取源文件，raw_decode 逐条解析顶层数组元素
+  - 每 --batch-size 条一批: 按 word 批量查出旧行，executemany upsert，一批一个事务
+  - --delta 只写 content_hash 变化的词条，并增量维护 dictionary_fts；
+    默认 (全量) 模式写入全部词条，结束后整体重建 dictionary_fts (词条前缀联想 / 释义 / 例句检索)
 
 Usage:
     python scripts/import_vocab.py
+    python scripts/import_vocab.py --delta
+    python scripts/import_vocab.py --src D:/corpus/all_sentences.json --batch-size 2000
 """
 
-import sqlite3
+import argparse
+import codecs
+import hashlib
 import json
+import sqlite3
+import sys
+import time
 from pathlib import Path
+from typing import Iterator, Dict, Any, List
 
 # --- 路径 ---
 SRC_JSON = Path(r"F:\sanity_check_avg\VocabWeb\data\exam_vocabulary.json")
-DB_PATH  = Path(__file__).resolve().parent.parent / "backend" / "data" / "static_content.db"
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+DB_PATH  = BACKEND_DIR / "data" / "static_content.db"
+
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.services.vocab_search_service import vocab_search_service
 
 # --- 颜色 ---
 RED    = "\033[91m"
@@ -39,30 +59,139 @@ CYAN   = "\033[96m"
 BOLD   = "\033[1m"
 RESET  = "\033[0m"
 
-
-def main():
-    print(f"\n{BOLD}{CYAN}{'='*60}")
-    print(f"  📖 Project_Mia — Vocabulary Import")
-    print(f"{'='*60}{RESET}\n")
-
-    # --- 读取源 JSON ---
-    print(f"  Reading: {SRC_JSON}")
-    if not SRC_JSON.exists():
-        print(f"  {RED}[ERROR] Source file not found!{RESET}")
-        return
-
-    with open(SRC_JSON, "r", encoding="utf-8") as f:
-        vocab_list = json.load(f)
-
-    total = len(vocab_list)
-    print(f"  Found: {total} words\n")
-
-    # --- 连接数据库 ---
-    conn = sqlite3.connect(str(DB_PATH))
-    cursor = conn.cursor()
-
-    # 确保表存在
-    cursor.execute("""
+READ_CHUNK = 1 << 16
+DEFAULT_BATCH = 500
+
+
+# ==================================================================
+#  流式解析
+# ==================================================================
+
+class StreamProgress:
+    """已读字节数 (源文件未解析完时无法知道总条数，按字节报告进度)"""
+
+    def __init__(self, total_bytes: int):
+        self.total_bytes = max(total_bytes, 1)
+        self.read_bytes = 0
+
+
+def iter_json_array(fp, progress: StreamProgress = None, chunk_size: int = READ_CHUNK) -> Iterator[Any]:
+    """
+    增量解析顶层 JSON 数组，逐个 yield 元素
+    缓冲区只保留当前未解析完的部分，峰值内存约为 单个元素 + chunk_size
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buf, pos, eof = "", 0, False
+
+    def fill() -> bool:
+        nonlocal buf, pos, eof
+        if eof:
+            return False
+        raw = fp.read(chunk_size)
+        if progress is not None:
+            progress.read_bytes += len(raw)
+        if not raw:
+            eof = True
+            buf = buf[pos:] + text_decoder.decode(b"", final=True)
+        else:
+            buf = buf[pos:] + text_decoder.decode(raw)
+        pos = 0
+        return True
+
+    def skip_ws() -> bool:
+        """跳过空白，返回缓冲区中是否还有字符"""
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buf):
+                return True
+            if not fill():
+                return False
+
+    if not skip_ws() or buf[pos] != "[":
+        raise ValueError("Source is not a JSON array")
+    pos += 1
+
+    expect_value = True
+    while True:
+        if not skip_ws():
+            raise ValueError("Unexpected end of file inside JSON array")
+        ch = buf[pos]
+        if ch == "]":
+            return
+        if ch == ",":
+            if expect_value:
+                raise ValueError(f"Unexpected ',' at offset {progress.read_bytes if progress else '?'}")
+            pos += 1
+            expect_value = True
+            continue
+        if not expect_value:
+            raise ValueError(f"Expected ',' or ']' but found {ch!r}")
+
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+                # 元素恰好止于缓冲区末尾时 (如被截断的数字) 需再读一块确认
+                if end < len(buf) or eof:
+                    break
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            fill()
+        pos = end
+        expect_value = False
+        yield value
+
+
+# ==================================================================
+#  行转换
+# ==================================================================
+
+def normalize(item: Dict[str, Any]):
+    """源条目 → (word, meaning, pos, frequency, example_sentences, content_hash)；空词返回 None"""
+    word = (item.get("word") or "").strip()
+    if not word:
+        return None
+
+    # 释义: 数组拼接为分号分隔
+    meanings_raw = item.get("meanings", [])
+    if isinstance(meanings_raw, list):
+        meaning = "; ".join(m.strip() for m in meanings_raw if m.strip())
+    else:
+        meaning = str(meanings_raw).strip()
+
+    if not meaning:
+        meaning = "[未知释义]"
+
+    pos = (item.get("pos") or "").strip() or None
+
+    # 简化例句: 只保留 sentence, translation, year, source_label
+    sentences = item.get("sentences") or []
+    clean_sentences = [
+        {
+            "en": s.get("sentence", ""),
+            "cn": s.get("translation", ""),
+            "year": s.get("year"),
+            "source": s.get("source_label", ""),
+        }
+        for s in sentences
+    ]
+    sentences_json = json.dumps(clean_sentences, ensure_ascii=False) if clean_sentences else None
+
+    digest = hashlib.sha1(
+        json.dumps([meaning, pos, len(sentences), sentences_json], ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
+    return (word, meaning, pos, len(sentences), sentences_json, digest)
+
+
+# ==================================================================
+#  批量写入
+# ==================================================================
+
+def ensure_schema(conn: sqlite3.Connection):
+    conn.execute("""
         CREATE TABLE IF NOT EXISTS dictionary (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             word VARCHAR(50) UNIQUE NOT NULL,
@@ -70,98 +199,158 @@ def main():
             pos VARCHAR(20),
             frequency INTEGER DEFAULT 0,
             example_sentences TEXT,
+            content_hash VARCHAR(40),
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     """)
-    cursor.execute("CREATE INDEX IF NOT EXISTS ix_dictionary_word ON dictionary(word)")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_dictionary_word ON dictionary(word)")
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(dictionary)")}
+    if "content_hash" not in cols:
+        print(f"  {YELLOW}Migrating dictionary: Adding content_hash column...{RESET}")
+        conn.execute("ALTER TABLE dictionary ADD COLUMN content_hash VARCHAR(40)")
+    conn.commit()
 
-    # --- 批量导入 ---
-    inserted = 0
-    updated = 0
+
+class BatchWriter:
+    """有界批量 upsert；delta 模式跳过哈希未变的词条并增量维护 FTS"""
+
+    def __init__(self, conn: sqlite3.Connection, batch_size: int, delta: bool):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.delta = delta
+        self.pending: Dict[str, tuple] = {}
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.index_ok = True
+
+    def add(self, row: tuple):
+        # 源中重复的词以最后一条为准
+        self.pending[row[0]] = row
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        rows = self.pending
+        self.pending = {}
+
+        placeholders = ",".join("?" * len(rows))
+        old = {
+            r[1]: r for r in self.conn.execute(
+                f"SELECT id, word, meaning, example_sentences, content_hash FROM dictionary WHERE word IN ({placeholders})",
+                list(rows),
+            )
+        }
+        changed = [r for w, r in rows.items() if not (self.delta and w in old and old[w][4] == r[5])]
+        self.unchanged += len(rows) - len(changed)
+        self.inserted += sum(1 for r in changed if r[0] not in old)
+        self.updated += sum(1 for r in changed if r[0] in old)
+        if not changed:
+            return
+
+        self.conn.executemany("""
+            INSERT INTO dictionary (word, meaning, pos, frequency, example_sentences, content_hash)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(word) DO UPDATE SET
+                meaning = excluded.meaning,
+                pos = excluded.pos,
+                frequency = excluded.frequency,
+                example_sentences = excluded.example_sentences,
+                content_hash = excluded.content_hash
+        """, changed)
+
+        if self.delta and self.index_ok:
+            words = [r[0] for r in changed]
+            new_rows = self.conn.execute(
+                f"SELECT id, word, meaning, example_sentences FROM dictionary WHERE word IN ({','.join('?' * len(words))})",
+                words,
+            ).fetchall()
+            removed = [old[w][:4] for w in words if w in old]
+            self.index_ok = vocab_search_service.update_index(self.conn, removed, new_rows)
+        self.conn.commit()
+
+
+def print_progress(progress: StreamProgress, count: int, started: float):
+    pct = min(progress.read_bytes / progress.total_bytes, 1.0)
+    bar_len = 30
+    filled = int(bar_len * pct)
+    bar = "█" * filled + "░" * (bar_len - filled)
+    rate = count / max(time.perf_counter() - started, 1e-6)
+    print(f"\r  [{bar}] {pct * 100:5.1f}% ({count} entries, {rate:,.0f}/s)", end="", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream exam_vocabulary.json into the dictionary table")
+    parser.add_argument("--src", type=Path, default=SRC_JSON, help="Source JSON array")
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="Target static_content.db")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH, help="Rows per upsert transaction")
+    parser.add_argument("--delta", action="store_true", help="Only write words whose content hash changed")
+    args = parser.parse_args()
+
+    print(f"\n{BOLD}{CYAN}{'='*60}")
+    print(f"  📖 Project_Mia — Vocabulary Import{' (delta)' if args.delta else ''}")
+    print(f"{'='*60}{RESET}\n")
+
+    # --- 源文件 ---
+    print(f"  Reading: {args.src}")
+    if not args.src.exists():
+        print(f"  {RED}[ERROR] Source file not found!{RESET}")
+        return
+
+    # --- 连接数据库 ---
+    conn = sqlite3.connect(str(args.db))
+    ensure_schema(conn)
+    writer = BatchWriter(conn, max(1, args.batch_size), args.delta)
+
+    # --- 流式导入 ---
+    total = 0
     errors = 0
     skipped_empty = 0
+    started = time.perf_counter()
+    progress = StreamProgress(args.src.stat().st_size)
+
+    with open(args.src, "rb") as fp:
+        for item in iter_json_array(fp, progress):
+            total += 1
+            try:
+                row = normalize(item)
+                if row is None:
+                    skipped_empty += 1
+                    continue
+                writer.add(row)
+            except Exception as e:
+                errors += 1
+                if errors <= 5:
+                    word = item.get("word") if isinstance(item, dict) else item
+                    print(f"\n  {RED}[ERROR] {word}: {e}{RESET}")
+
+            if total % 1000 == 0:
+                print_progress(progress, total, started)
+
+    writer.flush()
+    print_progress(progress, total, started)
+    print()
 
-    batch_size = 500
-    batch_count = 0
-
-    for i, item in enumerate(vocab_list):
-        try:
-            word = item.get("word", "").strip()
-            if not word:
-                skipped_empty += 1
-                continue
-
-            # 释义: 数组拼接为分号分隔
-            meanings_raw = item.get("meanings", [])
-            if isinstance(meanings_raw, list):
-                meaning = "; ".join(m.strip() for m in meanings_raw if m.strip())
-            else:
-                meaning = str(meanings_raw).strip()
-
-            if not meaning:
-                meaning = "[未知释义]"
-
-            pos = item.get("pos", "").strip() or None
-
-            # 例句 (保留完整结构用于跨年份联动)
-            sentences = item.get("sentences", [])
-            frequency = len(sentences)
-
-            # 简化例句: 只保留 sentence, year, source_label
-            clean_sentences = []
-            for s in sentences:
-                clean_sentences.append({
-                    "en": s.get("sentence", ""),
-                    "cn": s.get("translation", ""),
-                    "year": s.get("year"),
-                    "source": s.get("source_label", ""),
-                })
-
-            sentences_json = json.dumps(clean_sentences, ensure_ascii=False) if clean_sentences else None
-
-            # Upsert
-            cursor.execute("""
-                INSERT INTO dictionary (word, meaning, pos, frequency, example_sentences)
-                VALUES (?, ?, ?, ?, ?)
-                ON CONFLICT(word) DO UPDATE SET
-                    meaning = excluded.meaning,
-                    pos = excluded.pos,
-                    frequency = excluded.frequency,
-                    example_sentences = excluded.example_sentences
-            """, (word, meaning, pos, frequency, sentences_json))
-
-            if cursor.rowcount > 0:
-                inserted += 1
-            else:
-                updated += 1
-
-            batch_count += 1
-            if batch_count >= batch_size:
-                conn.commit()
-                batch_count = 0
-
-            # 进度条 (每500个打印)
-            if (i + 1) % 1000 == 0 or (i + 1) == total:
-                pct = (i + 1) / total * 100
-                bar_len = 30
-                filled = int(bar_len * (i + 1) / total)
-                bar = "█" * filled + "░" * (bar_len - filled)
-                print(f"\r  [{bar}] {pct:5.1f}% ({i+1}/{total})", end="", flush=True)
-
-        except Exception as e:
-            errors += 1
-            if errors <= 5:
-                print(f"\n  {RED}[ERROR] {word}: {e}{RESET}")
-
-    conn.commit()
+    # --- 全文索引 ---
+    t0 = time.perf_counter()
+    if args.delta and writer.index_ok:
+        print(f"  Search index:     updated {writer.inserted + writer.updated} entries incrementally")
+    else:
+        indexed = vocab_search_service.rebuild_index(conn)
+        conn.commit()
+        print(f"  Search index:     {indexed} entries ({time.perf_counter() - t0:.2f}s)")
     conn.close()
-    print()
 
     # --- 报告 ---
     print(f"\n{BOLD}  📊 Import Summary{RESET}")
     print(f"  {'─'*40}")
-    print(f"  Total processed:  {total}")
-    print(f"  Inserted/Updated: {GREEN}{inserted}{RESET}")
+    print(f"  Total processed:  {total}  ({time.perf_counter() - started:.2f}s)")
+    print(f"  Inserted:         {GREEN}{writer.inserted}{RESET}")
+    print(f"  Updated:          {GREEN}{writer.updated}{RESET}")
+    if args.delta:
+        print(f"  Unchanged:        {writer.unchanged}")
     print(f"  Skipped (empty):  {skipped_empty}")
     print(f"  Errors:           {RED if errors else GREEN}{errors}{RESET}")
 
@@ -0,0 +1,518 @@
+"""
+ingest_exam_sources.py — 真题原始资料 → {year}_full.json 增量构建
+=================================================================
+取代 _archive_legacy/scripts/pdf_to_json.py (串行抽页 + 逐 section 串行调用 LLM) 以及
+extract_images.py / extract_all_images.py / import_2025_docx.py (各自重复打开同一份 DOCX)。
+产物目录即 import_exam_data.py 的 --source-root:
+
+  <source-root>/
+    DOCX/{year}年考研英语一真题.docx      输入: 真题 (题干 / 答案表 / 配图)
+    PDF/{year}年考研英语一真题解析.pdf    输入: 解析 (可缺，缺失时由模型自行生成解析)
+    {year}_full.json                     输出: 结构化试卷
+    extracted_images/{year}/             输出: DOCX 全部配图，最大一张命名为 writing_b.*
+    .ingest_cache.db                     缓存: PDF 逐页文本 / 结构映射 / 逐 section LLM 输出
+
+流水线:
+  1. DOCX 单次打开: document.xml 取正文 + word/media/* 取全部图片 (只用 zipfile)
+  2. PDF 逐页文本按 (文件哈希, 页码) 缓存；未命中的页按页段分片，进程池并行 pdfplumber 抽取
+  3. PDF 结构 (各 section 页码范围) 与逐 section JSON 经 llm_service 生成，
+     --concurrency 路并发 + 退避重试；缓存键 = PROMPT_VERSION + 模型 + 输入文本哈希
+  4. 组装 {year}_full.json；内容未变化时不改写文件 (import_exam_data 的清单哈希随之不变)
+
+新增年份: 放入 DOCX / PDF 后重跑，已有年份全部命中缓存，只有新年份会抽取并调用模型。
+pdfplumber 为可选依赖 (pip install pdfplumber)，未安装时跳过解析 PDF。
+
+Usage:
+    python scripts/ingest_exam_sources.py                                  # 默认 ./exam_sources 或 $MIA_SOURCE_ROOT
+    python scripts/ingest_exam_sources.py --source-root ../exam_sources --years 2025
+    python scripts/ingest_exam_sources.py --extract-only                   # 只抽文本 / 配图，不调用模型
+    python scripts/ingest_exam_sources.py --years 2024 --force-llm         # 忽略 section 缓存重新生成
+    python scripts/import_exam_data.py --all                               # 然后增量入库 (默认同一目录)
+
+Author: Femo
+Date: 2026-03-18
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import sys
+import time
+import xml.etree.ElementTree as ET
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPTS_DIR.parent
+BACKEND_DIR = PROJECT_ROOT / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+try:
+    import pdfplumber
+except ImportError:  # 可选依赖: 没有时只处理 DOCX
+    pdfplumber = None
+
+# --- 颜色 ---
+RED    = "\033[91m"
+GREEN  = "\033[92m"
+YELLOW = "\033[93m"
+CYAN   = "\033[96m"
+BOLD   = "\033[1m"
+RESET  = "\033[0m"
+
+# import_exam_data.py 的默认 --source-root 也取自这里
+DEFAULT_SOURCE_ROOT = Path(os.environ.get("MIA_SOURCE_ROOT", PROJECT_ROOT / "exam_sources"))
+DOCX_PATTERN = re.compile(r"(\d{4})年考研英语一真题\.docx")
+PDF_NAME = "{year}年考研英语一真题解析.pdf"
+
+# 提示词 / 输出结构变化时 +1，所有 section 缓存随之失效
+PROMPT_VERSION = 1
+
+# 小于该大小的 media 视为占位图 / 装饰线
+MIN_IMAGE_BYTES = 1024
+RASTER_EXTS = {".jpeg", ".jpg", ".png", ".gif", ".webp"}
+
+# (section 类型, 名称, 题号范围, 结构映射键)
+TASKS = [
+    ("Use of English", "Section I", "1-20", "Use of English"),
+    ("Reading Text", "Text 1", "21-25", "Text 1"),
+    ("Reading Text", "Text 2", "26-30", "Text 2"),
+    ("Reading Text", "Text 3", "31-35", "Text 3"),
+    ("Reading Text", "Text 4", "36-40", "Text 4"),
+    ("Reading Part B", "Part B", "41-45", "Part B"),
+    ("Translation", "Part C", "46-50", "Translation"),
+    ("Writing", "Part A", "51", "Writing Part A"),
+    ("Writing", "Part B", "52", "Writing Part B"),
+]
+
+CACHE_DDL = """
+CREATE TABLE IF NOT EXISTS pdf_files (
+    file_hash TEXT PRIMARY KEY,
+    pages INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pdf_pages (
+    file_hash TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (file_hash, page)
+);
+CREATE TABLE IF NOT EXISTS llm_outputs (
+    cache_key TEXT PRIMARY KEY,
+    year INTEGER,
+    task TEXT,
+    output TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def sha256_text(*parts: str) -> str:
+    h = hashlib.sha256()
+    for p in parts:
+        h.update(p.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+# ============================================================================
+#  DOCX (单次打开: 正文 + 全部配图)
+# ============================================================================
+
+def read_docx(path: Path) -> Tuple[str, List[Tuple[str, bytes]]]:
+    """返回 (正文, [(media 文件名, 字节)])"""
+    with zipfile.ZipFile(path) as zf:
+        xml = zf.read("word/document.xml")
+        images = [
+            (info.filename.rsplit("/", 1)[-1], zf.read(info))
+            for info in zf.infolist()
+            if info.filename.startswith("word/media/") and not info.is_dir()
+        ]
+
+    parts = []
+    for elem in ET.fromstring(xml).iter():
+        tag = elem.tag.rsplit("}", 1)[-1]
+        if tag == "p":
+            parts.append("\n")
+        elif tag == "t" and elem.text:
+            parts.append(elem.text)
+        elif tag == "tab":
+            parts.append("\t")
+        elif tag == "br":
+            parts.append("\n")
+    return "".join(parts).strip(), images
+
+
+def write_images(year_dir: Path, images: List[Tuple[str, bytes]]) -> Dict[str, int]:
+    """
+    配图落盘: 最大的位图 → writing_b.{ext} (import_exam_data 按此名匹配大作文配图)，
+    其余 → docx_{原名}；字节相同的文件不重写
+    """
+    stats = {"written": 0, "unchanged": 0}
+    images = [(name, data) for name, data in images if len(data) > MIN_IMAGE_BYTES]
+    if not images:
+        return stats
+
+    raster = [img for img in images if Path(img[0]).suffix.lower() in RASTER_EXTS]
+    main = max(raster, key=lambda img: len(img[1])) if raster else None
+
+    year_dir.mkdir(parents=True, exist_ok=True)
+    for name, data in images:
+        if main is not None and name == main[0]:
+            target = year_dir / f"writing_b{Path(name).suffix.lower()}"
+        else:
+            target = year_dir / f"docx_{name}"
+        if target.exists() and target.read_bytes() == data:
+            stats["unchanged"] += 1
+            continue
+        target.write_bytes(data)
+        stats["written"] += 1
+    return stats
+
+
+# ============================================================================
+#  PDF 逐页文本 (进程池 worker，只读文件)
+# ============================================================================
+
+def count_pages(pdf_path: str) -> int:
+    with pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages)
+
+
+def extract_pages(pdf_path: str, start: int, end: int) -> Tuple[str, int, List[str]]:
+    """抽取 [start, end) 页文本，返回 (路径, start, 文本列表)"""
+    with pdfplumber.open(pdf_path) as pdf:
+        texts = [(pdf.pages[i].extract_text() or "") for i in range(start, min(end, len(pdf.pages)))]
+    return pdf_path, start, texts
+
+
+def load_pdf_pages(cache: sqlite3.Connection, pdfs: Dict[int, Path], workers: int,
+                   pages_per_task: int) -> Tuple[Dict[int, List[str]], Dict[int, str]]:
+    """
+    各年份解析 PDF 的逐页文本: 缓存命中直接读取，其余分片并行抽取后写入缓存
+    返回 ({year: [页文本]}, {year: "cached" | "extracted" | 错误信息})
+    """
+    hashes = {year: sha256_bytes(path.read_bytes()) for year, path in pdfs.items()}
+    known = dict(cache.execute("SELECT file_hash, pages FROM pdf_files").fetchall())
+    status: Dict[int, str] = {}
+    missing = {}
+    for year, file_hash in hashes.items():
+        if file_hash in known:
+            status[year] = "cached"
+        elif pdfplumber is None:
+            status[year] = "pdfplumber not installed"
+        else:
+            missing[year] = file_hash
+
+    if missing:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            counts = dict(zip(missing, pool.map(count_pages, [str(pdfs[y]) for y in missing])))
+            shards = [
+                (str(pdfs[y]), start, start + pages_per_task)
+                for y in missing for start in range(0, counts[y], pages_per_task)
+            ]
+            by_path = {str(pdfs[y]): y for y in missing}
+            texts: Dict[int, List[Optional[str]]] = {y: [None] * counts[y] for y in missing}
+            for path, start, chunk in pool.map(extract_pages, *zip(*shards)) if shards else ():
+                texts[by_path[path]][start:start + len(chunk)] = chunk
+
+        with cache:
+            for year, file_hash in missing.items():
+                cache.executemany(
+                    "INSERT OR REPLACE INTO pdf_pages (file_hash, page, text) VALUES (?, ?, ?)",
+                    [(file_hash, i, t or "") for i, t in enumerate(texts[year])],
+                )
+                cache.execute("INSERT OR REPLACE INTO pdf_files (file_hash, pages) VALUES (?, ?)",
+                              (file_hash, counts[year]))
+                status[year] = "extracted"
+
+    pages: Dict[int, List[str]] = {}
+    for year, file_hash in hashes.items():
+        rows = cache.execute("SELECT text FROM pdf_pages WHERE file_hash = ? ORDER BY page", (file_hash,)).fetchall()
+        pages[year] = [r[0] for r in rows]
+    return pages, status
+
+
+# ============================================================================
+#  LLM (结构映射 + 逐 section JSON)，输出按输入哈希缓存
+# ============================================================================
+
+def structure_prompt(pages: List[str]) -> str:
+    summaries = []
+    for i, text in enumerate(pages):
+        if not text:
+            content = "[Empty/Image]"
+        else:
+            content = f"Start: {text[:100].replace(chr(10), ' ')} ... End: {text[-100:].replace(chr(10), ' ')}"
+        summaries.append(f"Page {i + 1}: {content}")
+    keys = ", ".join(f'"{t[3]}"' for t in TASKS)
+    return (
+        "You are a document structure analyzer. Below are per-page summaries of a PDF analysing "
+        "one year's English exam (Section I Use of English, Reading Part A Text 1-4, Part B, "
+        "Translation, Writing Part A / Part B).\n"
+        f"Return a JSON object with keys {keys}; each value is [start_page, end_page] (1-based).\n\n"
+        "Page Summaries:\n" + "\n".join(summaries)
+    )
+
+
+def section_prompt(task: Tuple[str, str, str, str], exam_text: str, analysis_text: str) -> str:
+    section_type, section_name, q_range, _ = task
+    return f"""你是一个专业的英语教学助手和数据结构化专家。
+
+**任务**: 从【真题试卷】中提取 "{section_type} - {section_name}" 的文章、题目 ({q_range} 题) 和标准答案，
+结合【解析资料】中的词汇注释、长难句分析和题目详解，生成 JSON。
+
+=== 1. 真题试卷 ===
+{exam_text}
+
+=== 2. 解析资料 ===
+{analysis_text or "(无解析资料，请自行生成解析)"}
+
+**处理逻辑**:
+1. 定位 "{section_name}" (阅读) 或 "Section I Use of English" (完形)，提取题号 {q_range} 的全部题目
+2. 答案取自真题末尾的答案表；解析取自解析资料，缺失时用你的专业知识生成高质量解析
+3. Writing: correct_answer 为满分范文，analysis_raw 为范文点评与写作思路，options 为空对象
+4. Translation: correct_answer 为标准中文译文，analysis_raw 为语法结构分析与翻译技巧
+5. Reading Part B: 必须解释选项正确的依据 (线索词匹配、段落逻辑)
+
+**输出 JSON 结构** (只返回 JSON):
+{{
+  "section_info": {{"type": "{section_type}", "name": "{section_name}", "q_range": "{q_range}"}},
+  "article": {{"paragraphs": ["段落1...", "段落2..."]}},
+  "vocabulary": [{{"word": "...", "meanings": ["..."], "context_match": "..."}}],
+  "questions": [
+    {{"id": 题号, "text": "题干 (翻译为划线句原文，写作为题目要求)",
+      "options": {{"A": "...", "B": "...", "C": "...", "D": "..."}},
+      "correct_answer": "答案 / 译文 / 范文", "analysis_raw": "中文解析",
+      "ai_persona_prompt": "毒舌老师风格的英文解释 (必须生成)"}}
+  ]
+}}
+完形填空保留挖空符号 (如 _1_)；写作的 paragraphs 放题目要求 (Directions)。"""
+
+
+def _valid_section(data: Any) -> bool:
+    return isinstance(data, dict) and isinstance(data.get("questions"), list) and bool(data["questions"])
+
+
+def _valid_structure(data: Any) -> bool:
+    return isinstance(data, dict) and any(
+        isinstance(v, list) and len(v) == 2 and all(isinstance(x, int) for x in v) for v in data.values()
+    )
+
+
+class SectionGenerator:
+    """并发受限的 LLM 调用 + llm_outputs 缓存"""
+
+    def __init__(self, cache: sqlite3.Connection, concurrency: int, retries: int, force: bool):
+        from app.services.llm_service import llm_service, LLMService
+        self.llm = llm_service
+        self.extract_json = LLMService._extract_json
+        self.model = getattr(llm_service, "model", None) or llm_service.provider
+        self.cache = cache
+        self.sem = asyncio.Semaphore(concurrency)
+        self.retries = retries
+        self.force = force
+        self.calls = 0
+
+    def _cached(self, key: str) -> Optional[Any]:
+        if self.force:
+            return None
+        row = self.cache.execute("SELECT output FROM llm_outputs WHERE cache_key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    async def run(self, year: int, task_name: str, prompt: str, validate) -> Tuple[Optional[Any], str]:
+        """返回 (解析后的 JSON, "cached" | "generated" | 错误信息)"""
+        key = sha256_text(f"v{PROMPT_VERSION}", self.model, task_name, prompt)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached, "cached"
+
+        error = "no response"
+        for attempt in range(self.retries + 1):
+            try:
+                async with self.sem:
+                    self.calls += 1
+                    text = await self.llm.generate_block(prompt, temperature=0.2, max_tokens=8192)
+                data = self.extract_json(text or "")
+                if validate(data):
+                    with self.cache:
+                        self.cache.execute(
+                            "INSERT OR REPLACE INTO llm_outputs (cache_key, year, task, output) VALUES (?, ?, ?, ?)",
+                            (key, year, task_name, json.dumps(data, ensure_ascii=False)),
+                        )
+                    return data, "generated"
+                error = "invalid JSON structure"
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"[:200]
+            if attempt < self.retries:
+                await asyncio.sleep(min(2 ** attempt, 30) * random.uniform(0.5, 1.5))
+        return None, error
+
+
+async def build_year(gen: SectionGenerator, year: int, exam_text: str, pages: List[str]) -> Dict[str, Any]:
+    """结构映射 → 各 section 并发生成；返回 {"data", "sections": {名称: 状态}}"""
+    structure = {}
+    if pages:
+        structure, _ = await gen.run(year, "__structure__", structure_prompt(pages), _valid_structure)
+        structure = structure or {}
+
+    def analysis_for(key: str) -> str:
+        if not pages:
+            return ""
+        rng = structure.get(key)
+        if not (isinstance(rng, list) and len(rng) == 2):
+            return "\n".join(pages)
+        # 前后各多带一页，防止分界页遗漏
+        s, e = max(0, rng[0] - 2), min(len(pages), rng[1] + 1)
+        return "\n".join(pages[s:e])
+
+    results = await asyncio.gather(*[
+        gen.run(year, f"{t[0]}/{t[1]}", section_prompt(t, exam_text, analysis_for(t[3])), _valid_section)
+        for t in TASKS
+    ])
+    sections = {f"{t[0]}/{t[1]}": status for t, (_, status) in zip(TASKS, results)}
+    if any(data is None for data, _ in results):
+        return {"data": None, "sections": sections}
+    return {
+        "data": {"meta": {"year": year, "exam_type": "English I"}, "sections": [data for data, _ in results]},
+        "sections": sections,
+    }
+
+
+def write_json(path: Path, data: Dict[str, Any]) -> str:
+    """内容不变不改写 (保持 import_exam_data 的清单哈希)"""
+    payload = json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+    if path.exists() and path.read_bytes() == payload:
+        return "unchanged"
+    path.write_bytes(payload)
+    return "written"
+
+
+# ============================================================================
+#  入口
+# ============================================================================
+
+def parse_years(spec: str) -> List[int]:
+    """'2010-2025' / '2010,2012,2015-2017'"""
+    years = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if "-" in part:
+            lo, hi = part.split("-", 1)
+            years.update(range(int(lo), int(hi) + 1))
+        elif part:
+            years.add(int(part))
+    return sorted(years)
+
+
+def discover(docx_dir: Path) -> Dict[int, Path]:
+    found = {}
+    for f in docx_dir.glob("*.docx"):
+        m = DOCX_PATTERN.fullmatch(f.name)
+        if m:
+            found[int(m.group(1))] = f
+    return dict(sorted(found.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally build {year}_full.json from exam DOCX/PDF sources")
+    parser.add_argument("--source-root", type=Path, default=DEFAULT_SOURCE_ROOT,
+                        help="Source / output directory (default: $MIA_SOURCE_ROOT or Project_Mia/exam_sources)")
+    parser.add_argument("--docx-dir", default="DOCX", help="Relative to --source-root")
+    parser.add_argument("--pdf-dir", default="PDF", help="Relative to --source-root")
+    parser.add_argument("--years", help="e.g. 2010-2025 or 2024,2025 (default: all DOCX found)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="PDF extraction processes")
+    parser.add_argument("--pages-per-task", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent LLM calls")
+    parser.add_argument("--retries", type=int, default=2)
+    parser.add_argument("--extract-only", action="store_true", help="Only extract text / images (no LLM)")
+    parser.add_argument("--force-llm", action="store_true", help="Ignore cached LLM outputs")
+    args = parser.parse_args()
+
+    root = args.source_root.resolve()
+    docx_dir, pdf_dir = root / args.docx_dir, root / args.pdf_dir
+    docs = discover(docx_dir)
+    if args.years:
+        wanted = set(parse_years(args.years))
+        docs = {y: p for y, p in docs.items() if y in wanted}
+    if not docs:
+        print(f"{RED}[ERROR] No {{year}}年考研英语一真题.docx found in {docx_dir}{RESET}")
+        sys.exit(1)
+
+    print(f"\n{BOLD}{CYAN}  📥 Ingest exam sources ({len(docs)} year(s)) — {root}{RESET}")
+    if pdfplumber is None:
+        print(f"  {YELLOW}pdfplumber not installed — analysis PDFs skipped (pip install pdfplumber){RESET}")
+
+    start = time.perf_counter()
+    cache = sqlite3.connect(root / ".ingest_cache.db")
+    cache.executescript(CACHE_DDL)
+
+    # 1. DOCX: 正文 + 配图 (单次打开)
+    exam_text, image_stats = {}, {}
+    for year, path in docs.items():
+        text, images = read_docx(path)
+        exam_text[year] = text
+        image_stats[year] = write_images(root / "extracted_images" / str(year), images)
+
+    # 2. PDF 逐页文本 (缓存 + 进程池)
+    pdfs = {y: pdf_dir / PDF_NAME.format(year=y) for y in docs}
+    pdfs = {y: p for y, p in pdfs.items() if p.exists()}
+    pages, pdf_status = load_pdf_pages(cache, pdfs, args.workers, args.pages_per_task)
+    t_extract = time.perf_counter() - start
+
+    # 3 / 4. LLM + 组装
+    built: Dict[int, Dict[str, Any]] = {}
+    calls = 0
+    if not args.extract_only:
+        async def build_all():
+            gen = SectionGenerator(cache, args.concurrency, args.retries, args.force_llm)
+            results = await asyncio.gather(*[
+                build_year(gen, y, exam_text[y], pages.get(y, [])) for y in docs
+            ])
+            return dict(zip(docs, results)), gen.calls
+        built, calls = asyncio.run(build_all())
+        for year, result in built.items():
+            result["json"] = write_json(root / f"{year}_full.json", result["data"]) if result["data"] else "skipped"
+    cache.close()
+
+    failed = 0
+    print(f"\n  {'Year':<6}{'PDF pages':<20}{'Images':<18}{'Sections':<28}JSON")
+    for year in docs:
+        pdf = f"{len(pages[year])} {pdf_status[year]}" if year in pdf_status else "no PDF"
+        img = image_stats[year]
+        images = f"{img['written']} new, {img['unchanged']} same" if sum(img.values()) else "none"
+        if year in built:
+            statuses = list(built[year]["sections"].values())
+            n_cached = statuses.count("cached")
+            n_gen = statuses.count("generated")
+            errors = [f"{name}: {s}" for name, s in built[year]["sections"].items() if s not in ("cached", "generated")]
+            sections = f"{n_cached} cached, {n_gen} new" + (f", {len(errors)} failed" if errors else "")
+            json_state = built[year]["json"]
+            failed += bool(errors)
+        else:
+            sections, json_state, errors = "-", "-", []
+        color = RED if errors else ""
+        print(f"  {year:<6}{pdf:<20}{images:<18}{color}{sections:<28}{RESET if errors else ''}{json_state}")
+        for err in errors:
+            print(f"        {RED}✗ {err}{RESET}")
+
+    elapsed = time.perf_counter() - start
+    print(f"\n  Extraction {t_extract:.1f}s, total {elapsed:.1f}s, {calls} LLM call(s)")
+    if failed:
+        print(f"  {YELLOW}{BOLD}⚠️  {failed} year(s) incomplete — finished sections are cached, rerun to resume{RESET}\n")
+        sys.exit(1)
+    print(f"  {GREEN}{BOLD}✅ Done{RESET} → python scripts/import_exam_data.py --all --source-root {root}\n")
+
+
+if __name__ == "__main__":
+    main()
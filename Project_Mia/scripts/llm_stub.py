@@ -0,0 +1,91 @@
+"""
+llm_stub.py — 本地 LLM 替身 (基准测试 / 离线联调)
+==============================================
+替换 llm_service 单例的 provider 层，保留其上的埋点与业务逻辑:
+  - _provider_stream: 固定 TTFT 后按固定间隔吐出 N 个 token
+  - generate_block:   等待 TTFT + N × 间隔后一次性返回 (阅卷 / 剧情台词返回合法 JSON)
+输出由 prompt 哈希决定，同一输入每次结果一致。
+fail_rate > 0 时按 prompt 哈希 + 调用序号确定性地抛出 RuntimeError，用于演练重试。
+
+Usage (进程内):
+    from llm_stub import install
+    install(ttft_ms=150, token_ms=15, tokens=40)
+    install(ttft_ms=50, token_ms=2, tokens=30, fail_rate=0.1)
+"""
+
+import asyncio
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.services.llm_service import llm_service
+
+_WORDS = ["笨蛋", "绯墨", "喵", "这个", "语法", "其实", "很简单", "the", "past", "perfect", "注意", "哦", "！", "。"]
+
+
+class StubLLM:
+    """确定性的流式 / 非流式假模型"""
+
+    def __init__(self, ttft_ms: float = 150.0, token_ms: float = 15.0, tokens: int = 40, fail_rate: float = 0.0):
+        self.ttft = ttft_ms / 1000
+        self.token_delay = token_ms / 1000
+        self.tokens = tokens
+        self.fail_rate = fail_rate
+        self.calls = 0
+        self.failures = 0
+
+    @staticmethod
+    def _seed(text: str) -> int:
+        return int(hashlib.md5((text or "").encode("utf-8")).hexdigest()[:8], 16)
+
+    def _tokens_for(self, prompt: str):
+        seed = self._seed(prompt)
+        return [_WORDS[(seed + i * 5) % len(_WORDS)] for i in range(self.tokens)]
+
+    async def stream(self, span, prompt, image_base64=None, system_prompt=None,
+                     temperature=0.7, max_tokens=1000, history=None):
+        self.calls += 1
+        await asyncio.sleep(self.ttft)
+        span.opened()
+        for i, token in enumerate(self._tokens_for(prompt)):
+            if i:
+                await asyncio.sleep(self.token_delay)
+            yield token
+
+    async def block(self, prompt, image_base64=None, system_prompt=None,
+                    temperature=0.7, max_tokens=1000):
+        self.calls += 1
+        await asyncio.sleep(self.ttft + self.token_delay * self.tokens)
+        if self.fail_rate and self._seed(f"{self.calls}:{prompt}") % 1000 < self.fail_rate * 1000:
+            self.failures += 1
+            raise RuntimeError("[Stub] simulated upstream error (503)")
+        if system_prompt and "correct_cn" in system_prompt:
+            # 剧情台词 (scripts/generate_stories.py)
+            line = "".join(self._tokens_for(prompt)[:12])
+            return json.dumps({
+                "correct_cn": f"哼，做对了嘛~ {line}",
+                "wrong_cn": f"笨蛋绯墨，又错了喵… {line}",
+                "correct_en": "Hmph, not bad... for you, nya~",
+                "wrong_en": "Baka! Let's go over it together, nya...",
+            }, ensure_ascii=False)
+        if system_prompt and "Output JSON only" in system_prompt:
+            return json.dumps({
+                "score": 1.5,
+                "feedback": "[Stub] 还行吧，笨蛋绯墨喵~",
+                "key_points_missed": [],
+                "suggestions": [],
+            }, ensure_ascii=False)
+        return "".join(self._tokens_for(prompt))
+
+
+def install(ttft_ms: float = 150.0, token_ms: float = 15.0, tokens: int = 40, fail_rate: float = 0.0) -> StubLLM:
+    """把替身挂到 llm_service 上，返回实例 (可读 calls / failures 统计)"""
+    stub = StubLLM(ttft_ms, token_ms, tokens, fail_rate)
+    llm_service.provider = "stub"
+    llm_service._provider_stream = stub.stream
+    llm_service.generate_block = stub.block
+    return stub
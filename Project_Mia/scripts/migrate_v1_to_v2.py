@@ -2,22 +2,70 @@
 数据迁移脚本: V1 → V2
 将原EnglishExamWeb的7个数据库合并为Project_Mia的2个数据库
 
+流式迁移 (内存占用与旧库大小无关，可中断续跑):
+  - 源表按主键顺序用游标分块读取 (fetchmany)，每块一次 executemany 写入
+  - 每块一个事务；同一事务内更新目标库 migration_checkpoints 中该源表的
+    「最后已迁移主键」，中断后重跑从断点继续，已提交的块不会重复写入
+  - --dry-run 只读取源库，报告各表待迁移行数与耗时，不创建 / 修改目标库
+  - --reset 清空断点，从头重迁 (写入均为幂等 upsert)
+
+使用:
+    python scripts/migrate_v1_to_v2.py
+    python scripts/migrate_v1_to_v2.py F:/sanity_check_avg F:/sanity_check_avg/Project_Mia
+    python scripts/migrate_v1_to_v2.py --dry-run
+    python scripts/migrate_v1_to_v2.py --chunk-size 5000 --reset
+
 作者: 绯墨 (Femo)
 日期: 2026-02-15
 """
 
+import argparse
 import sqlite3
 import json
-import os
+import sys
+import time
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from sqlalchemy import create_engine
+
+from app.db.helpers import ensure_auto_save
+from app.db.models import StaticBase, ProfileBase
+
+# 断点表 (建在目标库中，与数据写入同一事务提交)
+CHECKPOINT_DDL = """
+CREATE TABLE IF NOT EXISTS migration_checkpoints (
+    source TEXT PRIMARY KEY,    -- 源表, 如 'vocab_prebuilt.vocabulary'
+    last_key,                   -- 最后一个已迁移的源主键 (无类型亲和: 整数 id / 文件名)
+    rows INTEGER NOT NULL DEFAULT 0,
+    done INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+# 整数主键的起始断点
+_MIN_ID = -(2 ** 63)
+
+# 每个单词最多保留的例句数
+SENTENCES_PER_WORD = 3
+
+# 一块: (本块最后一个源主键, 待写入的行)
+Chunk = Tuple[Any, List[tuple]]
+
 
 class DatabaseMigrator:
-    def __init__(self, old_root: str, new_root: str):
+    def __init__(self, old_root: str, new_root: str, chunk_size: int = 1000,
+                 dry_run: bool = False, reset: bool = False):
         self.old_root = Path(old_root)
         self.new_root = Path(new_root)
-        
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        self.reset = reset
+
         # 旧数据库路径
         self.old_dbs = {
             'webnav': self.old_root / 'EnglishExamWeb' / 'webnav_rpg.db',
@@ -25,14 +73,17 @@ class DatabaseMigrator:
             'user_vocab': self.old_root / 'VocabWeb' / 'user_vocab.db',
             'vocab_prebuilt': self.old_root / 'VocabWeb' / 'vocab_prebuilt.db',
         }
-        
+
         # 新数据库路径
         self.new_static_db = self.new_root / 'backend' / 'data' / 'static_content.db'
         self.new_profile_db = self.new_root / 'backend' / 'data' / 'femo_profile.db'
-        
+
         # JSON数据目录
         self.json_dir = self.old_root / 'EnglishExamWeb' / 'data'
-        
+
+        # 目标库连接 ('static' / 'profile')；dry-run 时为已存在目标库的只读连接
+        self.targets: Dict[str, Optional[sqlite3.Connection]] = {}
+
         self.stats = {
             'papers': 0,
             'questions': 0,
@@ -40,33 +91,43 @@ class DatabaseMigrator:
             'stories': 0,
             'vocab_progress': 0,
             'exam_history': 0,
+            'game_saves': 0,
         }
-    
+        # 源表 → (本次行数, 块数, 耗时秒)
+        self.timings: Dict[str, Tuple[int, int, float]] = {}
+
     def run(self):
         """执行完整迁移流程"""
-        print("🚀 开始数据迁移: EnglishExamWeb V1 → Project_Mia V2")
+        mode = " (dry-run)" if self.dry_run else ""
+        print(f"🚀 开始数据迁移: EnglishExamWeb V1 → Project_Mia V2{mode}")
         print("=" * 60)
-        
+
         # 1. 验证旧数据库存在
         self._validate_old_dbs()
-        
+
         # 2. 创建新数据库
         self._create_new_dbs()
-        
-        # 3. 迁移静态内容
-        self._migrate_static_content()
-        
-        # 4. 迁移用户数据
-        self._migrate_user_data()
-        
-        # 5. 数据验证
-        self._validate_migration()
-        
+
+        try:
+            # 3. 迁移静态内容
+            self._migrate_static_content()
+
+            # 4. 迁移用户数据
+            self._migrate_user_data()
+
+            # 5. 数据验证
+            if not self.dry_run:
+                self._validate_migration()
+        finally:
+            for conn in self.targets.values():
+                if conn is not None:
+                    conn.close()
+
         # 6. 生成报告
         self._generate_report()
-        
-        print("\n✅ 迁移完成!")
-    
+
+        print("\n✅ 迁移完成!" if not self.dry_run else "\n✅ Dry-run 完成 (未写入任何数据)")
+
     def _validate_old_dbs(self):
         """验证旧数据库文件存在"""
         print("\n📋 检查旧数据库文件...")
@@ -77,138 +138,229 @@ class DatabaseMigrator:
             else:
                 print(f"  ✗ {name}: {path} (缺失)")
                 missing.append(name)
-        
+
         if missing:
             raise FileNotFoundError(f"缺少数据库: {', '.join(missing)}")
-    
+
+    @staticmethod
+    def _open_readonly(path: Path) -> sqlite3.Connection:
+        return sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+
     def _create_new_dbs(self):
-        """创建新数据库并初始化表结构"""
+        """创建新数据库并初始化表结构 (沿用 ORM 模型 + ensure_auto_save，与线上库一致)"""
+        if self.dry_run:
+            # 只读打开已存在的目标库，用于读取断点
+            for target, path in (('static', self.new_static_db), ('profile', self.new_profile_db)):
+                self.targets[target] = self._open_readonly(path) if path.exists() else None
+            return
+
         print("\n🏗️  创建新数据库...")
-        
+
         # 确保目录存在
         self.new_static_db.parent.mkdir(parents=True, exist_ok=True)
-        
-        # 读取建表SQL
-        models_path = self.new_root / 'backend' / 'app' / 'db' / 'models.py'
-        with open(models_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-            static_sql = content.split('STATIC_CONTENT_SQL = """')[1].split('"""')[0]
-            profile_sql = content.split('FEMO_PROFILE_SQL = """')[1].split('"""')[0]
-        
-        # 创建static_content.db
-        print(f"  创建: {self.new_static_db}")
-        conn = sqlite3.connect(self.new_static_db)
-        conn.executescript(static_sql)
-        conn.commit()
-        conn.close()
-        
-        # 创建femo_profile.db
-        print(f"  创建: {self.new_profile_db}")
-        conn = sqlite3.connect(self.new_profile_db)
-        conn.executescript(profile_sql)
-        conn.commit()
-        conn.close()
-    
+
+        for target, path, base in (('static', self.new_static_db, StaticBase),
+                                   ('profile', self.new_profile_db, ProfileBase)):
+            print(f"  创建: {path}")
+            engine = create_engine(f"sqlite:///{path}", echo=False)
+            base.metadata.create_all(engine)
+            engine.dispose()
+
+            conn = sqlite3.connect(path, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if target == 'profile':
+                # 存档 / user_vocab_memory / vocab_progress 兼容视图
+                ensure_auto_save(conn)
+            conn.execute(CHECKPOINT_DDL)
+            if self.reset:
+                conn.execute("DELETE FROM migration_checkpoints")
+            self.targets[target] = conn
+
+    # ------------------------------------------------------------------
+    #  流式迁移框架
+    # ------------------------------------------------------------------
+
+    def _checkpoint(self, target: str, source: str) -> Optional[Tuple[Any, int, int]]:
+        """(last_key, rows, done)；目标库不存在 / 无断点 / --reset 时为 None"""
+        conn = self.targets.get(target)
+        if conn is None or self.reset:
+            return None
+        try:
+            row = conn.execute(
+                "SELECT last_key, rows, done FROM migration_checkpoints WHERE source = ?", (source,)
+            ).fetchone()
+        except sqlite3.OperationalError:
+            return None  # dry-run 下旧目标库尚无断点表
+        return tuple(row) if row else None
+
+    def _save_checkpoint(self, conn: sqlite3.Connection, source: str, last_key: Any,
+                         rows: int, done: bool = False):
+        conn.execute("""
+            INSERT INTO migration_checkpoints (source, last_key, rows, done, updated_at)
+            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(source) DO UPDATE SET
+                last_key = excluded.last_key, rows = migration_checkpoints.rows + excluded.rows,
+                done = excluded.done, updated_at = excluded.updated_at
+        """, (source, last_key, rows, int(done)))
+
+    def _run_step(self, source: str, target: str, start_key: Any,
+                  read: Callable[[Any], Iterator[Chunk]],
+                  write: Callable[[sqlite3.Connection, List[tuple]], None]):
+        """
+        从断点开始逐块 读取 → 写入 → 更新断点 (一块一个事务)
+        read(after_key) 产出 (本块最后主键, 行)；dry-run 只读取计数
+        """
+        checkpoint = self._checkpoint(target, source)
+        if checkpoint and checkpoint[2]:
+            print(f"    ✓ {source}: 已完成 ({checkpoint[1]} 行)，跳过")
+            self.timings[source] = (0, 0, 0.0)
+            return
+        after = checkpoint[0] if checkpoint else start_key
+        if checkpoint:
+            print(f"    ↻ {source}: 从断点 {after!r} 继续 (已迁移 {checkpoint[1]} 行)")
+
+        conn = self.targets.get(target)
+        started = time.perf_counter()
+        total = chunks = 0
+        for last_key, rows in read(after):
+            total += len(rows)
+            chunks += 1
+            if self.dry_run:
+                continue
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                write(conn, rows)
+                self._save_checkpoint(conn, source, last_key, len(rows))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            after = last_key
+
+        if not self.dry_run:
+            self._save_checkpoint(conn, source, after, 0, done=True)
+        self.timings[source] = (total, chunks, time.perf_counter() - started)
+
+    def _read_chunks(self, cursor: sqlite3.Cursor, key_index: int = 0) -> Iterator[Chunk]:
+        """游标按 chunk_size 分块；每块的断点为最后一行的主键列"""
+        while True:
+            rows = cursor.fetchmany(self.chunk_size)
+            if not rows:
+                return
+            yield rows[-1][key_index], rows
+
+    @staticmethod
+    def _has_table(conn: sqlite3.Connection, name: str) -> bool:
+        return conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (name,)
+        ).fetchone() is not None
+
+    # ------------------------------------------------------------------
+    #  静态内容
+    # ------------------------------------------------------------------
+
     def _migrate_static_content(self):
         """迁移静态内容到static_content.db"""
         print("\n📚 迁移静态内容...")
-        
-        conn = sqlite3.connect(self.new_static_db)
-        cursor = conn.cursor()
-        
+
         # 1. 迁移试卷和题目数据 (从JSON文件)
-        self._migrate_exam_papers(cursor)
-        
+        self._migrate_exam_papers()
+
         # 2. 迁移词典数据 (从vocab_prebuilt.db)
-        self._migrate_dictionary(cursor)
-        
+        self._migrate_dictionary()
+
         # 3. 迁移剧情数据 (从story_content.db)
-        self._migrate_stories(cursor)
-        
-        conn.commit()
-        conn.close()
-    
-    def _migrate_exam_papers(self, cursor):
-        """从JSON文件迁移试卷和题目数据"""
+        self._migrate_stories()
+
+    def _migrate_exam_papers(self):
+        """从JSON文件迁移试卷和题目数据 (一份试卷一块，断点为文件名)"""
         print("  ⏳ 正在迁移试卷数据...")
-        
-        json_files = sorted(self.json_dir.glob("20*.json"))
-        
-        for json_path in json_files:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            meta = data.get('meta', {})
-            year = meta.get('year')
-            exam_type = meta.get('exam_type', 'English I')
-            
-            if not year:
-                continue
-            
-            paper_id = f"{year}-{exam_type.lower().replace(' ', '')}"
-            
-            # 插入paper
-            cursor.execute("""
-                INSERT OR IGNORE INTO papers (paper_id, year, exam_type, title, total_score, time_limit)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (
-                paper_id,
-                year,
-                exam_type,
-                f"{year}年考研英语{exam_type.split()[-1]}",
-                meta.get('total_score', 100.0),
-                meta.get('time_limit', 180)
-            ))
-            self.stats['papers'] += 1
-            
-            # 插入questions
-            questions = self._extract_questions_from_json(data, paper_id)
-            for q in questions:
-                cursor.execute("""
-                    INSERT OR IGNORE INTO questions 
-                    (q_id, paper_id, q_type, section_name, question_number, passage_text, 
+
+        def read(after: str) -> Iterator[Chunk]:
+            for json_path in sorted(self.json_dir.glob("20*.json")):
+                if json_path.name <= after:
+                    continue
+                with open(json_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+
+                meta = data.get('meta', {})
+                year = meta.get('year')
+                exam_type = meta.get('exam_type', 'English I')
+
+                if not year:
+                    yield json_path.name, []
+                    continue
+
+                paper_id = f"{year}-{exam_type.lower().replace(' ', '')}"
+                paper = (
+                    paper_id,
+                    year,
+                    exam_type,
+                    f"{year}年考研英语{exam_type.split()[-1]}",
+                    meta.get('total_score', 100.0),
+                    meta.get('time_limit', 180)
+                )
+                questions = [
+                    (
+                        q['q_id'],
+                        paper_id,
+                        q['q_type'],
+                        q.get('section_name'),
+                        q.get('question_number'),
+                        q.get('passage_text'),
+                        q.get('content'),
+                        json.dumps(q.get('options'), ensure_ascii=False) if q.get('options') else None,
+                        q.get('correct_answer'),
+                        q.get('official_analysis'),
+                        q.get('difficulty', 3),
+                        q.get('score', 2.0),
+                        json.dumps(q.get('tags', []), ensure_ascii=False)
+                    )
+                    for q in self._extract_questions_from_json(data, paper_id)
+                ]
+                self.stats['papers'] += 1
+                self.stats['questions'] += len(questions)
+                yield json_path.name, [(paper, questions)]
+
+        def write(conn: sqlite3.Connection, items: List[tuple]):
+            for paper, questions in items:
+                conn.execute("""
+                    INSERT OR IGNORE INTO papers (paper_id, year, exam_type, title, total_score, time_limit)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, paper)
+                conn.executemany("""
+                    INSERT OR IGNORE INTO questions
+                    (q_id, paper_id, q_type, section_name, question_number, passage_text,
                      content, options_json, correct_answer, official_analysis, difficulty, score, tags)
                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    q['q_id'],
-                    paper_id,
-                    q['q_type'],
-                    q.get('section_name'),
-                    q.get('question_number'),
-                    q.get('passage_text'),
-                    q.get('content'),
-                    json.dumps(q.get('options'), ensure_ascii=False) if q.get('options') else None,
-                    q.get('correct_answer'),
-                    q.get('official_analysis'),
-                    q.get('difficulty', 3),
-                    q.get('score', 2.0),
-                    json.dumps(q.get('tags', []), ensure_ascii=False)
-                ))
-                self.stats['questions'] += 1
-        
+                """, questions)
+
+        self._run_step('json.papers', 'static', "", read, write)
         print(f"    ✓ 迁移 {self.stats['papers']} 份试卷, {self.stats['questions']} 道题目")
-    
+
     def _extract_questions_from_json(self, data: Dict, paper_id: str) -> List[Dict]:
         """从JSON数据中提取题目"""
         questions = []
         sections = data.get('sections', [])
-        
+
         for section in sections:
             section_info = section.get('section_info', {})
             section_name = section_info.get('name', '')
             section_type = section_info.get('type', '')
-            
+
             # 处理parts
             parts = section.get('parts', [])
             for part in parts:
                 passage_text = part.get('content', '')
-                
+
                 # 处理questions
                 part_questions = part.get('questions', [])
                 for q in part_questions:
                     q_num = q.get('number')
                     q_id = f"{paper_id}-{section_type.lower()}-q{q_num}"
-                    
+
                     questions.append({
                         'q_id': q_id,
                         'q_type': section_type.lower(),
@@ -223,281 +375,299 @@ class DatabaseMigrator:
                         'score': q.get('score', 2.0),
                         'tags': []
                     })
-        
+
         return questions
-    
-    def _migrate_dictionary(self, cursor):
-        """从vocab_prebuilt.db迁移词典数据"""
+
+    def _migrate_dictionary(self):
+        """
+        从vocab_prebuilt.db迁移词典数据 (按 vocabulary.id 分块)
+        旧库 sentences 无 word_id 索引且为只读，按块区间查询会每块全表扫描；
+        改为按 word_id 有序的单一游标与单词游标归并
+        """
         print("  ⏳ 正在迁移词典数据...")
-        
-        old_conn = sqlite3.connect(self.old_dbs['vocab_prebuilt'])
-        old_cursor = old_conn.cursor()
-        
-        # 读取vocabulary表
-        old_cursor.execute("SELECT id, word, meaning, pos, frequency FROM vocabulary")
-        vocab_rows = old_cursor.fetchall()
-        
-        for row in vocab_rows:
-            vocab_id, word, meaning, pos, freq = row
-            
-            # 获取该词的例句
-            old_cursor.execute("""
-                SELECT sentence, year, section_name 
-                FROM sentences 
-                WHERE word_id = ? 
-                LIMIT 3
-            """, (vocab_id,))
-            sentences = old_cursor.fetchall()
-            
-            example_sentences = [
-                {
-                    'sentence': s[0],
-                    'year': s[1],
-                    'section': s[2]
-                }
-                for s in sentences
-            ]
-            
-            # 插入新词典表
-            cursor.execute("""
+
+        old_conn = self._open_readonly(self.old_dbs['vocab_prebuilt'])
+
+        def read(after: int) -> Iterator[Chunk]:
+            cursor = old_conn.execute("""
+                SELECT id, word, meaning, pos, frequency FROM vocabulary
+                WHERE id > ? ORDER BY id
+            """, (after,))
+            # 每个单词的前 N 条例句 (替代逐词查询)
+            sentence_rows = old_conn.execute("""
+                SELECT word_id, sentence, year, section_name FROM (
+                    SELECT word_id, sentence, year, section_name,
+                           ROW_NUMBER() OVER (PARTITION BY word_id ORDER BY rowid) AS rn
+                    FROM sentences
+                    WHERE word_id > ?
+                ) WHERE rn <= ?
+                ORDER BY word_id
+            """, (after, SENTENCES_PER_WORD))
+            pending = next(sentence_rows, None)
+            for last_id, vocab_rows in self._read_chunks(cursor):
+                sentences: Dict[int, List[Dict]] = {}
+                while pending is not None and pending[0] <= last_id:
+                    word_id, sentence, year, section = pending
+                    sentences.setdefault(word_id, []).append(
+                        {'sentence': sentence, 'year': year, 'section': section}
+                    )
+                    pending = next(sentence_rows, None)
+
+                self.stats['dictionary'] += len(vocab_rows)
+                yield last_id, [
+                    (word, meaning, pos, freq or 0,
+                     json.dumps(sentences.get(vocab_id, []), ensure_ascii=False))
+                    for vocab_id, word, meaning, pos, freq in vocab_rows
+                ]
+
+        def write(conn: sqlite3.Connection, rows: List[tuple]):
+            conn.executemany("""
                 INSERT OR IGNORE INTO dictionary (word, meaning, pos, frequency, example_sentences)
                 VALUES (?, ?, ?, ?, ?)
-            """, (
-                word,
-                meaning,
-                pos,
-                freq or 0,
-                json.dumps(example_sentences, ensure_ascii=False)
-            ))
-            self.stats['dictionary'] += 1
-        
-        old_conn.close()
+            """, rows)
+
+        try:
+            self._run_step('vocab_prebuilt.vocabulary', 'static', _MIN_ID, read, write)
+        finally:
+            old_conn.close()
         print(f"    ✓ 迁移 {self.stats['dictionary']} 个单词")
-    
-    def _migrate_stories(self, cursor):
-        """从story_content.db迁移剧情数据"""
+
+    def _migrate_stories(self):
+        """从story_content.db迁移剧情数据 (按 rowid 分块)"""
         print("  ⏳ 正在迁移剧情数据...")
-        
+
         if not self.old_dbs['story'].exists():
             print("    ⚠️  story_content.db不存在,跳过")
             return
-        
-        old_conn = sqlite3.connect(self.old_dbs['story'])
-        old_cursor = old_conn.cursor()
-        
-        old_cursor.execute("""
-            SELECT q_id, year, section_type, correct_cn, wrong_cn, correct_en, wrong_en
-            FROM stories
-        """)
-        
-        for row in old_cursor.fetchall():
-            cursor.execute("""
-                INSERT OR IGNORE INTO stories 
+
+        old_conn = self._open_readonly(self.old_dbs['story'])
+
+        def read(after: int) -> Iterator[Chunk]:
+            cursor = old_conn.execute("""
+                SELECT rowid, q_id, year, section_type, correct_cn, wrong_cn, correct_en, wrong_en
+                FROM stories
+                WHERE rowid > ? ORDER BY rowid
+            """, (after,))
+            for last_rowid, rows in self._read_chunks(cursor):
+                self.stats['stories'] += len(rows)
+                yield last_rowid, [row[1:] for row in rows]
+
+        def write(conn: sqlite3.Connection, rows: List[tuple]):
+            # stories 无唯一约束: 先删同题旧台词，重迁 (--reset) 不会产生重复行
+            conn.executemany("DELETE FROM stories WHERE q_id = ?", [(r[0],) for r in rows])
+            conn.executemany("""
+                INSERT INTO stories
                 (q_id, year, section_type, correct_cn, wrong_cn, correct_en, wrong_en)
                 VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, row)
-            self.stats['stories'] += 1
-        
-        old_conn.close()
+            """, rows)
+
+        try:
+            self._run_step('story.stories', 'static', _MIN_ID, read, write)
+        finally:
+            old_conn.close()
         print(f"    ✓ 迁移 {self.stats['stories']} 条剧情")
-    
+
+    # ------------------------------------------------------------------
+    #  用户数据
+    # ------------------------------------------------------------------
+
     def _migrate_user_data(self):
         """迁移用户数据到femo_profile.db"""
         print("\n👤 迁移用户数据...")
-        
-        conn = sqlite3.connect(self.new_profile_db)
-        cursor = conn.cursor()
-        
+
         # 1. 迁移词汇学习进度
-        self._migrate_vocab_progress(cursor)
-        
+        self._migrate_vocab_progress()
+
         # 2. 迁移答题历史
-        self._migrate_exam_history(cursor)
-        
+        self._migrate_exam_history()
+
         # 3. 迁移游戏存档
-        self._migrate_game_saves(cursor)
-        
-        conn.commit()
-        conn.close()
-    
-    def _migrate_vocab_progress(self, cursor):
-        """从user_vocab.db迁移词汇进度"""
+        self._migrate_game_saves()
+
+    def _migrate_vocab_progress(self):
+        """
+        从user_vocab.db迁移词汇进度 → user_vocab_memory (slot 0)
+        [Stage 50.0] vocab_progress 已是 slot 0 的兼容视图，直接写统一进度表；
+        同一单词已有更近的复习记录时保留已有记录 (与 helpers 合并旧表的规则一致)
+        """
         print("  ⏳ 正在迁移词汇学习进度...")
-        
+
         if not self.old_dbs['user_vocab'].exists():
             print("    ⚠️  user_vocab.db不存在,跳过")
             return
-        
-        old_conn = sqlite3.connect(self.old_dbs['user_vocab'])
-        old_cursor = old_conn.cursor()
-        
+
+        old_conn = self._open_readonly(self.old_dbs['user_vocab'])
+
         # 检查表是否存在
-        old_cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='learning_records'")
-        if not old_cursor.fetchone():
+        if not self._has_table(old_conn, 'learning_records'):
             old_conn.close()
             print("    ⚠️  learning_records表不存在,跳过")
             return
-        
-        old_cursor.execute("""
-            SELECT DISTINCT word_id FROM learning_records
-        """)
-        word_ids = [row[0] for row in old_cursor.fetchall()]
-        
-        for word_id in word_ids:
-            # 获取词汇名称
-            old_cursor.execute("SELECT word FROM vocabulary WHERE id = ?", (word_id,))
-            word_row = old_cursor.fetchone()
-            if not word_row:
-                continue
-            word = word_row[0]
-            
-            # 获取最新的学习记录
-            old_cursor.execute("""
-                SELECT repetition, easiness_factor, interval, next_review, last_review,
-                       is_correct, consecutive_correct, is_mistake
-                FROM learning_records
-                WHERE word_id = ?
-                ORDER BY last_review DESC
-                LIMIT 1
-            """, (word_id,))
-            lr = old_cursor.fetchone()
-            
-            if not lr:
-                continue
-            
-            # 统计总复习次数和正确次数
-            old_cursor.execute("""
-                SELECT COUNT(*), SUM(CASE WHEN is_correct = 1 THEN 1 ELSE 0 END)
-                FROM learning_records
-                WHERE word_id = ?
-            """, (word_id,))
-            stats = old_cursor.fetchone()
-            total_reviews, correct_reviews = stats if stats else (0, 0)
-            
-            # 插入vocab_progress
-            cursor.execute("""
-                INSERT OR IGNORE INTO vocab_progress 
-                (word, repetition, easiness_factor, interval, next_review, last_review,
-                 mistake_count, consecutive_correct, is_in_mistake_book, 
-                 total_reviews, correct_reviews)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                word,
-                lr[0],  # repetition
-                lr[1],  # easiness_factor
-                lr[2],  # interval
-                lr[3],  # next_review
-                lr[4],  # last_review
-                0,      # mistake_count (可从is_correct=0的记录统计)
-                lr[6] if len(lr) > 6 else 0,  # consecutive_correct
-                lr[7] if len(lr) > 7 else False,  # is_in_mistake_book
-                total_reviews or 0,
-                correct_reviews or 0
-            ))
-            self.stats['vocab_progress'] += 1
-        
-        old_conn.close()
+
+        def read(after: int) -> Iterator[Chunk]:
+            # 单一游标: 窗口函数取每词最新记录 + 复习次数统计 (替代逐词 3 次查询)
+            cursor = old_conn.execute("""
+                SELECT r.word_id, v.word, r.repetition, r.easiness_factor, r.interval,
+                       date(r.next_review), date(r.last_review), r.consecutive_correct,
+                       r.total_reviews, r.correct_reviews
+                FROM (
+                    SELECT word_id, repetition, easiness_factor, interval, next_review, last_review,
+                           consecutive_correct,
+                           ROW_NUMBER() OVER (PARTITION BY word_id ORDER BY last_review DESC) AS rn,
+                           COUNT(*) OVER (PARTITION BY word_id) AS total_reviews,
+                           SUM(CASE WHEN is_correct = 1 THEN 1 ELSE 0 END)
+                               OVER (PARTITION BY word_id) AS correct_reviews
+                    FROM learning_records
+                    WHERE word_id > ?
+                ) r
+                JOIN vocabulary v ON v.id = r.word_id
+                WHERE r.rn = 1
+                ORDER BY r.word_id
+            """, (after,))
+            for last_id, rows in self._read_chunks(cursor):
+                self.stats['vocab_progress'] += len(rows)
+                yield last_id, [
+                    (word, ef or 2.5, interval or 0, rep or 0, next_review, last_review,
+                     streak or 0, correct or 0, max((total or 0) - (correct or 0), 0))
+                    for _, word, rep, ef, interval, next_review, last_review, streak, total, correct in rows
+                ]
+
+        def write(conn: sqlite3.Connection, rows: List[tuple]):
+            conn.executemany("""
+                INSERT INTO user_vocab_memory
+                (slot_id, word, easiness_factor, interval, repetitions, next_review_date, last_review_date,
+                 success_streak, total_recall_count, total_error_count, updated_at)
+                VALUES (0, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(slot_id, word) DO UPDATE SET
+                    easiness_factor    = excluded.easiness_factor,
+                    interval           = excluded.interval,
+                    repetitions        = excluded.repetitions,
+                    next_review_date   = excluded.next_review_date,
+                    last_review_date   = excluded.last_review_date,
+                    success_streak     = excluded.success_streak,
+                    total_recall_count = excluded.total_recall_count,
+                    total_error_count  = excluded.total_error_count
+                WHERE excluded.last_review_date > COALESCE(user_vocab_memory.last_review_date, '')
+            """, rows)
+
+        try:
+            self._run_step('user_vocab.learning_records', 'profile', _MIN_ID, read, write)
+        finally:
+            old_conn.close()
         print(f"    ✓ 迁移 {self.stats['vocab_progress']} 个词汇进度记录")
-    
-    def _migrate_exam_history(self, cursor):
+
+    def _migrate_exam_history(self):
         """从webnav_rpg.db迁移答题历史"""
         print("  ⏳ 正在迁移答题历史...")
-        
+
         # 这个功能在V1中可能没有完整实现,这里预留接口
         print("    ⚠️  V1无完整答题历史,跳过")
-    
-    def _migrate_game_saves(self, cursor):
-        """从webnav_rpg.db迁移游戏存档"""
+
+    def _migrate_game_saves(self):
+        """从webnav_rpg.db迁移游戏存档 (按 slot_id 分块)"""
         print("  ⏳ 正在迁移游戏存档...")
-        
+
         if not self.old_dbs['webnav'].exists():
             print("    ⚠️  webnav_rpg.db不存在,跳过")
             return
-        
-        old_conn = sqlite3.connect(self.old_dbs['webnav'])
-        old_cursor = old_conn.cursor()
-        
+
+        old_conn = self._open_readonly(self.old_dbs['webnav'])
+
         # 检查表是否存在
-        old_cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='game_saves'")
-        if not old_cursor.fetchone():
+        if not self._has_table(old_conn, 'game_saves'):
             old_conn.close()
             print("    ⚠️  game_saves表不存在,跳过")
             return
-        
-        old_cursor.execute("""
-            SELECT slot_id, data_json, updated_at
-            FROM game_saves
-        """)
-        
-        for row in old_cursor.fetchall():
-            slot_id, data_json, updated_at = row
-            
-            # 解析旧存档JSON
-            try:
-                old_save = json.loads(data_json)
-                stats = old_save.get('stats', {})
-                
-                # 转换为新格式
-                cursor.execute("""
-                    INSERT OR REPLACE INTO game_saves 
-                    (slot_id, hp, max_hp, exp, level, mia_mood, snapshot_json, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    slot_id,
-                    stats.get('hp', 100),
-                    stats.get('maxHp', 100),
-                    stats.get('exp', 0),
-                    stats.get('level', 1),
-                    'normal',
-                    data_json,
-                    updated_at
-                ))
-            except json.JSONDecodeError:
-                print(f"    ⚠️  存档槽{slot_id}数据损坏,跳过")
-        
-        old_conn.close()
-        print(f"    ✓ 迁移游戏存档")
-    
+
+        def read(after: int) -> Iterator[Chunk]:
+            cursor = old_conn.execute("""
+                SELECT slot_id, data_json, updated_at
+                FROM game_saves
+                WHERE slot_id > ? ORDER BY slot_id
+            """, (after,))
+            for last_slot, rows in self._read_chunks(cursor):
+                saves = []
+                for slot_id, data_json, updated_at in rows:
+                    # 解析旧存档JSON
+                    try:
+                        stats = json.loads(data_json).get('stats', {})
+                    except (json.JSONDecodeError, TypeError, AttributeError):
+                        print(f"    ⚠️  存档槽{slot_id}数据损坏,跳过")
+                        continue
+                    # 转换为新格式
+                    saves.append((
+                        slot_id,
+                        stats.get('hp', 100),
+                        stats.get('maxHp', 100),
+                        stats.get('exp', 0),
+                        stats.get('level', 1),
+                        'normal',
+                        data_json,
+                        updated_at
+                    ))
+                self.stats['game_saves'] += len(saves)
+                yield last_slot, saves
+
+        def write(conn: sqlite3.Connection, rows: List[tuple]):
+            # upsert 而非 REPLACE: 保留新版存档独有的列 (好感度 / 每日设置等)
+            conn.executemany("""
+                INSERT INTO game_saves
+                (slot_id, hp, max_hp, exp, level, mia_mood, snapshot_json, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(slot_id) DO UPDATE SET
+                    hp = excluded.hp, max_hp = excluded.max_hp, exp = excluded.exp,
+                    level = excluded.level, mia_mood = excluded.mia_mood,
+                    snapshot_json = excluded.snapshot_json, updated_at = excluded.updated_at
+            """, rows)
+
+        try:
+            self._run_step('webnav.game_saves', 'profile', _MIN_ID, read, write)
+        finally:
+            old_conn.close()
+        print(f"    ✓ 迁移 {self.stats['game_saves']} 个游戏存档")
+
+    # ------------------------------------------------------------------
+    #  验证 / 报告
+    # ------------------------------------------------------------------
+
     def _validate_migration(self):
         """验证迁移结果"""
         print("\n🔍 验证迁移结果...")
-        
+
         # 检查static_content.db
-        conn = sqlite3.connect(self.new_static_db)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT COUNT(*) FROM papers")
-        papers_count = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM questions")
-        questions_count = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM dictionary")
-        dict_count = cursor.fetchone()[0]
-        
-        conn.close()
-        
+        conn = self.targets['static']
+        papers_count = conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+        questions_count = conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+        dict_count = conn.execute("SELECT COUNT(*) FROM dictionary").fetchone()[0]
+
         print(f"  ✓ static_content.db:")
         print(f"    - {papers_count} 份试卷")
         print(f"    - {questions_count} 道题目")
         print(f"    - {dict_count} 个单词")
-        
+
         # 检查femo_profile.db
-        conn = sqlite3.connect(self.new_profile_db)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT COUNT(*) FROM vocab_progress")
-        progress_count = cursor.fetchone()[0]
-        
-        conn.close()
-        
+        conn = self.targets['profile']
+        progress_count = conn.execute(
+            "SELECT COUNT(*) FROM user_vocab_memory WHERE slot_id = 0"
+        ).fetchone()[0]
+
         print(f"  ✓ femo_profile.db:")
         print(f"    - {progress_count} 个词汇进度")
-    
+
+    def _print_timings(self):
+        print(f"\n⏱️  各源表{'待迁移' if self.dry_run else '本次迁移'}统计:")
+        print(f"  {'源表':<32}{'行数':>10}{'块数':>8}{'耗时':>10}")
+        for source, (rows, chunks, elapsed) in self.timings.items():
+            print(f"  {source:<34}{rows:>10}{chunks:>8}{elapsed:>9.2f}s")
+
     def _generate_report(self):
-        """生成迁移报告"""
+        """生成迁移报告 (dry-run 只打印统计)"""
+        self._print_timings()
+        if self.dry_run:
+            return
+
         report_path = self.new_root / 'scripts' / 'migration_report.txt'
-        
+
         with open(report_path, 'w', encoding='utf-8') as f:
             f.write("数据迁移报告\n")
             f.write("=" * 60 + "\n\n")
@@ -505,31 +675,37 @@ class DatabaseMigrator:
             f.write("迁移统计:\n")
             for key, value in self.stats.items():
                 f.write(f"  - {key}: {value}\n")
-        
+            f.write("\n各源表 (行数 / 块数 / 耗时):\n")
+            for source, (rows, chunks, elapsed) in self.timings.items():
+                f.write(f"  - {source}: {rows} / {chunks} / {elapsed:.2f}s\n")
+
         print(f"\n📄 迁移报告已保存: {report_path}")
 
 # ============================================================================
 # 主函数
 # ============================================================================
 
-if __name__ == '__main__':
-    import sys
-    
-    # 路径配置
-    OLD_ROOT = r'F:\sanity_check_avg'
-    NEW_ROOT = r'F:\sanity_check_avg\Project_Mia'
-    
-    # 允许从命令行传入路径
-    if len(sys.argv) > 1:
-        OLD_ROOT = sys.argv[1]
-    if len(sys.argv) > 2:
-        NEW_ROOT = sys.argv[2]
-    
+def main():
+    parser = argparse.ArgumentParser(description="Stream-migrate EnglishExamWeb V1 databases into Project_Mia V2")
+    parser.add_argument("old_root", nargs="?", default=r'F:\sanity_check_avg',
+                        help="Directory containing EnglishExamWeb/ and VocabWeb/")
+    parser.add_argument("new_root", nargs="?", default=r'F:\sanity_check_avg\Project_Mia',
+                        help="Project_Mia root (targets backend/data/*.db)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Source rows per chunk / transaction")
+    parser.add_argument("--dry-run", action="store_true", help="Only read sources; report counts and timing")
+    parser.add_argument("--reset", action="store_true", help="Ignore and clear checkpoints, migrate from scratch")
+    args = parser.parse_args()
+
     try:
-        migrator = DatabaseMigrator(OLD_ROOT, NEW_ROOT)
+        migrator = DatabaseMigrator(args.old_root, args.new_root, args.chunk_size, args.dry_run, args.reset)
         migrator.run()
     except Exception as e:
         print(f"\n❌ 迁移失败: {e}")
+        print("   已提交的块已记录断点，修复后重新运行即可从断点继续")
         import traceback
         traceback.print_exc()
         sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,7 +2,9 @@
 migrate_vocab_progress.py — 阶段 2.9 任务 4: 旧进度迁移
 ==========================================================
 将 VocabWeb/user_vocab.db 中的 learning_records (SM-2 数据)
-迁移到 Project_Mia/backend/data/femo_profile.db 的 vocab_progress 表。
+迁移到 Project_Mia/backend/data/femo_profile.db 的 user_vocab_memory 表 (默认 slot 0)。
+[Stage 50.0] 背词进度统一由 vocab_progress_service 读写，vocab_progress 已是兼容视图；
+同一单词已有更近的复习记录时保留已有记录。
 
 旧表结构 (learning_records):
   id, word_id, sentence_id, is_correct, repetition,
@@ -13,15 +15,22 @@ migrate_vocab_progress.py — 阶段 2.9 任务 4: 旧进度迁移
 
 Usage:
     python scripts/migrate_vocab_progress.py
+    python scripts/migrate_vocab_progress.py --slot 2
 """
 
+import argparse
 import sqlite3
+import sys
 from pathlib import Path
-from datetime import datetime
 
 # --- 路径 ---
 OLD_DB = Path(r"F:\sanity_check_avg\VocabWeb\user_vocab.db")
-NEW_DB = Path(__file__).resolve().parent.parent / "backend" / "data" / "femo_profile.db"
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.db.helpers import get_profile_conn, ensure_auto_save
+from app.services.vocab_progress_service import vocab_progress_service
 
 # --- 颜色 ---
 RED    = "\033[91m"
@@ -32,7 +41,16 @@ BOLD   = "\033[1m"
 RESET  = "\033[0m"
 
 
+def _date(value):
+    """旧库时间戳 (ISO / 'YYYY-MM-DD HH:MM:SS') → YYYY-MM-DD"""
+    return str(value)[:10] if value else None
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Migrate VocabWeb learning records into user_vocab_memory")
+    parser.add_argument("--slot", type=int, default=0, help="Target save slot")
+    args = parser.parse_args()
+
     print(f"\n{BOLD}{CYAN}{'='*60}")
     print(f"  🔄 Project_Mia — Vocab Progress Migration")
     print(f"{'='*60}{RESET}\n")
@@ -67,76 +85,44 @@ def main():
         return
 
     # --- 写入新数据库 ---
-    new_conn = sqlite3.connect(str(NEW_DB))
-    new_cur = new_conn.cursor()
-
-    # 确保表存在
-    new_cur.execute("""
-        CREATE TABLE IF NOT EXISTS vocab_progress (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            word VARCHAR(50) UNIQUE NOT NULL,
-            repetition INTEGER DEFAULT 0,
-            easiness_factor REAL DEFAULT 2.5,
-            interval INTEGER DEFAULT 0,
-            next_review TIMESTAMP,
-            last_review TIMESTAMP,
-            mistake_count INTEGER DEFAULT 0,
-            consecutive_correct INTEGER DEFAULT 0,
-            is_in_mistake_book BOOLEAN DEFAULT 0,
-            total_reviews INTEGER DEFAULT 0,
-            correct_reviews INTEGER DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    new_cur.execute("CREATE INDEX IF NOT EXISTS ix_vocab_progress_word ON vocab_progress(word)")
-
     migrated = 0
     skipped = 0
     errors = 0
 
-    for word_id, rep, ef, interval, next_rev, last_rev, consec_correct, is_mistake in records:
-        word = word_map.get(word_id)
-        if not word:
-            skipped += 1
-            continue
-
-        try:
-            # 计算 total_reviews 和 correct_reviews (近似)
-            total_reviews = rep if rep else 0
-            correct_reviews = consec_correct if consec_correct else 0
-            is_mistake_val = 1 if is_mistake else 0
-
-            new_cur.execute("""
-                INSERT INTO vocab_progress
-                    (word, repetition, easiness_factor, interval,
-                     next_review, last_review, mistake_count,
-                     consecutive_correct, is_in_mistake_book,
-                     total_reviews, correct_reviews)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(word) DO UPDATE SET
-                    repetition = excluded.repetition,
-                    easiness_factor = excluded.easiness_factor,
-                    interval = excluded.interval,
-                    next_review = excluded.next_review,
-                    last_review = excluded.last_review,
-                    mistake_count = excluded.mistake_count,
-                    consecutive_correct = excluded.consecutive_correct,
-                    is_in_mistake_book = excluded.is_in_mistake_book,
-                    total_reviews = excluded.total_reviews,
-                    correct_reviews = excluded.correct_reviews,
-                    updated_at = CURRENT_TIMESTAMP
-            """, (word, rep, ef, interval, next_rev, last_rev,
-                  0, consec_correct or 0, is_mistake_val,
-                  total_reviews, correct_reviews))
-            migrated += 1
-        except Exception as e:
-            errors += 1
-            if errors <= 3:
-                print(f"  {RED}[ERROR] {word}: {e}{RESET}")
-
-    new_conn.commit()
-    new_conn.close()
+    with get_profile_conn() as conn:
+        ensure_auto_save(conn)
+
+        for word_id, rep, ef, interval, next_rev, last_rev, consec_correct, is_mistake in records:
+            word = word_map.get(word_id)
+            if not word:
+                skipped += 1
+                continue
+
+            try:
+                existing = vocab_progress_service.get(conn, args.slot, word)
+                if existing and (existing["last_review_date"] or "") >= (_date(last_rev) or ""):
+                    skipped += 1
+                    continue
+
+                # 旧库只有连对次数与错题标记，召回 / 错误次数取近似值
+                vocab_progress_service.save(conn, args.slot, word, {
+                    "easiness_factor": ef or 2.5,
+                    "interval": interval or 0,
+                    "repetitions": rep or 0,
+                    "next_review_date": _date(next_rev),
+                    "last_review_date": _date(last_rev),
+                    "mastery_level": 0,
+                    "success_streak": consec_correct or 0,
+                    "total_recall_count": consec_correct or 0,
+                    "total_error_count": 1 if is_mistake else 0,
+                })
+                migrated += 1
+            except Exception as e:
+                errors += 1
+                if errors <= 3:
+                    print(f"  {RED}[ERROR] {word}: {e}{RESET}")
+
+        conn.commit()
 
     # --- 报告 ---
     print(f"\n{BOLD}  📊 Migration Summary{RESET}")
@@ -0,0 +1,116 @@
+"""
+normalize_question_images.py — 已入库配图归一化 (存量回填)
+=============================================================
+ETL v3 起 import_exam_data.py 在导入时即归一化配图；旧库中的配图仍是原图
+(部分还是不带 data: 前缀的裸 base64)。本脚本就地处理 static_content.db:
+  - 补齐 image_thumb_base64 / image_width / image_height / image_bytes / image_thumb_bytes 列
+  - 尚未归一化的配图 (image_width 为空) 限制分辨率 + 重编码 + 生成缩略图
+  - 全部写入在一个事务内完成；--dry-run 只报告体积变化
+
+Usage:
+    python scripts/normalize_question_images.py
+    python scripts/normalize_question_images.py --dry-run
+    python scripts/normalize_question_images.py --force      # 已归一化的也重新处理
+    python scripts/normalize_question_images.py --db-path backend/data/static_content.db
+"""
+
+import argparse
+import sqlite3
+import sys
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from import_exam_data import IMAGE_META_COLUMNS, PROJECT_ROOT, ensure_image_columns, image_service
+
+# --- 颜色 ---
+RED    = "\033[91m"
+GREEN  = "\033[92m"
+YELLOW = "\033[93m"
+CYAN   = "\033[96m"
+BOLD   = "\033[1m"
+RESET  = "\033[0m"
+
+UPDATE_COLUMNS = ("image_base64",) + IMAGE_META_COLUMNS
+
+
+def normalize_db(db_path: Path, dry_run: bool = False, force: bool = False) -> int:
+    """返回处理的配图数"""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    try:
+        if not dry_run:
+            ensure_image_columns(conn)
+        existing = {r[1] for r in conn.execute("PRAGMA table_info(questions)")}
+        pending = "" if force or "image_width" not in existing else " AND image_width IS NULL"
+        rows = conn.execute(f"""
+            SELECT q_id, image_base64 FROM questions
+            WHERE image_base64 IS NOT NULL AND image_base64 != ''{pending}
+            ORDER BY q_id
+        """).fetchall()
+        if not rows:
+            print(f"{GREEN}Nothing to do — all images normalized.{RESET}")
+            return 0
+
+        print(f"{BOLD}{'q_id':<34} {'before':>9} {'after':>9} {'thumb':>8}  size{RESET}")
+        updates = []
+        total_before = total_after = 0
+        for r in rows:
+            try:
+                norm = image_service.normalize_data_uri(r["image_base64"])
+            except ValueError as e:
+                print(f"{r['q_id']:<34} {RED}undecodable: {e}{RESET}")
+                continue
+            total_before += norm["original_bytes"]
+            total_after += norm["image_bytes"]
+            size = f"{norm['image_width']}×{norm['image_height']}" if norm["image_width"] else f"{YELLOW}kept{RESET}"
+            thumb = f"{norm['image_thumb_bytes'] / 1024:.1f}KB" if norm["image_thumb_bytes"] else "-"
+            print(f"{r['q_id']:<34} {norm['original_bytes'] // 1024:>7}KB "
+                  f"{norm['image_bytes'] // 1024:>7}KB {thumb:>8}  {size}")
+            updates.append(tuple(norm[c] for c in UPDATE_COLUMNS) + (r["q_id"],))
+
+        saved = 1 - total_after / total_before if total_before else 0
+        print(f"\n{CYAN}{len(updates)} images: {total_before / 1024:.0f}KB → "
+              f"{total_after / 1024:.0f}KB ({saved:.0%} smaller){RESET}")
+        if dry_run:
+            print(f"{YELLOW}--dry-run: database not modified{RESET}")
+            return len(updates)
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                f"UPDATE questions SET {', '.join(c + ' = ?' for c in UPDATE_COLUMNS)} WHERE q_id = ?",
+                updates,
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        print(f"{GREEN}✓ Updated {len(updates)} questions{RESET}")
+        return len(updates)
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Normalize question images already in static_content.db")
+    parser.add_argument(
+        "--db-path", type=Path,
+        default=PROJECT_ROOT / "backend" / "data" / "static_content.db",
+        help="Path to static_content.db"
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Report size changes without writing")
+    parser.add_argument("--force", action="store_true", help="Re-normalize images that already have metadata")
+    args = parser.parse_args()
+
+    if not image_service.available:
+        print(f"{YELLOW}[WARN] Pillow not installed — images are kept as-is (pip install Pillow){RESET}")
+    if not args.db_path.exists():
+        print(f"{RED}[ERROR] Database not found: {args.db_path}{RESET}")
+        sys.exit(1)
+    normalize_db(args.db_path, args.dry_run, args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,17 +2,21 @@
 """
 re_import_writing_b_images.py
 ──────────────────────────────
-从 F:\sanity_check_avg\extracted_images\<year>\writing_b.jpeg/jpg/png
-重新读取并以 base64 写入 static_content.db 的对应 writing_b 题目。
+从 <source-root>/extracted_images/<year>/writing_b.jpeg/jpg/png ($MIA_SOURCE_ROOT 或 Project_Mia/exam_sources)
+重新读取，归一化 (限制分辨率 + 重编码 + 缩略图) 后写入 static_content.db 的对应 writing_b 题目。
 
-只更新 image_base64 为 NULL 或 < 2000字节 的记录。
+只更新 image_base64 为 NULL 或 < 5000字节 的记录。
 """
-import base64
 import sqlite3
+import sys
 from pathlib import Path
 
-STATIC_DB = Path(r'F:\sanity_check_avg\Project_Mia\backend\data\static_content.db')
-IMG_ROOT   = Path(r'F:\sanity_check_avg\extracted_images')
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from import_exam_data import IMAGE_META_COLUMNS, IMAGE_ROOT, PROJECT_ROOT, ensure_image_columns, image_service
+
+STATIC_DB = PROJECT_ROOT / "backend" / "data" / "static_content.db"
+IMG_ROOT   = IMAGE_ROOT
 
 YEARS = range(2010, 2026)
 
@@ -34,6 +38,7 @@ def find_image(year: int) -> Path | None:
 
 conn = sqlite3.connect(STATIC_DB)
 conn.row_factory = sqlite3.Row
+ensure_image_columns(conn)
 
 rows = conn.execute("""
     SELECT q_id, paper_id, image_base64
@@ -69,11 +74,12 @@ for row in rows:
         skipped += 1
     else:
         raw     = img_path.read_bytes()
-        b64     = base64.b64encode(raw).decode("utf-8")
-        conn.execute("UPDATE questions SET image_base64=? WHERE q_id=?",
-                     (b64, row["q_id"]))
+        norm    = image_service.normalize(raw)
+        cols    = ("image_base64",) + IMAGE_META_COLUMNS
+        conn.execute(f"UPDATE questions SET {', '.join(c + '=?' for c in cols)} WHERE q_id=?",
+                     tuple(norm[c] for c in cols) + (row["q_id"],))
         file_str = img_path.name
-        action   = f"UPDATED ({len(raw)//1024}kb → {len(b64)//1024}kb b64)"
+        action   = f"UPDATED ({len(raw)//1024}kb → {norm['image_bytes']//1024}kb)"
         updated += 1
 
     print(f"  {year:<6} {db_len:>12}  {file_str:>40}  {action}")
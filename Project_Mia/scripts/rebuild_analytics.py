@@ -0,0 +1,54 @@
+"""
+rebuild_analytics.py — 从 answer_history_logs 重建统计汇总表
+=============================================================
+answer_stats_daily / answer_stats_question 平时由答题接口增量维护；
+导入旧存档、手工修库或汇总逻辑调整后，用本脚本从原始日志完整重算。
+
+Usage:
+    python scripts/rebuild_analytics.py             # 全部存档
+    python scripts/rebuild_analytics.py --slot 1    # 仅重算 slot 1
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.db.helpers import get_profile_conn, ensure_auto_save, PROFILE_DB
+from app.services.analytics_service import analytics_service
+
+# --- 颜色 ---
+GREEN  = "\033[92m"
+CYAN   = "\033[96m"
+BOLD   = "\033[1m"
+RESET  = "\033[0m"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild analytics rollup tables from answer_history_logs")
+    parser.add_argument("--slot", type=int, default=None, help="Only rebuild this slot_id")
+    args = parser.parse_args()
+
+    print(f"\n{BOLD}{CYAN}{'='*60}")
+    print(f"  📊 Project_Mia — Analytics Rollup Rebuild")
+    print(f"{'='*60}{RESET}\n")
+    print(f"  Database: {PROFILE_DB}")
+    print(f"  Scope:    {'all slots' if args.slot is None else f'slot {args.slot}'}\n")
+
+    start = time.perf_counter()
+    with get_profile_conn() as conn:
+        ensure_auto_save(conn)
+        stats = analytics_service.rebuild(conn, slot_id=args.slot)
+    elapsed = time.perf_counter() - start
+
+    print(f"  Logs scanned:        {stats['logs']}")
+    print(f"  Daily rows written:  {stats['daily_rows']}")
+    print(f"  Question rows:       {stats['question_rows']}")
+    print(f"\n  {GREEN}{BOLD}✅ Rebuild complete in {elapsed:.2f}s{RESET}\n")
+
+
+if __name__ == "__main__":
+    main()
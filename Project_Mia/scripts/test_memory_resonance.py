@@ -2,12 +2,12 @@
 test_memory_resonance.py — 阶段 3.0 集成测试
 ==============================================
 验证 Mia 的"记忆共鸣"能力:
-  1. 在 vocab_progress 中植入 "inexorable" 死对头记录
+  1. 在 user_vocab_memory (slot 0) 中植入 "inexorable" 死对头记录
   2. 提取 2010 Text 1 文章 (含 "inexorable decline")
   3. 调用 MiaContextService 扫描 → 确认检测到 inexorable
   4. 调用 MiaPersonaService 构建 Prompt → 确认包含记忆指令
   5. 模拟 POST /api/mia/interact → 验证回复中提及 inexorable
-  6. 清理: 删除伪造记录
+  6. 清理: 删除伪造记录 (原有进度则还原)
 
 Usage:
     python scripts/test_memory_resonance.py
@@ -22,7 +22,8 @@ from pathlib import Path
 BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
 sys.path.insert(0, str(BACKEND_DIR))
 
-from app.db.helpers import PROFILE_DB, STATIC_DB
+from app.db.helpers import STATIC_DB, get_profile_conn, ensure_auto_save
+from app.services.vocab_progress_service import vocab_progress_service
 
 # --- 颜色 ---
 RED    = "\033[91m"
@@ -39,6 +40,14 @@ INFO = f"{CYAN}[INFO]{RESET}"
 
 TEST_WORD = "inexorable"
 TEST_QID  = "2010-eng1-reading_a-q21"
+TEST_SLOT = 0  # context_service 默认读取 slot 0
+
+# 死对头: EF=1.3, 错3次
+WEAK_STATE = {
+    "easiness_factor": 1.3, "interval": 1, "repetitions": 2,
+    "next_review_date": None, "last_review_date": None, "mastery_level": 0,
+    "success_streak": 0, "total_recall_count": 2, "total_error_count": 3,
+}
 
 passed = 0
 failed = 0
@@ -114,27 +123,10 @@ def main():
     # ========================================================
     print(f"\n  {BOLD}🔧 Step 1: Inject '{TEST_WORD}' as weakness{RESET}")
 
-    pconn = sqlite3.connect(str(PROFILE_DB))
-
-    # 确保表存在
-    pconn.execute("""
-        CREATE TABLE IF NOT EXISTS vocab_progress (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            word VARCHAR(50) UNIQUE NOT NULL,
-            repetition INTEGER DEFAULT 0,
-            easiness_factor REAL DEFAULT 2.5,
-            interval INTEGER DEFAULT 0,
-            next_review TIMESTAMP,
-            last_review TIMESTAMP,
-            mistake_count INTEGER DEFAULT 0,
-            consecutive_correct INTEGER DEFAULT 0,
-            is_in_mistake_book BOOLEAN DEFAULT 0,
-            total_reviews INTEGER DEFAULT 0,
-            correct_reviews INTEGER DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
+    with get_profile_conn() as pconn:
+        ensure_auto_save(pconn)
+        # 已有的真实进度先留底，清理时还原
+        original = vocab_progress_service.get(pconn, TEST_SLOT, TEST_WORD)
 
     # 也确保 dictionary 里有这个词
     dconn = sqlite3.connect(str(STATIC_DB))
@@ -148,25 +140,14 @@ def main():
         print(f"         Added '{TEST_WORD}' to dictionary")
     dconn.close()
 
-    # 插入死对头记录: EF=1.3, 错3次
-    pconn.execute("""
-        INSERT OR REPLACE INTO vocab_progress
-            (word, repetition, easiness_factor, interval,
-             mistake_count, consecutive_correct, is_in_mistake_book,
-             total_reviews, correct_reviews)
-        VALUES (?, 2, 1.3, 1, 3, 0, 1, 5, 2)
-    """, (TEST_WORD,))
-    pconn.commit()
-
-    # 验证
-    check = pconn.execute(
-        "SELECT * FROM vocab_progress WHERE word = ?", (TEST_WORD,)
-    ).fetchone()
-    pconn.close()
+    with get_profile_conn() as pconn:
+        vocab_progress_service.save(pconn, TEST_SLOT, TEST_WORD, WEAK_STATE)
+        pconn.commit()
+        check = vocab_progress_service.get(pconn, TEST_SLOT, TEST_WORD)
 
     test_result(
         f"'{TEST_WORD}' injected as weakness (EF=1.3, mistakes=3)",
-        check is not None,
+        check is not None and check["easiness_factor"] == 1.3 and check["total_error_count"] == 3,
     )
 
     # ========================================================
@@ -303,16 +284,15 @@ def main():
     # ========================================================
     print(f"\n  {BOLD}🧹 Step 6: Cleanup{RESET}")
 
-    pconn = sqlite3.connect(str(PROFILE_DB))
-    pconn.execute("DELETE FROM vocab_progress WHERE word = ?", (TEST_WORD,))
-    pconn.commit()
-
-    verify_gone = pconn.execute(
-        "SELECT COUNT(*) FROM vocab_progress WHERE word = ?", (TEST_WORD,)
-    ).fetchone()
-    pconn.close()
+    with get_profile_conn() as pconn:
+        if original:
+            vocab_progress_service.save(pconn, TEST_SLOT, TEST_WORD, original)
+        else:
+            vocab_progress_service.delete(pconn, TEST_SLOT, TEST_WORD)
+        pconn.commit()
+        after = vocab_progress_service.get(pconn, TEST_SLOT, TEST_WORD)
 
-    cleaned = verify_gone[0] == 0
+    cleaned = after == original
     test_result("Test data cleaned up", cleaned)
 
     # ========================================================
@@ -0,0 +1,104 @@
+"""
+test_query_plans.py — 热点查询计划检查
+========================================
+在 bench_seed.py 生成的合成库上，对 app/db/indexes.py hot_queries() 登记的每条查询
+执行 EXPLAIN QUERY PLAN，出现以下情况即判失败:
+  - 整表扫描 (SCAN <table>，登记为 allow_scan 的除外)
+  - 未命中登记的索引
+  - ORDER BY / GROUP BY 需要 TEMP B-TREE (登记为 ordered 的查询)
+
+种子库经过 ensure_auto_save，索引与线上库一致；加 --analyze 可在 ANALYZE 之后再查一遍
+(有统计信息时 SQLite 可能改选计划)。
+
+Usage:
+    python scripts/test_query_plans.py                  # small 规模
+    python scripts/test_query_plans.py --scale medium --analyze
+    python scripts/test_query_plans.py --only vocab. -v # 打印完整计划
+"""
+
+import argparse
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = SCRIPTS_DIR.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import bench_seed
+from app.db import indexes
+from app.db.helpers import ensure_auto_save
+
+# --- 颜色 ---
+RED    = "\033[91m"
+GREEN  = "\033[92m"
+YELLOW = "\033[93m"
+CYAN   = "\033[96m"
+BOLD   = "\033[1m"
+RESET  = "\033[0m"
+
+
+def check(conns, queries, verbose: bool) -> int:
+    """逐条检查，返回失败数"""
+    failures = 0
+    for q in queries:
+        try:
+            plan = indexes.explain(conns[q.db], q)
+        except sqlite3.Error as e:
+            failures += 1
+            print(f"  {RED}✗ {q.name:<36}{RESET} {e}  ({q.source})")
+            continue
+        problems = indexes.plan_problems(q, plan)
+        if problems:
+            failures += 1
+            print(f"  {RED}✗ {q.name:<36}{RESET} {'; '.join(problems)}  ({q.source})")
+        else:
+            print(f"  {GREEN}✓ {q.name:<36}{RESET}")
+        if problems or verbose:
+            for line in plan:
+                print(f"      {CYAN}{line}{RESET}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check EXPLAIN QUERY PLAN of registered hot queries")
+    parser.add_argument("--scale", choices=sorted(bench_seed.SCALES), default="small")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", action="append", default=[], help="Query name prefix (repeatable)")
+    parser.add_argument("--analyze", action="store_true", help="Re-check after ANALYZE")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Print every plan")
+    args = parser.parse_args()
+
+    queries = [q for q in indexes.hot_queries() if not args.only or any(q.name.startswith(p) for p in args.only)]
+    print(f"\n{BOLD}{CYAN}  🔍 Query plan check ({args.scale}, {len(queries)} queries){RESET}")
+
+    with tempfile.TemporaryDirectory(prefix="mia_plans_") as tmp:
+        out = Path(tmp)
+        bench_seed.seed(out, bench_seed.scale_params(args.scale), args.seed)
+        conns = {
+            "static": sqlite3.connect(out / "static_content.db"),
+            "profile": sqlite3.connect(out / "femo_profile.db"),
+        }
+        conns["profile"].row_factory = bench_seed.helpers._dict_factory
+        ensure_auto_save(conns["profile"])
+
+        failures = check(conns, queries, args.verbose)
+        if args.analyze:
+            print(f"\n{BOLD}  After ANALYZE{RESET}")
+            for conn in conns.values():
+                conn.execute("ANALYZE")
+            failures += check(conns, queries, args.verbose)
+
+        for conn in conns.values():
+            conn.close()
+
+    if failures:
+        print(f"\n  {RED}{BOLD}❌ {failures} query plan problem(s){RESET}\n")
+        sys.exit(1)
+    print(f"\n  {GREEN}{BOLD}✅ All query plans use indexes{RESET}\n")
+
+
+if __name__ == "__main__":
+    main()